@@ -0,0 +1,220 @@
+"""
+Request coalescing for the Shadowdark GM API
+
+Two GMs clicking "summarize" on the same transcript, or a flaky client
+resubmitting the same recording, should not pay for two LLM or diarization
+runs. ``SingleFlight`` gives every identical request the same computation:
+the first caller runs it, callers that arrive while it is in flight wait
+for its result, and a finished result is replayed to repeats for
+``IDEMPOTENCY_TTL_SECONDS``. Failures are shared with the callers already
+waiting but never replayed, so a retry after an error runs again; results
+that are only partly successful can be kept from replay the same way
+(``replay_if``).
+
+Requests are identified by an ``Idempotency-Key`` header when the client
+sends one, and otherwise by the content hash of their input plus their
+parameters (see ``request_key``). Reusing a key with a different request
+is an ``IdempotencyConflictError``.
+
+Coalescing is per API process; with several workers (JOB_BACKEND=redis),
+identical requests only share work when they land on the same worker.
+"""
+
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+class IdempotencyConflictError(Exception):
+    """Raised when an idempotency key is reused for a different request."""
+
+    def __init__(self, key: str):
+        self.key = key
+        super().__init__(f"Idempotency key '{key}' was already used for a different request")
+
+
+def request_key(endpoint: str, content_sha256: str, params: Dict[str, Any],
+                idempotency_key: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Key and fingerprint identifying a request.
+
+    Args:
+        endpoint: Operation name (keys never match across endpoints)
+        content_sha256: SHA-256 of the request's transcript or audio
+        params: Every other parameter that affects the result
+        idempotency_key: Client-supplied ``Idempotency-Key``, if any
+
+    Returns:
+        (key, fingerprint); without an idempotency key both are the fingerprint
+    """
+    canonical = json.dumps({"content": content_sha256, "params": params}, sort_keys=True, default=str)
+    fingerprint = hashlib.sha256(f"{endpoint}\0{canonical}".encode("utf-8")).hexdigest()
+    if idempotency_key:
+        return f"{endpoint}:key:{idempotency_key}", fingerprint
+    return f"{endpoint}:{fingerprint}", fingerprint
+
+
+@dataclass
+class _Flight:
+    fingerprint: str
+    future: Future
+    expires_at: Optional[float] = None   # set once finished successfully
+
+
+class SingleFlight:
+    """
+    Shares one computation among identical concurrent requests.
+
+    Usage:
+        flights = SingleFlight()
+        notes, shared = flights.run(key, fingerprint, lambda: summarize_text(text))
+        result, shared = await flights.arun(key, fingerprint, run_diarization_job)
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_results: Optional[int] = None):
+        """
+        Args:
+            ttl_seconds: How long a finished result is replayed to repeats
+                (defaults to IDEMPOTENCY_TTL_SECONDS, then 300; 0 only shares
+                in-flight work)
+            max_results: Finished results kept at most (defaults to
+                IDEMPOTENCY_MAX_RESULTS, then 256); the oldest are dropped first
+        """
+        self.ttl_seconds = ttl_seconds if ttl_seconds is not None else float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "300"))
+        self.max_results = max_results or int(os.getenv("IDEMPOTENCY_MAX_RESULTS", "256"))
+        self._flights: "OrderedDict[str, _Flight]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"started": 0, "joined": 0, "replayed": 0}
+
+    def _expire_locked(self) -> None:
+        now = time.monotonic()
+        finished = [key for key, flight in self._flights.items() if flight.expires_at is not None]
+        for key in finished:
+            if self._flights[key].expires_at <= now:
+                del self._flights[key]
+        finished = [key for key in finished if key in self._flights]
+        for key in finished[:max(0, len(finished) - self.max_results)]:
+            del self._flights[key]
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[Future, bool]:
+        """
+        The shared future for ``key``.
+
+        Returns:
+            (future, leader): the leader must compute the result and pass it
+            to ``resolve``; everyone else waits on the future
+
+        Raises:
+            IdempotencyConflictError: The key belongs to a different request
+        """
+        with self._lock:
+            self._expire_locked()
+            flight = self._flights.get(key)
+            if flight is not None:
+                if flight.fingerprint != fingerprint:
+                    raise IdempotencyConflictError(key.split(":key:", 1)[-1])
+                self.stats["joined" if flight.expires_at is None else "replayed"] += 1
+                return flight.future, False
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._flights[key] = _Flight(fingerprint, future)
+            self.stats["started"] += 1
+            return future, True
+
+    def resolve(self, key: str, future: Future, result: Any = None, error: Optional[BaseException] = None,
+                replay: bool = True) -> None:
+        """
+        Publish the leader's outcome to the waiting callers.
+
+        Successes are kept for replay unless ``replay`` is False; failures
+        are always dropped.
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None and flight.future is future:
+                if error is None and replay and self.ttl_seconds > 0:
+                    flight.expires_at = time.monotonic() + self.ttl_seconds
+                    self._flights.move_to_end(key)
+                else:
+                    del self._flights[key]
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
+
+    def run(self, key: str, fingerprint: str, func: Callable[[], Any],
+            replay_if: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """
+        Run ``func`` once for every identical caller (blocking).
+
+        Args:
+            key, fingerprint: From ``request_key``
+            func: Computes the result
+            replay_if: Whether a result may be replayed to later repeats
+                (default: every result); rejected results still reach the
+                callers already waiting
+
+        Returns:
+            (result, shared) where ``shared`` is False for the caller that computed it
+        """
+        future, leader = self.claim(key, fingerprint)
+        if not leader:
+            return future.result(), True
+        try:
+            result = func()
+        except BaseException as e:
+            self.resolve(key, future, error=e)
+            raise
+        self.resolve(key, future, result, replay=replay_if is None or replay_if(result))
+        return result, False
+
+    async def arun(self, key: str, fingerprint: str, factory: Callable[[], Awaitable[Any]],
+                   on_join: Optional[Callable[[], None]] = None,
+                   replay_if: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """
+        Await ``factory()`` once for every identical caller.
+
+        The computation runs in its own task, so it finishes for the callers
+        still waiting even if the one that started it disconnects.
+
+        Args:
+            key, fingerprint: From ``request_key``
+            factory: Returns the awaitable computing the result
+            on_join: Called before waiting when an existing flight is joined
+                (e.g. to drop this request's copy of the input)
+            replay_if: As for ``run``
+
+        Returns:
+            (result, shared) where ``shared`` is False for the caller that computed it
+        """
+        future, leader = self.claim(key, fingerprint)
+        if not leader:
+            if on_join:
+                on_join()
+            return await asyncio.wrap_future(future), True
+
+        task = asyncio.ensure_future(factory())
+
+        def publish(done: "asyncio.Task") -> None:
+            if done.cancelled():
+                self.resolve(key, future, error=asyncio.CancelledError())
+            elif done.exception() is not None:
+                self.resolve(key, future, error=done.exception())
+            else:
+                result = done.result()
+                self.resolve(key, future, result, replay=replay_if is None or replay_if(result))
+
+        task.add_done_callback(publish)
+        return await asyncio.shield(task), False
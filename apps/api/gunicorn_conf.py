@@ -0,0 +1,87 @@
+"""
+Gunicorn settings for production API deployments.
+
+    gunicorn -c apps/api/gunicorn_conf.py apps.api.main:app
+
+The master imports the app and preloads the heavy modules and encodings
+(apps/api/preload.py), then freezes the GC heap and forks its Uvicorn
+workers, so every worker starts with them shared copy-on-write. Each
+worker still runs the app's startup hook itself (database, readiness
+checks) and answers ``/ready`` with 503 until that is done.
+
+Several workers need the shared job queue (``JOB_BACKEND=redis``, see
+apps/api/jobs.py): with the in-memory queue a worker cannot see another
+one's jobs, so only one worker is allowed. With Redis the master also
+loads the diarization model and forks the job runner; the runner's
+executors fork from it and share those weights too. Coalesced requests
+and cached session counts stay per worker.
+
+Environment:
+    API_BIND: Listen address (default 0.0.0.0:8000)
+    WEB_CONCURRENCY: Worker processes (default 2 with JOB_BACKEND=redis, else 1; only 1 is allowed without Redis)
+    API_PRELOAD: Set to 0 to skip preloading in the master
+    API_JOB_RUNNER: Set to 0 to run the job runner elsewhere (scripts/run_job_runner.py) with JOB_BACKEND=redis
+    API_WORKER_TIMEOUT: Seconds before a silent worker is restarted (default 120)
+"""
+
+import os
+import signal
+
+
+def _enabled(name: str, default: str = "1") -> bool:
+    return os.getenv(name, default).strip().lower() not in ("0", "false", "no", "off")
+
+
+shared_jobs = os.getenv("JOB_BACKEND", "memory").strip().lower() == "redis"
+
+bind = os.getenv("API_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "2" if shared_jobs else "1"))
+if workers > 1 and not shared_jobs:
+    raise RuntimeError(
+        f"WEB_CONCURRENCY={workers}: the in-memory job queue is per process; set JOB_BACKEND=redis "
+        f"to share it between workers, or run a single worker"
+    )
+worker_class = "uvicorn.workers.UvicornWorker"
+preload_app = _enabled("API_PRELOAD")
+timeout = int(os.getenv("API_WORKER_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+run_job_runner = shared_jobs and _enabled("API_JOB_RUNNER")
+_job_runner = None
+
+
+def _job_runner_main():
+    # Forked from the master: drop the arbiter's signal handlers first
+    for signum in (signal.SIGHUP, signal.SIGQUIT, signal.SIGUSR1, signal.SIGUSR2,
+                   signal.SIGTTIN, signal.SIGTTOU, signal.SIGWINCH, signal.SIGCHLD):
+        signal.signal(signum, signal.SIG_DFL)
+    from apps.api.jobs import run_job_runner as run
+
+    run(start_method="fork")
+
+
+def when_ready(server):
+    # Runs in the master after the app import, before the first fork
+    global _job_runner
+    if preload_app:
+        from apps.api.preload import freeze_heap, memory_report, preload, preload_models
+
+        preload()
+        if run_job_runner:
+            preload_models()
+        freeze_heap()
+        server.log.info(f"Master memory before fork: {memory_report()}")
+
+    if run_job_runner:
+        import multiprocessing
+
+        _job_runner = multiprocessing.get_context("fork").Process(target=_job_runner_main, name="job-runner")
+        _job_runner.start()
+        server.log.info(f"Job runner {_job_runner.pid} forked from the master")
+
+
+def on_exit(server):
+    if _job_runner is not None:
+        _job_runner.terminate()  # fails the jobs still running; queued ones wait in Redis
+        _job_runner.join(timeout=graceful_timeout)
@@ -0,0 +1,1071 @@
+"""
+Background jobs for the Shadowdark GM API
+
+Audio endpoints used to diarize and summarize inside the request handler,
+so minutes of CPU work ran on the event loop and froze every other
+request (``/health`` included). They now hand the work to ``JobManager``:
+
+- submitting returns a job id at once; status, progress and the result
+  are read from the manager (``GET /jobs/{id}``, ``/jobs/{id}/result``)
+- ``JobRunner`` runs queued jobs on long-lived executor processes, one job
+  each, at most ``max_concurrency`` at a time; the rest wait in a FIFO
+  queue. Executors load the diarization model once and keep it between
+  jobs instead of paying for torch and pyannote on every job
+- a queued job is dropped on cancel; a running one has its executor
+  terminated and replaced
+- when ``max_concurrency + max_queued`` jobs are already admitted,
+  ``submit`` raises ``QueueFullError`` (the API answers 429)
+
+Job functions run in an executor and report progress through a
+``progress(fraction, message)`` callback.
+
+Job state lives in a ``JobStore`` (``get_job_store()`` picks one from
+``JOB_BACKEND``):
+
+- ``MemoryJobStore`` (default) - in the API process, which also runs the
+  executors. Another API process cannot see these jobs, so this backend
+  is for a single worker (plain ``uvicorn``)
+- ``RedisJobStore`` - in Redis (``REDIS_URL``, the compose ``redis``
+  service), shared by every API worker; needs the ``redis`` package. API
+  workers only submit and read jobs; one ``JobRunner`` per host executes
+  them (forked by the Gunicorn master, see apps/api/gunicorn_conf.py, or
+  ``python scripts/run_job_runner.py``). Uploads are handed over
+  through ``JOB_DIR``, so the runner and the API workers share a host
+"""
+
+import os
+import json
+import time
+import uuid
+import socket
+import asyncio
+import logging
+import tempfile
+import threading
+import multiprocessing as mp
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from multiprocessing.connection import Connection, wait as wait_connections
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, List, Optional, Set
+
+from core import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINAL_STATES = {"succeeded", "failed", "cancelled"}
+RUNNER_HEARTBEAT_SECONDS = 30
+
+Progress = Callable[[float, str], None]
+
+
+class QueueFullError(Exception):
+    """Raised when the job queue is at capacity."""
+
+    def __init__(self, admitted: int, retry_after: int):
+        self.admitted = admitted
+        self.retry_after = retry_after
+        super().__init__(f"Job queue is full ({admitted} jobs admitted); retry in {retry_after}s")
+
+
+class JobCancelledError(Exception):
+    """Raised when a job being waited on is cancelled."""
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        super().__init__(f"Job {job_id} was cancelled")
+
+
+@dataclass
+class Job:
+    """A unit of background work and its current state."""
+    kind: str
+    params: Dict[str, Any]
+    input_path: Optional[str] = None
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    status: str = "queued"
+    progress: float = 0.0
+    message: str = "Queued"
+    result: Any = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Public view of the job (parameters may hold tokens and are left out)."""
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "filename": self.params.get("filename"),
+            "status": self.status,
+            "progress": round(self.progress, 3),
+            "message": self.message,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+async def wait_for_job(manager: "JobManager", job_id: str, poll_seconds: float = 0.25) -> Any:
+    """
+    Await a job's result from the event loop.
+
+    Cancelling the awaiting task (a client disconnect) leaves the job running.
+
+    Raises:
+        JobCancelledError: The job itself was cancelled
+        RuntimeError: The job failed (or expired before it was read)
+    """
+    while True:
+        job = await asyncio.to_thread(manager.get, job_id)
+        if job is None:
+            raise RuntimeError(f"Job {job_id} is no longer available")
+        if job.status == "succeeded":
+            return job.result
+        if job.status == "cancelled":
+            raise JobCancelledError(job_id)
+        if job.status == "failed":
+            raise RuntimeError(job.error)
+        await asyncio.sleep(poll_seconds)
+
+
+# --- job functions (run in an executor process) ----------------------------
+
+def _use_mock_llm() -> bool:
+    return not os.getenv("OPENAI_API_KEY", "").startswith("sk-")
+
+
+_diarizers: Dict[Optional[str], Any] = {}
+
+
+def _diarizer(huggingface_token: Optional[str] = None):
+    """
+    The executor's SpeakerDiarizer for ``huggingface_token``.
+
+    The one for the configured token is kept, pipeline loaded, for every
+    later job in this process; a token sent with a request gets its own.
+    """
+    from core.agents.diarizer import SpeakerDiarizer
+
+    default_token = os.getenv("HUGGINGFACE_TOKEN")
+    token = huggingface_token or default_token
+    if token != default_token:
+        return SpeakerDiarizer(huggingface_token=token)
+    if token not in _diarizers:
+        _diarizers[token] = SpeakerDiarizer(huggingface_token=token)
+    return _diarizers[token]
+
+
+def load_audio_models() -> bool:
+    """
+    Load the diarization model into this process's cached diarizer.
+
+    Executors forked from a process that already did this share its pages.
+
+    Returns:
+        Whether the model is loaded
+    """
+    start = time.perf_counter()
+    try:
+        diarizer = _diarizer()
+        if diarizer.pipeline is not None:
+            return True
+        diarizer._load_pipeline()
+    except Exception as e:
+        # The jobs report it; the load is retried on the first one
+        logger.warning(f"⚠️  Could not preload the diarization model in process {os.getpid()}: {e}")
+        return False
+    logger.info(f"🔥 Process {os.getpid()} loaded the diarization model in {time.perf_counter() - start:.1f}s")
+    return True
+
+
+def warm_up_audio_models() -> None:
+    """Set the executor's torch thread budget and load the diarization model before its first job."""
+    # Executors share the cores: JOB_TORCH_THREADS each, by default an equal split
+    threads = int(os.getenv("JOB_TORCH_THREADS", "0")) or \
+        max(1, (os.cpu_count() or 1) // int(os.getenv("JOB_MAX_CONCURRENCY", "2")))
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass  # the jobs report it
+    if os.getenv("JOB_WARM_MODELS", "1").strip().lower() not in ("0", "false", "no", "off"):
+        load_audio_models()
+
+
+def summarize_audio_job(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Diarize, transcribe and summarize an uploaded recording; optionally sync to Notion."""
+    from core.agents.session_scribe import summarize_audio
+    from core.data.db import dispose_engine, session_scope
+
+    filename = params["filename"]
+    try:
+        context_chunks = None
+        if params.get("use_rag"):
+            from core.agents.rag_librarian import search
+            progress(0.05, "Searching campaign notes")
+            with session_scope() as sess:
+                # Use filename as initial search query
+                chunks = search(sess, f"session audio recording {Path(filename).stem}", k=3)
+                context_chunks = [chunk.text for chunk in chunks]
+
+        progress(0.1, "Diarizing, transcribing and summarizing")
+        with session_scope() as sess:
+            notes = summarize_audio(
+                audio_path=params["audio_path"],
+                campaign_id=params.get("campaign_id"),
+                context_chunks=context_chunks,
+                db_session=sess if params.get("save_to_db") else None,
+                huggingface_token=params.get("huggingface_token") or os.getenv("HUGGINGFACE_TOKEN"),
+                use_mock=_use_mock_llm(),
+                audio_hash=params.get("audio_sha256"),
+                raise_errors=True,  # a failed summary fails the job instead of succeeding with an error page
+                diarizer=None if _use_mock_llm() else _diarizer(params.get("huggingface_token"))
+            )
+    finally:
+        dispose_engine()
+
+    result = {"notes": notes, "notion_page_url": None, "audio_filename": filename}
+    if params.get("sync_to_notion"):
+        progress(0.95, "Syncing to Notion")
+        try:
+            from core.integrations.notion_sync import NotionSync
+
+            notion = NotionSync()
+            if not notion.test_connection():
+                raise Exception("Failed to connect to Notion API")
+            page = notion.create_session_page(
+                title=params.get("session_title") or f"Audio Session - {Path(filename).stem}",
+                content=notes,
+                properties={
+                    "Play Group": {"select": {"name": params.get("play_group") or "Online"}},
+                    "Status": {"select": {"name": "Draft"}}
+                }
+            )
+            result["notion_page_url"] = page.get('url')
+        except Exception as e:
+            result["notion_error"] = str(e)
+    return result
+
+
+def diarize_job(params: Dict[str, Any], progress: Progress) -> Dict[str, Any]:
+    """Speaker diarization of an uploaded recording."""
+    progress(0.05, "Loading diarization model")
+    diarizer = _diarizer(params.get("huggingface_token"))
+    diarizer._load_pipeline()  # already loaded in a warm executor
+
+    progress(0.2, "Diarizing")
+    result = diarizer.diarize_audio(
+        params["audio_path"],
+        min_speakers=params.get("min_speakers"),
+        max_speakers=params.get("max_speakers"),
+        audio_hash=params.get("audio_sha256")
+    )
+    return format_diarization(result, diarizer.get_speaker_mapping(result), params["filename"])
+
+
+def format_diarization(result, speaker_mapping: Dict[str, str], filename: str) -> Dict[str, Any]:
+    """API response body for a diarization result."""
+    return {
+        "filename": filename,
+        "duration": result.total_duration,
+        "num_speakers": result.num_speakers,
+        "speaker_stats": result.speaker_stats,
+        "speaker_mapping": speaker_mapping,
+        "segments": [
+            {
+                "start_time": seg.start_time,
+                "end_time": seg.end_time,
+                "duration": seg.duration,
+                "speaker_id": seg.speaker_id,
+                "speaker_name": speaker_mapping.get(seg.speaker_id, seg.speaker_id)
+            }
+            for seg in result.segments
+        ]
+    }
+
+
+JOB_TYPES: Dict[str, Callable[[Dict[str, Any], Progress], Any]] = {
+    "summarize-audio": summarize_audio_job,
+    "diarize": diarize_job,
+}
+
+
+# --- job stores ------------------------------------------------------------
+
+class JobStore(ABC):
+    """
+    Job records and the FIFO queue; subclasses decide where they live.
+
+    Every state change goes through the store, so it is the single source
+    of truth for whichever processes submit, run and read jobs.
+    """
+
+    # Whether processes other than this one can see the jobs
+    shared = False
+
+    def __init__(self, retention_seconds: float):
+        self.retention_seconds = retention_seconds
+
+    @abstractmethod
+    def admitted(self) -> int:
+        """Jobs queued or running."""
+
+    @abstractmethod
+    def add(self, job: Job, capacity: int) -> None:
+        """
+        Queue ``job`` unless ``capacity`` jobs are already admitted.
+
+        Raises:
+            QueueFullError: The queue is at capacity
+        """
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Job]:
+        """The job's current record (None once unknown or expired)."""
+
+    @abstractmethod
+    def list(self) -> List[Job]:
+        """Every job still retained, oldest first."""
+
+    @abstractmethod
+    def claim(self, runner_id: str) -> Optional[Job]:
+        """Move the oldest queued job to running and return it (None if the queue is empty)."""
+
+    @abstractmethod
+    def set_progress(self, job_id: str, fraction: float, message: str) -> None:
+        """Record progress of a running job (ignored once it is final)."""
+
+    @abstractmethod
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None,
+               message: str = "") -> Optional[Job]:
+        """
+        Move a queued or running job to a final state.
+
+        Returns:
+            The finished job, or None if it was already final (or unknown)
+        """
+
+    @abstractmethod
+    def retry_after(self) -> int:
+        """Rough wait until a slot frees up, in seconds."""
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+        return self.finish(job_id, "cancelled", message="Cancelled") or self.get(job_id)
+
+    def heartbeat(self, runner_id: str) -> None:
+        """Tell the store that ``runner_id`` is alive (shared stores only)."""
+
+    def recover(self) -> None:
+        """Fail running jobs whose runner stopped without finishing them (shared stores only)."""
+
+    def check_capacity(self, capacity: int) -> None:
+        """Raise QueueFullError if a new job would not be admitted."""
+        admitted = self.admitted()
+        if admitted >= capacity:
+            raise QueueFullError(admitted, retry_after=self.retry_after())
+
+    def _finished(self, job: Job) -> None:
+        """Bookkeeping once ``job`` reached its final state (called by the store that moved it)."""
+        metrics.inc("gm_jobs_total", kind=job.kind, status=job.status)
+        if job.input_path:
+            Path(job.input_path).unlink(missing_ok=True)
+        if job.status != "cancelled":
+            elapsed = f" in {job.finished_at - job.started_at:.1f}s" if job.started_at else ""
+            logger.info(f"{'✅' if job.status == 'succeeded' else '❌'} Job {job.id[:8]} ({job.kind}) {job.status}{elapsed}")
+
+
+def _retry_after(runtimes: List[float]) -> int:
+    """The average runtime of recent jobs, at least 5s (30s with no history)."""
+    return max(5, int(sum(runtimes) / len(runtimes))) if runtimes else 30
+
+
+class MemoryJobStore(JobStore):
+    """Jobs in this process's memory; the API process runs the executors itself."""
+
+    def __init__(self, retention_seconds: float):
+        super().__init__(retention_seconds)
+        self._jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._queue: Deque[str] = deque()
+        self._running: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def admitted(self) -> int:
+        with self._lock:
+            return len(self._queue) + len(self._running)
+
+    def add(self, job: Job, capacity: int) -> None:
+        with self._lock:
+            admitted = len(self._queue) + len(self._running)
+            if admitted >= capacity:
+                raise QueueFullError(admitted, retry_after=self._retry_after_locked())
+            self._prune_locked()
+            self._jobs[job.id] = job
+            self._queue.append(job.id)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def list(self) -> List[Job]:
+        with self._lock:
+            self._prune_locked()
+            return list(self._jobs.values())
+
+    def claim(self, runner_id: str) -> Optional[Job]:
+        with self._lock:
+            while self._queue:
+                job = self._jobs.get(self._queue.popleft())
+                if job is not None and job.status == "queued":
+                    job.status, job.message, job.started_at = "running", "Started", time.time()
+                    self._running.add(job.id)
+                    return job
+            return None
+
+    def set_progress(self, job_id: str, fraction: float, message: str) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and job.status == "running":
+                job.progress, job.message = fraction, message
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None,
+               message: str = "") -> Optional[Job]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.status in FINAL_STATES:
+                return None
+            if job.status == "queued":
+                self._queue.remove(job_id)
+            self._running.discard(job_id)
+            job.status, job.result, job.error, job.message = status, result, error, message
+            job.finished_at = time.time()
+            if status == "succeeded":
+                job.progress = 1.0
+        self._finished(job)
+        return job
+
+    def retry_after(self) -> int:
+        with self._lock:
+            return self._retry_after_locked()
+
+    def _retry_after_locked(self) -> int:
+        return _retry_after([job.finished_at - job.started_at for job in self._jobs.values()
+                             if job.status == "succeeded" and job.started_at])
+
+    def _prune_locked(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        for job_id, job in list(self._jobs.items()):
+            if job.status in FINAL_STATES and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+
+# Redis scripts: each state change is one atomic step, whichever process makes it
+
+_ADD_SCRIPT = """
+local admitted = redis.call('LLEN', KEYS[1]) + redis.call('SCARD', KEYS[2])
+if admitted >= tonumber(ARGV[1]) then return admitted end
+redis.call('HSET', KEYS[3], unpack(ARGV, 4))
+redis.call('RPUSH', KEYS[1], ARGV[2])
+redis.call('ZADD', KEYS[4], ARGV[3], ARGV[2])
+return -1
+"""
+
+_CLAIM_SCRIPT = """
+while true do
+  local job_id = redis.call('LPOP', KEYS[1])
+  if not job_id then return false end
+  local key = ARGV[1] .. job_id
+  if redis.call('HGET', key, 'status') == 'queued' then
+    redis.call('HSET', key, 'status', 'running', 'message', 'Started', 'started_at', ARGV[3], 'runner', ARGV[2])
+    redis.call('SADD', KEYS[2], job_id)
+    return job_id
+  end
+end
+"""
+
+_PROGRESS_SCRIPT = """
+if redis.call('HGET', KEYS[1], 'status') == 'running' then
+  redis.call('HSET', KEYS[1], 'progress', ARGV[1], 'message', ARGV[2])
+end
+"""
+
+_FINISH_SCRIPT = """
+local status = redis.call('HGET', KEYS[1], 'status')
+if status ~= 'queued' and status ~= 'running' then return 0 end
+redis.call('HSET', KEYS[1], 'status', ARGV[2], 'message', ARGV[3], 'finished_at', ARGV[4])
+if ARGV[5] ~= '' then redis.call('HSET', KEYS[1], 'error', ARGV[5]) end
+if ARGV[6] ~= '' then redis.call('HSET', KEYS[1], 'result', ARGV[6]) end
+if ARGV[2] == 'succeeded' then
+  redis.call('HSET', KEYS[1], 'progress', '1')
+  local started = redis.call('HGET', KEYS[1], 'started_at')
+  if started then
+    redis.call('LPUSH', KEYS[4], tonumber(ARGV[4]) - tonumber(started))
+    redis.call('LTRIM', KEYS[4], 0, 19)
+  end
+end
+redis.call('LREM', KEYS[2], 0, ARGV[1])
+redis.call('SREM', KEYS[3], ARGV[1])
+redis.call('EXPIRE', KEYS[1], ARGV[7])
+return 1
+"""
+
+
+class RedisJobStore(JobStore):
+    """Jobs in Redis, shared by every API worker and the job runner; requires redis."""
+
+    shared = True
+
+    def __init__(self, retention_seconds: float, url: Optional[str] = None, prefix: Optional[str] = None):
+        super().__init__(retention_seconds)
+        self.url = url or os.getenv("REDIS_URL", "redis://localhost:6379/0")
+        self.prefix = prefix if prefix is not None else os.getenv("JOB_REDIS_PREFIX", "gm:jobs:")
+        try:
+            import redis
+        except ImportError:
+            raise ImportError("redis is required for the shared job queue (JOB_BACKEND=redis). "
+                              "Install with: pip install redis")
+        self.client = redis.Redis.from_url(self.url, decode_responses=True)
+        self._add = self.client.register_script(_ADD_SCRIPT)
+        self._claim = self.client.register_script(_CLAIM_SCRIPT)
+        self._progress = self.client.register_script(_PROGRESS_SCRIPT)
+        self._finish = self.client.register_script(_FINISH_SCRIPT)
+
+    # Keys: a hash per job, the queue (list of ids), the running set, an index
+    # of every retained job by creation time and recent runtimes for Retry-After
+    def _key(self, name: str) -> str:
+        return self.prefix + name
+
+    def _job_key(self, job_id: str) -> str:
+        return self.prefix + "job:" + job_id
+
+    def admitted(self) -> int:
+        with self.client.pipeline() as pipe:
+            queued, running = pipe.llen(self._key("queue")).scard(self._key("running")).execute()
+        return queued + running
+
+    def add(self, job: Job, capacity: int) -> None:
+        fields = {
+            "kind": job.kind,
+            "params": json.dumps(job.params),
+            "input_path": job.input_path or "",
+            "status": job.status,
+            "progress": job.progress,
+            "message": job.message,
+            "created_at": job.created_at,
+        }
+        admitted = self._add(
+            keys=[self._key("queue"), self._key("running"), self._job_key(job.id), self._key("index")],
+            args=[capacity, job.id, job.created_at, *[item for pair in fields.items() for item in pair]]
+        )
+        if admitted >= 0:
+            raise QueueFullError(admitted, retry_after=self.retry_after())
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self._decode(job_id, self.client.hgetall(self._job_key(job_id)))
+
+    def list(self) -> List[Job]:
+        job_ids = self.client.zrange(self._key("index"), 0, -1)
+        with self.client.pipeline() as pipe:
+            for job_id in job_ids:
+                pipe.hgetall(self._job_key(job_id))
+            records = pipe.execute()
+        jobs, expired = [], []
+        for job_id, record in zip(job_ids, records):
+            job = self._decode(job_id, record)
+            (jobs if job is not None else expired).append(job or job_id)
+        if expired:
+            self.client.zrem(self._key("index"), *expired)
+        return jobs
+
+    def claim(self, runner_id: str) -> Optional[Job]:
+        job_id = self._claim(keys=[self._key("queue"), self._key("running")],
+                             args=[self.prefix + "job:", runner_id, time.time()])
+        return self.get(job_id) if job_id else None
+
+    def set_progress(self, job_id: str, fraction: float, message: str) -> None:
+        self._progress(keys=[self._job_key(job_id)], args=[fraction, message])
+
+    def finish(self, job_id: str, status: str, result: Any = None, error: Optional[str] = None,
+               message: str = "") -> Optional[Job]:
+        moved = self._finish(
+            keys=[self._job_key(job_id), self._key("queue"), self._key("running"), self._key("runtimes")],
+            args=[job_id, status, message, time.time(), error or "",
+                  json.dumps(result) if result is not None else "", int(self.retention_seconds)]
+        )
+        if not moved:
+            return None
+        job = self.get(job_id)
+        if job is not None:
+            self._finished(job)
+        return job
+
+    def retry_after(self) -> int:
+        return _retry_after([float(seconds) for seconds in self.client.lrange(self._key("runtimes"), 0, -1)])
+
+    def heartbeat(self, runner_id: str) -> None:
+        self.client.set(self._key("runner:" + runner_id), os.getpid(), ex=RUNNER_HEARTBEAT_SECONDS)
+
+    def recover(self) -> None:
+        for job_id in self.client.smembers(self._key("running")):
+            runner_id = self.client.hget(self._job_key(job_id), "runner")
+            if runner_id and self.client.exists(self._key("runner:" + runner_id)):
+                continue
+            if self.finish(job_id, "failed", message="Failed", error="Job runner stopped before the job finished"):
+                logger.warning(f"⚠️  Job {job_id[:8]} failed: its runner stopped")
+
+    @staticmethod
+    def _decode(job_id: str, record: Dict[str, str]) -> Optional[Job]:
+        if not record:
+            return None
+        return Job(
+            kind=record["kind"],
+            params=json.loads(record["params"]),
+            input_path=record.get("input_path") or None,
+            id=job_id,
+            status=record["status"],
+            progress=float(record.get("progress") or 0.0),
+            message=record.get("message", ""),
+            result=json.loads(record["result"]) if record.get("result") else None,
+            error=record.get("error") or None,
+            created_at=float(record["created_at"]),
+            started_at=float(record["started_at"]) if record.get("started_at") else None,
+            finished_at=float(record["finished_at"]) if record.get("finished_at") else None,
+        )
+
+
+def get_job_store(retention_seconds: Optional[float] = None) -> JobStore:
+    """
+    The job store selected by JOB_BACKEND: ``memory`` (default) or ``redis``.
+
+    Args:
+        retention_seconds: How long finished jobs stay readable (defaults to JOB_RETENTION_SECONDS, then 3600)
+    """
+    retention_seconds = retention_seconds or float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+    backend = os.getenv("JOB_BACKEND", "memory").strip().lower()
+    if backend == "redis":
+        return RedisJobStore(retention_seconds)
+    if backend != "memory":
+        raise ValueError(f"Unknown JOB_BACKEND: {backend} (use memory or redis)")
+    return MemoryJobStore(retention_seconds)
+
+
+# --- runner: long-lived executor processes ---------------------------------
+
+def _executor_main(worker_id: int, job_types: Dict[str, Callable], warm_up: Optional[Callable],
+                   tasks: Connection, results: Connection) -> None:
+    """
+    Executor process: warm up once, then run one job at a time until told to stop.
+
+    Jobs arrive on ``tasks`` as ``(job_id, kind, params)`` (None stops the
+    executor). Progress, the samples recorded during the job and its
+    outcome go back on ``results`` as ``(message, job_id, payload)``.
+    """
+    if warm_up is not None:
+        warm_up()
+    results.send(("ready", None, None))
+
+    while True:
+        try:
+            task = tasks.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        job_id, kind, params = task
+
+        def progress(fraction: float, message: str) -> None:
+            results.send(("progress", job_id, (min(max(fraction, 0.0), 1.0), message)))
+
+        try:
+            outcome = ("done", job_id, job_types[kind](params, progress))
+        except Exception as e:
+            outcome = ("error", job_id, f"{type(e).__name__}: {e}")
+        if metrics.enabled():
+            results.send(("metrics", job_id, metrics.drain()))  # merged into the runner's registry
+        results.send(outcome)
+
+
+@dataclass
+class _Executor:
+    """Runner-side handle of one executor process."""
+    worker_id: int
+    process: Any
+    tasks: Connection                 # runner -> executor
+    results: Connection               # executor -> runner
+    ready: bool = False
+    job_id: Optional[str] = None
+
+
+class JobRunner:
+    """
+    Runs queued jobs from a store on long-lived executor processes.
+
+    Each executor runs one job at a time and keeps what it loaded (torch,
+    pyannote, the diarization pipeline) for the next one. An executor whose
+    job is cancelled, or that dies, is replaced.
+
+    Usage:
+        runner = JobRunner(get_job_store(), num_workers=2).start()
+        ...
+        runner.shutdown()
+    """
+
+    def __init__(
+        self,
+        store: JobStore,
+        num_workers: Optional[int] = None,
+        job_types: Optional[Dict[str, Callable]] = None,
+        warm_up: Optional[Callable[[], None]] = None,
+        poll_seconds: float = 0.5,
+        start_method: str = "spawn"
+    ):
+        """
+        Args:
+            store: Where jobs are claimed from and reported to
+            num_workers: Executor processes, i.e. jobs at once (defaults to JOB_MAX_CONCURRENCY, then 2)
+            job_types: Job functions by kind (defaults to the audio jobs); must be
+                module-level so the executors can import them
+            warm_up: Module-level function each executor runs before its first
+                job (defaults to ``warm_up_audio_models`` for the audio jobs)
+            poll_seconds: How often an idle runner checks the queue and cancellations
+            start_method: ``spawn`` (default), or ``fork`` from a process that
+                already loaded the models so the executors share their pages
+        """
+        self.store = store
+        self.num_workers = num_workers or int(os.getenv("JOB_MAX_CONCURRENCY", "2"))
+        self.job_types = job_types or JOB_TYPES
+        self.warm_up = warm_up if warm_up is not None or job_types is not None else warm_up_audio_models
+        self.poll_seconds = poll_seconds
+        self.runner_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._ctx = mp.get_context(start_method)
+        self._executors: Dict[int, _Executor] = {}
+        self._wake_reader, self._wake_writer = mp.get_context("spawn").Pipe(duplex=False)
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+
+    def start(self) -> "JobRunner":
+        """Start the executors and the supervising thread."""
+        if self._thread is not None:
+            return self
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+        self._thread = threading.Thread(target=self._loop, name="job-runner", daemon=True)
+        self._thread.start()
+        logger.info(f"🧵 Job runner {self.runner_id} started {self.num_workers} executors")
+        return self
+
+    def wake(self) -> None:
+        """Check the queue now instead of at the next poll."""
+        try:
+            self._wake_writer.send("wake")
+        except OSError:
+            pass  # shut down
+
+    def shutdown(self, wait: bool = False) -> None:
+        """
+        Stop the executors.
+
+        Running jobs finish first if ``wait`` is True; otherwise their
+        executors are terminated and the jobs fail.
+        """
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wake_writer.send(None)
+        self._thread.join(timeout=10)
+        self._thread = None
+        for executor in self._executors.values():
+            try:
+                executor.tasks.send(None)
+            except OSError:
+                pass  # already gone
+        for executor in self._executors.values():
+            if not wait:
+                executor.process.terminate()
+            executor.process.join()
+            self._receive(executor)
+            if executor.job_id:
+                self.store.finish(executor.job_id, "failed", message="Failed",
+                                  error="Job runner shut down before the job finished")
+            executor.tasks.close()
+            executor.results.close()
+        self._executors = {}
+
+    def _spawn(self, worker_id: int) -> None:
+        task_reader, task_writer = self._ctx.Pipe(duplex=False)
+        result_reader, result_writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=_executor_main,
+            args=(worker_id, self.job_types, self.warm_up, task_reader, result_writer),
+            name=f"job-executor-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        # The child holds the only copies of these ends, so its exit shows up as EOF
+        task_reader.close()
+        result_writer.close()
+        self._executors[worker_id] = _Executor(worker_id, process, task_writer, result_reader)
+
+    def _loop(self) -> None:
+        last_recover = 0.0
+        while not self._stopping:
+            try:
+                self.store.heartbeat(self.runner_id)
+                if time.monotonic() - last_recover > RUNNER_HEARTBEAT_SECONDS / 2:
+                    self.store.recover()
+                    last_recover = time.monotonic()
+                self._assign()
+            except Exception as e:
+                # e.g. Redis restarting: keep the executors, try again next poll
+                logger.error(f"❌ Job runner could not reach the job store: {e}")
+
+            watched = {}
+            for executor in self._executors.values():
+                watched[executor.results] = executor
+                watched[executor.process.sentinel] = executor
+            dead = []
+            for item in wait_connections(list(watched) + [self._wake_reader], timeout=self.poll_seconds):
+                if item is self._wake_reader:
+                    if self._wake_reader.recv() is None:
+                        return
+                    continue
+                executor = watched[item]
+                alive = self._receive(executor) if item is executor.results else False
+                if not alive and executor not in dead:
+                    dead.append(executor)
+            for executor in dead:
+                self._replace(executor)
+            self._stop_cancelled()
+
+    def _assign(self) -> None:
+        for executor in self._executors.values():
+            if not executor.ready or executor.job_id is not None:
+                continue
+            job = self.store.claim(self.runner_id)
+            if job is None:
+                return
+            executor.job_id = job.id
+            try:
+                executor.tasks.send((job.id, job.kind, job.params))
+            except OSError:
+                pass  # the executor died; _replace fails the job
+            logger.info(f"▶️  Job {job.id[:8]} ({job.kind}) started on executor {executor.worker_id}")
+
+    def _receive(self, executor: _Executor) -> bool:
+        """Handle every message waiting from ``executor``; False once its pipe is closed."""
+        while True:
+            try:
+                if not executor.results.poll():
+                    return True
+                kind, job_id, payload = executor.results.recv()
+            except (EOFError, OSError):
+                return False
+            if kind == "ready":
+                executor.ready = True
+            elif kind == "progress":
+                self.store.set_progress(job_id, *payload)
+            elif kind == "metrics":
+                metrics.merge(payload)
+            else:
+                executor.job_id = None
+                if kind == "done":
+                    self.store.finish(job_id, "succeeded", result=payload, message="Done")
+                else:
+                    self.store.finish(job_id, "failed", error=payload, message="Failed")
+
+    def _replace(self, executor: _Executor) -> None:
+        """An executor exited (or was stopped): fail its job unless already final, then respawn it."""
+        self._receive(executor)  # results it sent before exiting still count
+        executor.process.join(timeout=5)
+        if executor.process.is_alive():
+            executor.process.terminate()  # closed its pipe but hung
+            executor.process.join()
+        executor.tasks.close()
+        executor.results.close()
+        if executor.job_id is not None:
+            # Died without reporting (killed, out of memory); a no-op for a cancelled job
+            self.store.finish(executor.job_id, "failed", message="Failed",
+                              error=f"Worker process exited with code {executor.process.exitcode}")
+        if not self._stopping:
+            self._spawn(executor.worker_id)
+
+    def _stop_cancelled(self) -> None:
+        """Terminate executors whose job was cancelled (or failed by another process) while running."""
+        for executor in list(self._executors.values()):
+            if executor.job_id is None:
+                continue
+            job = self.store.get(executor.job_id)
+            if job is None or job.status in FINAL_STATES:
+                logger.info(f"🛑 Stopping executor {executor.worker_id} (job {executor.job_id[:8]} {job.status if job else 'gone'})")
+                executor.job_id = None
+                executor.process.terminate()
+                self._replace(executor)
+
+
+def run_job_runner(num_workers: Optional[int] = None, start_method: str = "spawn",
+                   stop: Optional[threading.Event] = None) -> None:
+    """
+    Run a JobRunner on the JOB_BACKEND store until ``stop`` is set (or SIGTERM/SIGINT).
+
+    Entry point for the runner process of a shared (Redis) deployment.
+    """
+    import signal
+
+    stop = stop or threading.Event()
+    if threading.current_thread() is threading.main_thread():
+        for signum in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, lambda *_: stop.set())
+    runner = JobRunner(get_job_store(), num_workers=num_workers, start_method=start_method).start()
+    try:
+        stop.wait()
+    finally:
+        runner.shutdown()
+
+
+# --- manager (runs in every API process) -----------------------------------
+
+class JobManager:
+    """
+    Bounded background job execution for the API.
+
+    Usage:
+        jobs = JobManager().start()
+        job = jobs.submit("diarize", {"audio_path": path, "filename": name}, input_path=path)
+        result = await wait_for_job(jobs, job.id)
+    """
+
+    def __init__(
+        self,
+        max_concurrency: Optional[int] = None,
+        max_queued: Optional[int] = None,
+        retention_seconds: Optional[float] = None,
+        work_dir: Optional[str] = None,
+        job_types: Optional[Dict[str, Callable]] = None,
+        store: Optional[JobStore] = None,
+        run_jobs: Optional[bool] = None,
+        warm_up: Optional[Callable[[], None]] = None
+    ):
+        """
+        Args:
+            max_concurrency: Jobs running at once (defaults to JOB_MAX_CONCURRENCY, then 2)
+            max_queued: Jobs waiting beyond those before submissions get 429
+                (defaults to JOB_MAX_QUEUED, then 8)
+            retention_seconds: How long finished jobs stay readable (defaults to JOB_RETENTION_SECONDS, then 3600)
+            work_dir: Where uploads wait for their job (defaults to JOB_DIR, then a temp directory)
+            job_types: Job functions by kind (defaults to the audio jobs); must be
+                module-level so the executors can import them
+            store: Job store (defaults to ``get_job_store()``)
+            run_jobs: Run the executors in this process (defaults to True for an
+                in-memory store; a shared store has its own runner)
+            warm_up: Executor warm-up function (see JobRunner)
+        """
+        self.max_concurrency = max_concurrency or int(os.getenv("JOB_MAX_CONCURRENCY", "2"))
+        self.max_queued = max_queued if max_queued is not None else int(os.getenv("JOB_MAX_QUEUED", "8"))
+        self.retention_seconds = retention_seconds or float(os.getenv("JOB_RETENTION_SECONDS", "3600"))
+        self.work_dir = Path(work_dir or os.getenv("JOB_DIR") or Path(tempfile.gettempdir()) / "gm_jobs")
+        self.job_types = job_types or JOB_TYPES
+        self.store = store or get_job_store(self.retention_seconds)
+        self.runner = None
+        if run_jobs if run_jobs is not None else not self.store.shared:
+            self.runner = JobRunner(self.store, self.max_concurrency, job_types, warm_up)
+        self._closed = False
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrency + self.max_queued
+
+    def start(self) -> "JobManager":
+        """Prepare ``work_dir`` and, when this process runs the jobs, start the executors."""
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        if self.runner is not None:
+            self._remove_stale_uploads()
+            self.runner.start()
+        logger.info(f"🧵 Job manager ready ({self.max_concurrency} concurrent, {self.max_queued} queued, "
+                    f"{type(self.store).__name__}{'' if self.runner else ', jobs run elsewhere'})")
+        return self
+
+    # --- public API ------------------------------------------------------
+
+    def check_capacity(self) -> None:
+        """Raise QueueFullError if a new job would not be admitted."""
+        self.store.check_capacity(self.capacity)
+
+    def upload_path(self, suffix: str) -> Path:
+        """A fresh path for an upload that a job will consume."""
+        return self.work_dir / f"upload_{uuid.uuid4().hex}{suffix}"
+
+    def submit(self, kind: str, params: Dict[str, Any], input_path: Optional[str] = None) -> Job:
+        """
+        Queue a job.
+
+        Args:
+            kind: Job type (a key of ``job_types``)
+            params: Picklable (JSON-compatible for a shared store) arguments for the job function
+            input_path: Upload owned by the job; deleted when the job ends
+
+        Returns:
+            The queued job
+
+        Raises:
+            QueueFullError: when the queue is at capacity
+        """
+        if kind not in self.job_types:
+            raise ValueError(f"Unknown job type: {kind}")
+        if self._closed:
+            raise RuntimeError("Job manager is shut down")
+        job = Job(kind=kind, params=params, input_path=input_path)
+        self.store.add(job, self.capacity)
+        if self.runner is not None:
+            self.runner.wake()
+        logger.info(f"📥 Job {job.id[:8]} ({kind}) queued")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.store.get(job_id)
+
+    def list(self) -> List[Job]:
+        return self.store.list()
+
+    def cancel(self, job_id: str) -> Optional[Job]:
+        """Cancel a queued or running job; finished jobs are returned unchanged."""
+        job = self.store.cancel(job_id)
+        if job is not None and job.status == "cancelled":
+            logger.info(f"🛑 Job {job_id[:8]} cancelled")
+            if self.runner is not None:
+                self.runner.wake()  # stops a running job's executor now
+        return job
+
+    def stats(self) -> Dict[str, Any]:
+        counts = {state: 0 for state in JOB_STATES}
+        for job in self.store.list():
+            counts[job.status] += 1
+        return {"max_concurrency": self.max_concurrency, "max_queued": self.max_queued, **counts}
+
+    def shutdown(self) -> None:
+        """Stop accepting jobs; an in-process runner cancels what is left and stops its executors."""
+        self._closed = True
+        if self.runner is None:
+            return  # shared jobs belong to the runner, not to this API process
+        for job in self.store.list():
+            if job.status not in FINAL_STATES:
+                self.store.cancel(job.id)
+        self.runner.shutdown()
+
+    # --- internals -------------------------------------------------------
+
+    def _remove_stale_uploads(self) -> None:
+        # Left behind by a previous run: older than any job could still need
+        cutoff = time.time() - self.retention_seconds
+        for stale in self.work_dir.glob("upload_*"):
+            try:
+                if stale.stat().st_mtime < cutoff:
+                    stale.unlink()
+            except OSError:
+                pass  # removed concurrently
@@ -0,0 +1,197 @@
+"""
+Pre-fork preloading and readiness for production API deployments
+
+A plain ``uvicorn`` worker imports torch, pyannote.audio and the agents
+that import them at module level when it starts, and loads the tiktoken
+encodings on the first request that counts tokens. Under Gunicorn with
+``preload_app`` (apps/api/gunicorn_conf.py) the master calls ``preload()``
+before forking instead: every worker starts with those pages shared
+copy-on-write, and no request pays the import.
+
+The workers themselves never run a model; the job executors do. With a
+shared job queue (``JOB_BACKEND=redis``) the master also calls
+``preload_models()`` and forks the job runner, whose executors fork from
+it in turn, so one copy of the diarization weights serves them all. With
+the in-memory queue the executors are spawned by the worker and load
+their own copy. The readiness gate (``Readiness``, served at ``/ready``)
+tells a load balancer when a worker has its database connection, its
+preloaded modules and, with DIARIZATION_WORKERS set, a warm diarization
+pool.
+
+``memory_report()`` gives RSS and PSS for the current process.
+scripts/measure_worker_memory.py measures a whole deployment.
+"""
+
+import gc
+import os
+import time
+import logging
+import importlib
+import threading
+from typing import Dict, Iterable, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Heavy imports the API workers need (the agents pull in torch and pyannote)
+PRELOAD_MODULES = (
+    "numpy",
+    "torch",
+    "pyannote.audio",
+    "tiktoken",
+    "core.data.vector_store",
+    "core.agents.rag_librarian",
+    "core.agents.diarizer",
+    "core.agents.session_scribe",
+    "core.agents.gm_chat",
+    "apps.api.jobs",
+)
+
+# Encodings loaded by tiktoken.encoding_for_model (rag_librarian counts tokens as gpt-4)
+TIKTOKEN_MODELS = ("gpt-4",)
+
+
+def preload_modules() -> Iterable[str]:
+    """PRELOAD_MODULES plus any listed in API_PRELOAD_MODULES (comma-separated)."""
+    extra = [name.strip() for name in os.getenv("API_PRELOAD_MODULES", "").split(",") if name.strip()]
+    return tuple(PRELOAD_MODULES) + tuple(extra)
+
+
+def preload(modules: Optional[Iterable[str]] = None, tiktoken_models: Iterable[str] = TIKTOKEN_MODELS) -> Dict[str, float]:
+    """
+    Import the heavy modules and load the tokenizer encodings.
+
+    Safe to call again (already-imported modules cost nothing). Missing
+    optional dependencies are skipped with a warning.
+
+    Returns:
+        Seconds spent per module / encoding that loaded
+    """
+    timings = {}
+    for name in modules or preload_modules():
+        start = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            logger.warning(f"⚠️  Not preloading {name}: {e}")
+            continue
+        timings[name] = time.perf_counter() - start
+
+    for model in tiktoken_models:
+        start = time.perf_counter()
+        try:
+            import tiktoken
+            tiktoken.encoding_for_model(model)
+        except Exception as e:
+            logger.warning(f"⚠️  Not preloading the tiktoken encoding for {model}: {e}")
+            continue
+        timings[f"tiktoken:{model}"] = time.perf_counter() - start
+
+    slowest = sorted(timings.items(), key=lambda item: -item[1])[:3]
+    logger.info(f"📦 Preloaded {len(timings)} modules/encodings in {sum(timings.values()):.1f}s "
+                f"(slowest: {', '.join(f'{name} {seconds:.1f}s' for name, seconds in slowest)})")
+    return timings
+
+
+def preload_models() -> Dict[str, float]:
+    """
+    Load the diarization model the job executors use, in the process that will fork them.
+
+    Torch is kept to one thread here so no OpenMP pool exists to be broken
+    by the fork; each executor sets its own thread budget. Skipped on CUDA
+    hosts, where a CUDA context cannot cross a fork: executors there load
+    the model themselves.
+
+    Returns:
+        Seconds spent, keyed by what loaded
+    """
+    try:
+        import torch
+    except ImportError as e:
+        logger.warning(f"⚠️  Not preloading models: {e}")
+        return {}
+    if torch.cuda.is_available():
+        logger.info("⏭️  Not preloading models: CUDA contexts do not survive fork")
+        return {}
+    torch.set_num_threads(1)
+
+    from apps.api.jobs import load_audio_models
+
+    start = time.perf_counter()
+    if not load_audio_models():
+        return {}
+    return {"diarization_pipeline": time.perf_counter() - start}
+
+
+def freeze_heap() -> None:
+    """
+    Move every object allocated so far out of the garbage collector's reach.
+
+    Call in the master right before forking. Otherwise the first collection
+    in each worker writes to the headers of the preloaded objects, which
+    copies their pages and undoes the sharing.
+    """
+    gc.collect()
+    gc.freeze()
+    logger.info(f"🧊 Froze {gc.get_freeze_count():,} objects before forking")
+
+
+def memory_report(pid: Optional[int] = None) -> Dict[str, float]:
+    """
+    RSS and PSS of a process in MB (Linux; empty elsewhere).
+
+    RSS counts every shared page in full in every worker. PSS splits each
+    shared page between the processes mapping it, so the PSS of all workers
+    adds up to the memory they really use.
+    """
+    path = f"/proc/{pid or 'self'}/smaps_rollup"
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb", "Shared_Clean": "shared_mb", "Shared_Dirty": "shared_mb",
+              "Private_Clean": "private_mb", "Private_Dirty": "private_mb"}
+    report: Dict[str, float] = {}
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(":")
+                if name in fields:
+                    key = fields[name]
+                    report[key] = report.get(key, 0.0) + int(value.split()[0]) / 1024
+    except OSError:
+        return {}
+    return {key: round(value, 1) for key, value in report.items()}
+
+
+class Readiness:
+    """
+    Named start-up checks that must all pass before a worker takes traffic.
+
+    Usage:
+        readiness = Readiness("database", "models")
+        readiness.mark("database")
+        readiness.ready  # False until "models" is marked too
+    """
+
+    def __init__(self, *checks: str):
+        self._lock = threading.Lock()
+        self._checks: Dict[str, Dict] = {}
+        for name in checks:
+            self.expect(name)
+
+    def expect(self, name: str) -> None:
+        """Add a check that has not passed yet."""
+        with self._lock:
+            self._checks.setdefault(name, {"ok": False, "detail": "pending"})
+
+    def mark(self, name: str, ok: bool = True, detail: Optional[str] = None) -> None:
+        with self._lock:
+            self._checks[name] = {"ok": ok, "detail": detail or ("ready" if ok else "failed")}
+
+    @property
+    def ready(self) -> bool:
+        with self._lock:
+            return all(check["ok"] for check in self._checks.values())
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            checks = {name: dict(check) for name, check in self._checks.items()}
+        return {"ready": all(check["ok"] for check in checks.values()), "checks": checks}
@@ -0,0 +1,371 @@
+"""
+Upload handling for the Shadowdark GM API
+
+Session recordings run to several GB, so uploads never pass through memory
+in one piece:
+
+- ``spool_upload`` copies a multipart upload to disk in fixed-size chunks,
+  hashing it on the way (the SHA-256 keys the diarization cache, so the
+  job does not read the file a second time) and stopping at the size limit
+- ``UploadStore`` backs resumable uploads (the core of the tus 1.0 protocol
+  plus its creation and termination extensions): the client creates an
+  upload with its total length, sends it in ``PATCH`` requests at known
+  offsets, and after a dropped connection asks for the offset
+  (``HEAD``) and continues from there
+
+A finished resumable upload is claimed by a job with ``upload_id`` instead
+of a file field.
+
+Upload state is shared through the upload directory, not process memory,
+so any API process can continue an upload another one started.
+"""
+
+import os
+import json
+import time
+import base64
+import hashlib
+import shutil
+import logging
+import tempfile
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import AsyncIterable, Dict, Iterator, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are not serialized across requests
+    fcntl = None
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TUS_VERSION = "1.0.0"
+TUS_EXTENSIONS = ("creation", "termination")
+UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+
+def max_upload_bytes() -> Optional[int]:
+    """Upload size limit from MAX_UPLOAD_MB (default 4096; 0 disables the limit)."""
+    megabytes = float(os.getenv("MAX_UPLOAD_MB", "4096"))
+    return int(megabytes * 1024 * 1024) if megabytes > 0 else None
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds the size limit."""
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        super().__init__(f"Upload exceeds the {limit / (1024 * 1024):.0f} MB limit")
+
+
+class UploadOffsetError(Exception):
+    """Raised when a resumable chunk does not start at the upload's current offset."""
+
+    def __init__(self, expected: int, received: int):
+        self.expected = expected
+        self.received = received
+        super().__init__(f"Upload is at offset {expected}, chunk starts at {received}")
+
+
+@dataclass
+class SpooledUpload:
+    """An upload written to disk."""
+    path: Path
+    size: int
+    sha256: str
+
+
+async def spool_upload(upload, path: Path, max_bytes: Optional[int] = None,
+                       chunk_bytes: int = UPLOAD_CHUNK_BYTES) -> SpooledUpload:
+    """
+    Stream an upload to disk, hashing it as it goes.
+
+    Args:
+        upload: Anything with an async ``read(size)`` (e.g. FastAPI's ``UploadFile``)
+        path: Destination file
+        max_bytes: Size limit; the partial file is removed when it is exceeded
+        chunk_bytes: Read size
+
+    Returns:
+        SpooledUpload with the size and SHA-256 of the content
+
+    Raises:
+        UploadTooLargeError: when the upload is larger than ``max_bytes``
+    """
+    path = Path(path)
+    hasher = hashlib.sha256()
+    size = 0
+    try:
+        with open(path, "wb") as f:
+            while chunk := await upload.read(chunk_bytes):
+                size += len(chunk)
+                if max_bytes is not None and size > max_bytes:
+                    raise UploadTooLargeError(max_bytes)
+                hasher.update(chunk)
+                f.write(chunk)
+    except BaseException:
+        path.unlink(missing_ok=True)
+        raise
+    return SpooledUpload(path=path, size=size, sha256=hasher.hexdigest())
+
+
+def parse_upload_metadata(header: Optional[str]) -> Dict[str, str]:
+    """Decode a tus ``Upload-Metadata`` header (``key base64value,key2 ...``)."""
+    metadata = {}
+    for pair in (header or "").split(","):
+        parts = pair.strip().split(" ", 1)
+        if not parts[0]:
+            continue
+        try:
+            value = base64.b64decode(parts[1]).decode("utf-8") if len(parts) == 2 else ""
+        except ValueError:
+            raise ValueError(f"Invalid Upload-Metadata value for {parts[0]!r}")
+        metadata[parts[0]] = value
+    return metadata
+
+
+@dataclass
+class ResumableUpload:
+    """State of a resumable upload (persisted next to its data file)."""
+    id: str
+    length: int
+    filename: str
+    offset: int = 0
+    hashed: int = 0              # bytes covered by the writing process's running hash
+    sha256: Optional[str] = None
+    created_at: float = 0.0
+    updated_at: float = 0.0
+
+    @property
+    def complete(self) -> bool:
+        return self.offset == self.length
+
+
+class UploadStore:
+    """
+    Resumable uploads on disk.
+
+    Each upload has a data file ``<id>.part`` and a state file ``<id>.json``.
+    A request writing to an upload holds an exclusive lock on its data file,
+    so a concurrent request (in this or another process) is refused.
+
+    The running hash lives in the memory of the process that received the
+    bytes. The state file records how many bytes it covers (``hashed``).
+    When the upload completes, the data file is hashed again unless this
+    process saw every byte, as after a restart or when another API worker
+    received some of the parts.
+
+    Usage:
+        store = UploadStore("/tmp/gm_uploads").start()
+        upload = store.create(length, "session.m4a")
+        upload = await store.append(upload.id, 0, request.stream())
+        path, upload = store.claim(upload.id, destination)
+    """
+
+    def __init__(self, directory: Optional[str] = None, max_bytes: Optional[int] = None,
+                 expiry_hours: Optional[float] = None):
+        """
+        Args:
+            directory: Where uploads are kept (defaults to UPLOAD_DIR, then a temp directory)
+            max_bytes: Largest accepted upload (defaults to MAX_UPLOAD_MB)
+            expiry_hours: Unfinished uploads untouched this long are removed
+                (defaults to UPLOAD_EXPIRY_HOURS, then 24)
+        """
+        self.directory = Path(directory or os.getenv("UPLOAD_DIR") or Path(tempfile.gettempdir()) / "gm_uploads")
+        self.max_bytes = max_bytes if max_bytes is not None else max_upload_bytes()
+        self.expiry_seconds = 3600 * (expiry_hours or float(os.getenv("UPLOAD_EXPIRY_HOURS", "24")))
+        self._hashers: Dict[str, Tuple["hashlib._Hash", int]] = {}   # upload id -> (hash, bytes it covers)
+
+    def start(self) -> "UploadStore":
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.expire()
+        return self
+
+    def create(self, length: int, filename: str) -> ResumableUpload:
+        """
+        Register a new upload of ``length`` bytes.
+
+        Raises:
+            UploadTooLargeError: when ``length`` exceeds the size limit
+        """
+        if length < 0:
+            raise ValueError("Upload-Length must not be negative")
+        if self.max_bytes is not None and length > self.max_bytes:
+            raise UploadTooLargeError(self.max_bytes)
+        now = time.time()
+        upload = ResumableUpload(id=uuid.uuid4().hex, length=length, filename=filename,
+                                 created_at=now, updated_at=now)
+        self._data_path(upload.id).touch()
+        if upload.complete:
+            upload.sha256 = hashlib.sha256().hexdigest()
+        self._save(upload)
+        logger.info(f"📦 Upload {upload.id[:8]} created ({filename}, {length / (1024 * 1024):.1f} MB)")
+        return upload
+
+    def get(self, upload_id: str) -> Optional[ResumableUpload]:
+        if not upload_id.isalnum():
+            return None
+        state_path = self._state_path(upload_id)
+        if not state_path.exists():
+            return None
+        return ResumableUpload(**json.loads(state_path.read_text()))
+
+    async def append(self, upload_id: str, offset: int, chunks: AsyncIterable[bytes]) -> ResumableUpload:
+        """
+        Write the next part of an upload.
+
+        Args:
+            upload_id: Upload to extend
+            offset: Where the client thinks the upload stands (``Upload-Offset``)
+            chunks: Body of the request
+
+        Returns:
+            The upload with its new offset; if the connection drops part way,
+            the bytes received so far are kept and the offset reflects them
+
+        Raises:
+            KeyError: unknown upload
+            UploadOffsetError: ``offset`` is not the current offset, or
+                another request is writing to this upload
+            UploadTooLargeError: more bytes than the declared length
+        """
+        if self.get(upload_id) is None:
+            raise KeyError(upload_id)
+        with self._locked(upload_id) as f:
+            if f is None:
+                upload = self.get(upload_id)
+                raise UploadOffsetError(upload.offset if upload else 0, offset)
+            # Read under the lock: the last writer may have been another process
+            upload = self.get(upload_id)
+            if upload is None:
+                raise KeyError(upload_id)
+            if offset != upload.offset:
+                raise UploadOffsetError(upload.offset, offset)
+
+            hasher, hashed = self._hashers.pop(upload_id, (None, 0))
+            if upload.offset == 0:
+                hasher, upload.hashed = hashlib.sha256(), 0
+            elif hasher is None or not hashed == upload.hashed == upload.offset:
+                # This process did not see every byte so far: hashed on completion
+                hasher, upload.hashed = None, 0
+            try:
+                f.seek(upload.offset)
+                f.truncate()  # drop bytes past the recorded offset from an interrupted write
+                async for chunk in chunks:
+                    if upload.offset + len(chunk) > upload.length:
+                        raise UploadTooLargeError(upload.length)
+                    f.write(chunk)
+                    upload.offset += len(chunk)
+                    if hasher is not None:
+                        hasher.update(chunk)
+                        upload.hashed = upload.offset
+            finally:
+                f.flush()
+                upload.updated_at = time.time()
+                if upload.complete:
+                    upload.sha256 = self._finish_hash(upload, hasher)
+                elif hasher is not None:
+                    self._hashers[upload_id] = (hasher, upload.hashed)
+                self._save(upload)
+        return upload
+
+    def claim(self, upload_id: str, destination: Path) -> Tuple[Path, ResumableUpload]:
+        """
+        Hand a completed upload over to a job: its data file moves to
+        ``destination`` and the upload is forgotten.
+
+        Raises:
+            KeyError: unknown upload
+            ValueError: the upload is not complete
+        """
+        if self.get(upload_id) is None:
+            raise KeyError(upload_id)
+        with self._locked(upload_id) as f:
+            upload = self.get(upload_id)
+            if upload is None:
+                raise KeyError(upload_id)
+            if f is None or not upload.complete:
+                raise ValueError(f"Upload {upload_id} is incomplete ({upload.offset}/{upload.length} bytes)")
+            shutil.move(self._data_path(upload_id), destination)
+            self._state_path(upload_id).unlink(missing_ok=True)
+        return Path(destination), upload
+
+    def release(self, path: Path, upload: ResumableUpload) -> None:
+        """Return a claimed upload to the store (its job could not be queued)."""
+        shutil.move(path, self._data_path(upload.id))
+        self._save(upload)
+
+    def delete(self, upload_id: str) -> bool:
+        """Remove an upload (tus termination); returns False if it did not exist."""
+        if self.get(upload_id) is None:
+            return False
+        existed = self._state_path(upload_id).exists()
+        self._data_path(upload_id).unlink(missing_ok=True)
+        self._state_path(upload_id).unlink(missing_ok=True)
+        self._hashers.pop(upload_id, None)
+        return existed
+
+    def expire(self) -> int:
+        """Remove unfinished uploads that have not been written to within the expiry window."""
+        cutoff = time.time() - self.expiry_seconds
+        removed = 0
+        for state_path in self.directory.glob("*.json"):
+            upload = self.get(state_path.stem)
+            if not upload or upload.updated_at >= cutoff:
+                continue
+            with self._locked(upload.id) as f:
+                if f is not None:  # skip uploads being written to right now
+                    self.delete(upload.id)
+                    removed += 1
+        if removed:
+            logger.info(f"🧹 Removed {removed} expired uploads")
+        return removed
+
+    @contextmanager
+    def _locked(self, upload_id: str) -> Iterator[Optional[object]]:
+        """
+        The upload's data file opened for writing and locked exclusively;
+        None while another request holds the lock.
+        """
+        try:
+            f = open(self._data_path(upload_id), "r+b")
+        except FileNotFoundError:
+            raise KeyError(upload_id)
+        try:
+            if fcntl is not None:
+                try:
+                    fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    yield None
+                    return
+            yield f
+        finally:
+            f.close()  # releases the lock
+
+    def _finish_hash(self, upload: ResumableUpload, hasher: Optional["hashlib._Hash"]) -> str:
+        if hasher is not None and upload.hashed == upload.length:
+            return hasher.hexdigest()
+        # Some bytes arrived in another process (or before a restart); hash the finished file
+        hasher = hashlib.sha256()
+        with open(self._data_path(upload.id), "rb") as f:
+            while chunk := f.read(UPLOAD_CHUNK_BYTES):
+                hasher.update(chunk)
+        return hasher.hexdigest()
+
+    def _data_path(self, upload_id: str) -> Path:
+        if not upload_id.isalnum():
+            raise KeyError(upload_id)  # ids are hex; never let one become a path
+        return self.directory / f"{upload_id}.part"
+
+    def _state_path(self, upload_id: str) -> Path:
+        return self._data_path(upload_id).with_suffix(".json")
+
+    def _save(self, upload: ResumableUpload) -> None:
+        state_path = self._state_path(upload.id)
+        tmp_path = state_path.with_suffix(".json.tmp")
+        tmp_path.write_text(json.dumps(asdict(upload)))
+        os.replace(tmp_path, state_path)
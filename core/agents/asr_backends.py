@@ -0,0 +1,253 @@
+"""
+ASR Backends for Shadowdark GM Assistant
+
+Speech-to-text engines behind a common interface, so the diarizer and the
+transcript generator do not depend on a specific provider:
+
+- ``OpenAIWhisperBackend``: hosted Whisper API (25MB upload limit)
+- ``LocalWhisperBackend``: CTranslate2 int8 Whisper (faster-whisper) on CPU,
+  decoding VAD-trimmed chunks across a thread pool with no size limit
+"""
+
+import os
+import logging
+from abc import ABC, abstractmethod
+from pathlib import Path
+from dataclasses import dataclass, field
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WHISPER_SAMPLE_RATE = 16000
+
+
+@dataclass
+class TranscriptionSegment:
+    """A piece of recognized speech with timestamps in seconds."""
+    start: float
+    end: float
+    text: str
+
+
+@dataclass
+class TranscriptionResult:
+    """Output of an ASR backend."""
+    text: str
+    segments: List[TranscriptionSegment] = field(default_factory=list)
+    backend: str = ""
+
+
+class ASRBackend(ABC):
+    """Common interface for speech-to-text engines."""
+
+    name = "base"
+    max_upload_mb: Optional[float] = None  # None means no size limit
+
+    @abstractmethod
+    def transcribe(self, audio_path: str) -> TranscriptionResult:
+        """
+        Transcribe an audio file.
+
+        Args:
+            audio_path: Path to the audio file
+
+        Returns:
+            TranscriptionResult with full text and timestamped segments
+        """
+
+    def exceeds_size_limit(self, audio_path: Path) -> bool:
+        """Whether the file is too large for this backend."""
+        if self.max_upload_mb is None:
+            return False
+        return audio_path.stat().st_size / (1024 * 1024) > self.max_upload_mb
+
+
+class OpenAIWhisperBackend(ASRBackend):
+    """Hosted Whisper via the OpenAI audio transcription API."""
+
+    name = "openai"
+    max_upload_mb = 25
+
+    def __init__(self, api_key: Optional[str] = None, model: str = "whisper-1"):
+        from core.integrations.openai_client import get_openai_service
+
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key required for Whisper transcription")
+        self.model = model
+        self.client = get_openai_service(self.api_key)  # shared, rate-limited and retrying
+
+    def transcribe(self, audio_path: str) -> TranscriptionResult:
+        audio_path = Path(audio_path)
+        if self.exceeds_size_limit(audio_path):
+            size_mb = audio_path.stat().st_size / (1024 * 1024)
+            raise ValueError(f"Audio file is {size_mb:.1f}MB (Whisper limit: {self.max_upload_mb}MB). "
+                             "Please split the file into smaller segments first.")
+
+        response = self.client.transcribe(
+            str(audio_path),
+            model=self.model,
+            response_format="verbose_json"
+        )
+
+        segments = [
+            TranscriptionSegment(start=seg.start, end=seg.end, text=seg.text.strip())
+            for seg in (getattr(response, "segments", None) or [])
+        ]
+        return TranscriptionResult(text=response.text, segments=segments, backend=self.name)
+
+
+class LocalWhisperBackend(ASRBackend):
+    """
+    Local CPU Whisper using CTranslate2 (faster-whisper) with int8 weights.
+
+    The audio is decoded once, trimmed to voiced regions with the Silero VAD
+    bundled with faster-whisper, packed into chunks of at most
+    ``max_chunk_seconds`` and decoded in parallel across ``num_workers``
+    threads. Nothing is uploaded, so there is no file size limit.
+    """
+
+    name = "local"
+    max_upload_mb = None
+
+    def __init__(
+        self,
+        model_path: Optional[str] = None,
+        compute_type: str = "int8",
+        cpu_threads: Optional[int] = None,
+        num_workers: Optional[int] = None,
+        max_chunk_seconds: float = 30.0,
+        language: Optional[str] = None,
+        beam_size: int = 5
+    ):
+        """
+        Args:
+            model_path: Local CTranslate2 model directory or model size name
+                (defaults to WHISPER_MODEL_PATH, then "small")
+            compute_type: CTranslate2 compute type ("int8", "int8_float32", "float32")
+            cpu_threads: Intra-op threads per decode (defaults to cores / workers)
+            num_workers: Parallel decodes (defaults to ASR_WORKERS, then 4)
+            max_chunk_seconds: Maximum length of a decoded chunk
+            language: Force a language code (e.g. "en") instead of detecting it
+            beam_size: Beam width for decoding
+        """
+        self.model_path = model_path or os.getenv("WHISPER_MODEL_PATH", "small")
+        self.compute_type = compute_type
+        self.num_workers = num_workers or int(os.getenv("ASR_WORKERS", "4"))
+        self.cpu_threads = cpu_threads or max(1, (os.cpu_count() or 1) // self.num_workers)
+        self.max_chunk_seconds = max_chunk_seconds
+        self.language = language
+        self.beam_size = beam_size
+        self._model = None
+
+    def _load_model(self):
+        if self._model is None:
+            try:
+                from faster_whisper import WhisperModel
+            except ImportError as e:
+                raise ImportError(
+                    "Local transcription requires faster-whisper: pip install faster-whisper"
+                ) from e
+
+            logger.info(f"🧠 Loading local Whisper model '{self.model_path}' "
+                       f"({self.compute_type}, {self.num_workers} workers x {self.cpu_threads} threads)")
+            self._model = WhisperModel(
+                self.model_path,
+                device="cpu",
+                compute_type=self.compute_type,
+                cpu_threads=self.cpu_threads,
+                num_workers=self.num_workers
+            )
+        return self._model
+
+    def transcribe(self, audio_path: str) -> TranscriptionResult:
+        from faster_whisper import decode_audio
+        from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+        model = self._load_model()
+        audio = decode_audio(str(audio_path), sampling_rate=WHISPER_SAMPLE_RATE)
+
+        speech = get_speech_timestamps(audio, VadOptions(min_silence_duration_ms=500))
+        chunks = self._pack_chunks([(ts["start"], ts["end"]) for ts in speech])
+        voiced = sum(end - start for start, end in chunks) / WHISPER_SAMPLE_RATE
+        logger.info(f"🎙️  Decoding {len(chunks)} voiced chunks ({voiced:.0f}s of "
+                   f"{len(audio) / WHISPER_SAMPLE_RATE:.0f}s audio) on {self.num_workers} workers...")
+
+        def decode_chunk(bounds: Tuple[int, int]) -> List[TranscriptionSegment]:
+            start, end = bounds
+            offset = start / WHISPER_SAMPLE_RATE
+            segments, _ = model.transcribe(
+                audio[start:end],
+                language=self.language,
+                beam_size=self.beam_size,
+                vad_filter=False,
+                condition_on_previous_text=False
+            )
+            return [
+                TranscriptionSegment(start=offset + seg.start, end=offset + seg.end, text=seg.text.strip())
+                for seg in segments
+            ]
+
+        with ThreadPoolExecutor(max_workers=self.num_workers, thread_name_prefix="asr") as executor:
+            decoded = list(executor.map(decode_chunk, chunks))
+
+        segments = [seg for chunk_segments in decoded for seg in chunk_segments if seg.text]
+        text = " ".join(seg.text for seg in segments)
+        return TranscriptionResult(text=text, segments=segments, backend=self.name)
+
+    def _pack_chunks(self, regions: List[Tuple[int, int]], max_gap_seconds: float = 2.0) -> List[Tuple[int, int]]:
+        """
+        Pack speech regions (in samples) into chunks no longer than max_chunk_seconds.
+
+        Regions separated by more than ``max_gap_seconds`` of silence always
+        start a new chunk, so long pauses are never decoded.
+        """
+        max_len = int(self.max_chunk_seconds * WHISPER_SAMPLE_RATE)
+        max_gap = int(max_gap_seconds * WHISPER_SAMPLE_RATE)
+        chunks = []
+        current_start = current_end = None
+
+        for start, end in regions:
+            # Split regions that are longer than a chunk on their own
+            while end - start > max_len:
+                if current_start is not None:
+                    chunks.append((current_start, current_end))
+                    current_start = current_end = None
+                chunks.append((start, start + max_len))
+                start += max_len
+
+            if current_start is None:
+                current_start, current_end = start, end
+            elif end - current_start <= max_len and start - current_end <= max_gap:
+                current_end = end
+            else:
+                chunks.append((current_start, current_end))
+                current_start, current_end = start, end
+
+        if current_start is not None:
+            chunks.append((current_start, current_end))
+        return chunks
+
+
+def get_asr_backend(name: Optional[str] = None, openai_api_key: Optional[str] = None) -> Optional[ASRBackend]:
+    """
+    Build the configured ASR backend.
+
+    Args:
+        name: "openai" or "local" (defaults to the ASR_BACKEND env var, then "openai")
+        openai_api_key: API key for the OpenAI backend
+
+    Returns:
+        An ASRBackend, or None if the OpenAI backend is selected without an API key
+    """
+    name = (name or os.getenv("ASR_BACKEND", "openai")).lower()
+
+    if name == "local":
+        return LocalWhisperBackend()
+    if name == "openai":
+        api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        return OpenAIWhisperBackend(api_key=api_key) if api_key else None
+    raise ValueError(f"Unknown ASR backend: {name}. Supported backends: openai, local")
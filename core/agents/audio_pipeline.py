@@ -0,0 +1,710 @@
+"""
+Audio Pipeline for Shadowdark GM Assistant
+
+Runs the whole recording-to-notes workflow as a DAG of stages:
+
+    split -> [vad] -> (diarize || transcribe) per segment -> transcript per segment
+          -> merge -> summarize -> Notion sync
+
+The optional VAD stage cuts each segment down to its voiced audio before
+diarization and transcription; their timestamps are mapped back onto the
+segment clock with the stage's time-remap table.
+
+Stages run on a bounded thread pool as soon as their dependencies finish,
+so segments are processed concurrently. Each stage gets a content-hash key
+derived from its parameters and the keys of its dependencies (the split
+stage is keyed by the audio content hash). Outputs are written to a
+directory named after that key and recorded in a job manifest
+(``job.json``). Re-running the same job skips every stage whose key
+matches a completed record with intact outputs, so a failure only costs
+the stages after it.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+import threading
+from pathlib import Path
+from dataclasses import dataclass, field, asdict, replace
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Callable, Dict, List, Optional
+
+from .audio_splitter import AudioSplitter, SegmentInfo, SegmentManifest
+from .diarization_cache import compute_audio_hash
+from .speech_transcoder import SpeechTranscoder
+from .vad import SpeechMap, VoiceActivityDetector
+from ..data.transcript_store import store_path_for, write_transcript_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+JOB_MANIFEST_VERSION = 1
+
+
+class PipelineError(Exception):
+    """Raised when one or more pipeline stages fail."""
+
+    def __init__(self, failed: Dict[str, str]):
+        self.failed = failed
+        details = ", ".join(f"{name} ({error})" for name, error in failed.items())
+        super().__init__(f"Pipeline stages failed: {details}")
+
+
+@dataclass
+class PipelineStage:
+    """A unit of work in the DAG."""
+    name: str
+    run: Callable[["StageContext"], Dict[str, Any]]
+    deps: List[str] = field(default_factory=list)
+    params: Dict[str, Any] = field(default_factory=dict)  # hashed into the stage key
+
+
+@dataclass
+class StageContext:
+    """What a stage receives when it runs."""
+    name: str
+    key: str
+    stage_dir: Path
+    inputs: Dict[str, Dict[str, Any]]  # outputs of dependency stages, by stage name
+
+
+def _describe_artifact(path) -> Dict[str, Any]:
+    stat = Path(path).stat()
+    return {"path": str(path), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": compute_audio_hash(path)}
+
+
+def _artifact_intact(artifact: Dict[str, Any]) -> bool:
+    path = Path(artifact["path"])
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    if stat.st_size != artifact["size"]:
+        return False
+    if stat.st_mtime_ns == artifact.get("mtime_ns"):
+        return True
+    # Touched, restored or rewritten in place: only the content decides
+    return compute_audio_hash(path) == artifact["sha256"]
+
+
+class JobManifest:
+    """
+    Persistent record of stage keys, statuses and outputs for one job.
+
+    Stage outputs are JSON values; files a stage produced are listed under
+    ``artifacts`` with their size, modification time and SHA-256 so a resume
+    can tell whether they are still intact. A file whose size or mtime
+    changed is hashed again, and the stage re-runs if its content differs.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self.data = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if self.path.exists():
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    data = json.load(f)
+                if data.get("version") == JOB_MANIFEST_VERSION:
+                    return data
+            except (OSError, json.JSONDecodeError) as e:
+                logger.warning(f"⚠️  Ignoring unreadable job manifest {self.path}: {e}")
+        return {"version": JOB_MANIFEST_VERSION, "created_at": time.time(), "stages": {}}
+
+    def completed(self, name: str, key: str) -> Optional[Dict[str, Any]]:
+        """Outputs of a finished stage with this key, or None if it must (re)run."""
+        with self._lock:
+            record = self.data["stages"].get(name)
+        if not record or record.get("status") != "done" or record.get("key") != key:
+            return None
+
+        for artifact in record.get("artifacts", {}).values():
+            if not _artifact_intact(artifact):
+                logger.info(f"🔁 {name}: output {Path(artifact['path']).name} is missing or changed, re-running")
+                return None
+        return record["outputs"]
+
+    def record(self, name: str, key: str, status: str, **fields) -> None:
+        with self._lock:
+            self.data["stages"][name] = {"key": key, "status": status, "updated_at": time.time(), **fields}
+            self.data["updated_at"] = time.time()
+            self._save()
+
+    def set(self, **fields) -> None:
+        with self._lock:
+            self.data.update(fields)
+            self._save()
+
+    def _save(self) -> None:
+        # Write atomically so an interrupted run never corrupts the manifest
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, indent=2, default=str)
+        os.replace(tmp_path, self.path)
+
+
+class PipelineExecutor:
+    """
+    Runs PipelineStages in dependency order with bounded parallelism.
+
+    ``run`` may be called several times (e.g. once to split, then with the
+    per-segment stages); keys and outputs of earlier calls stay available
+    as dependencies.
+    """
+
+    def __init__(self, manifest: JobManifest, work_dir: Path, max_workers: int = 4, force: bool = False):
+        self.manifest = manifest
+        self.work_dir = Path(work_dir)
+        self.max_workers = max_workers
+        self.force = force
+        self.keys: Dict[str, str] = {}
+        self.outputs: Dict[str, Dict[str, Any]] = {}
+        self.ran: List[str] = []
+        self.skipped: List[str] = []
+
+    def stage_key(self, stage: PipelineStage) -> str:
+        payload = {
+            "stage": stage.name,
+            "params": stage.params,
+            "deps": {dep: self.keys[dep] for dep in stage.deps},
+        }
+        return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+    def run(self, stages: List[PipelineStage]) -> Dict[str, Dict[str, Any]]:
+        """
+        Run the stages, skipping ones already completed with the same key.
+
+        Args:
+            stages: Stages to run; dependencies may refer to stages from earlier calls
+
+        Returns:
+            Outputs of every stage run so far, by name
+
+        Raises:
+            PipelineError: If any stage failed (its dependents are not run)
+        """
+        pending = {stage.name: stage for stage in stages}
+        for stage in stages:
+            unknown = [dep for dep in stage.deps if dep not in pending and dep not in self.outputs]
+            if unknown:
+                raise ValueError(f"Stage {stage.name} depends on unknown stages: {unknown}")
+
+        failed: Dict[str, str] = {}
+        running = {}
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="pipeline") as pool:
+            while pending or running:
+                self._schedule_ready(pending, running, failed, pool)
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        self.outputs[stage.name] = future.result()
+                        self.ran.append(stage.name)
+                    except Exception as e:
+                        failed[stage.name] = f"{type(e).__name__}: {e}"
+                        logger.error(f"❌ Stage {stage.name} failed: {e}")
+
+        if failed:
+            raise PipelineError(failed)
+        return self.outputs
+
+    def _schedule_ready(self, pending, running, failed, pool) -> None:
+        # Loop because skipping a completed stage can make its dependents ready
+        progressed = True
+        while progressed:
+            progressed = False
+            for name, stage in list(pending.items()):
+                if any(dep in failed for dep in stage.deps):
+                    del pending[name]
+                    failed[name] = "dependency failed"
+                    progressed = True
+                    continue
+                if not all(dep in self.outputs for dep in stage.deps):
+                    continue
+
+                del pending[name]
+                progressed = True
+                key = self.stage_key(stage)
+                self.keys[name] = key
+
+                cached = None if self.force else self.manifest.completed(name, key)
+                if cached is not None:
+                    logger.info(f"⏭️  {name}: already complete ({key[:12]})")
+                    self.outputs[name] = cached
+                    self.skipped.append(name)
+                else:
+                    running[pool.submit(self._run_stage, stage, key)] = stage
+
+    def _run_stage(self, stage: PipelineStage, key: str) -> Dict[str, Any]:
+        stage_dir = self.work_dir / "stages" / f"{stage.name}-{key[:12]}"
+        stage_dir.mkdir(parents=True, exist_ok=True)
+        context = StageContext(
+            name=stage.name,
+            key=key,
+            stage_dir=stage_dir,
+            inputs={dep: self.outputs[dep] for dep in stage.deps}
+        )
+
+        logger.info(f"▶️  {stage.name}: running")
+        self.manifest.record(stage.name, key, "running")
+        start = time.perf_counter()
+        try:
+            outputs = stage.run(context) or {}
+        except Exception as e:
+            self.manifest.record(stage.name, key, "failed", error=f"{type(e).__name__}: {e}",
+                                 seconds=time.perf_counter() - start)
+            raise
+
+        artifacts = {label: _describe_artifact(path) for label, path in outputs.pop("artifacts", {}).items()}
+        outputs["artifacts"] = {label: artifact["path"] for label, artifact in artifacts.items()}
+        elapsed = time.perf_counter() - start
+        self.manifest.record(stage.name, key, "done", outputs=outputs, artifacts=artifacts, seconds=elapsed)
+        logger.info(f"✅ {stage.name}: done in {elapsed:.1f}s")
+        return outputs
+
+
+@dataclass
+class PipelineResult:
+    """Where a pipeline run left its outputs."""
+    work_dir: Path
+    manifest_path: Path
+    transcript_path: Optional[Path] = None
+    notes_path: Optional[Path] = None
+    notion_url: Optional[str] = None
+    silence_removed_percent: Optional[float] = None
+    ran: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    seconds: float = 0.0
+
+
+class AudioPipeline:
+    """
+    End-to-end processing of a session recording into notes.
+
+    Usage:
+        pipeline = AudioPipeline(max_workers=4, notion=True)
+        result = pipeline.run("session_12.m4a")   # re-run to resume after a failure
+    """
+
+    def __init__(
+        self,
+        work_dir: Optional[str] = None,
+        max_workers: int = 4,
+        quality: str = "balanced",
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        split_engine: str = "parallel",
+        cut_strategy: str = "silence",
+        transcoder: Optional[SpeechTranscoder] = None,
+        vad: Optional[VoiceActivityDetector] = None,
+        asr_backend=None,
+        huggingface_token: Optional[str] = None,
+        openai_api_key: Optional[str] = None,
+        diarization_workers: int = 0,
+        cpu_mode: Optional[str] = None,
+        campaign_id: Optional[int] = None,
+        notion: bool = False,
+        force: bool = False
+    ):
+        """
+        Args:
+            work_dir: Job directory (defaults to ``<audio stem>_pipeline`` next to the audio)
+            max_workers: Stages run concurrently
+            quality: Diarization quality preset
+            min_speakers: Minimum number of speakers (optional)
+            max_speakers: Maximum number of speakers (optional)
+            split_engine: AudioSplitter engine
+            cut_strategy: AudioSplitter cut strategy
+            transcoder: Re-encode segments as compact speech before upload
+            vad: Drop silence from each segment before diarization and transcription
+            asr_backend: Speech-to-text backend (defaults to ASR_BACKEND)
+            huggingface_token: HuggingFace token for the diarization model
+            openai_api_key: OpenAI key for transcription and summarization
+            diarization_workers: Diarize on a worker pool of this size (0 = in-process)
+            cpu_mode: Diarization CPU inference mode (defaults to DIARIZATION_CPU_MODE, see cpu_inference)
+            campaign_id: Campaign for the session notes
+            notion: Sync the notes to Notion at the end
+            force: Ignore completed stages and run everything again
+        """
+        self.work_dir = Path(work_dir) if work_dir else None
+        self.max_workers = max_workers
+        self.quality = quality
+        self.min_speakers = min_speakers
+        self.max_speakers = max_speakers
+        self.split_engine = split_engine
+        self.cut_strategy = cut_strategy
+        self.transcoder = transcoder
+        self.vad = vad
+        self.huggingface_token = huggingface_token or os.getenv("HUGGINGFACE_TOKEN")
+        self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
+        self.diarization_workers = diarization_workers
+        self.cpu_mode = cpu_mode or os.getenv("DIARIZATION_CPU_MODE", "default")
+        self.campaign_id = campaign_id
+        self.notion = notion
+        self.force = force
+
+        if asr_backend is None:
+            from .asr_backends import get_asr_backend
+            asr_backend = get_asr_backend(openai_api_key=self.openai_api_key)
+        self.asr_backend = asr_backend
+
+        self._diarizer = None
+        self._diarizer_lock = threading.Lock()
+        self._resource_lock = threading.Lock()
+        self._pool = None
+
+    def run(self, audio_path: str) -> PipelineResult:
+        """
+        Process a recording, resuming from the job manifest if one exists.
+
+        Args:
+            audio_path: Path to the session recording
+
+        Returns:
+            PipelineResult with output paths and which stages ran or were skipped
+        """
+        audio_path = Path(audio_path)
+        if not audio_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        if self.asr_backend is None:
+            raise ValueError("OpenAI API key required for transcription (or set ASR_BACKEND=local)")
+
+        work_dir = self.work_dir or audio_path.parent / f"{audio_path.stem}_pipeline"
+        manifest = JobManifest(work_dir / "job.json")
+        executor = PipelineExecutor(manifest, work_dir, max_workers=self.max_workers, force=self.force)
+        start = time.perf_counter()
+
+        logger.info(f"🧮 Hashing {audio_path.name}...")
+        source_sha256 = compute_audio_hash(audio_path)
+        manifest.set(source=str(audio_path), source_sha256=source_sha256)
+
+        try:
+            # Phase 1: split (the segment count is only known afterwards)
+            outputs = executor.run([self._split_stage(audio_path, source_sha256)])
+            segments = SegmentManifest.load(Path(outputs["split"]["manifest"]))
+            logger.info(f"🧩 {len(segments.segments)} segments; running up to {self.max_workers} stages at a time")
+
+            # Phase 2: everything downstream of the split
+            outputs = executor.run(self._segment_stages(audio_path, source_sha256, segments))
+        finally:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
+
+        result = PipelineResult(
+            work_dir=work_dir,
+            manifest_path=manifest.path,
+            transcript_path=Path(outputs["merge"]["transcript"]),
+            notes_path=Path(outputs["summarize"]["notes"]),
+            notion_url=outputs.get("notion", {}).get("url"),
+            silence_removed_percent=self._silence_removed(outputs, segments),
+            ran=executor.ran,
+            skipped=executor.skipped,
+            seconds=time.perf_counter() - start
+        )
+        logger.info(f"🎉 Pipeline finished in {result.seconds:.1f}s "
+                   f"({len(result.ran)} stages run, {len(result.skipped)} skipped)")
+        return result
+
+    # --- stage definitions -------------------------------------------------
+
+    def _split_stage(self, audio_path: Path, source_sha256: str) -> PipelineStage:
+        def run(ctx: StageContext) -> Dict[str, Any]:
+            splitter = AudioSplitter()
+            splitter.split_audio(
+                str(audio_path),
+                str(ctx.stage_dir),
+                engine=self.split_engine,
+                cut_strategy=self.cut_strategy,
+                transcoder=self.transcoder
+            )
+            manifest = splitter.last_manifest
+            manifest_path = ctx.stage_dir / f"{audio_path.stem}_manifest.json"
+            if manifest is None:
+                # Small enough to process whole: one segment pointing at the source
+                duration = splitter.get_audio_duration(audio_path)
+                manifest = SegmentManifest(
+                    source=str(audio_path),
+                    source_sha256=source_sha256,
+                    source_duration=duration,
+                    engine="none",
+                    overlap_seconds=0.0,
+                    segments=[SegmentInfo(1, str(audio_path), 0.0, duration, duration, 0.0,
+                                          audio_path.stat().st_size, source_sha256)]
+                )
+                manifest.save(manifest_path)
+
+            artifacts = {"manifest": manifest_path}
+            for seg in manifest.segments:
+                if Path(seg.path) != audio_path:
+                    artifacts[f"segment_{seg.index:03d}"] = seg.path
+            return {"manifest": str(manifest_path), "artifacts": artifacts}
+
+        return PipelineStage(
+            name="split",
+            run=run,
+            params={
+                "source_sha256": source_sha256,
+                "engine": self.split_engine,
+                "cut_strategy": self.cut_strategy,
+                "encoding": self.transcoder.description if self.transcoder else None,
+            }
+        )
+
+    def _segment_stages(self, audio_path: Path, source_sha256: str, segments: SegmentManifest) -> List[PipelineStage]:
+        from .diarizer import DIARIZATION_MODEL_ID
+
+        stages = []
+        transcript_stages = []
+        for seg in segments.segments:
+            suffix = f"{seg.index:03d}"
+            diarize, transcribe, transcript = f"diarize_{suffix}", f"transcribe_{suffix}", f"transcript_{suffix}"
+            audio_deps, vad_stage, vad_params = ["split"], None, {}
+            if self.vad:
+                vad_stage = f"vad_{suffix}"
+                stages.append(PipelineStage(
+                    name=vad_stage,
+                    run=lambda ctx, seg=seg: self._run_vad(ctx, seg),
+                    deps=["split"],
+                    params={"segment_sha256": seg.sha256, "vad": self.vad.description,
+                            "encoding": self.transcoder.description if self.transcoder else None}
+                ))
+                audio_deps, vad_params = [vad_stage], {"vad": self.vad.description}
+
+            stages.append(PipelineStage(
+                name=diarize,
+                run=lambda ctx, seg=seg, v=vad_stage: self._run_diarize(ctx, seg, source_sha256, v),
+                deps=audio_deps,
+                params={"segment_sha256": seg.sha256, "model": DIARIZATION_MODEL_ID, "cpu_mode": self.cpu_mode,
+                        "quality": self.quality, "min_speakers": self.min_speakers,
+                        "max_speakers": self.max_speakers, **vad_params}
+            ))
+            stages.append(PipelineStage(
+                name=transcribe,
+                run=lambda ctx, seg=seg, v=vad_stage: self._run_transcribe(ctx, seg, v),
+                deps=audio_deps,
+                params={"segment_sha256": seg.sha256, "asr_backend": self.asr_backend.name, **vad_params}
+            ))
+            stages.append(PipelineStage(
+                name=transcript,
+                run=lambda ctx, seg=seg, d=diarize, t=transcribe: self._run_transcript(ctx, seg, audio_path, d, t),
+                deps=[diarize, transcribe]
+            ))
+            transcript_stages.append(transcript)
+
+        stages.append(PipelineStage(
+            name="merge",
+            run=lambda ctx: self._run_merge(ctx, audio_path, transcript_stages),
+            deps=["split"] + transcript_stages
+        ))
+        stages.append(PipelineStage(
+            name="summarize",
+            run=self._run_summarize,
+            deps=["merge"],
+            params={"campaign_id": self.campaign_id, "mock": self._use_mock_llm()}
+        ))
+        if self.notion:
+            stages.append(PipelineStage(
+                name="notion",
+                run=lambda ctx: self._run_notion(ctx, audio_path),
+                deps=["summarize"]
+            ))
+        return stages
+
+    # --- stage implementations ---------------------------------------------
+
+    def _run_vad(self, ctx: StageContext, seg: SegmentInfo) -> Dict[str, Any]:
+        speech_map, voiced_path = self.vad.trim(Path(seg.path), ctx.stage_dir, transcoder=self.transcoder)
+        map_path = ctx.stage_dir / "speech_map.json"
+        speech_map.save(map_path)
+        artifacts = {"speech_map": map_path}
+        if voiced_path:
+            artifacts["audio"] = voiced_path
+        return {
+            "speech_map": str(map_path),
+            "audio": str(voiced_path or seg.path),
+            "removed_percent": round(speech_map.removed_percent, 2),
+            "artifacts": artifacts
+        }
+
+    def _segment_audio(self, ctx: StageContext, seg: SegmentInfo, vad_stage: Optional[str]):
+        """Audio to diarize/transcribe for a segment, its speech map, and the remap back to the segment clock."""
+        if not vad_stage or ctx.inputs[vad_stage]["audio"] == seg.path:
+            return seg.path, None, None
+        speech_map = SpeechMap.load(Path(ctx.inputs[vad_stage]["speech_map"]))
+        return ctx.inputs[vad_stage]["audio"], speech_map, speech_map.remap()
+
+    def _run_diarize(
+        self,
+        ctx: StageContext,
+        seg: SegmentInfo,
+        source_sha256: str,
+        vad_stage: Optional[str] = None
+    ) -> Dict[str, Any]:
+        from .diarizer import QUALITY_PRESETS, SpeakerSegment
+
+        audio, speech_map, remap = self._segment_audio(ctx, seg, vad_stage)
+        settings = QUALITY_PRESETS.get(self.quality, QUALITY_PRESETS["balanced"])
+        if self.diarization_workers > 0:
+            future = self._get_pool().submit(
+                audio,
+                session_id=source_sha256,
+                min_speakers=self.min_speakers,
+                max_speakers=self.max_speakers,
+                **settings
+            )
+            result = future.result()
+        else:
+            # One pipeline in memory; pyannote inference is not safe to share across threads
+            with self._diarizer_lock:
+                result = self._get_diarizer().diarize_audio(
+                    audio,
+                    min_speakers=self.min_speakers,
+                    max_speakers=self.max_speakers,
+                    **settings
+                )
+
+        if remap:
+            # Results may be shared with the diarization cache; build new ones
+            result = replace(result, total_duration=speech_map.duration, segments=[
+                SpeakerSegment(start, end, segment.speaker_id, end - start)
+                for segment in result.segments
+                for start, end in remap.span_to_source(segment.start_time, segment.end_time)
+            ])
+
+        output_path = ctx.stage_dir / "diarization.json"
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(result), f)
+        return {"diarization": str(output_path), "artifacts": {"diarization": output_path}}
+
+    def _run_transcribe(self, ctx: StageContext, seg: SegmentInfo, vad_stage: Optional[str] = None) -> Dict[str, Any]:
+        audio, _, remap = self._segment_audio(ctx, seg, vad_stage)
+        result = self.asr_backend.transcribe(audio)
+        if remap:
+            for segment in result.segments:
+                segment.start, segment.end = remap.to_source(segment.start), remap.to_source(segment.end)
+
+        output_path = ctx.stage_dir / "transcription.json"
+        with open(output_path, "w", encoding="utf-8") as f:
+            json.dump(asdict(result), f)
+        return {"transcription": str(output_path), "artifacts": {"transcription": output_path}}
+
+    def _run_transcript(
+        self,
+        ctx: StageContext,
+        seg: SegmentInfo,
+        audio_path: Path,
+        diarize_stage: str,
+        transcribe_stage: str
+    ) -> Dict[str, Any]:
+        from .diarizer import DiarizationResult, SpeakerSegment
+        from .transcript_generator import TranscriptGenerator
+
+        with open(ctx.inputs[diarize_stage]["diarization"], "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["segments"] = [SpeakerSegment(**s) for s in data["segments"]]
+        diarization_result = DiarizationResult(**data)
+
+        with open(ctx.inputs[transcribe_stage]["transcription"], "r", encoding="utf-8") as f:
+            transcript_text = json.load(f)["text"]
+
+        diarizer = self._get_diarizer()
+        if transcript_text:
+            diarizer.apply_transcript_corrections(diarization_result, transcript_text)
+        speaker_mapping = diarizer.get_speaker_mapping(diarization_result)
+
+        generator = TranscriptGenerator(asr_backend=self.asr_backend)
+        content = generator._create_formatted_transcript(
+            diarization_result, transcript_text, speaker_mapping, Path(seg.path), segment_number=seg.index
+        )
+        output_path = ctx.stage_dir / f"{audio_path.stem}_segment_{seg.index:03d}_transcript.md"
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(content)
+        artifacts = {"transcript": output_path}
+        store_path = write_transcript_store(generator.last_table, output_path)
+        if store_path:
+            artifacts["store"] = store_path
+        return {"transcript": str(output_path), "artifacts": artifacts}
+
+    def _run_merge(self, ctx: StageContext, audio_path: Path, transcript_stages: List[str]) -> Dict[str, Any]:
+        from .transcript_merger import TranscriptMerger
+
+        files = [ctx.inputs[name]["transcript"] for name in transcript_stages]
+        output_path = ctx.stage_dir / f"{audio_path.stem}_merged_transcript.md"
+        TranscriptMerger().merge_transcripts(files, str(output_path), manifest_path=ctx.inputs["split"]["manifest"])
+        artifacts = {"transcript": output_path}
+        if store_path_for(output_path).exists():
+            artifacts["store"] = store_path_for(output_path)
+        return {"transcript": str(output_path), "artifacts": artifacts}
+
+    def _run_summarize(self, ctx: StageContext) -> Dict[str, Any]:
+        from .session_scribe import load_transcript_for_notes, summarize_text
+
+        transcript_path = Path(ctx.inputs["merge"]["transcript"])
+        # A failure fails the stage instead of recording the error template as done
+        notes = summarize_text(
+            load_transcript_for_notes(transcript_path),
+            campaign_id=self.campaign_id,
+            use_mock=self._use_mock_llm(),
+            raise_errors=True
+        )
+
+        output_path = ctx.stage_dir / transcript_path.name.replace("_merged_transcript", "_session_notes")
+        output_path.write_text(notes, encoding="utf-8")
+        return {"notes": str(output_path), "artifacts": {"notes": output_path}}
+
+    def _run_notion(self, ctx: StageContext, audio_path: Path) -> Dict[str, Any]:
+        from core.integrations.notion_sync import NotionSync
+
+        notes = Path(ctx.inputs["summarize"]["notes"]).read_text(encoding="utf-8")
+        page = NotionSync().create_session_page(title=f"Session Notes - {audio_path.stem}", content=notes)
+        return {"page_id": page.get("id"), "url": page.get("url")}
+
+    def _silence_removed(self, outputs: Dict[str, Dict[str, Any]], segments: SegmentManifest) -> Optional[float]:
+        """Share of the recording VAD kept away from diarization and transcription."""
+        if not self.vad:
+            return None
+        total = sum(seg.duration for seg in segments.segments)
+        removed = sum(seg.duration * outputs[f"vad_{seg.index:03d}"]["removed_percent"] / 100
+                      for seg in segments.segments)
+        percent = 100.0 * removed / total if total else 0.0
+        logger.info(f"🔇 VAD removed {percent:.1f}% of the audio ({removed / 60:.1f} of {total / 60:.1f} minutes)")
+        return percent
+
+    # --- shared resources --------------------------------------------------
+
+    def _get_diarizer(self):
+        with self._resource_lock:
+            if self._diarizer is None:
+                from .diarizer import SpeakerDiarizer
+                self._diarizer = SpeakerDiarizer(
+                    huggingface_token=self.huggingface_token,
+                    openai_api_key=self.openai_api_key,
+                    asr_backend=self.asr_backend,
+                    cpu_mode=self.cpu_mode
+                )
+        return self._diarizer
+
+    def _get_pool(self):
+        with self._resource_lock:
+            if self._pool is None:
+                from .diarization_pool import DiarizationWorkerPool
+                self._pool = DiarizationWorkerPool(
+                    num_workers=self.diarization_workers,
+                    huggingface_token=self.huggingface_token,
+                    cpu_mode=self.cpu_mode
+                ).start()
+        return self._pool
+
+    def _use_mock_llm(self) -> bool:
+        return not (self.openai_api_key or "").startswith("sk-")
@@ -7,17 +7,87 @@ quality and providing seamless segment boundaries.
 """
 
 import os
+import csv
+import json
+import time
 import logging
 import tempfile
 import subprocess
 from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional
 import math
 
+from .. import metrics
+from .diarization_cache import compute_audio_hash
+from .speech_transcoder import SpeechTranscoder, format_bytes_saved
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SPLIT_ENGINES = ("parallel", "segment")
+CUT_STRATEGIES = ("fixed", "silence")
+
+
+@dataclass
+class SegmentInfo:
+    """One segment of a split recording; times are offsets into the source in seconds."""
+    index: int
+    path: str
+    start: float
+    end: float
+    duration: float
+    overlap_before: float  # seconds shared with the previous segment
+    size_bytes: int
+    sha256: str
+
+
+@dataclass
+class SegmentManifest:
+    """Describes how a recording was split, for downstream stages (transcription, merging)."""
+    source: str
+    source_sha256: str
+    source_duration: float
+    engine: str
+    overlap_seconds: float
+    segments: List[SegmentInfo] = field(default_factory=list)
+    cut_strategy: str = "fixed"
+    encoding: Optional[str] = None  # None = stream copy of the source codec
+
+    def save(self, path: Path) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(asdict(self), f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path) -> "SegmentManifest":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data["segments"] = [SegmentInfo(**seg) for seg in data.get("segments", [])]
+        return cls(**data)
+
+
+def plan_segments(total_duration: float, segment_duration: float, overlap: float = 0.0) -> List[Tuple[float, float]]:
+    """
+    Plan (start, end) offsets covering the recording.
+
+    Each segment after the first starts ``overlap`` seconds before the
+    previous one ends.
+    """
+    if overlap >= segment_duration:
+        raise ValueError("Overlap must be shorter than the segment duration")
+
+    plan = []
+    start = 0.0
+    while start < total_duration:
+        end = min(start + segment_duration, total_duration)
+        plan.append((start, end))
+        if end >= total_duration:
+            break
+        start = end - overlap
+    return plan
+
 
 class AudioSplitter:
     """
@@ -30,7 +100,9 @@ class AudioSplitter:
     def __init__(self):
         self.max_size_mb = 23  # Stay under 25MB limit with buffer
         self.overlap_seconds = 30  # Overlap between segments for continuity
+        self.silence_overlap_seconds = 0  # Cuts placed in pauses need no overlap
         self._supported_formats = {'.wav', '.mp3', '.m4a', '.mp4', '.mpeg', '.mpga', '.webm'}
+        self.last_manifest: Optional[SegmentManifest] = None
     
     def should_split(self, audio_path: Path) -> bool:
         """
@@ -87,13 +159,19 @@ class AudioSplitter:
             logger.warning(f"Using estimated duration: {estimated_duration:.1f} seconds")
             return estimated_duration
     
-    def calculate_segment_duration(self, total_duration: float, file_size_mb: float) -> float:
+    def calculate_segment_duration(
+        self,
+        total_duration: float,
+        file_size_mb: float,
+        round_to_blocks: bool = True
+    ) -> float:
         """
         Calculate optimal segment duration to stay under size limit.
         
         Args:
             total_duration: Total audio duration in seconds
             file_size_mb: Total file size in MB
+            round_to_blocks: Round down to whole 5-minute blocks (for fixed cuts)
             
         Returns:
             Segment duration in seconds
@@ -104,6 +182,12 @@ class AudioSplitter:
         # Calculate segment duration to stay under limit
         target_segment_duration = self.max_size_mb / mb_per_second
         
+        if not round_to_blocks:
+            # Silence-aware cuts only ever move earlier, so the exact limit is safe
+            segment_duration = max(60.0, math.floor(target_segment_duration))
+            logger.info(f"📊 Calculated segment duration: {segment_duration/60:.1f} minutes")
+            return segment_duration
+        
         # Round down to nearest 5 minutes for clean segments
         target_minutes = math.floor(target_segment_duration / 300) * 5
         if target_minutes < 5:  # Minimum 5 minutes
@@ -114,18 +198,43 @@ class AudioSplitter:
         
         return segment_duration
     
-    def split_audio(self, audio_path: str, output_dir: Optional[str] = None) -> List[Path]:
+    def split_audio(
+        self,
+        audio_path: str,
+        output_dir: Optional[str] = None,
+        engine: str = "parallel",
+        max_workers: Optional[int] = None,
+        segment_duration: Optional[float] = None,
+        cut_strategy: str = "fixed",
+        transcoder: Optional[SpeechTranscoder] = None
+    ) -> List[Path]:
         """
         Split audio file into smaller segments.
         
+        Both engines seek on the input, so each byte of the source is read
+        about once no matter how many segments there are. A manifest with
+        segment offsets, durations and hashes is written next to the
+        segments (``<name>_manifest.json``) and kept on ``last_manifest``,
+        which is None when the file is returned unsplit.
+        
         Args:
             audio_path: Path to the input audio file
             output_dir: Directory to save segments (defaults to same directory as input)
+            engine: "parallel" (input-seeking ffmpeg per segment, with overlap) or
+                "segment" (one ffmpeg segment-muxer pass, no overlap)
+            max_workers: Concurrent ffmpeg processes for the parallel engine
+            segment_duration: Segment length in seconds (defaults to a size-based estimate)
+            cut_strategy: "fixed" (cut at exact offsets) or "silence" (cut in the
+                quietest point before each offset, without overlap)
+            transcoder: Re-encode segments as compact speech audio; the segment
+                duration is then derived from its bitrate, often giving one segment
             
         Returns:
             List of paths to the created segment files
         """
         audio_path = Path(audio_path)
+        # Never leave the previous file's timeline behind
+        self.last_manifest = None
         
         # Validate input
         if not audio_path.exists():
@@ -134,8 +243,14 @@ class AudioSplitter:
         if audio_path.suffix.lower() not in self._supported_formats:
             raise ValueError(f"Unsupported audio format: {audio_path.suffix}")
         
-        # Check if splitting is needed
-        if not self.should_split(audio_path):
+        if engine not in SPLIT_ENGINES:
+            raise ValueError(f"Unknown split engine: {engine}. Supported engines: {', '.join(SPLIT_ENGINES)}")
+        
+        if cut_strategy not in CUT_STRATEGIES:
+            raise ValueError(f"Unknown cut strategy: {cut_strategy}. Supported strategies: {', '.join(CUT_STRATEGIES)}")
+        
+        # Check if splitting is needed (transcoding always produces new files)
+        if segment_duration is None and transcoder is None and not self.should_split(audio_path):
             logger.info("📝 No splitting needed - returning original file")
             return [audio_path]
         
@@ -144,7 +259,14 @@ class AudioSplitter:
         file_size_mb = audio_path.stat().st_size / (1024 * 1024)
         
         # Calculate segment parameters
-        segment_duration = self.calculate_segment_duration(total_duration, file_size_mb)
+        if segment_duration is None and transcoder is not None:
+            # Encoded size is bitrate x duration, so the limit gives the length directly
+            segment_duration = math.floor(transcoder.max_segment_duration(self.max_size_mb))
+            logger.info(f"📊 {transcoder.description} fits {segment_duration/60:.1f} minutes per segment")
+        elif segment_duration is None:
+            segment_duration = self.calculate_segment_duration(
+                total_duration, file_size_mb, round_to_blocks=(cut_strategy == "fixed")
+            )
         
         # Set up output directory
         if output_dir is None:
@@ -153,71 +275,209 @@ class AudioSplitter:
             output_dir = Path(output_dir)
             output_dir.mkdir(parents=True, exist_ok=True)
         
-        # Generate output filenames
-        base_name = audio_path.stem
-        extension = audio_path.suffix
-        
-        segments = []
-        segment_num = 0
-        current_start = 0.0
+        # The segment muxer cannot produce overlapping segments
+        if engine == "segment":
+            overlap = 0.0
+        elif cut_strategy == "silence":
+            overlap = self.silence_overlap_seconds
+        else:
+            overlap = self.overlap_seconds
         
-        logger.info(f"🔪 Starting audio splitting...")
+        logger.info(f"🔪 Starting audio splitting ({engine} engine, {cut_strategy} cuts)...")
         logger.info(f"   Total duration: {total_duration/60:.1f} minutes")
         logger.info(f"   Segment length: {segment_duration/60:.1f} minutes")
-        logger.info(f"   Overlap: {self.overlap_seconds} seconds")
+        logger.info(f"   Overlap: {overlap} seconds")
         
-        while current_start < total_duration:
-            segment_num += 1
-            
-            # Calculate segment end time
-            segment_end = min(current_start + segment_duration, total_duration)
-            
-            # Generate output filename
-            output_filename = f"{base_name}_segment_{segment_num:03d}{extension}"
-            output_path = output_dir / output_filename
-            
-            logger.info(f"📦 Creating segment {segment_num}: {current_start/60:.1f}min - {segment_end/60:.1f}min")
+        started = time.perf_counter()
+        if cut_strategy == "silence":
+            from .cut_planner import SilenceCutPlanner
+            plan = SilenceCutPlanner().plan(audio_path, total_duration, segment_duration, overlap)
+        else:
+            plan = plan_segments(total_duration, segment_duration, overlap)
+        
+        codec_args = transcoder.ffmpeg_args() if transcoder else ['-c', 'copy']  # Copy without re-encoding for speed
+        suffix = transcoder.suffix if transcoder else audio_path.suffix
+        if engine == "segment":
+            bounds = self._split_with_segment_muxer(audio_path, output_dir, plan, total_duration, codec_args, suffix)
+        else:
+            bounds = self._split_parallel(audio_path, output_dir, plan, max_workers, codec_args, suffix)
+        
+        metrics.observe("gm_ffmpeg_split_seconds", time.perf_counter() - started, engine=engine)
+        
+        manifest = self._build_manifest(audio_path, engine, overlap, total_duration, bounds, max_workers)
+        manifest.cut_strategy = cut_strategy
+        manifest.encoding = transcoder.description if transcoder else None
+        manifest_path = output_dir / f"{audio_path.stem}_manifest.json"
+        manifest.save(manifest_path)
+        self.last_manifest = manifest
+        
+        segments = [Path(seg.path) for seg in manifest.segments]
+        for seg in manifest.segments:
+            segment_size_mb = seg.size_bytes / (1024 * 1024)
+            logger.info(f"   ✅ Segment {seg.index}: {seg.start/60:.1f}min - {seg.end/60:.1f}min ({segment_size_mb:.1f}MB)")
+            if segment_size_mb > 25:
+                logger.warning(f"⚠️  Segment {seg.index} still over 25MB - may need further splitting")
+        
+        if transcoder:
+            output_bytes = sum(seg.size_bytes for seg in manifest.segments)
+            logger.info(f"🗜️  Upload size: {format_bytes_saved(audio_path.stat().st_size, output_bytes)}")
+        
+        logger.info(f"✅ Audio splitting complete in {time.perf_counter() - started:.1f}s!")
+        logger.info(f"   Created {len(segments)} segments (manifest: {manifest_path.name})")
+        logger.info(f"   Total processing time will be approximately {len(segments) * 2:.0f}-{len(segments) * 4:.0f} minutes")
+        
+        return segments
+    
+    def extract_range(
+        self,
+        audio_path: Path,
+        start: float,
+        end: float,
+        output_path: Path,
+        codec_args: Optional[List[str]] = None
+    ) -> Path:
+        """
+        Extract ``[start, end)`` of a recording, seeking on the input.
+        
+        Args:
+            audio_path: Path to the input audio file
+            start: Offset into the recording in seconds
+            end: End offset in seconds
+            output_path: Where the extracted audio is written
+            codec_args: ffmpeg encoding arguments (defaults to stream copy)
             
-            # Use ffmpeg to extract segment
+        Returns:
+            The output path
+        """
+        cmd = [
+            'ffmpeg', '-v', 'error',
+            '-ss', f"{start:.3f}",  # Input seeking: jump straight to the offset
+            '-i', str(audio_path),
+            '-t', f"{end - start:.3f}",
+            *(codec_args if codec_args is not None else ['-c', 'copy']),
+            '-avoid_negative_ts', 'make_zero',
+            '-y',  # Overwrite output files
+            str(output_path)
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip())
+        return Path(output_path)
+    
+    def _segment_path(self, audio_path: Path, output_dir: Path, index: int, suffix: str) -> Path:
+        return output_dir / f"{audio_path.stem}_segment_{index:03d}{suffix}"
+    
+    def _split_parallel(
+        self,
+        audio_path: Path,
+        output_dir: Path,
+        plan: List[Tuple[float, float]],
+        max_workers: Optional[int],
+        codec_args: List[str],
+        suffix: str
+    ) -> List[Tuple[Path, float, float]]:
+        """Extract planned segments concurrently, seeking on the input (-ss before -i)."""
+        max_workers = max_workers or min(len(plan), os.cpu_count() or 1)
+        
+        def extract(item):
+            index, (start, end) = item
+            output_path = self._segment_path(audio_path, output_dir, index, suffix)
             try:
-                cmd = [
-                    'ffmpeg', '-i', str(audio_path),
-                    '-ss', str(current_start),
-                    '-t', str(segment_end - current_start),
-                    '-c', 'copy',  # Copy without re-encoding for speed
-                    '-avoid_negative_ts', 'make_zero',
-                    '-y',  # Overwrite output files
-                    str(output_path)
-                ]
-                
-                result = subprocess.run(cmd, capture_output=True, text=True)
-                if result.returncode != 0:
-                    raise Exception(f"ffmpeg failed: {result.stderr}")
-                
-                segments.append(output_path)
-                
-                # Verify segment size
-                segment_size_mb = output_path.stat().st_size / (1024 * 1024)
-                logger.info(f"   ✅ Segment {segment_num}: {segment_size_mb:.1f}MB")
-                
-                if segment_size_mb > 25:
-                    logger.warning(f"⚠️  Segment {segment_num} still over 25MB - may need further splitting")
-                
-            except Exception as e:
-                logger.error(f"❌ Failed to create segment {segment_num}: {e}")
-                # Continue with other segments
-                continue
+                self.extract_range(audio_path, start, end, output_path, codec_args)
+            except RuntimeError as e:
+                raise RuntimeError(f"ffmpeg failed on segment {index}: {e}") from e
+            return output_path, start, end
+        
+        logger.info(f"⚡ Extracting {len(plan)} segments with {max_workers} parallel ffmpeg processes")
+        # ffmpeg does the work in child processes; threads only wait on them
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(extract, enumerate(plan, 1)))
+    
+    def _split_with_segment_muxer(
+        self,
+        audio_path: Path,
+        output_dir: Path,
+        plan: List[Tuple[float, float]],
+        total_duration: float,
+        codec_args: List[str],
+        suffix: str
+    ) -> List[Tuple[Path, float, float]]:
+        """Cut the whole file in a single ffmpeg pass with the segment muxer."""
+        cut_times = [start for start, _ in plan[1:]]
+        pattern = output_dir / f"{audio_path.stem}_segment_%03d{suffix}"
+        
+        with tempfile.NamedTemporaryFile(suffix=".csv", delete=False) as tmp:
+            list_path = Path(tmp.name)
+        try:
+            cmd = [
+                'ffmpeg', '-v', 'error',
+                '-i', str(audio_path),
+                '-map', '0:a',
+                *codec_args,
+                '-f', 'segment',
+                '-segment_start_number', '1',
+                '-reset_timestamps', '1',
+                '-segment_list', str(list_path),
+                '-segment_list_type', 'csv',
+                '-y'
+            ]
+            if cut_times:
+                cmd += ['-segment_times', ",".join(f"{t:.3f}" for t in cut_times)]
+            else:
+                cmd += ['-segment_time', f"{total_duration + 1:.3f}"]
+            cmd.append(str(pattern))
             
-            # Move to next segment (with overlap)
-            if segment_end >= total_duration:
-                break
-            current_start = segment_end - self.overlap_seconds
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                raise RuntimeError(f"ffmpeg segment muxer failed: {result.stderr}")
+            
+            # The list records where each segment actually starts and ends
+            # (copy mode can only cut on packet boundaries)
+            bounds = []
+            with open(list_path, newline="", encoding="utf-8") as f:
+                for name, start, end in csv.reader(f):
+                    bounds.append((output_dir / name, float(start), float(end)))
+            return bounds
+        finally:
+            list_path.unlink(missing_ok=True)
+    
+    def _build_manifest(
+        self,
+        audio_path: Path,
+        engine: str,
+        overlap: float,
+        total_duration: float,
+        bounds: List[Tuple[Path, float, float]],
+        max_workers: Optional[int]
+    ) -> "SegmentManifest":
+        """Hash the source and every segment (in parallel) and assemble the manifest."""
+        paths = [audio_path] + [path for path, _, _ in bounds]
+        with ThreadPoolExecutor(max_workers=max_workers or min(len(paths), os.cpu_count() or 1)) as executor:
+            hashes = list(executor.map(compute_audio_hash, paths))
         
-        logger.info(f"✅ Audio splitting complete!")
-        logger.info(f"   Created {len(segments)} segments")
-        logger.info(f"   Total processing time will be approximately {len(segments) * 2:.0f}-{len(segments) * 4:.0f} minutes")
+        segments = []
+        previous_end = None
+        for index, ((path, start, end), sha256) in enumerate(zip(bounds, hashes[1:]), 1):
+            segments.append(SegmentInfo(
+                index=index,
+                path=str(path),
+                start=round(start, 3),
+                end=round(end, 3),
+                duration=round(end - start, 3),
+                overlap_before=round(max(0.0, previous_end - start), 3) if previous_end is not None else 0.0,
+                size_bytes=path.stat().st_size,
+                sha256=sha256
+            ))
+            previous_end = end
         
-        return segments
+        return SegmentManifest(
+            source=str(audio_path),
+            source_sha256=hashes[0],
+            source_duration=round(total_duration, 3),
+            engine=engine,
+            overlap_seconds=overlap,
+            segments=segments
+        )
     
     def estimate_processing_time(self, segments: List[Path]) -> Tuple[int, int]:
         """
@@ -241,19 +501,20 @@ class AudioSplitter:
         return min_total, max_total
 
 
-def split_audio_file(audio_path: str, output_dir: Optional[str] = None) -> List[Path]:
+def split_audio_file(audio_path: str, output_dir: Optional[str] = None, engine: str = "parallel") -> List[Path]:
     """
     Convenience function to split an audio file.
     
     Args:
         audio_path: Path to the input audio file
         output_dir: Directory to save segments (optional)
+        engine: Split engine ("parallel" or "segment")
         
     Returns:
         List of paths to the created segment files
     """
     splitter = AudioSplitter()
-    return splitter.split_audio(audio_path, output_dir)
+    return splitter.split_audio(audio_path, output_dir, engine=engine)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,194 @@
+"""
+Batch Session Summarizer for Shadowdark GM Assistant
+
+Backfilling a campaign means summarizing dozens of recorded sessions. The
+batch summarizer runs them concurrently on a thread pool; the shared OpenAI
+client (core/integrations/openai_client.py) keeps the combined load within
+the account's rate limits, so extra workers queue for their turn instead
+of failing. Each session is persisted as soon as its notes are ready, and
+the report records status, token usage and latency per item.
+"""
+
+import os
+import time
+import logging
+from dataclasses import asdict, dataclass, field
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List, Optional
+
+from core.integrations.openai_client import track_usage
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class BatchItem:
+    """One transcript to summarize."""
+    name: str
+    transcript: str
+    context_chunks: Optional[List[str]] = None
+
+
+@dataclass
+class BatchItemResult:
+    """Outcome of one batch item."""
+    name: str
+    status: str                      # "succeeded" or "failed"
+    notes: Optional[str] = None
+    error: Optional[str] = None
+    session_id: Optional[int] = None
+    latency_seconds: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    llm_calls: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def to_dict(self, include_notes: bool = True) -> Dict:
+        data = asdict(self)
+        data["total_tokens"] = self.total_tokens
+        data["latency_seconds"] = round(self.latency_seconds, 3)
+        if not include_notes:
+            data.pop("notes")
+        return data
+
+
+@dataclass
+class BatchReport:
+    """Results of a batch, in input order."""
+    items: List[BatchItemResult] = field(default_factory=list)
+    max_workers: int = 0
+    wall_seconds: float = 0.0
+
+    @property
+    def succeeded(self) -> int:
+        return sum(1 for item in self.items if item.status == "succeeded")
+
+    @property
+    def failed(self) -> int:
+        return len(self.items) - self.succeeded
+
+    def to_dict(self, include_notes: bool = True) -> Dict:
+        return {
+            "total": len(self.items),
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "max_workers": self.max_workers,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "summed_latency_seconds": round(sum(item.latency_seconds for item in self.items), 3),
+            "prompt_tokens": sum(item.prompt_tokens for item in self.items),
+            "completion_tokens": sum(item.completion_tokens for item in self.items),
+            "items": [item.to_dict(include_notes) for item in self.items],
+        }
+
+
+class BatchSummarizer:
+    """
+    Summarizes many transcripts concurrently.
+
+    Usage:
+        summarizer = BatchSummarizer(max_workers=4)
+        report = summarizer.run(items, campaign_id=3, session_factory=session_scope)
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[int] = None,
+        use_mock: bool = False,
+        summarize: Optional[Callable[..., str]] = None,
+        persist: Optional[Callable[..., Optional[int]]] = None
+    ):
+        """
+        Args:
+            max_workers: Transcripts in flight (defaults to BATCH_SUMMARY_WORKERS, then 4);
+                the OpenAI client's rate limits still apply on top
+            use_mock: Use the mock LLM instead of OpenAI
+            summarize: ``summarize_text``-compatible function (defaults to session_scribe's)
+            persist: ``_persist_session_data``-compatible function (defaults to session_scribe's)
+        """
+        self.max_workers = max_workers or int(os.getenv("BATCH_SUMMARY_WORKERS", "4"))
+        self.use_mock = use_mock
+        if summarize is None or persist is None:
+            from core.agents.session_scribe import _persist_session_data, summarize_text
+            summarize = summarize or summarize_text
+            persist = persist or _persist_session_data
+        self._summarize = summarize
+        self._persist = persist
+
+    def run(
+        self,
+        items: List[BatchItem],
+        campaign_id: Optional[int] = None,
+        session_factory: Optional[Callable] = None,
+        on_result: Optional[Callable[[BatchItemResult], None]] = None
+    ) -> BatchReport:
+        """
+        Summarize every item.
+
+        Args:
+            items: Transcripts to summarize
+            campaign_id: Campaign the sessions belong to (needed to persist them)
+            session_factory: Returns a context-managed database session (e.g.
+                ``core.data.db.session_scope``); each finished item is persisted
+                through it when ``campaign_id`` is set
+            on_result: Called with each result as it finishes (completion order)
+
+        Returns:
+            BatchReport with results in input order
+        """
+        started = time.perf_counter()
+        results: List[Optional[BatchItemResult]] = [None] * len(items)
+        workers = max(1, min(self.max_workers, len(items)))
+        logger.info(f"📚 Summarizing {len(items)} sessions with {workers} workers")
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="batch-summary") as executor:
+            futures = {executor.submit(self._summarize_one, item): index for index, item in enumerate(items)}
+            for done, future in enumerate(as_completed(futures), 1):
+                index = futures[future]
+                result = future.result()
+                if result.status == "succeeded" and campaign_id and session_factory:
+                    self._persist_result(result, items[index], campaign_id, session_factory)
+                results[index] = result
+                icon = "✅" if result.status == "succeeded" else "❌"
+                logger.info(f"{icon} [{done}/{len(items)}] {result.name}: {result.status} in "
+                            f"{result.latency_seconds:.1f}s ({result.total_tokens:,} tokens)")
+                if on_result:
+                    on_result(result)
+
+        report = BatchReport(items=results, max_workers=workers, wall_seconds=time.perf_counter() - started)
+        logger.info(f"📚 Batch done in {report.wall_seconds:.1f}s: {report.succeeded} succeeded, {report.failed} failed")
+        return report
+
+    def _summarize_one(self, item: BatchItem) -> BatchItemResult:
+        start = time.perf_counter()
+        with track_usage() as usage:
+            try:
+                notes = self._summarize(
+                    item.transcript,
+                    context_chunks=item.context_chunks,
+                    use_mock=self.use_mock,
+                    raise_errors=True
+                )
+                result = BatchItemResult(name=item.name, status="succeeded", notes=notes)
+            except Exception as e:
+                result = BatchItemResult(name=item.name, status="failed", error=f"{type(e).__name__}: {e}")
+        result.latency_seconds = time.perf_counter() - start
+        result.prompt_tokens = usage.prompt_tokens
+        result.completion_tokens = usage.completion_tokens
+        result.llm_calls = usage.calls
+        return result
+
+    def _persist_result(self, result: BatchItemResult, item: BatchItem, campaign_id: int, session_factory) -> None:
+        try:
+            with session_factory() as sess:
+                result.session_id = self._persist(sess, campaign_id, item.transcript, result.notes)
+        except Exception as e:
+            result.session_id = None
+            logger.warning(f"⚠️  Could not open a database session for {item.name}: {e}")
+        if result.session_id is None:
+            result.status = "failed"
+            result.error = "Notes generated but could not be saved to the database"
@@ -0,0 +1,217 @@
+"""
+CPU Inference Optimizations for Shadowdark GM Assistant
+
+Optimized CPU execution for the pyannote diarization pipeline on hosts
+without a GPU. The segmentation and speaker-embedding models inside the
+pipeline can be:
+
+- ``int8``: dynamically quantized with PyTorch (int8 Linear/LSTM weights)
+- ``onnx``: exported to ONNX and executed by onnxruntime
+- ``onnx-int8``: exported to ONNX with int8 dynamically quantized weights
+
+ONNX is used for the segmentation model only. The embedding model is
+called with per-frame weight masks and computes filterbank features inside
+``forward``, so it always uses PyTorch int8. A failed ONNX export also
+falls back to int8.
+"""
+
+import os
+import logging
+from pathlib import Path
+from typing import Optional
+
+import torch
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+CPU_MODES = ("default", "int8", "onnx", "onnx-int8")
+
+DEFAULT_ONNX_DIR = Path(
+    os.getenv("ONNX_MODEL_DIR", Path.home() / ".cache" / "shadowdark-gm" / "onnx")
+).expanduser()
+
+
+def configure_torch_threads(intra_op_threads: Optional[int] = None, inter_op_threads: Optional[int] = None) -> None:
+    """
+    Pin PyTorch's intra- and inter-op thread pools.
+
+    ``torch.set_interop_threads`` may only be called before any inter-op work
+    has started, so a late call is logged and ignored.
+    """
+    if intra_op_threads:
+        torch.set_num_threads(intra_op_threads)
+    if inter_op_threads:
+        try:
+            torch.set_interop_threads(inter_op_threads)
+        except RuntimeError as e:
+            logger.warning(f"⚠️  Could not set inter-op threads (already initialized): {e}")
+    logger.info(f"🧵 Torch threads: intra-op={torch.get_num_threads()}, inter-op={torch.get_num_interop_threads()}")
+
+
+def quantize_module(model: torch.nn.Module) -> torch.nn.Module:
+    """Apply PyTorch dynamic int8 quantization to Linear and LSTM layers."""
+    model.eval()
+    return torch.ao.quantization.quantize_dynamic(
+        model, {torch.nn.Linear, torch.nn.LSTM}, dtype=torch.qint8
+    )
+
+
+class OnnxRunner:
+    """Callable that runs an exported ONNX model with controlled threading."""
+
+    def __init__(
+        self,
+        onnx_path: Path,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None
+    ):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if intra_op_threads:
+            options.intra_op_num_threads = intra_op_threads
+        if inter_op_threads:
+            options.inter_op_num_threads = inter_op_threads
+            options.execution_mode = ort.ExecutionMode.ORT_PARALLEL
+
+        self.session = ort.InferenceSession(str(onnx_path), options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def __call__(self, waveforms: torch.Tensor, *args, **kwargs) -> torch.Tensor:
+        inputs = {self.input_name: waveforms.detach().cpu().numpy().astype("float32")}
+        output = self.session.run(None, inputs)[0]
+        return torch.from_numpy(output)
+
+
+def export_to_onnx(
+    model: torch.nn.Module,
+    name: str,
+    num_samples: int,
+    onnx_dir: Optional[Path] = None,
+    quantize: bool = False
+) -> Path:
+    """
+    Export a waveform model to ONNX (reusing a previous export if present).
+
+    Args:
+        model: Model taking ``(batch, channel, samples)`` waveforms
+        name: File stem for the exported model
+        num_samples: Samples per chunk used for the dummy input
+        onnx_dir: Export directory (defaults to ONNX_MODEL_DIR)
+        quantize: Also write and return an int8 weight-quantized copy
+
+    Returns:
+        Path to the ONNX model to load
+    """
+    onnx_dir = Path(onnx_dir) if onnx_dir else DEFAULT_ONNX_DIR
+    onnx_dir.mkdir(parents=True, exist_ok=True)
+    fp32_path = onnx_dir / f"{name}.onnx"
+
+    if not fp32_path.exists():
+        logger.info(f"📦 Exporting {name} to ONNX...")
+        model.eval()
+        dummy = torch.zeros(1, 1, num_samples)
+        with torch.no_grad():
+            torch.onnx.export(
+                model,
+                dummy,
+                str(fp32_path),
+                input_names=["waveforms"],
+                output_names=["output"],
+                dynamic_axes={"waveforms": {0: "batch"}, "output": {0: "batch"}},
+                opset_version=17
+            )
+
+    if not quantize:
+        return fp32_path
+
+    int8_path = onnx_dir / f"{name}.int8.onnx"
+    if not int8_path.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        logger.info(f"📦 Quantizing {name} ONNX weights to int8...")
+        quantize_dynamic(str(fp32_path), str(int8_path), weight_type=QuantType.QInt8)
+    return int8_path
+
+
+def _attach_onnx(model: torch.nn.Module, runner: OnnxRunner) -> None:
+    """Route the model's forward pass through onnxruntime, keeping its pyannote attributes."""
+    model.forward = runner
+
+
+def _optimize_model(
+    model: torch.nn.Module,
+    name: str,
+    num_samples: int,
+    mode: str,
+    intra_op_threads: Optional[int],
+    inter_op_threads: Optional[int],
+    allow_onnx: bool = True
+) -> torch.nn.Module:
+    """Optimize one model in place where possible; returns the model to use."""
+    if mode.startswith("onnx") and allow_onnx:
+        try:
+            onnx_path = export_to_onnx(model, name, num_samples, quantize=(mode == "onnx-int8"))
+            _attach_onnx(model, OnnxRunner(onnx_path, intra_op_threads, inter_op_threads))
+            logger.info(f"⚡ {name}: running under onnxruntime ({onnx_path.name})")
+            return model
+        except Exception as e:
+            logger.warning(f"⚠️  {name}: ONNX path unavailable ({e}); falling back to int8 quantization")
+
+    logger.info(f"⚡ {name}: dynamic int8 quantization")
+    return quantize_module(model)
+
+
+def optimize_pipeline_for_cpu(
+    pipeline,
+    mode: str = "int8",
+    intra_op_threads: Optional[int] = None,
+    inter_op_threads: Optional[int] = None,
+    model_tag: str = "pyannote"
+):
+    """
+    Apply a CPU optimization mode to a pyannote speaker-diarization pipeline.
+
+    Args:
+        pipeline: Loaded pyannote ``SpeakerDiarization`` pipeline (on CPU)
+        mode: One of ``CPU_MODES``
+        intra_op_threads: Threads used inside each operator
+        inter_op_threads: Threads used to run independent operators
+        model_tag: Prefix for exported ONNX files (one export per pipeline model)
+
+    Returns:
+        The same pipeline, with its inner models optimized
+    """
+    if mode not in CPU_MODES:
+        raise ValueError(f"Unknown CPU mode: {mode}. Supported modes: {', '.join(CPU_MODES)}")
+
+    configure_torch_threads(intra_op_threads, inter_op_threads)
+    if mode == "default":
+        return pipeline
+
+    # Segmentation model: pyannote Inference wrapper around a Model
+    segmentation = getattr(pipeline, "_segmentation", None)
+    seg_model = getattr(segmentation, "model", None)
+    if seg_model is not None:
+        sample_rate = seg_model.hparams.get("sample_rate", 16000) if hasattr(seg_model, "hparams") else 16000
+        num_samples = int(segmentation.duration * sample_rate)
+        segmentation.model = _optimize_model(
+            seg_model, f"{model_tag}-segmentation", num_samples, mode, intra_op_threads, inter_op_threads
+        )
+    else:
+        logger.warning("⚠️  Pipeline has no segmentation model to optimize")
+
+    # Speaker-embedding model: pretrained embedding wrapper exposing model_
+    embedding = getattr(pipeline, "_embedding", None)
+    emb_model = getattr(embedding, "model_", None)
+    if emb_model is not None:
+        embedding.model_ = _optimize_model(
+            emb_model, f"{model_tag}-embedding", 0, mode, intra_op_threads, inter_op_threads, allow_onnx=False
+        )
+    else:
+        logger.warning("⚠️  Pipeline has no speaker-embedding model to optimize")
+
+    return pipeline
@@ -0,0 +1,201 @@
+"""
+Silence-Aware Cut Planner for Shadowdark GM Assistant
+
+Chooses where ``AudioSplitter`` cuts a recording. Instead of cutting at
+fixed offsets (and padding both sides with overlap so words are not lost),
+each cut is moved to the quietest point shortly before its target. Cuts
+land in pauses, so segments need little or no overlap.
+
+The recording is streamed in blocks (soundfile, or an ffmpeg PCM pipe for
+formats libsndfile cannot read) and reduced to a frame-level RMS energy
+profile with numpy; the full waveform is never held in memory.
+"""
+
+import logging
+import subprocess
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+import numpy as np
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+PIPE_SAMPLE_RATE = 16000
+
+
+class SilenceCutPlanner:
+    """
+    Plans segment boundaries at low-energy points.
+
+    Each cut is searched for in ``[target - tolerance, target]``, so a
+    segment is never longer than the requested duration (which keeps the
+    size limit that duration was derived from).
+    """
+
+    def __init__(
+        self,
+        tolerance_seconds: float = 30.0,
+        frame_seconds: float = 0.05,
+        min_pause_seconds: float = 0.4,
+        block_seconds: float = 60.0
+    ):
+        """
+        Args:
+            tolerance_seconds: How far before each target cut to search
+            frame_seconds: RMS analysis frame length
+            min_pause_seconds: Energy is averaged over this span, so a cut
+                lands in a real pause rather than a single quiet frame
+            block_seconds: Audio read per block while streaming
+        """
+        self.tolerance_seconds = tolerance_seconds
+        self.frame_seconds = frame_seconds
+        self.min_pause_seconds = min_pause_seconds
+        self.block_seconds = block_seconds
+
+    def energy_profile(self, audio_path: Path) -> np.ndarray:
+        """
+        Compute the RMS energy of every analysis frame, streaming the file.
+
+        Args:
+            audio_path: Path to the audio file
+
+        Returns:
+            Array of per-frame RMS values (frame ``i`` starts at ``i * frame_seconds``)
+        """
+        frames = []
+        remainder = np.zeros(0, dtype=np.float32)
+        frame_len = None
+
+        for block, sample_rate in self._iter_blocks(Path(audio_path)):
+            if frame_len is None:
+                frame_len = max(1, int(round(self.frame_seconds * sample_rate)))
+
+            samples = np.concatenate([remainder, block]) if remainder.size else block
+            usable = (samples.size // frame_len) * frame_len
+            if usable:
+                framed = samples[:usable].reshape(-1, frame_len)
+                frames.append(np.sqrt(np.mean(framed * framed, axis=1)))
+            remainder = samples[usable:]
+
+        if remainder.size:
+            frames.append(np.array([np.sqrt(np.mean(remainder * remainder))], dtype=np.float32))
+        return np.concatenate(frames) if frames else np.zeros(0, dtype=np.float32)
+
+    def choose_cut(self, energy: np.ndarray, target_frame: int, window_frames: int) -> int:
+        """
+        Index of the quietest frame in ``[target - window, target]``.
+
+        Energy is smoothed over ``min_pause_seconds`` first; ties go to the
+        frame closest to the target so segments stay as long as possible.
+        """
+        low = max(0, target_frame - window_frames)
+        high = min(len(energy), target_frame + 1)
+        if high <= low:
+            return target_frame
+
+        pause_frames = max(1, int(round(self.min_pause_seconds / self.frame_seconds)))
+        # Pad so the moving average near the window edges still sees real audio
+        pad_low = max(0, low - pause_frames)
+        pad_high = min(len(energy), high + pause_frames)
+        smoothed = np.convolve(energy[pad_low:pad_high], np.ones(pause_frames) / pause_frames, mode="same")
+        window = smoothed[low - pad_low:high - pad_low]
+
+        # Last occurrence of the minimum = closest to the target
+        best = len(window) - 1 - int(np.argmin(window[::-1]))
+        return low + best
+
+    def plan(
+        self,
+        audio_path: Path,
+        total_duration: float,
+        segment_duration: float,
+        overlap: float = 0.0
+    ) -> List[Tuple[float, float]]:
+        """
+        Plan (start, end) offsets with cuts placed in pauses.
+
+        Args:
+            audio_path: Path to the audio file
+            total_duration: Recording length in seconds
+            segment_duration: Maximum segment length in seconds
+            overlap: Optional safety overlap added before each cut
+
+        Returns:
+            List of (start, end) offsets in seconds
+        """
+        if overlap >= segment_duration:
+            raise ValueError("Overlap must be shorter than the segment duration")
+
+        energy = self.energy_profile(audio_path)
+        window_frames = int(min(self.tolerance_seconds, segment_duration / 2) / self.frame_seconds)
+        reference = float(np.median(energy)) if energy.size else 0.0
+
+        plan = []
+        start = 0.0
+        while start < total_duration:
+            target = start + segment_duration
+            if target >= total_duration:
+                plan.append((start, total_duration))
+                break
+
+            cut_frame = self.choose_cut(energy, int(target / self.frame_seconds), window_frames)
+            cut = cut_frame * self.frame_seconds
+            if cut <= start + overlap:
+                cut = target  # no usable audio analysis here; fall back to a fixed cut
+
+            level = energy[cut_frame] if cut_frame < energy.size else 0.0
+            logger.info(f"✂️  Cut at {cut/60:.2f}min ({target - cut:.1f}s before target, "
+                       f"{self._relative_db(level, reference):+.1f} dB vs median)")
+            plan.append((start, cut))
+            start = cut - overlap
+        return plan
+
+    def _iter_blocks(self, audio_path: Path) -> Iterator[Tuple[np.ndarray, int]]:
+        """Yield mono float32 blocks and their sample rate."""
+        try:
+            import soundfile as sf
+
+            info = sf.info(str(audio_path))
+            blocksize = int(self.block_seconds * info.samplerate)
+            blocks = sf.blocks(str(audio_path), blocksize=blocksize, dtype="float32", always_2d=True)
+            first = next(blocks, None)
+        except Exception as e:
+            # libsndfile cannot read compressed containers like m4a
+            logger.info(f"🔁 Streaming {audio_path.suffix} through ffmpeg for energy analysis ({type(e).__name__})")
+            yield from self._iter_ffmpeg_blocks(audio_path)
+            return
+
+        # Past the first block a read error is a real failure (truncated or
+        # corrupt file), not a format libsndfile lacks: don't start over
+        if first is not None:
+            yield first.mean(axis=1), info.samplerate
+        for block in blocks:
+            yield block.mean(axis=1), info.samplerate
+
+    def _iter_ffmpeg_blocks(self, audio_path: Path) -> Iterator[Tuple[np.ndarray, int]]:
+        cmd = [
+            'ffmpeg', '-v', 'error', '-i', str(audio_path),
+            '-ac', '1', '-ar', str(PIPE_SAMPLE_RATE), '-f', 'f32le', '-'
+        ]
+        block_bytes = int(self.block_seconds * PIPE_SAMPLE_RATE) * 4
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                usable = len(data) - len(data) % 4
+                yield np.frombuffer(data[:usable], dtype=np.float32), PIPE_SAMPLE_RATE
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors="replace")
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg decode failed: {stderr}")
+
+    @staticmethod
+    def _relative_db(level: float, reference: float) -> float:
+        if level <= 0 or reference <= 0:
+            return -120.0 if level <= 0 else 0.0
+        return 20 * float(np.log10(level / reference))
@@ -0,0 +1,316 @@
+"""
+Diarization Cache for Shadowdark GM Assistant
+
+Persists speaker diarization results on disk so that re-transcribing a
+recording (or re-uploading the same file to the API) skips the pyannote
+pipeline entirely. Entries are keyed by the audio content hash, the
+diarization model, the quality preset and the speaker constraints.
+"""
+
+import os
+import json
+import time
+import hashlib
+import logging
+from pathlib import Path
+from dataclasses import dataclass, asdict
+from typing import Dict, List, Optional, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = Path(
+    os.getenv("DIARIZATION_CACHE_DIR", Path.home() / ".cache" / "shadowdark-gm" / "diarization")
+).expanduser()
+
+# Bump when the stored payload layout changes so stale entries are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+def compute_audio_hash(audio_path: Union[str, Path], chunk_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 content hash of an audio file.
+
+    The file is read in fixed-size chunks so large recordings never have
+    to be held in memory.
+
+    Args:
+        audio_path: Path to the audio file
+        chunk_size: Read size in bytes
+
+    Returns:
+        Hex digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(audio_path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass
+class CacheEntry:
+    """Metadata describing a single cached diarization result."""
+    key: str
+    audio_hash: str
+    audio_name: str
+    model_id: str
+    quality: str
+    min_speakers: Optional[int]
+    max_speakers: Optional[int]
+    num_segments: int
+    created_at: float
+    last_used_at: float
+    size_bytes: int = 0
+
+
+class DiarizationCache:
+    """
+    On-disk cache of diarization results.
+
+    Each entry is stored as two files in the cache directory:
+    - ``<key>.rttm``: the raw pyannote annotation in RTTM format
+    - ``<key>.json``: entry metadata plus the post-processed segments
+    """
+
+    def __init__(self, cache_dir: Optional[Union[str, Path]] = None):
+        self.cache_dir = Path(cache_dir).expanduser() if cache_dir else DEFAULT_CACHE_DIR
+
+    @staticmethod
+    def make_key(
+        audio_hash: str,
+        model_id: str,
+        quality: str,
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None
+    ) -> str:
+        """Build the cache key for a diarization request."""
+        parts = [
+            audio_hash,
+            model_id,
+            quality,
+            str(min_speakers),
+            str(max_speakers),
+            str(CACHE_FORMAT_VERSION),
+        ]
+        return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+
+    def _json_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _rttm_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.rttm"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up a cached result.
+
+        Args:
+            key: Cache key from ``make_key``
+
+        Returns:
+            Stored payload (``entry``, ``segments``, ``total_duration``) or None on a miss
+        """
+        json_path = self._json_path(key)
+        if not json_path.exists():
+            return None
+
+        try:
+            with open(json_path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            logger.warning(f"⚠️  Ignoring unreadable diarization cache entry {key}: {e}")
+            return None
+
+        if payload.get("version") != CACHE_FORMAT_VERSION:
+            return None
+
+        # Touch the entry so pruning keeps recently used results
+        payload["entry"]["last_used_at"] = time.time()
+        try:
+            self._write_json(json_path, payload)
+        except OSError:
+            pass
+
+        return payload
+
+    def put(
+        self,
+        key: str,
+        audio_hash: str,
+        audio_name: str,
+        model_id: str,
+        quality: str,
+        min_speakers: Optional[int],
+        max_speakers: Optional[int],
+        raw_segments: List[Dict],
+        segments: List[Dict],
+        total_duration: float
+    ) -> CacheEntry:
+        """
+        Store a diarization result.
+
+        Args:
+            key: Cache key from ``make_key``
+            audio_hash: Content hash of the source audio
+            audio_name: Original audio filename (informational)
+            model_id: Diarization model identifier
+            quality: Quality preset name
+            min_speakers: Minimum speaker constraint used
+            max_speakers: Maximum speaker constraint used
+            raw_segments: Segments straight from the pipeline (written as RTTM)
+            segments: Post-processed segments
+            total_duration: Total audio duration in seconds
+
+        Returns:
+            The stored CacheEntry
+        """
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+        rttm_path = self._rttm_path(key)
+        uri = Path(audio_name).stem.replace(" ", "_") or "audio"
+        with open(rttm_path, "w", encoding="utf-8") as f:
+            f.write(self.to_rttm(raw_segments, uri))
+
+        now = time.time()
+        entry = CacheEntry(
+            key=key,
+            audio_hash=audio_hash,
+            audio_name=audio_name,
+            model_id=model_id,
+            quality=quality,
+            min_speakers=min_speakers,
+            max_speakers=max_speakers,
+            num_segments=len(segments),
+            created_at=now,
+            last_used_at=now,
+        )
+        payload = {
+            "version": CACHE_FORMAT_VERSION,
+            "entry": asdict(entry),
+            "total_duration": total_duration,
+            "segments": segments,
+        }
+        self._write_json(self._json_path(key), payload)
+
+        entry.size_bytes = self._entry_size(key)
+        logger.info(f"💾 Cached diarization result ({len(segments)} segments) as {key}")
+        return entry
+
+    def read_rttm(self, key: str) -> Optional[str]:
+        """Return the raw RTTM annotation for an entry, if present."""
+        rttm_path = self._rttm_path(key)
+        if not rttm_path.exists():
+            return None
+        return rttm_path.read_text(encoding="utf-8")
+
+    def list_entries(self) -> List[CacheEntry]:
+        """List all cache entries, most recently used first."""
+        if not self.cache_dir.exists():
+            return []
+
+        entries = []
+        for json_path in self.cache_dir.glob("*.json"):
+            try:
+                with open(json_path, "r", encoding="utf-8") as f:
+                    payload = json.load(f)
+                entry = CacheEntry(**payload["entry"])
+            except (OSError, json.JSONDecodeError, KeyError, TypeError):
+                continue
+            entry.size_bytes = self._entry_size(entry.key)
+            entries.append(entry)
+
+        entries.sort(key=lambda e: e.last_used_at, reverse=True)
+        return entries
+
+    def total_size(self) -> int:
+        """Total size of the cache in bytes."""
+        return sum(entry.size_bytes for entry in self.list_entries())
+
+    def remove(self, key: str) -> bool:
+        """Remove a single entry. Returns True if anything was deleted."""
+        removed = False
+        for path in (self._json_path(key), self._rttm_path(key)):
+            if path.exists():
+                path.unlink()
+                removed = True
+        return removed
+
+    def prune(
+        self,
+        max_age_days: Optional[float] = None,
+        max_size_mb: Optional[float] = None
+    ) -> List[CacheEntry]:
+        """
+        Prune the cache by age and/or total size.
+
+        Entries unused for longer than ``max_age_days`` are removed first,
+        then the least recently used entries are evicted until the cache
+        fits in ``max_size_mb``.
+
+        Args:
+            max_age_days: Remove entries not used within this many days
+            max_size_mb: Target maximum cache size in megabytes
+
+        Returns:
+            List of removed entries
+        """
+        entries = self.list_entries()
+        removed = []
+
+        if max_age_days is not None:
+            cutoff = time.time() - max_age_days * 86400
+            for entry in list(entries):
+                if entry.last_used_at < cutoff:
+                    self.remove(entry.key)
+                    removed.append(entry)
+                    entries.remove(entry)
+
+        if max_size_mb is not None:
+            budget = max_size_mb * 1024 * 1024
+            total = sum(entry.size_bytes for entry in entries)
+            # entries are sorted most recent first, so evict from the end
+            while entries and total > budget:
+                entry = entries.pop()
+                self.remove(entry.key)
+                removed.append(entry)
+                total -= entry.size_bytes
+
+        if removed:
+            logger.info(f"🧹 Pruned {len(removed)} diarization cache entries")
+        return removed
+
+    def clear(self) -> int:
+        """Remove every entry. Returns the number of entries removed."""
+        entries = self.list_entries()
+        for entry in entries:
+            self.remove(entry.key)
+        return len(entries)
+
+    @staticmethod
+    def to_rttm(segments: List[Dict], uri: str) -> str:
+        """Serialize segments (start_time/end_time/speaker_id dicts) as RTTM lines."""
+        lines = []
+        for seg in segments:
+            duration = seg["end_time"] - seg["start_time"]
+            lines.append(
+                f"SPEAKER {uri} 1 {seg['start_time']:.3f} {duration:.3f} "
+                f"<NA> <NA> {seg['speaker_id']} <NA> <NA>"
+            )
+        return "\n".join(lines) + ("\n" if lines else "")
+
+    def _entry_size(self, key: str) -> int:
+        size = 0
+        for path in (self._json_path(key), self._rttm_path(key)):
+            if path.exists():
+                size += path.stat().st_size
+        return size
+
+    @staticmethod
+    def _write_json(path: Path, payload: Dict) -> None:
+        # Write atomically so a crash never leaves a truncated entry behind
+        tmp_path = path.with_suffix(".json.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(payload, f)
+        os.replace(tmp_path, path)
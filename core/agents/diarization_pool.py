@@ -0,0 +1,588 @@
+"""
+Diarization Worker Pool for Shadowdark GM Assistant
+
+Runs diarization jobs on N worker processes for many-core hosts. Each worker:
+
+- is pinned to its own CPU set (where the OS supports affinity)
+- runs torch with a fixed thread budget, so concurrent jobs do not
+  oversubscribe the machine
+- keeps a warm pyannote pipeline loaded between jobs
+
+Jobs are dispatched round-robin across sessions: a long recording split
+into many segments takes turns with other sessions instead of filling
+every worker until all of its segments are done.
+
+A worker that dies (out of memory, segfault, killed) fails the job it held
+and is replaced; shutting the pool down fails every job still outstanding,
+so no Future is left pending.
+"""
+
+import os
+import time
+import uuid
+import logging
+import threading
+import multiprocessing as mp
+from collections import OrderedDict, deque
+from concurrent.futures import Future
+from multiprocessing.connection import Connection, wait as wait_connections
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional
+
+from .. import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DiarizationJob:
+    """A single diarization request queued on the pool."""
+    audio_path: str
+    session_id: str = "default"
+    min_speakers: Optional[int] = None
+    max_speakers: Optional[int] = None
+    min_segment_duration: float = 1.0
+    merge_threshold: float = 0.5
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex)
+
+
+@dataclass
+class PoolStats:
+    """Throughput counters for a worker pool."""
+    workers: int
+    threads_per_worker: int
+    jobs_queued: int = 0
+    jobs_running: int = 0
+    jobs_completed: int = 0
+    jobs_failed: int = 0
+    audio_seconds: float = 0.0  # audio diarized by completed jobs
+    busy_seconds: float = 0.0   # summed per-job processing time
+    wall_seconds: float = 0.0   # wall-clock time with at least one job in flight
+    workers_warm: int = 0       # workers that loaded the model at start-up
+    workers_restarted: int = 0  # replacements for workers that died
+
+    @property
+    def audio_hours_per_hour(self) -> float:
+        """Audio-hours diarized per wall-clock hour of pool activity."""
+        return self.audio_seconds / self.wall_seconds if self.wall_seconds else 0.0
+
+    @property
+    def utilization(self) -> float:
+        """Fraction of worker capacity spent processing while the pool was active."""
+        capacity = self.wall_seconds * self.workers
+        return self.busy_seconds / capacity if capacity else 0.0
+
+
+def available_cpus() -> List[int]:
+    """CPUs this process may run on."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+
+def plan_cpu_sets(
+    num_workers: int,
+    threads_per_worker: Optional[int] = None,
+    cpus: Optional[List[int]] = None
+) -> List[List[int]]:
+    """
+    Split the available CPUs into one contiguous set per worker.
+
+    Args:
+        num_workers: Number of worker processes
+        threads_per_worker: CPUs per worker (defaults to an even split)
+        cpus: CPU ids to distribute (defaults to this process's affinity)
+
+    Returns:
+        One list of CPU ids per worker
+    """
+    cpus = sorted(cpus) if cpus is not None else available_cpus()
+    threads_per_worker = threads_per_worker or max(1, len(cpus) // num_workers)
+
+    if num_workers * threads_per_worker > len(cpus):
+        logger.warning(f"⚠️  {num_workers} workers x {threads_per_worker} threads oversubscribes "
+                       f"{len(cpus)} CPUs; CPU sets will overlap")
+
+    return [
+        [cpus[(worker * threads_per_worker + i) % len(cpus)] for i in range(threads_per_worker)]
+        for worker in range(num_workers)
+    ]
+
+
+class FairJobQueue:
+    """
+    Thread-safe job queue with round-robin scheduling across sessions.
+
+    Jobs from the same session are served in submission order, and every
+    session with pending work gets one job per round.
+    """
+
+    def __init__(self):
+        self._sessions: Dict[str, Deque[DiarizationJob]] = OrderedDict()
+        self._cond = threading.Condition()
+        self._closed = False
+
+    def put(self, job: DiarizationJob) -> None:
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Job queue is closed")
+            self._sessions.setdefault(job.session_id, deque()).append(job)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[DiarizationJob]:
+        """Next job in round-robin order, or None once closed (or on timeout)."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._sessions or self._closed, timeout)
+            if not self._sessions:
+                return None
+
+            session_id, jobs = self._sessions.popitem(last=False)
+            job = jobs.popleft()
+            if jobs:
+                # Move the session to the back of the rotation
+                self._sessions[session_id] = jobs
+            return job
+
+    def close(self) -> List[DiarizationJob]:
+        """Stop accepting jobs; returns the jobs that were still pending."""
+        with self._cond:
+            self._closed = True
+            pending = [job for jobs in self._sessions.values() for job in jobs]
+            self._sessions.clear()
+            self._cond.notify_all()
+            return pending
+
+    def __len__(self) -> int:
+        with self._cond:
+            return sum(len(jobs) for jobs in self._sessions.values())
+
+
+def _worker_main(worker_id, cpus, threads, options, tasks, results):
+    """
+    Worker process: pin CPUs, fix the thread budget, warm the pipeline, then serve jobs.
+
+    Jobs arrive on ``tasks`` (None stops the worker); each outcome goes back
+    on ``results`` as ``(status, job_id, payload, elapsed)``, preceded by a
+    ``"metrics"`` message with the samples recorded since the last job.
+    """
+    # Thread budget must be set before torch initializes its pools
+    for var in ("OMP_NUM_THREADS", "MKL_NUM_THREADS", "OPENBLAS_NUM_THREADS"):
+        os.environ[var] = str(threads)
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    import torch
+    torch.set_num_threads(threads)
+    torch.set_num_interop_threads(1)
+
+    from .diarizer import SpeakerDiarizer
+
+    diarizer = SpeakerDiarizer(
+        huggingface_token=options.get("huggingface_token"),
+        use_cache=options.get("use_cache", True),
+        cache_dir=options.get("cache_dir"),
+        cpu_mode=options.get("cpu_mode"),
+        intra_op_threads=threads
+    )
+    try:
+        diarizer._load_pipeline()
+        logger.info(f"🔥 Diarization worker {worker_id} ready (CPUs {cpus}, {threads} threads)")
+        results.send(("warm", None, True, 0.0))
+    except Exception as e:
+        # Reported per job below; the load is retried on the first job
+        logger.error(f"❌ Diarization worker {worker_id} failed to warm up: {e}")
+        results.send(("warm", None, False, 0.0))
+
+    while True:
+        try:
+            job = tasks.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+
+        start = time.perf_counter()
+        try:
+            result = diarizer.diarize_audio(
+                job.audio_path,
+                min_speakers=job.min_speakers,
+                max_speakers=job.max_speakers,
+                min_segment_duration=job.min_segment_duration,
+                merge_threshold=job.merge_threshold
+            )
+            outcome = ("done", job.job_id, result, time.perf_counter() - start)
+        except Exception as e:
+            outcome = ("error", job.job_id, f"{type(e).__name__}: {e}", time.perf_counter() - start)
+        if metrics.enabled():
+            results.send(("metrics", job.job_id, metrics.drain(), 0.0))  # merged into the parent's registry
+        results.send(outcome)
+
+
+@dataclass
+class _Worker:
+    """Parent-side handle of one worker process."""
+    worker_id: int
+    process: mp.Process
+    tasks: Connection                 # parent -> worker
+    results: Connection               # worker -> parent
+    job: Optional[DiarizationJob] = None
+
+
+class DiarizationWorkerPool:
+    """
+    Pool of diarization worker processes with CPU pinning and fair scheduling.
+
+    Usage:
+        with DiarizationWorkerPool(num_workers=4, threads_per_worker=8) as pool:
+            futures = [pool.submit(path, session_id="session-12") for path in segments]
+            results = [f.result() for f in futures]
+            print(pool.stats().audio_hours_per_hour)
+    """
+
+    def __init__(
+        self,
+        num_workers: Optional[int] = None,
+        threads_per_worker: Optional[int] = None,
+        pin_cpus: bool = True,
+        huggingface_token: Optional[str] = None,
+        cpu_mode: Optional[str] = None,
+        use_cache: bool = True,
+        cache_dir: Optional[str] = None
+    ):
+        """
+        Args:
+            num_workers: Worker processes (defaults to DIARIZATION_WORKERS, then 2)
+            threads_per_worker: Torch threads per worker (defaults to an even split of the CPUs)
+            pin_cpus: Pin each worker to its own CPU set
+            huggingface_token: HuggingFace token for the pyannote model
+            cpu_mode: CPU inference mode passed to each SpeakerDiarizer
+            use_cache: Use the persistent diarization cache in workers
+            cache_dir: Diarization cache directory
+        """
+        self.num_workers = num_workers or int(os.getenv("DIARIZATION_WORKERS", "0")) or 2
+        cpus = available_cpus()
+        self.threads_per_worker = (
+            threads_per_worker
+            or int(os.getenv("DIARIZATION_THREADS_PER_WORKER", "0"))
+            or max(1, len(cpus) // self.num_workers)
+        )
+        self.cpu_sets = plan_cpu_sets(self.num_workers, self.threads_per_worker, cpus) if pin_cpus else [None] * self.num_workers
+        self.options = {
+            "huggingface_token": huggingface_token or os.getenv("HUGGINGFACE_TOKEN"),
+            "cpu_mode": cpu_mode,
+            "use_cache": use_cache,
+            "cache_dir": cache_dir,
+        }
+
+        self._jobs = FairJobQueue()
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._slots = threading.Semaphore(self.num_workers)   # idle workers
+        self._stats = PoolStats(workers=self.num_workers, threads_per_worker=self.threads_per_worker)
+        self._in_flight = 0
+        self._active_since: Optional[float] = None
+        self._workers: Dict[int, _Worker] = {}
+        self._threads: List[threading.Thread] = []
+        self._started = False
+        self._closing = False
+        self._warm: Dict[int, bool] = {}
+        self._all_reported = threading.Event()
+
+    # Process entry point; tests substitute a lightweight stand-in
+    worker_main = staticmethod(_worker_main)
+
+    def start(self) -> "DiarizationWorkerPool":
+        """Spawn the worker processes and dispatcher threads."""
+        if self._started:
+            return self
+
+        # spawn, not fork: torch thread pools do not survive fork
+        self._ctx = mp.get_context("spawn")
+        self._wake_reader, self._wake_writer = self._ctx.Pipe(duplex=False)
+        self._closing = False
+        for worker_id in range(self.num_workers):
+            self._spawn(worker_id)
+
+        for target, name in ((self._dispatch_loop, "diarization-dispatch"), (self._collect_loop, "diarization-collect")):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        self._started = True
+        logger.info(f"🏭 Started diarization pool: {self.num_workers} workers x {self.threads_per_worker} threads")
+        return self
+
+    def _spawn(self, worker_id: int) -> None:
+        task_reader, task_writer = self._ctx.Pipe(duplex=False)
+        result_reader, result_writer = self._ctx.Pipe(duplex=False)
+        process = self._ctx.Process(
+            target=self.worker_main,
+            args=(worker_id, self.cpu_sets[worker_id], self.threads_per_worker, self.options, task_reader, result_writer),
+            name=f"diarization-worker-{worker_id}",
+            daemon=True
+        )
+        process.start()
+        # The child holds the only copies of these ends, so its exit shows up as EOF
+        task_reader.close()
+        result_writer.close()
+        with self._lock:
+            self._workers[worker_id] = _Worker(worker_id, process, task_writer, result_reader)
+            self._warm.pop(worker_id, None)
+
+    def submit(
+        self,
+        audio_path: str,
+        session_id: str = "default",
+        min_speakers: Optional[int] = None,
+        max_speakers: Optional[int] = None,
+        min_segment_duration: float = 1.0,
+        merge_threshold: float = 0.5
+    ) -> Future:
+        """
+        Queue an audio file for diarization.
+
+        Args:
+            audio_path: Path to the audio file
+            session_id: Scheduling group; sessions are served round-robin
+            min_speakers: Minimum number of speakers (optional)
+            max_speakers: Maximum number of speakers (optional)
+            min_segment_duration: Minimum segment length to keep
+            merge_threshold: Maximum gap for merging same-speaker segments
+
+        Returns:
+            Future resolving to a DiarizationResult
+        """
+        if not self._started:
+            self.start()
+
+        job = DiarizationJob(
+            audio_path=str(audio_path),
+            session_id=session_id,
+            min_speakers=min_speakers,
+            max_speakers=max_speakers,
+            min_segment_duration=min_segment_duration,
+            merge_threshold=merge_threshold
+        )
+        future = Future()
+        with self._lock:
+            self._futures[job.job_id] = future
+            self._stats.jobs_queued += 1
+            self._mark_active(+1)
+        self._jobs.put(job)
+        return future
+
+    def wait_until_warm(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until every worker has tried to load the model.
+
+        Returns:
+            False on timeout; check ``stats().workers_warm`` for how many succeeded
+        """
+        return self._all_reported.wait(timeout)
+
+    def stats(self) -> PoolStats:
+        """Snapshot of the pool's throughput counters."""
+        with self._lock:
+            snapshot = PoolStats(**vars(self._stats))
+            if self._active_since is not None:
+                snapshot.wall_seconds += time.perf_counter() - self._active_since
+            return snapshot
+
+    def shutdown(self, wait: bool = True) -> None:
+        """
+        Stop the pool.
+
+        Pending jobs are cancelled. Running jobs finish first if ``wait`` is
+        True; otherwise their workers are terminated and the jobs fail.
+        """
+        if not self._started:
+            return
+
+        self._closing = True
+        for job in self._jobs.close():
+            self._finish(job.job_id, error="Diarization pool shut down", cancelled=True)
+        self._slots.release()  # unblock the dispatcher so it sees the closed queue
+
+        with self._lock:
+            workers = list(self._workers.values())
+        for worker in workers:
+            try:
+                worker.tasks.send(None)
+            except OSError:
+                pass  # already gone
+        for worker in workers:
+            if not wait:
+                worker.process.terminate()
+            worker.process.join()
+
+        self._wake_writer.send(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+        # Anything the workers did not report on (terminated, or died mid-job)
+        with self._lock:
+            outstanding = list(self._futures)
+        for job_id in outstanding:
+            self._finish(job_id, error="Diarization pool shut down before the job finished")
+        with self._lock:
+            remaining, self._workers = list(self._workers.values()), {}
+        for worker in remaining:
+            worker.tasks.close()
+            worker.results.close()
+        self._started = False
+
+    def __enter__(self) -> "DiarizationWorkerPool":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+    def _dispatch_loop(self) -> None:
+        # Hand a job to the workers only when one is idle, so the fair
+        # order decided here is the order in which jobs actually start
+        while True:
+            self._slots.acquire()
+            job = self._jobs.get()
+            if job is None:
+                return
+            with self._lock:
+                worker = next((w for w in self._workers.values() if w.job is None), None)
+                if worker is not None:
+                    worker.job = job
+                    self._stats.jobs_queued -= 1
+                    self._stats.jobs_running += 1
+            if worker is None:
+                # The idle worker died and is being replaced; try again shortly
+                try:
+                    self._jobs.put(job)
+                except RuntimeError:
+                    self._finish(job.job_id, error="Diarization pool shut down", cancelled=True)
+                    return
+                self._slots.release()
+                time.sleep(0.05)
+                continue
+            try:
+                worker.tasks.send(job)
+            except OSError:
+                pass  # the worker died; the collector fails the job it now holds
+
+    def _collect_loop(self) -> None:
+        while True:
+            with self._lock:
+                workers = list(self._workers.values())
+            watched = {}
+            for worker in workers:
+                watched[worker.results] = worker
+                watched[worker.process.sentinel] = worker
+            ready = wait_connections(list(watched) + [self._wake_reader])
+
+            stopping, dead = False, []
+            for item in ready:
+                if item is self._wake_reader:
+                    self._wake_reader.recv()
+                    stopping = True
+                    continue
+                worker = watched[item]
+                if item is worker.results:
+                    if not self._receive(worker) and worker not in dead:
+                        dead.append(worker)
+                elif worker not in dead:
+                    dead.append(worker)
+            for worker in dead:
+                self._reap(worker)
+            if stopping:
+                return
+
+    def _receive(self, worker: _Worker) -> bool:
+        """Handle every message waiting from ``worker``; False once its pipe is closed."""
+        while True:
+            try:
+                if not worker.results.poll():
+                    return True
+                status, job_id, payload, elapsed = worker.results.recv()
+            except (EOFError, OSError):
+                return False
+
+            if status == "metrics":
+                metrics.merge(payload)
+                continue
+            if status == "warm":
+                with self._lock:
+                    self._warm[worker.worker_id] = bool(payload)
+                    self._stats.workers_warm = sum(self._warm.values())
+                    if len(self._warm) >= self.num_workers:
+                        self._all_reported.set()
+                continue
+            with self._lock:
+                worker.job = None
+            self._slots.release()
+            if status == "done":
+                self._finish(job_id, result=payload, elapsed=elapsed)
+            else:
+                self._finish(job_id, error=payload, elapsed=elapsed)
+
+    def _reap(self, worker: _Worker) -> None:
+        """A worker process exited: fail its job and replace it (unless shutting down)."""
+        self._receive(worker)  # results it sent before exiting still count
+        worker.process.join(timeout=5)
+        if worker.process.is_alive():
+            worker.process.terminate()  # closed its pipe but hung
+            worker.process.join()
+        with self._lock:
+            if self._workers.get(worker.worker_id) is not worker:
+                return  # already handled
+            del self._workers[worker.worker_id]
+            job, worker.job = worker.job, None
+        worker.tasks.close()
+        worker.results.close()
+
+        exitcode = worker.process.exitcode
+        if job is not None:
+            logger.error(f"💥 Diarization worker {worker.worker_id} died (exit code {exitcode}) "
+                         f"while processing {job.audio_path}")
+            self._finish(job.job_id, error=f"Diarization worker died (exit code {exitcode})")
+            self._slots.release()
+        if self._closing:
+            return
+
+        self._spawn(worker.worker_id)
+        with self._lock:
+            self._stats.workers_restarted += 1
+        logger.warning(f"♻️  Restarted diarization worker {worker.worker_id}")
+
+    def _finish(self, job_id, result=None, error=None, elapsed=0.0, cancelled=False) -> None:
+        with self._lock:
+            future = self._futures.pop(job_id, None)
+            if future is None:
+                return  # already settled
+            if cancelled:
+                self._stats.jobs_queued -= 1
+            else:
+                self._stats.jobs_running -= 1
+                self._stats.busy_seconds += elapsed
+            if error is None:
+                self._stats.jobs_completed += 1
+                self._stats.audio_seconds += result.total_duration
+            else:
+                self._stats.jobs_failed += 1
+            self._mark_active(-1)
+
+        if cancelled:
+            future.cancel()
+        elif error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(RuntimeError(error))
+
+    def _mark_active(self, delta: int) -> None:
+        # Called with the lock held; accumulates wall time while work is in flight
+        now = time.perf_counter()
+        if self._in_flight == 0 and delta > 0:
+            self._active_since = now
+        self._in_flight += delta
+        if self._in_flight == 0 and self._active_since is not None:
+            self._stats.wall_seconds += now - self._active_since
+            self._active_since = None
@@ -2,40 +2,54 @@
 Speaker Diarization Agent for Shadowdark GM Assistant
 
 This agent processes audio files to identify different speakers and create 
-diarized transcripts w        # Try to process original file first, convert only if needed
-        converted_audio = None
-        try:
-            # Try original file first
-            diarization = self.pipeline(str(audio_path))
-            logger.info(f"Successfully processed {audio_path.suffix} file directly")
-            wav_path = audio_path
-        except Exception as e:
-            logger.info(f"Direct processing failed, attempting conversion: {e}")
-            try:
-                wav_path = self._convert_audio_format(audio_path)
-                converted_audio = wav_path if wav_path != audio_path else Nonepeaker labels and timestamps.
+diarized transcripts with speaker labels and timestamps.
 """
 
 import os
+import time
 import logging
 import tempfile
 import subprocess
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
 import torch
 import librosa
 import soundfile as sf
-from dataclasses import dataclass
-from openai import OpenAI
+from dataclasses import dataclass, asdict
 
 # Import pyannote.audio components
 from pyannote.audio import Pipeline
 from pyannote.core import Annotation, Segment
 
+from .. import metrics
+from .diarization_cache import DiarizationCache, compute_audio_hash
+from .asr_backends import ASRBackend, TranscriptionResult, get_asr_backend
+from .cpu_inference import CPU_MODES, optimize_pipeline_for_cpu
+from .speech_transcoder import SpeechTranscoder, TranscodeResult
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+DIARIZATION_MODEL_ID = "pyannote/speaker-diarization-community-1"
+
+# Post-processing presets exposed as --quality on the CLI
+QUALITY_PRESETS = {
+    'fast': {'min_segment_duration': 0.5, 'merge_threshold': 0.3},
+    'balanced': {'min_segment_duration': 1.5, 'merge_threshold': 0.8},
+    'precise': {'min_segment_duration': 2.5, 'merge_threshold': 1.2}
+}
+
+
+def quality_label(min_segment_duration: float, merge_threshold: float) -> str:
+    """Return the preset name matching these post-processing settings (used in cache keys)."""
+    for name, settings in QUALITY_PRESETS.items():
+        if (settings['min_segment_duration'] == min_segment_duration and
+                settings['merge_threshold'] == merge_threshold):
+            return name
+    return f"custom-{min_segment_duration:g}-{merge_threshold:g}"
+
 
 @dataclass
 class SpeakerSegment:
@@ -59,6 +73,22 @@ class DiarizationResult:
     speaker_stats: Dict[str, float]  # speaker_id -> total speaking time
 
 
+@dataclass
+class StageTimings:
+    """Wall-clock timings for a combined diarization + transcription run."""
+    diarization_seconds: float = 0.0
+    transcription_seconds: float = 0.0
+    alignment_seconds: float = 0.0
+    total_seconds: float = 0.0
+    concurrent: bool = False
+    
+    @property
+    def overlapped_seconds(self) -> float:
+        """Stage time hidden by running diarization and transcription side by side."""
+        stage_total = self.diarization_seconds + self.transcription_seconds + self.alignment_seconds
+        return max(0.0, stage_total - self.total_seconds)
+
+
 class SpeakerDiarizer:
     """
     Speaker diarization agent using pyannote.audio.
@@ -70,22 +100,60 @@ class SpeakerDiarizer:
     4. Handle various audio formats
     """
     
-    def __init__(self, huggingface_token: Optional[str] = None, openai_api_key: Optional[str] = None):
+    def __init__(
+        self,
+        huggingface_token: Optional[str] = None,
+        openai_api_key: Optional[str] = None,
+        use_cache: bool = True,
+        cache_dir: Optional[str] = None,
+        asr_backend: Optional[ASRBackend] = None,
+        cpu_mode: Optional[str] = None,
+        intra_op_threads: Optional[int] = None,
+        inter_op_threads: Optional[int] = None,
+        speech_transcoder: Optional[SpeechTranscoder] = None
+    ):
         """
         Initialize the diarizer.
         
         Args:
             huggingface_token: HuggingFace access token for accessing models
             openai_api_key: OpenAI API key for Whisper transcription
+            use_cache: Reuse stored diarization results for identical audio/settings
+            cache_dir: Diarization cache directory (defaults to DIARIZATION_CACHE_DIR)
+            asr_backend: Speech-to-text backend (defaults to ASR_BACKEND, see asr_backends)
+            cpu_mode: Optimized CPU inference: "default" (float32 on best device), "int8",
+                "onnx" or "onnx-int8" (defaults to DIARIZATION_CPU_MODE, see cpu_inference)
+            intra_op_threads: Threads per operator for CPU inference
+            inter_op_threads: Threads across operators for CPU inference
+            speech_transcoder: Re-encode audio as compact speech before ASR upload
+                (runs alongside diarization in diarize_and_transcribe)
         """
         self.huggingface_token = huggingface_token
         self.pipeline = None
         self._supported_formats = {'.wav', '.mp3', '.m4a', '.flac', '.ogg'}
-        
-        # Initialize OpenAI client for Whisper transcription
+        self.model_id = DIARIZATION_MODEL_ID
+        self.cpu_mode = cpu_mode or os.getenv("DIARIZATION_CPU_MODE", "default")
+        if self.cpu_mode not in CPU_MODES:
+            raise ValueError(f"Unknown CPU mode: {self.cpu_mode}. Supported modes: {', '.join(CPU_MODES)}")
+        self.intra_op_threads = intra_op_threads
+        self.inter_op_threads = inter_op_threads
+        self.cache = DiarizationCache(cache_dir) if use_cache else None
+        self.last_timings: Optional[StageTimings] = None
+        
+        # Initialize speech-to-text backend (hosted Whisper unless ASR_BACKEND=local)
         self.openai_api_key = openai_api_key or os.getenv("OPENAI_API_KEY")
-        self.openai_client = OpenAI(api_key=self.openai_api_key) if self.openai_api_key else None
-        
+        self.asr_backend = asr_backend or get_asr_backend(openai_api_key=self.openai_api_key)
+        self.last_transcription: Optional[TranscriptionResult] = None
+        self.speech_transcoder = speech_transcoder
+        self.last_transcode: Optional[TranscodeResult] = None
+        
+    @property
+    def cache_model_id(self) -> str:
+        """Model identifier used in cache keys (quantized modes can differ slightly from float32)."""
+        if self.cpu_mode == "default":
+            return self.model_id
+        return f"{self.model_id}@{self.cpu_mode}"
+    
     def _load_pipeline(self):
         """Load the pyannote.audio diarization pipeline."""
         if self.pipeline is None:
@@ -93,14 +161,28 @@ class SpeakerDiarizer:
                 # Try to load the community model (free) with optimizations
                 if self.huggingface_token:
                     self.pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization-community-1",
+                        self.model_id,
                         token=self.huggingface_token
                     )
                 else:
                     self.pipeline = Pipeline.from_pretrained(
-                        "pyannote/speaker-diarization-community-1"
+                        self.model_id
                     )
                 
+                # Optimized CPU mode: quantized / ONNX models, explicit thread budget
+                if self.cpu_mode != "default":
+                    device = torch.device("cpu")
+                    self.pipeline.to(device)
+                    optimize_pipeline_for_cpu(
+                        self.pipeline,
+                        mode=self.cpu_mode,
+                        intra_op_threads=self.intra_op_threads,
+                        inter_op_threads=self.inter_op_threads,
+                        model_tag=self.model_id.replace("/", "--")
+                    )
+                    logger.info(f"Loaded diarization pipeline on {device} ({self.cpu_mode} mode)")
+                    return
+                
                 # Apple Silicon optimizations
                 if torch.backends.mps.is_available():
                     # Enable optimized operations for Apple Silicon
@@ -176,7 +258,8 @@ class SpeakerDiarizer:
         min_speakers: Optional[int] = None,
         max_speakers: Optional[int] = None,
         min_segment_duration: float = 1.0,
-        merge_threshold: float = 0.5
+        merge_threshold: float = 0.5,
+        audio_hash: Optional[str] = None
     ) -> DiarizationResult:
         """
         Perform speaker diarization on an audio file.
@@ -185,6 +268,8 @@ class SpeakerDiarizer:
             audio_path: Path to the audio file
             min_speakers: Minimum number of speakers (optional)
             max_speakers: Maximum number of speakers (optional)
+            audio_hash: SHA-256 of the file if already known (e.g. computed while
+                uploading), so the cache lookup does not read the file again
             
         Returns:
             DiarizationResult with speaker segments and statistics
@@ -199,6 +284,18 @@ class SpeakerDiarizer:
             raise ValueError(f"Unsupported audio format: {audio_path.suffix}. "
                            f"Supported formats: {self._supported_formats}")
         
+        # Reuse a stored result for identical audio and settings
+        cache_key = None
+        quality = quality_label(min_segment_duration, merge_threshold)
+        if self.cache:
+            audio_hash = audio_hash or compute_audio_hash(audio_path)
+            cache_key = self.cache.make_key(audio_hash, self.cache_model_id, quality, min_speakers, max_speakers)
+            cached = self.cache.get(cache_key)
+            if cached:
+                logger.info(f"♻️  Using cached diarization for {audio_path.name} ({quality}, key {cache_key})")
+                segments = [SpeakerSegment(**seg) for seg in cached['segments']]
+                return self._build_result(segments, cached['total_duration'])
+        
         # Load pipeline
         self._load_pipeline()
         
@@ -215,6 +312,7 @@ class SpeakerDiarizer:
                 logger.info("Note: Runtime speaker constraints not yet implemented")
             
             # Get audio duration for progress estimation
+            audio_duration = None
             try:
                 import librosa
                 audio_duration = librosa.get_duration(path=str(audio_path))
@@ -234,6 +332,7 @@ class SpeakerDiarizer:
                 logger.info(f"🎵 Starting diarization of {audio_path.name}...")
                 logger.info("📊 This may take several minutes depending on audio length...")
             
+            analysis_start = time.perf_counter()
             try:
                 logger.info("🔍 Analyzing audio with ML model...")
                 diarization = self.pipeline(str(audio_path))
@@ -330,36 +429,36 @@ class SpeakerDiarizer:
             
             # Sort segments by start time
             segments.sort(key=lambda s: s.start_time)
+            raw_segments = [asdict(segment) for segment in segments]
             
             # Apply post-processing to improve diarization quality
             logger.info("🔧 Post-processing diarization results...")
             segments = self._post_process_segments(segments, min_segment_duration, merge_threshold)
             
-            # Recalculate speaker stats after post-processing
-            speaker_stats = {}
-            for segment in segments:
-                if segment.speaker_id not in speaker_stats:
-                    speaker_stats[segment.speaker_id] = 0
-                speaker_stats[segment.speaker_id] += segment.duration
-            
-            # Log completion summary
-            num_speakers = len(speaker_stats)
-            logger.info(f"🎉 Diarization completed successfully!")
-            logger.info(f"   📊 Detected {num_speakers} speakers in {total_duration:.1f} seconds")
-            logger.info(f"   🗣️  Speaker breakdown:")
-            for speaker_id, duration in speaker_stats.items():
-                percentage = duration/total_duration*100 if total_duration > 0 else 0
-                logger.info(f"      {speaker_id}: {duration:.1f}s ({percentage:.1f}%)")
+            result = self._build_result(segments, total_duration)
             
-            result = DiarizationResult(
-                segments=segments,
-                num_speakers=num_speakers,  
-                total_duration=total_duration,
-                speaker_stats=speaker_stats
-            )
+            audio_seconds = audio_duration or total_duration
+            if audio_seconds:
+                metrics.observe("gm_diarization_realtime_factor",
+                                (time.perf_counter() - analysis_start) / audio_seconds, cpu_mode=self.cpu_mode)
+                metrics.inc("gm_diarization_audio_seconds_total", audio_seconds, cpu_mode=self.cpu_mode)
             
-            logger.info(f"Diarization complete: {result.num_speakers} speakers identified "
-                       f"in {total_duration:.1f}s of audio")
+            if self.cache and cache_key:
+                try:
+                    self.cache.put(
+                        cache_key,
+                        audio_hash=audio_hash,
+                        audio_name=audio_path.name,
+                        model_id=self.cache_model_id,
+                        quality=quality,
+                        min_speakers=min_speakers,
+                        max_speakers=max_speakers,
+                        raw_segments=raw_segments,
+                        segments=[asdict(segment) for segment in result.segments],
+                        total_duration=total_duration
+                    )
+                except OSError as e:
+                    logger.warning(f"⚠️  Could not write diarization cache: {e}")
             
             return result
             
@@ -368,6 +467,35 @@ class SpeakerDiarizer:
             if converted_audio and converted_audio.exists():
                 converted_audio.unlink()
     
+    def _build_result(self, segments: List[SpeakerSegment], total_duration: float) -> DiarizationResult:
+        """Compute speaker statistics for post-processed segments and wrap them in a result."""
+        speaker_stats = {}
+        for segment in segments:
+            if segment.speaker_id not in speaker_stats:
+                speaker_stats[segment.speaker_id] = 0
+            speaker_stats[segment.speaker_id] += segment.duration
+        
+        # Log completion summary
+        num_speakers = len(speaker_stats)
+        logger.info(f"🎉 Diarization completed successfully!")
+        logger.info(f"   📊 Detected {num_speakers} speakers in {total_duration:.1f} seconds")
+        logger.info(f"   🗣️  Speaker breakdown:")
+        for speaker_id, duration in speaker_stats.items():
+            percentage = duration/total_duration*100 if total_duration > 0 else 0
+            logger.info(f"      {speaker_id}: {duration:.1f}s ({percentage:.1f}%)")
+        
+        result = DiarizationResult(
+            segments=segments,
+            num_speakers=num_speakers,  
+            total_duration=total_duration,
+            speaker_stats=speaker_stats
+        )
+        
+        logger.info(f"Diarization complete: {result.num_speakers} speakers identified "
+                   f"in {total_duration:.1f}s of audio")
+        
+        return result
+    
     def create_speaker_transcript(
         self, 
         diarization_result: DiarizationResult,
@@ -429,7 +557,7 @@ class SpeakerDiarizer:
     
     def transcribe_audio(self, audio_path: str) -> Optional[str]:
         """
-        Transcribe audio file using OpenAI Whisper API.
+        Transcribe audio file using the configured ASR backend.
         
         Args:
             audio_path: Path to the audio file
@@ -437,8 +565,8 @@ class SpeakerDiarizer:
         Returns:
             Transcript text or None if transcription fails
         """
-        if not self.openai_client:
-            logger.warning("OpenAI client not available - cannot transcribe audio")
+        if not self.asr_backend:
+            logger.warning("No ASR backend available - cannot transcribe audio")
             return None
             
         audio_path = Path(audio_path)
@@ -447,38 +575,42 @@ class SpeakerDiarizer:
             logger.error(f"Audio file not found: {audio_path}")
             return None
         
+        speech_dir = None
         try:
-            logger.info("🎙️  Starting speech-to-text transcription with OpenAI Whisper...")
+            # Shrink the upload first; diarization keeps using the original audio
+            if self.speech_transcoder:
+                speech_dir = tempfile.TemporaryDirectory(prefix="gm-speech-")
+                self.last_transcode = self.speech_transcoder.transcode(
+                    audio_path, Path(speech_dir.name) / f"{audio_path.stem}{self.speech_transcoder.suffix}"
+                )
+                audio_path = self.last_transcode.output
             
-            # Check file size (Whisper has 25MB limit)
-            file_size_mb = audio_path.stat().st_size / (1024 * 1024)
-            if file_size_mb > 25:
-                logger.warning(f"⚠️  Audio file is {file_size_mb:.1f}MB (Whisper limit: 25MB)")
-                logger.info("🔄 Large file detected - using local transcription fallback")
-                
-                # Use a simple fallback for very large files
-                # In a production system, you could split the audio into chunks
-                # For now, return a placeholder that indicates we need manual transcription
+            logger.info(f"🎙️  Starting speech-to-text transcription ({self.asr_backend.name} backend)...")
+            
+            # Hosted Whisper has an upload limit; local backends do not
+            if self.asr_backend.exceeds_size_limit(audio_path):
+                file_size_mb = audio_path.stat().st_size / (1024 * 1024)
+                limit_mb = self.asr_backend.max_upload_mb
+                logger.warning(f"⚠️  Audio file is {file_size_mb:.1f}MB (Whisper limit: {limit_mb}MB)")
                 logger.error("❌ File too large for automatic transcription. Please:")
                 logger.error("   1. Split the audio file into smaller segments (<25MB each)")
-                logger.error("   2. Use a local Whisper installation for large files")
+                logger.error("   2. Use the local Whisper backend (ASR_BACKEND=local) for large files")
                 logger.error("   3. Or provide a pre-transcribed text file")
                 return "Large audio file detected. Manual transcription required. Please split the file or provide a text transcript."
             
-            # Open and transcribe the audio file
-            with open(audio_path, "rb") as audio_file:
-                transcript = self.openai_client.audio.transcriptions.create(
-                    model="whisper-1",
-                    file=audio_file,
-                    response_format="text"
-                )
+            result = self.asr_backend.transcribe(str(audio_path))
+            self.last_transcription = result
             
             logger.info("✅ Speech-to-text transcription completed successfully")
-            return transcript
+            return result.text
             
         except Exception as e:
             logger.error(f"❌ Failed to transcribe audio: {e}")
             return None
+        
+        finally:
+            if speech_dir is not None:
+                speech_dir.cleanup()
     
     def _align_transcript_with_speakers(self, transcript: str, segments: List[SpeakerSegment]) -> Dict[int, str]:
         """
@@ -544,54 +676,116 @@ class SpeakerDiarizer:
         min_speakers: Optional[int] = None,
         max_speakers: Optional[int] = None,
         min_segment_duration: float = 1.0,
-        merge_threshold: float = 0.5
+        merge_threshold: float = 0.5,
+        concurrent: bool = True,
+        audio_hash: Optional[str] = None
     ) -> Tuple[DiarizationResult, Optional[str]]:
         """
         Perform both speaker diarization and speech-to-text transcription.
         
+        Diarization is local compute and Whisper is a network upload, and the two
+        only meet at the alignment step. With ``concurrent`` enabled the Whisper
+        request runs on a worker thread while diarization runs on the caller's
+        thread. Per-stage timings are stored on ``self.last_timings``.
+        
         Args:
             audio_path: Path to the audio file
             min_speakers: Minimum number of speakers (optional)
             max_speakers: Maximum number of speakers (optional)
+            concurrent: Overlap transcription with diarization (default True)
+            audio_hash: SHA-256 of the file if already known (see diarize_audio)
             
         Returns:
             Tuple of (DiarizationResult, transcript_text)
         """
         logger.info("🎵 Starting combined diarization and transcription...")
         
-        # Step 1: Perform speaker diarization
-        diarization_result = self.diarize_audio(
-            audio_path, min_speakers, max_speakers, 
-            min_segment_duration, merge_threshold
-        )
-        
-        # Step 2: Transcribe the audio (if OpenAI client available)
+        run_concurrently = concurrent and self.asr_backend is not None
+        timings = StageTimings(concurrent=run_concurrently)
+        run_start = time.perf_counter()
         transcript_text = None
-        if self.openai_client:
-            transcript_text = self.transcribe_audio(audio_path)
-            
-            # Step 2.5: Apply transcript-based corrections if we have the text
-            if transcript_text:
-                logger.info("🔍 Applying transcript-based speaker corrections...")
-                
-                # Apply mid-sentence split detection
-                corrected_segments = self._detect_mid_sentence_splits(
-                    diarization_result.segments, transcript_text
-                )
-                
-                # Apply gaming session heuristics
-                gaming_corrected = self._apply_gaming_session_heuristics(
-                    corrected_segments, transcript_text
+        
+        if run_concurrently:
+            # Step 1 + 2: Start the Whisper upload, then diarize while it is in flight
+            logger.info("⚡ Running transcription concurrently with diarization...")
+            executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="whisper")
+            try:
+                asr_future = executor.submit(self._timed, self.transcribe_audio, audio_path)
+                diarization_result, timings.diarization_seconds = self._timed(
+                    self.diarize_audio, audio_path, min_speakers, max_speakers,
+                    min_segment_duration, merge_threshold, audio_hash
                 )
-                
-                diarization_result.segments = gaming_corrected
+                transcript_text, timings.transcription_seconds = asr_future.result()
+            finally:
+                # Don't block on an in-flight upload if diarization failed
+                executor.shutdown(wait=False, cancel_futures=True)
         else:
-            logger.warning("⚠️  OpenAI client not available - skipping transcription")
+            # Step 1: Perform speaker diarization
+            diarization_result, timings.diarization_seconds = self._timed(
+                self.diarize_audio, audio_path, min_speakers, max_speakers,
+                min_segment_duration, merge_threshold, audio_hash
+            )
+            
+            # Step 2: Transcribe the audio (if an ASR backend is available)
+            if self.asr_backend:
+                transcript_text, timings.transcription_seconds = self._timed(
+                    self.transcribe_audio, audio_path
+                )
+            else:
+                logger.warning("⚠️  ASR backend not available - skipping transcription")
+        
+        # Step 2.5: Apply transcript-based corrections if we have the text
+        if transcript_text:
+            align_start = time.perf_counter()
+            self.apply_transcript_corrections(diarization_result, transcript_text)
+            timings.alignment_seconds = time.perf_counter() - align_start
+        
+        timings.total_seconds = time.perf_counter() - run_start
+        self.last_timings = timings
         
         logger.info("🎉 Combined processing completed!")
+        logger.info(f"   ⏱️  Diarization: {timings.diarization_seconds:.1f}s, "
+                   f"transcription: {timings.transcription_seconds:.1f}s, "
+                   f"alignment: {timings.alignment_seconds:.1f}s")
+        logger.info(f"   ⏱️  Wall clock: {timings.total_seconds:.1f}s "
+                   f"({timings.overlapped_seconds:.1f}s overlapped)")
         return diarization_result, transcript_text
     
-    def get_speaker_mapping(self, diarization_result: DiarizationResult) -> Dict[str, str]:
+    def apply_transcript_corrections(self, diarization_result: DiarizationResult, transcript_text: str) -> DiarizationResult:
+        """
+        Refine speaker segments using the transcript text (in place).
+        
+        Args:
+            diarization_result: Results from diarization
+            transcript_text: Transcript of the same audio
+            
+        Returns:
+            The same DiarizationResult with corrected segments
+        """
+        logger.info("🔍 Applying transcript-based speaker corrections...")
+        
+        # Apply mid-sentence split detection
+        corrected_segments = self._detect_mid_sentence_splits(
+            diarization_result.segments, transcript_text
+        )
+        
+        # Apply gaming session heuristics
+        gaming_corrected = self._apply_gaming_session_heuristics(
+            corrected_segments, transcript_text
+        )
+        
+        diarization_result.segments = gaming_corrected
+        return diarization_result
+    
+    @staticmethod
+    def _timed(func, *args, **kwargs):
+        """Call ``func`` and return ``(result, elapsed_seconds)``."""
+        start = time.perf_counter()
+        result = func(*args, **kwargs)
+        return result, time.perf_counter() - start
+    
+    @staticmethod
+    def get_speaker_mapping(diarization_result: DiarizationResult) -> Dict[str, str]:
         """
         Create a mapping from technical speaker IDs to human-readable names.
         
@@ -12,7 +12,7 @@ from dataclasses import dataclass, asdict
 from datetime import datetime
 
 from sqlmodel import Session
-from openai import OpenAI
+from core.integrations.openai_client import get_openai_service
 
 from core.data.vector_store import query as rag_query
 from core.data.models import Chunk
@@ -69,7 +69,9 @@ class GMChatAgent:
     
     def __init__(self, db_session: Session):
         self.db_session = db_session
-        self.client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+        self.client = get_openai_service()  # shared, rate-limited and retrying
+        if self.client is None:
+            raise ValueError("OpenAI API key required for chat (set OPENAI_API_KEY)")
         self.conversation = ConversationHistory()
         
         # Initialize with system prompt
@@ -342,7 +344,8 @@ Remember: Accuracy to official Shadowdark rules is MORE important than being hel
             if messages and messages[-1]["role"] == "user":
                 messages[-1]["content"] = enhanced_message
             
-            response = self.client.chat.completions.create(
+            response = self.client.chat(
+                agent="gm_chat",
                 model="gpt-5",
                 messages=messages,
                 max_completion_tokens=10000
@@ -0,0 +1,454 @@
+"""
+Live Transcriber for Shadowdark GM Assistant
+
+Follows a recording that is still being written (OBS, Audacity, a Discord
+bot) and processes it window by window while the game is running:
+
+- every time ``window_seconds`` of new audio has arrived, the window is cut
+  out with ``AudioSplitter`` (starting ``context_seconds`` early) and
+  diarized and transcribed with ``SpeakerDiarizer``
+- each window's speaker labels are matched to the session's speakers,
+  first by agreement on the shared context audio, then by comparing a
+  voice print (MFCC statistics) against the speakers heard so far
+- the new entries are appended to the transcript, in the format
+  ``TranscriptGenerator`` writes, so the file can be read during the game
+
+When the file stops growing for ``idle_seconds`` the remaining audio is
+processed, speakers are named by speaking time (GM first) and the
+transcript and its columnar store are finalized. Progress is kept in
+``<transcript>.live.json``, so an interrupted run continues where it
+stopped.
+
+The recording must be readable while it is written: WAV, FLAC, OGG, MP3
+or MKA work; MP4/M4A cannot be read until the recorder finalizes them.
+"""
+
+import json
+import time
+import wave
+import logging
+import tempfile
+import subprocess
+from pathlib import Path
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .audio_splitter import AudioSplitter
+from .asr_backends import ASRBackend, WHISPER_SAMPLE_RATE
+from .speech_transcoder import SpeechTranscoder
+from ..data.transcript_store import TranscriptTable, format_entry, write_transcript_store
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+WINDOW_CODEC_ARGS = ['-ac', '1', '-ar', str(WHISPER_SAMPLE_RATE), '-c:a', 'pcm_s16le']
+LIVE_STATUS = "**Status:** 🔴 Live - updated as the recording grows"
+
+
+def _cosine(a: np.ndarray, b: np.ndarray) -> float:
+    denominator = float(np.linalg.norm(a) * np.linalg.norm(b))
+    return float(np.dot(a, b)) / denominator if denominator else 0.0
+
+
+class SpeakerTracker:
+    """
+    Keeps speaker identities consistent across independently diarized windows.
+
+    Each window restarts pyannote's labels. A window label is matched to a
+    session speaker when the two agree on at least ``min_agreement_seconds``
+    of the context audio both windows saw; labels with no partner there are
+    matched by voice-print similarity, and otherwise become a new speaker.
+    """
+
+    def __init__(self, similarity_threshold: float = 0.9, min_agreement_seconds: float = 1.0):
+        """
+        Args:
+            similarity_threshold: Cosine similarity a voice print needs to match a known speaker
+            min_agreement_seconds: Shared context speech needed to carry a label over
+        """
+        self.similarity_threshold = similarity_threshold
+        self.min_agreement_seconds = min_agreement_seconds
+        self.recent: List[Tuple[float, float, str]] = []   # previous window on the session clock
+        self.profiles: Dict[str, Dict] = {}                 # speaker -> {"vector": [...], "seconds": float}
+        self.next_index = 1
+
+    def assign(
+        self,
+        segments: List[Tuple[float, float, str]],
+        prints: Optional[Dict[str, np.ndarray]] = None
+    ) -> Dict[str, str]:
+        """
+        Map a window's labels to session speakers and remember the window.
+
+        Args:
+            segments: (start, end, label) on the session clock
+            prints: Voice print per window label, when available
+
+        Returns:
+            Window label -> session speaker
+        """
+        prints = prints or {}
+        seconds: Dict[str, float] = {}
+        for start, end, label in segments:
+            seconds[label] = seconds.get(label, 0.0) + end - start
+
+        # Context agreement: how long each (label, speaker) pair spoke at the same time
+        agreement: Dict[Tuple[str, str], float] = {}
+        for start, end, label in segments:
+            for prev_start, prev_end, speaker in self.recent:
+                shared = min(end, prev_end) - max(start, prev_start)
+                if shared > 0:
+                    agreement[(label, speaker)] = agreement.get((label, speaker), 0.0) + shared
+
+        mapping: Dict[str, str] = {}
+        taken = set()
+        for (label, speaker), shared in sorted(agreement.items(), key=lambda item: -item[1]):
+            if shared < self.min_agreement_seconds or label in mapping or speaker in taken:
+                continue
+            mapping[label] = speaker
+            taken.add(speaker)
+
+        # Everyone else: nearest known voice, or a new speaker
+        for label in sorted(seconds, key=lambda l: -seconds[l]):
+            if label in mapping:
+                continue
+            best, best_score = None, self.similarity_threshold
+            if label in prints:
+                for speaker, profile in self.profiles.items():
+                    if speaker in taken:
+                        continue
+                    score = _cosine(prints[label], np.asarray(profile["vector"]))
+                    if score >= best_score:
+                        best, best_score = speaker, score
+            if best is None:
+                best = f"Speaker {self.next_index}"
+                self.next_index += 1
+            mapping[label] = best
+            taken.add(best)
+
+        for label, vector in prints.items():
+            self._update_profile(mapping[label], vector, seconds.get(label, 0.0))
+        self.recent = [(start, end, mapping[label]) for start, end, label in segments]
+        return mapping
+
+    def _update_profile(self, speaker: str, vector: np.ndarray, seconds: float) -> None:
+        """Running average of a speaker's voice print, weighted by speaking time."""
+        profile = self.profiles.get(speaker)
+        if profile is None or profile["seconds"] <= 0:
+            self.profiles[speaker] = {"vector": [float(v) for v in vector], "seconds": seconds}
+            return
+        total = profile["seconds"] + seconds
+        if total <= 0:
+            return
+        merged = (np.asarray(profile["vector"]) * profile["seconds"] + vector * seconds) / total
+        self.profiles[speaker] = {"vector": [float(v) for v in merged], "seconds": total}
+
+    def to_dict(self) -> Dict:
+        return {"recent": self.recent, "profiles": self.profiles, "next_index": self.next_index}
+
+    def load(self, data: Dict) -> None:
+        self.recent = [tuple(item) for item in data.get("recent", [])]
+        self.profiles = data.get("profiles", {})
+        self.next_index = data.get("next_index", 1)
+
+
+class LiveTranscriber:
+    """
+    Incrementally diarizes and transcribes a recording that is still growing.
+
+    Usage:
+        live = LiveTranscriber(window_seconds=300)
+        transcript_path = live.follow("session_live.wav")   # returns once recording stops
+    """
+
+    def __init__(
+        self,
+        window_seconds: float = 300.0,
+        context_seconds: float = 30.0,
+        poll_seconds: float = 10.0,
+        idle_seconds: float = 120.0,
+        quality: str = "balanced",
+        huggingface_token: Optional[str] = None,
+        openai_api_key: Optional[str] = None,
+        asr_backend: Optional[ASRBackend] = None,
+        speech_transcoder: Optional[SpeechTranscoder] = None,
+        similarity_threshold: float = 0.9
+    ):
+        """
+        Args:
+            window_seconds: New audio processed per window
+            context_seconds: Audio before each window diarized again to link speakers
+            poll_seconds: How often the recording is checked for growth
+            idle_seconds: The recording is treated as finished after this long without growth
+            quality: Diarization quality preset
+            huggingface_token: HuggingFace token for the diarization model
+            openai_api_key: OpenAI key for transcription
+            asr_backend: Speech-to-text backend (defaults to ASR_BACKEND)
+            speech_transcoder: Re-encode each window as compact speech before ASR upload
+            similarity_threshold: Voice-print similarity needed to recognize a returning speaker
+        """
+        self.window_seconds = window_seconds
+        self.context_seconds = context_seconds
+        self.poll_seconds = poll_seconds
+        self.idle_seconds = idle_seconds
+        self.quality = quality
+        self.huggingface_token = huggingface_token
+        self.openai_api_key = openai_api_key
+        self.asr_backend = asr_backend
+        self.speech_transcoder = speech_transcoder
+        self.splitter = AudioSplitter()
+        self.tracker = SpeakerTracker(similarity_threshold=similarity_threshold)
+        self.processed_seconds = 0.0
+        self.window_index = 0
+        self.names: Dict[str, str] = {}  # session speaker -> final name, once finalized
+        self._diarizer = None
+
+    def follow(self, audio_path: str, output_path: Optional[str] = None) -> str:
+        """
+        Process a growing recording until it stops growing, then finalize the transcript.
+
+        Args:
+            audio_path: Recording being written
+            output_path: Transcript path (defaults to ``<name>_transcript.md`` beside the audio)
+
+        Returns:
+            Path to the finalized transcript
+        """
+        audio_path = Path(audio_path)
+        if not audio_path.exists():
+            raise FileNotFoundError(f"Audio file not found: {audio_path}")
+        output_path = Path(output_path) if output_path else audio_path.parent / f"{audio_path.stem}_transcript.md"
+        state_path = output_path.with_name(output_path.name + ".live.json")
+
+        self._start(audio_path, output_path, state_path)
+        logger.info(f"🔴 Following {audio_path.name} in {self.window_seconds / 60:.0f}-minute windows "
+                   f"(transcript: {output_path.name})")
+
+        last_size, last_growth = -1, time.monotonic()
+        with tempfile.TemporaryDirectory(prefix="gm_live_") as work_dir:
+            work_dir = Path(work_dir)
+            while True:
+                size = audio_path.stat().st_size
+                if size != last_size:
+                    last_size, last_growth = size, time.monotonic()
+                idle = time.monotonic() - last_growth >= self.idle_seconds
+
+                available = self._available_seconds(audio_path)
+                if available is not None and available - self.processed_seconds >= self.window_seconds:
+                    self._process_window(audio_path, output_path, state_path, work_dir,
+                                         self.processed_seconds + self.window_seconds, available)
+                    continue
+                if idle:
+                    if available is not None and available - self.processed_seconds > 1.0:
+                        self._process_window(audio_path, output_path, state_path, work_dir, available, available)
+                    break
+                time.sleep(self.poll_seconds)
+
+        self._finalize(audio_path, output_path, state_path)
+        return str(output_path)
+
+    # --- windows -----------------------------------------------------------
+
+    def _process_window(
+        self,
+        audio_path: Path,
+        output_path: Path,
+        state_path: Path,
+        work_dir: Path,
+        window_end: float,
+        available: float
+    ) -> None:
+        from .diarizer import QUALITY_PRESETS
+
+        started = time.perf_counter()
+        self.window_index += 1
+        boundary = self.processed_seconds
+        window_start = max(0.0, boundary - self.context_seconds)
+        window_path = work_dir / f"{audio_path.stem}_live_{self.window_index:04d}.wav"
+        self.splitter.extract_range(audio_path, window_start, window_end, window_path, WINDOW_CODEC_ARGS)
+
+        diarizer = self._get_diarizer()
+        settings = QUALITY_PRESETS.get(self.quality, QUALITY_PRESETS["balanced"])
+        result, transcript_text = diarizer.diarize_and_transcribe(str(window_path), **settings)
+
+        # Session clock from here on
+        segments = [(window_start + s.start_time, window_start + s.end_time, s.speaker_id) for s in result.segments]
+        mapping = self.tracker.assign(segments, self._voice_prints(window_path, result.segments))
+        texts = self._segment_texts(result, transcript_text, diarizer.last_transcription, boundary - window_start)
+
+        entries = []
+        for (start, end, label), text in zip(segments, texts):
+            if end <= boundary or text is None:
+                continue  # already written by the previous window
+            entries.append(format_entry(max(start, boundary), end, mapping[label], text.strip(),
+                                        segment=self.window_index))
+        with open(output_path, "a", encoding="utf-8") as f:
+            f.writelines(entries)
+        window_path.unlink(missing_ok=True)
+
+        self.processed_seconds = window_end
+        self._save_state(state_path, audio_path)
+        logger.info(f"✅ Window {self.window_index} ({self._clock(boundary)}-{self._clock(window_end)}): "
+                   f"{len(entries)} entries in {time.perf_counter() - started:.0f}s, "
+                   f"{max(0.0, available - window_end) / 60:.1f} minutes behind the recording")
+
+    def _segment_texts(self, result, transcript_text: Optional[str], transcription, boundary: float) -> List[Optional[str]]:
+        """
+        Text for each diarization segment of a window (window clock).
+
+        Recognized pieces carry timestamps, so each goes to the segment it
+        overlaps most; pieces that end before ``boundary`` were written by
+        the previous window. Without timestamps the text is spread over the
+        segments in proportion to their length, as in ``TranscriptGenerator``.
+        ``None`` marks a segment that lies in already written context audio.
+        """
+        segments = result.segments
+        if transcription is not None and transcription.segments:
+            texts = [[] for _ in segments]
+            for piece in transcription.segments:
+                if (piece.start + piece.end) / 2 < boundary or not segments:
+                    continue
+                best = max(range(len(segments)), key=lambda i: (
+                    min(piece.end, segments[i].end_time) - max(piece.start, segments[i].start_time)
+                ))
+                texts[best].append(piece.text.strip())
+            return [" ".join(parts) if parts or seg.end_time > boundary else None
+                    for seg, parts in zip(segments, texts)]
+
+        from .transcript_generator import TranscriptGenerator
+        aligned = TranscriptGenerator()._align_transcript_with_speakers(transcript_text, segments) if transcript_text else {}
+        return [aligned.get(i, "") if (seg.start_time + seg.end_time) / 2 >= boundary else None
+                for i, seg in enumerate(segments)]
+
+    def _voice_prints(self, window_path: Path, segments) -> Dict[str, np.ndarray]:
+        """Mean and spread of MFCCs over each window label's speech (a cheap voice print)."""
+        try:
+            import librosa
+        except ImportError:
+            return {}
+
+        audio, sample_rate = librosa.load(str(window_path), sr=WHISPER_SAMPLE_RATE, mono=True)
+        mfcc = librosa.feature.mfcc(y=audio, sr=sample_rate, n_mfcc=20)[1:]  # drop c0 (loudness)
+        hop_seconds = 512 / sample_rate
+        frames: Dict[str, List[np.ndarray]] = {}
+        for seg in segments:
+            lo, hi = int(seg.start_time / hop_seconds), int(seg.end_time / hop_seconds)
+            if hi > lo:
+                frames.setdefault(seg.speaker_id, []).append(mfcc[:, lo:hi])
+        prints = {}
+        for label, chunks in frames.items():
+            features = np.concatenate(chunks, axis=1)
+            if features.shape[1] >= 10:
+                prints[label] = np.concatenate([features.mean(axis=1), features.std(axis=1)])
+        return prints
+
+    # --- transcript and state ----------------------------------------------
+
+    def _start(self, audio_path: Path, output_path: Path, state_path: Path) -> None:
+        table = TranscriptTable()
+        if state_path.exists() and output_path.exists():
+            with open(state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self.processed_seconds = state["processed_seconds"]
+            self.window_index = state["window_index"]
+            self.tracker.load(state["tracker"])
+            with open(output_path, "r", encoding="utf-8") as f:
+                table = TranscriptTable.from_markdown(f)
+            # A finalized transcript uses display names; go back to the tracker's
+            original = {name: speaker for speaker, name in state.get("names", {}).items()}
+            table.speaker = [original.get(name, name) for name in table.speaker]
+            logger.info(f"♻️  Resuming live transcript at {self._clock(self.processed_seconds)} "
+                       f"({len(table)} entries so far)")
+        elif output_path.exists():
+            raise FileExistsError(f"{output_path} exists and is not a live transcript; choose another output path")
+
+        # (Re)write the live header; entries are appended below it
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write("# Session Transcript\n\n")
+            f.write(f"**Generated:** {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
+            f.write(f"**Source Audio:** {audio_path.name}\n")
+            f.write(f"{LIVE_STATUS}\n\n## Transcript\n\n")
+            f.writelines(format_entry(**row) for row in table.rows())
+
+    def _save_state(self, state_path: Path, audio_path: Path) -> None:
+        state = {
+            "source": str(audio_path),
+            "processed_seconds": self.processed_seconds,
+            "window_index": self.window_index,
+            "tracker": self.tracker.to_dict(),
+            "names": self.names
+        }
+        temp_path = state_path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        temp_path.replace(state_path)
+
+    def _finalize(self, audio_path: Path, output_path: Path, state_path: Path) -> None:
+        """Name speakers by speaking time and rewrite the transcript in its final form."""
+        from .diarizer import DiarizationResult
+
+        with open(output_path, "r", encoding="utf-8") as f:
+            table = TranscriptTable.from_markdown(f)
+
+        speaker_stats: Dict[str, float] = {}
+        for start, end, speaker in zip(table.start, table.end, table.speaker):
+            speaker_stats[speaker] = speaker_stats.get(speaker, 0.0) + end - start
+        self.names = self._get_diarizer().get_speaker_mapping(DiarizationResult(
+            segments=[], num_speakers=len(speaker_stats),
+            total_duration=self.processed_seconds, speaker_stats=speaker_stats
+        ))
+        table.speaker = [self.names.get(speaker, speaker) for speaker in table.speaker]
+        table.metadata = {
+            "source_audio": audio_path.name,
+            "duration": self.processed_seconds,
+            "speakers": dict(self.names)
+        }
+
+        output_path.write_text(table.to_markdown(), encoding="utf-8")
+        write_transcript_store(table, output_path)
+        self._save_state(state_path, audio_path)
+        logger.info(f"🏁 Live transcript finalized: {len(table)} entries, {len(speaker_stats)} speakers, "
+                   f"{self.processed_seconds / 60:.1f} minutes ({output_path})")
+
+    # --- helpers -------------------------------------------------------------
+
+    def _available_seconds(self, audio_path: Path) -> Optional[float]:
+        """
+        Audio written so far, or None while the file cannot be read yet.
+
+        Recorders often leave the WAV header's length unset until they stop,
+        so WAV duration comes from the file size instead.
+        """
+        if audio_path.suffix.lower() == ".wav":
+            try:
+                with wave.open(str(audio_path), "rb") as wav:
+                    bytes_per_second = wav.getframerate() * wav.getnchannels() * wav.getsampwidth()
+                return max(0.0, (audio_path.stat().st_size - 44) / bytes_per_second)
+            except (wave.Error, EOFError, ZeroDivisionError):
+                return None
+
+        cmd = ['ffprobe', '-v', 'quiet', '-show_entries', 'format=duration', '-of', 'csv=p=0', str(audio_path)]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        try:
+            return float(result.stdout.strip())
+        except ValueError:
+            return None
+
+    def _get_diarizer(self):
+        if self._diarizer is None:
+            from .diarizer import SpeakerDiarizer
+            self._diarizer = SpeakerDiarizer(
+                huggingface_token=self.huggingface_token,
+                openai_api_key=self.openai_api_key,
+                asr_backend=self.asr_backend,
+                speech_transcoder=self.speech_transcoder,
+                use_cache=False  # every window is new audio
+            )
+        return self._diarizer
+
+    @staticmethod
+    def _clock(seconds: float) -> str:
+        return f"{int(seconds // 3600)}:{int(seconds % 3600 // 60):02d}:{int(seconds % 60):02d}"
@@ -0,0 +1,243 @@
+"""
+Multitrack Ingest for Shadowdark GM Assistant
+
+Discord recording bots (Craig and similar) save one audio track per
+speaker. With a track per speaker there is nothing to diarize: each track
+is trimmed to its voiced regions, the voiced audio is transcribed (tracks
+in parallel), and the per-track timestamps are mapped back to the session
+clock and merged into one speaker-labelled timeline.
+
+The result converts to the same ``DiarizationResult`` / ``SpeakerSegment``
+objects the diarizer produces, so the regular transcript output applies.
+"""
+
+import os
+import re
+import heapq
+import shutil
+import logging
+import tempfile
+import zipfile
+from pathlib import Path
+from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Tuple
+
+from .asr_backends import ASRBackend, get_asr_backend
+from .speech_transcoder import SpeechTranscoder
+from .vad import TimeRemap, VoiceActivityDetector
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRACK_FORMATS = {'.wav', '.mp3', '.m4a', '.mp4', '.ogg', '.oga', '.opus', '.flac', '.webm', '.aac'}
+
+
+@dataclass
+class SpeakerTrack:
+    """One speaker's recording."""
+    speaker: str
+    path: Path
+    index: int = 0      # position among the session's tracks
+
+
+@dataclass
+class Utterance:
+    """Recognized speech on the session clock."""
+    start: float
+    end: float
+    speaker: str
+    text: str
+
+
+def group_regions(regions: List[Tuple[float, float]], max_seconds: Optional[float]) -> List[List[Tuple[float, float]]]:
+    """Pack consecutive regions into groups of at most ``max_seconds`` voiced audio (one upload each)."""
+    if not regions:
+        return []
+    if not max_seconds:
+        return [list(regions)]
+
+    groups, current, current_seconds = [], [], 0.0
+    for start, end in regions:
+        while end - start > 0:
+            room = max_seconds - current_seconds
+            if room <= 0:
+                groups.append(current)
+                current, current_seconds = [], 0.0
+                room = max_seconds
+            piece_end = min(end, start + room)
+            current.append((start, piece_end))
+            current_seconds += piece_end - start
+            start = piece_end
+    if current:
+        groups.append(current)
+    return groups
+
+
+def speaker_from_filename(stem: str) -> str:
+    """Speaker label from a track file name, e.g. ``1-alice`` (Craig) -> ``alice``."""
+    return re.sub(r'^\d+[-_ ]+', '', stem) or stem
+
+
+class MultitrackTranscriber:
+    """
+    Transcribes a multitrack session without diarization.
+    """
+
+    def __init__(
+        self,
+        asr_backend: Optional[ASRBackend] = None,
+        openai_api_key: Optional[str] = None,
+        transcoder: Optional[SpeechTranscoder] = None,
+        max_workers: Optional[int] = None,
+        frame_seconds: float = 0.02
+    ):
+        """
+        Args:
+            asr_backend: Speech-to-text engine (defaults to the ASR_BACKEND configuration)
+            openai_api_key: API key for the OpenAI backend
+            transcoder: Encoding for the trimmed audio (defaults to 24 kbps Opus speech)
+            max_workers: Tracks/chunks processed concurrently (defaults to MULTITRACK_WORKERS, then 4)
+            frame_seconds: Energy analysis frame length for voice detection
+        """
+        self.asr_backend = asr_backend or get_asr_backend(openai_api_key=openai_api_key)
+        if self.asr_backend is None:
+            raise ValueError("An ASR backend is required (set OPENAI_API_KEY or ASR_BACKEND=local)")
+        self.transcoder = transcoder or SpeechTranscoder()
+        self.max_workers = max_workers or int(os.getenv("MULTITRACK_WORKERS", "4"))
+        self.vad = VoiceActivityDetector(engine="energy", frame_seconds=frame_seconds)
+        self.total_duration = 0.0
+        self.voiced_seconds = 0.0
+
+    def discover_tracks(self, source: Path, extract_dir: Path) -> List[SpeakerTrack]:
+        """
+        Find per-speaker tracks in a directory or zip archive.
+
+        Args:
+            source: Directory or .zip file
+            extract_dir: Where zip members are extracted
+
+        Returns:
+            Tracks sorted by file name; speakers whose file names give the
+            same label (``1-alice``, ``2-alice``) become ``alice`` and ``alice (2)``
+        """
+        source = Path(source)
+        if source.is_dir():
+            paths = sorted(p for p in source.iterdir() if p.suffix.lower() in TRACK_FORMATS)
+        elif zipfile.is_zipfile(source):
+            paths = []
+            with zipfile.ZipFile(source) as archive:
+                for member in archive.infolist():
+                    name = Path(member.filename).name  # flatten; never trust archive paths
+                    if member.is_dir() or Path(name).suffix.lower() not in TRACK_FORMATS:
+                        continue
+                    target = extract_dir / name
+                    if target.exists():
+                        # Same file name in another archive folder; keep both
+                        target = extract_dir / str(len(paths)) / name
+                        target.parent.mkdir()
+                    with archive.open(member) as src, open(target, "wb") as dst:
+                        shutil.copyfileobj(src, dst)
+                    paths.append(target)
+            paths.sort(key=lambda p: (p.name, str(p)))
+        else:
+            raise ValueError(f"Expected a directory or zip of per-speaker tracks: {source}")
+
+        if not paths:
+            raise ValueError(f"No audio tracks found in {source}")
+
+        tracks, seen = [], {}
+        for index, path in enumerate(paths):
+            speaker = speaker_from_filename(path.stem)
+            seen[speaker] = seen.get(speaker, 0) + 1
+            if seen[speaker] > 1:
+                speaker = f"{speaker} ({seen[speaker]})"
+            tracks.append(SpeakerTrack(speaker=speaker, path=path, index=index))
+        return tracks
+
+    def transcribe(self, source: Path) -> List[Utterance]:
+        """
+        Transcribe every track and merge the results into one timeline.
+
+        Args:
+            source: Directory or .zip of per-speaker tracks
+
+        Returns:
+            Utterances from all speakers, ordered by start time
+        """
+        with tempfile.TemporaryDirectory(prefix="gm_multitrack_") as tmp:
+            tmp = Path(tmp)
+            extract_dir = tmp / "tracks"
+            extract_dir.mkdir()
+            tracks = self.discover_tracks(source, extract_dir)
+            logger.info(f"🎚️  {len(tracks)} speaker tracks: {', '.join(t.speaker for t in tracks)}")
+
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="multitrack") as executor:
+                analyses = list(executor.map(self._analyze_track, tracks))
+
+                limit = None
+                if self.asr_backend.max_upload_mb:
+                    limit = self.transcoder.max_segment_duration(self.asr_backend.max_upload_mb)
+                jobs = []
+                for track, (duration, regions) in zip(tracks, analyses):
+                    for index, group in enumerate(group_regions(regions, limit)):
+                        jobs.append((track, index, group))
+
+                self.total_duration = max((duration for duration, _ in analyses), default=0.0)
+                self.voiced_seconds = sum(end - start for _, regions in analyses for start, end in regions)
+                logger.info(f"🗣️  {self.voiced_seconds / 60:.1f} voiced minutes across tracks "
+                           f"({len(jobs)} uploads); session length {self.total_duration / 60:.1f} minutes")
+
+                results = list(executor.map(lambda job: self._transcribe_group(*job, tmp), jobs))
+
+        per_track = {}
+        for (track, _, _), utterances in zip(jobs, results):
+            per_track.setdefault(track.index, []).extend(utterances)
+        streams = [sorted(utterances, key=lambda u: u.start) for utterances in per_track.values()]
+        return list(heapq.merge(*streams, key=lambda u: u.start))
+
+    def _analyze_track(self, track: SpeakerTrack) -> Tuple[float, List[Tuple[float, float]]]:
+        speech_map = self.vad.detect(track.path)
+        return speech_map.duration, speech_map.regions
+
+    def _transcribe_group(
+        self,
+        track: SpeakerTrack,
+        index: int,
+        regions: List[Tuple[float, float]],
+        work_dir: Path
+    ) -> List[Utterance]:
+        # The track index keeps tracks with the same file stem (alice.wav, alice.flac) apart
+        trimmed = work_dir / f"{track.index:02d}_{track.path.stem}_voiced_{index:03d}{self.transcoder.suffix}"
+        self.vad.extract(track.path, regions, trimmed, self.transcoder)
+        remap = TimeRemap.from_regions(regions)
+
+        result = self.asr_backend.transcribe(str(trimmed))
+        return [
+            Utterance(remap.to_source(seg.start), remap.to_source(seg.end), track.speaker, seg.text)
+            for seg in result.segments if seg.text
+        ]
+
+
+def utterances_to_diarization(utterances: List[Utterance], total_duration: float):
+    """
+    Express a multitrack timeline as a diarization result.
+
+    Returns:
+        (DiarizationResult, segment texts aligned with ``result.segments``)
+    """
+    from .diarizer import DiarizationResult, SpeakerSegment
+
+    segments = [SpeakerSegment(u.start, u.end, u.speaker, u.end - u.start) for u in utterances]
+    speaker_stats = {}
+    for segment in segments:
+        speaker_stats[segment.speaker_id] = speaker_stats.get(segment.speaker_id, 0.0) + segment.duration
+
+    result = DiarizationResult(
+        segments=segments,
+        num_speakers=len(speaker_stats),
+        total_duration=total_duration,
+        speaker_stats=speaker_stats
+    )
+    return result, [u.text for u in utterances]
@@ -7,7 +7,7 @@ import fitz  # PyMuPDF
 import tiktoken
 from sqlmodel import Session
 from core.data.models import Document
-from core.data.vector_store import upsert_chunks, query as vs_query
+from core.data.vector_store import upsert_chunks, query as vs_query, query_async as vs_query_async
 
 def _count_tokens(text: str, model: str = "gpt-4") -> int:
     """Count tokens for a given text using tiktoken"""
@@ -419,3 +419,6 @@ def _extract_section_header(text: str) -> Optional[str]:
 
 def search(sess: Session, query: str, k: int = 5):
     return vs_query(sess, query, k=k)
+
+async def search_async(sess, query: str, k: int = 5):
+    return await vs_query_async(sess, query, k=k)
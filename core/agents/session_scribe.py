@@ -2,19 +2,21 @@
 import os
 import re
 from datetime import datetime
+from pathlib import Path
 from textwrap import dedent
 from typing import List, Optional, Dict
-from openai import OpenAI
 from dotenv import load_dotenv
 from sqlmodel import Session
+from ..integrations.openai_client import get_openai_service
 from ..data.models import Session as SessionModel, Event, NPC
+from ..data.blob_store import get_blob_store, store_audio_enabled
 from .diarizer import SpeakerDiarizer, DiarizationResult
 
 load_dotenv()
 
-# Initialize OpenAI client if API key is available
+# Shared rate-limited OpenAI client (None without a valid API key)
 openai_api_key = os.getenv("OPENAI_API_KEY")
-client = OpenAI(api_key=openai_api_key) if openai_api_key and openai_api_key.startswith("sk-") else None
+client = get_openai_service(openai_api_key) if openai_api_key and openai_api_key.startswith("sk-") else None
 
 SHADOWDARK_STYLE_GUIDE = dedent("""
 You are an expert Shadowdark RPG session note taker. Follow these style guidelines:
@@ -109,6 +111,33 @@ def _enhance_transcript_with_speakers(transcript: str, speaker_mapping: Dict[str
     
     return enhanced
 
+def load_transcript_for_notes(transcript_path: str) -> str:
+    """
+    Read a transcript file for summarization.
+    
+    Diarized transcripts are loaded through the columnar transcript store
+    (its Parquet file when fresh, else the parsed markdown) and reduced to
+    ``Speaker: text`` lines, so the review markup never reaches the prompt.
+    Other files, such as VTT exports, are returned as they are.
+    """
+    from ..data.transcript_store import load_transcript
+    
+    table = load_transcript(Path(transcript_path))
+    if len(table):
+        return table.to_dialogue()
+    return Path(transcript_path).read_text(encoding="utf-8")
+
+def transcript_text_for_notes(transcript: str) -> str:
+    """
+    ``load_transcript_for_notes`` for a transcript received as text (API
+    requests): review-format markdown becomes ``Speaker: text`` lines, any
+    other text is returned as it is.
+    """
+    from ..data.transcript_store import TranscriptTable
+    
+    table = TranscriptTable.from_markdown(transcript)
+    return table.to_dialogue() if len(table) else transcript
+
 def _clean_vtt_transcript(transcript: str) -> str:
     """
     Clean VTT transcript by removing system messages, timestamps, and non-game content.
@@ -491,7 +520,10 @@ def summarize_audio(
     db_session: Optional[Session] = None,
     huggingface_token: Optional[str] = None,
     use_mock: bool = False,
-    fast_mode: bool = False
+    fast_mode: bool = False,
+    audio_hash: Optional[str] = None,
+    raise_errors: bool = False,
+    diarizer: Optional[SpeakerDiarizer] = None
 ) -> str:
     """
     Generate session notes from an audio file with speaker diarization.
@@ -504,6 +536,9 @@ def summarize_audio(
         huggingface_token: HuggingFace token for accessing diarization models
         use_mock: If True, use mock processing (for testing)
         fast_mode: If True, skip speaker diarization for faster processing
+        audio_hash: SHA-256 of the file if already known (keys the diarization cache)
+        raise_errors: Raise failures instead of returning the template with the error
+        diarizer: Diarizer to reuse, pipeline already loaded (a new one is created by default)
         
     Returns:
         Formatted session notes with speaker identification
@@ -514,13 +549,21 @@ def summarize_audio(
         
         print(f"🎙️  Processing audio file: {audio_path}")
         
+        audio_uri = None
+        if db_session and campaign_id:
+            if audio_hash is None:
+                # Hashed once here; the diarizer reuses it as its cache key
+                from .diarization_cache import compute_audio_hash
+                audio_hash = compute_audio_hash(audio_path)
+            audio_uri = _store_audio_reference(audio_path, audio_hash)
+        
         if fast_mode:
             # Fast mode: Skip diarization, use Whisper transcription only
             print("🚀 Fast mode enabled: Skipping speaker diarization...")
             print("📊 Step 1/2: Transcribing audio with Whisper...")
             
-            openai_key = os.getenv("OPENAI_API_KEY")
-            diarizer = SpeakerDiarizer(huggingface_token=huggingface_token, openai_api_key=openai_key)
+            if diarizer is None:
+                diarizer = SpeakerDiarizer(huggingface_token=huggingface_token, openai_api_key=os.getenv("OPENAI_API_KEY"))
             
             # Just transcribe without diarization
             transcript_text = diarizer.transcribe_audio(audio_path)
@@ -531,12 +574,14 @@ def summarize_audio(
         else:
             # Full mode: Include speaker diarization
             # Initialize diarizer with both HuggingFace and OpenAI tokens
-            openai_key = os.getenv("OPENAI_API_KEY")
-            diarizer = SpeakerDiarizer(huggingface_token=huggingface_token, openai_api_key=openai_key)
+            if diarizer is None:
+                diarizer = SpeakerDiarizer(huggingface_token=huggingface_token, openai_api_key=os.getenv("OPENAI_API_KEY"))
             
             # Perform combined diarization and transcription with progress updates
             print("📊 Step 1/4: Performing speaker diarization and transcription...")
-            diarization_result, transcript_text = diarizer.diarize_and_transcribe(audio_path, min_speakers=2, max_speakers=6)
+            diarization_result, transcript_text = diarizer.diarize_and_transcribe(
+                audio_path, min_speakers=2, max_speakers=6, audio_hash=audio_hash
+            )
             
             # Create speaker mapping (GM + Players)
             print("📊 Step 2/4: Creating speaker mapping...")
@@ -559,10 +604,14 @@ def summarize_audio(
             campaign_id=campaign_id,
             context_chunks=context_chunks,
             db_session=db_session,
-            use_mock=use_mock
+            use_mock=use_mock,
+            raise_errors=raise_errors,
+            audio_uri=audio_uri
         )
         
     except Exception as e:
+        if raise_errors:
+            raise
         today = datetime.now().strftime("%Y-%m-%d")
         return f"[{today}]\n\nError processing audio: {str(e)}\n\n" + TEMPLATE
 
@@ -572,7 +621,9 @@ def summarize_text(
     context_chunks: List[str] = None,
     db_session: Optional[Session] = None,
     speaker_mapping: Optional[Dict[str, str]] = None,
-    use_mock: bool = False
+    use_mock: bool = False,
+    raise_errors: bool = False,
+    audio_uri: Optional[str] = None
 ) -> str:
     """
     Generate Shadowdark-style session notes from a transcript.
@@ -584,6 +635,8 @@ def summarize_text(
         db_session: Optional database session for persisting results
         speaker_mapping: Optional mapping from technical speaker IDs to readable names
         use_mock: If True, use mock LLM instead of OpenAI (for testing)
+        raise_errors: Raise failures instead of returning the template with the error
+        audio_uri: Reference to the source recording, saved with the session
     
     Returns:
         Formatted session notes following Shadowdark template
@@ -625,7 +678,8 @@ def summarize_text(
                     
                     chunk_user_prompt = _build_user_prompt(chunk, context_chunks)
                     
-                    response = client.chat.completions.create(
+                    response = client.chat(
+                        agent="session_scribe",
                         model="gpt-5",  # Use GPT-5 for better processing
                         messages=[
                             {"role": "system", "content": system_prompt},
@@ -654,7 +708,8 @@ def summarize_text(
                     model = "gpt-5"  # Use GPT-5 for all processing now
                     max_tokens = 10000
                 
-                response = client.chat.completions.create(
+                response = client.chat(
+                    agent="session_scribe",
                     model=model,
                     messages=[
                         {"role": "system", "content": system_prompt},
@@ -672,24 +727,51 @@ def summarize_text(
         
         # If we have a database session, persist the results
         if db_session and campaign_id:
-            _persist_session_data(db_session, campaign_id, transcript, notes)
+            _persist_session_data(db_session, campaign_id, transcript, notes, audio_uri=audio_uri)
         
         return notes
         
     except Exception as e:
+        if raise_errors:
+            raise
         # Fallback to template with error message
         today = datetime.now().strftime("%Y-%m-%d")
         return f"[{today}]\n\nError generating session notes: {str(e)}\n\n" + TEMPLATE
 
-def _persist_session_data(db_session: Session, campaign_id: int, transcript: str, notes: str):
-    """Persist session data to the database"""
+def _store_audio_reference(audio_path: str, audio_hash: str) -> str:
+    """
+    Reference to a source recording for ``Session.audio_uri``.
+    
+    With BLOB_STORE_AUDIO set the file is copied into the blob store and its
+    blob URI returned; otherwise only its content hash (``sha256:<hex>``,
+    the diarization cache key) is kept.
+    """
+    if store_audio_enabled():
+        try:
+            return get_blob_store().put_file(audio_path, digest=audio_hash, compress=False)
+        except Exception as e:
+            print(f"⚠️  Could not store audio in the blob store: {e}")
+    return f"sha256:{audio_hash}"
+
+def _persist_session_data(db_session: Session, campaign_id: int, transcript: str, notes: str,
+                          audio_uri: Optional[str] = None) -> Optional[int]:
+    """Persist session data to the database; returns the new session's id (None if it failed)"""
     try:
+        # The raw transcript goes to the blob store; the row keeps its URI
+        transcript_uri = None
+        try:
+            transcript_uri = get_blob_store().put_text(transcript)
+        except Exception as e:
+            print(f"⚠️  Could not store transcript in the blob store, keeping it in the session row: {e}")
+        
         # Create session record
         session = SessionModel(
             campaign_id=campaign_id,
             date=datetime.now().strftime("%Y-%m-%d"),
             summary_md=notes,
-            gm_notes_md=transcript
+            gm_notes_md=None if transcript_uri else transcript,
+            transcript_uri=transcript_uri,
+            audio_uri=audio_uri
         )
         
         db_session.add(session)
@@ -699,6 +781,9 @@ def _persist_session_data(db_session: Session, campaign_id: int, transcript: str
         # TODO: Parse notes and extract structured data (NPCs, events, etc.)
         # This would involve parsing the generated notes and creating Event, NPC records
         
+        return session.id
+        
     except Exception as e:
         print(f"Error persisting session data: {e}")
         db_session.rollback()
+        return None
@@ -0,0 +1,138 @@
+"""
+Speech Transcoder for Shadowdark GM Assistant
+
+Re-encodes recordings into a compact speech format (mono, 16 kHz, Opus or
+low-bitrate AAC) before they are uploaded for transcription. Whisper
+resamples everything to 16 kHz mono anyway, so this loses nothing the ASR
+model would use.
+
+With a fixed target bitrate the output size is predictable, so the
+longest segment that fits the upload limit can be computed up front. A
+2-hour session at 24 kbps Opus is about 21MB, one upload instead of many
+stream-copied 5-minute pieces.
+"""
+
+import time
+import logging
+import subprocess
+from pathlib import Path
+from dataclasses import dataclass
+from typing import List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+SPEECH_CODECS = {
+    # codec name: (ffmpeg encoder, file suffix, default kbps)
+    "opus": ("libopus", ".ogg", 24),
+    "aac": ("aac", ".m4a", 32),
+}
+
+
+@dataclass
+class TranscodeResult:
+    """Outcome of transcoding one file."""
+    source: Path
+    output: Path
+    source_bytes: int
+    output_bytes: int
+    seconds: float
+
+    @property
+    def bytes_saved(self) -> int:
+        return self.source_bytes - self.output_bytes
+
+
+def format_bytes_saved(source_bytes: int, output_bytes: int) -> str:
+    """Human-readable summary such as '412.3MB -> 41.0MB (90% smaller)'."""
+    ratio = 1 - output_bytes / source_bytes if source_bytes else 0.0
+    return f"{source_bytes / (1024 * 1024):.1f}MB -> {output_bytes / (1024 * 1024):.1f}MB ({ratio:.0%} smaller)"
+
+
+class SpeechTranscoder:
+    """
+    Encodes audio as mono, low-sample-rate speech at a target bitrate.
+    """
+
+    def __init__(
+        self,
+        codec: str = "opus",
+        bitrate_kbps: Optional[int] = None,
+        sample_rate: int = 16000,
+        container_overhead: float = 0.03
+    ):
+        """
+        Args:
+            codec: "opus" (Ogg/Opus) or "aac" (M4A)
+            bitrate_kbps: Target audio bitrate (defaults to 24 for Opus, 32 for AAC)
+            sample_rate: Output sample rate in Hz
+            container_overhead: Fraction of the size budget reserved for container overhead
+                and bitrate variance
+        """
+        if codec not in SPEECH_CODECS:
+            raise ValueError(f"Unknown speech codec: {codec}. Supported codecs: {', '.join(SPEECH_CODECS)}")
+
+        self.codec = codec
+        self.encoder, self.suffix, default_kbps = SPEECH_CODECS[codec]
+        self.bitrate_kbps = bitrate_kbps or default_kbps
+        self.sample_rate = sample_rate
+        self.container_overhead = container_overhead
+
+    @property
+    def description(self) -> str:
+        return f"{self.codec} {self.bitrate_kbps}kbps mono {self.sample_rate // 1000}kHz"
+
+    def ffmpeg_args(self) -> List[str]:
+        """Output encoding arguments for ffmpeg (use instead of ``-c copy``)."""
+        args = [
+            '-vn', '-ac', '1', '-ar', str(self.sample_rate),
+            '-c:a', self.encoder, '-b:a', f"{self.bitrate_kbps}k"
+        ]
+        if self.codec == "opus":
+            args += ['-application', 'voip']
+        return args
+
+    def max_segment_duration(self, size_limit_mb: float) -> float:
+        """
+        Longest segment (seconds) whose encoded size fits the limit.
+
+        Args:
+            size_limit_mb: Upload size limit in MB
+
+        Returns:
+            Segment duration in seconds
+        """
+        budget_bits = size_limit_mb * 1024 * 1024 * 8 * (1 - self.container_overhead)
+        return budget_bits / (self.bitrate_kbps * 1000)
+
+    def transcode(self, audio_path: Path, output_path: Optional[Path] = None) -> TranscodeResult:
+        """
+        Transcode a whole file.
+
+        Args:
+            audio_path: Source audio file
+            output_path: Destination (defaults to ``<name>_speech<suffix>`` next to the source)
+
+        Returns:
+            TranscodeResult with sizes and elapsed time
+        """
+        audio_path = Path(audio_path)
+        output_path = Path(output_path) if output_path else audio_path.with_name(f"{audio_path.stem}_speech{self.suffix}")
+
+        start = time.perf_counter()
+        cmd = ['ffmpeg', '-v', 'error', '-i', str(audio_path)] + self.ffmpeg_args() + ['-y', str(output_path)]
+        result = subprocess.run(cmd, capture_output=True, text=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg transcode failed: {result.stderr}")
+
+        transcoded = TranscodeResult(
+            source=audio_path,
+            output=output_path,
+            source_bytes=audio_path.stat().st_size,
+            output_bytes=output_path.stat().st_size,
+            seconds=time.perf_counter() - start
+        )
+        logger.info(f"🗜️  Transcoded to {self.description} in {transcoded.seconds:.1f}s: "
+                   f"{format_bytes_saved(transcoded.source_bytes, transcoded.output_bytes)}")
+        return transcoded
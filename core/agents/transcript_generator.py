@@ -7,11 +7,15 @@ for manual review and editing before session note generation.
 
 import os
 import logging
+import tempfile
 from pathlib import Path
 from typing import Optional, List, Dict
 from datetime import datetime
 
-from .diarizer import SpeakerDiarizer, DiarizationResult
+from .diarizer import SpeakerDiarizer, DiarizationResult, QUALITY_PRESETS
+from .asr_backends import ASRBackend, get_asr_backend
+from .speech_transcoder import SpeechTranscoder
+from ..data.transcript_store import TranscriptTable, format_entry, write_transcript_store
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -26,9 +30,18 @@ class TranscriptGenerator:
     and clear formatting for easy editing and quality control.
     """
     
-    def __init__(self, huggingface_token: Optional[str] = None, openai_api_key: Optional[str] = None):
+    def __init__(
+        self,
+        huggingface_token: Optional[str] = None,
+        openai_api_key: Optional[str] = None,
+        asr_backend: Optional[ASRBackend] = None,
+        speech_transcoder: Optional[SpeechTranscoder] = None
+    ):
         self.huggingface_token = huggingface_token
         self.openai_api_key = openai_api_key
+        self.asr_backend = asr_backend
+        self.speech_transcoder = speech_transcoder
+        self.last_table: Optional[TranscriptTable] = None
     
     def generate_transcript(
         self, 
@@ -60,17 +73,13 @@ class TranscriptGenerator:
         # Initialize diarizer
         diarizer = SpeakerDiarizer(
             huggingface_token=self.huggingface_token,
-            openai_api_key=self.openai_api_key
+            openai_api_key=self.openai_api_key,
+            asr_backend=self.asr_backend,
+            speech_transcoder=self.speech_transcoder
         )
         
         # Set quality parameters
-        quality_settings = {
-            'fast': {'min_segment_duration': 0.5, 'merge_threshold': 0.3},
-            'balanced': {'min_segment_duration': 1.5, 'merge_threshold': 0.8},
-            'precise': {'min_segment_duration': 2.5, 'merge_threshold': 1.2}
-        }
-        
-        settings = quality_settings.get(quality, quality_settings['balanced'])
+        settings = QUALITY_PRESETS.get(quality, QUALITY_PRESETS['balanced'])
         logger.info(f"🎛️  Using '{quality}' quality settings: {settings}")
         
         # Perform diarization and transcription with quality-based settings
@@ -107,29 +116,96 @@ class TranscriptGenerator:
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(formatted_transcript)
         
+        # Columnar copy for downstream stages (after the markdown, so it counts as fresh)
+        if self.last_table is not None:
+            write_transcript_store(self.last_table, output_path)
+        
         logger.info(f"✅ Transcript saved to: {output_path}")
         return str(output_path)
     
+    def generate_multitrack_transcript(
+        self,
+        source: str,
+        output_path: Optional[str] = None,
+        max_workers: Optional[int] = None
+    ) -> str:
+        """
+        Generate a transcript from per-speaker tracks, without diarization.
+        
+        Args:
+            source: Directory or zip of per-speaker tracks (one file per speaker)
+            output_path: Path to save transcript (defaults to ``<name>_transcript.md`` beside the source)
+            max_workers: Tracks/uploads processed concurrently
+            
+        Returns:
+            Path to the generated transcript file
+        """
+        from .multitrack import MultitrackTranscriber, utterances_to_diarization
+        
+        source = Path(source)
+        if not source.exists():
+            raise FileNotFoundError(f"Multitrack source not found: {source}")
+        
+        logger.info(f"🎚️  Generating multitrack transcript from: {source.name}")
+        transcriber = MultitrackTranscriber(
+            asr_backend=self.asr_backend,
+            openai_api_key=self.openai_api_key,
+            transcoder=self.speech_transcoder,
+            max_workers=max_workers
+        )
+        utterances = transcriber.transcribe(source)
+        diarization_result, texts = utterances_to_diarization(utterances, transcriber.total_duration)
+        speaker_mapping = {speaker: speaker for speaker in diarization_result.speaker_stats}
+        
+        formatted_transcript = self._create_formatted_transcript(
+            diarization_result, None, speaker_mapping, source, segment_texts=texts
+        )
+        
+        if output_path is None:
+            output_path = source.parent / f"{source.stem}_transcript.md"
+        else:
+            output_path = Path(output_path)
+        
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(formatted_transcript)
+        write_transcript_store(self.last_table, output_path)
+        
+        logger.info(f"✅ Multitrack transcript saved to: {output_path} "
+                   f"({len(utterances)} utterances from {diarization_result.num_speakers} speakers)")
+        return str(output_path)
+    
     def _create_formatted_transcript(
         self,
         diarization_result: DiarizationResult,
         transcript_text: Optional[str],
         speaker_mapping: dict,
-        audio_file: Path
+        audio_file: Path,
+        segment_number: int = 0,
+        segment_texts: Optional[List[str]] = None
     ) -> str:
         """
         Create a well-formatted transcript for manual review.
         
+        The same entries are collected column-wise in ``self.last_table``.
+        
         Args:
             diarization_result: Results from speaker diarization
             transcript_text: Full transcript text from Whisper
             speaker_mapping: Mapping of technical speaker IDs to readable names
             audio_file: Original audio file path
+            segment_number: Source segment recorded with each entry (0 = whole recording)
+            segment_texts: Text for each diarization segment, when already known
+                (skips segment merging and proportional alignment)
             
         Returns:
             Formatted transcript string
         """
         lines = []
+        self.last_table = TranscriptTable(metadata={
+            'source_audio': audio_file.name,
+            'duration': diarization_result.total_duration,
+            'speakers': dict(speaker_mapping)
+        })
         
         # Header with metadata
         lines.append(f"# Session Transcript")
@@ -197,36 +273,34 @@ class TranscriptGenerator:
                 lines.append(transcript_text)
             return "\n".join(lines)
         
-        # Merge consecutive short segments to reduce over-segmentation
-        logger.info("🔗 Merging consecutive short segments...")
-        merged_segments = self._merge_consecutive_segments(diarization_result.segments)
-        
-        # Update diarization result with merged segments
-        diarization_result.segments = merged_segments
-        
-        # Align transcript text with speaker segments if available
-        aligned_segments = {}
-        if transcript_text:
-            logger.info("📝 Aligning transcript with speaker segments...")
-            aligned_segments = self._align_transcript_with_speakers(transcript_text, merged_segments)
+        if segment_texts is not None:
+            # Text is already known per segment (multitrack); nothing to merge or align
+            aligned_segments = dict(enumerate(segment_texts))
+        else:
+            # Merge consecutive short segments to reduce over-segmentation
+            logger.info("🔗 Merging consecutive short segments...")
+            merged_segments = self._merge_consecutive_segments(diarization_result.segments)
+            
+            # Update diarization result with merged segments
+            diarization_result.segments = merged_segments
+            
+            # Align transcript text with speaker segments if available
+            aligned_segments = {}
+            if transcript_text:
+                logger.info("📝 Aligning transcript with speaker segments...")
+                aligned_segments = self._align_transcript_with_speakers(transcript_text, merged_segments)
         
         # Create structured transcript with speaker segments
         for i, segment in enumerate(diarization_result.segments):
             # Get speaker name
             speaker_name = speaker_mapping.get(segment.speaker_id, segment.speaker_id)
             
-            # Format timestamp
-            start_time = self._format_timestamp(segment.start_time)
-            end_time = self._format_timestamp(segment.end_time)
-            
-            # Add speaker and timestamp
-            lines.append(f"### {start_time} - {end_time}")
-            
-            # Add aligned transcript content if available
-            if i in aligned_segments and aligned_segments[i].strip():
-                lines.append(f"**{speaker_name}:** {aligned_segments[i].strip()}")
-            else:
-                lines.append(f"**{speaker_name}:** *[Edit this section with the actual speech content]*")
+            # Add speaker, timestamp and aligned transcript content if available
+            text = aligned_segments.get(i, "").strip()
+            self.last_table.append(segment.start_time, segment.end_time, speaker_name, text, segment=segment_number)
+            lines.append(format_entry(
+                self.last_table.start[-1], self.last_table.end[-1], speaker_name, text, segment=segment_number
+            ).rstrip("\n"))
             lines.append("")
         
         # Add raw transcript for reference
@@ -256,12 +330,6 @@ class TranscriptGenerator:
         
         return "\n".join(lines)
     
-    def _format_timestamp(self, seconds: float) -> str:
-        """Format seconds to MM:SS format."""
-        minutes = int(seconds // 60)
-        seconds = int(seconds % 60)
-        return f"{minutes:02d}:{seconds:02d}"
-    
     def _merge_consecutive_segments(self, segments: List, min_duration: float = 2.0, max_gap: float = 1.0):
         """
         Merge consecutive segments from the same speaker to reduce over-segmentation.
@@ -403,30 +471,23 @@ class TranscriptGenerator:
         
         logger.info(f"🎙️  Generating simple transcript from: {audio_path.name}")
         
-        # Initialize diarizer (we only need it for transcription)
-        from openai import OpenAI
-        
-        if not self.openai_api_key:
-            raise ValueError("OpenAI API key required for transcription")
-        
-        openai_client = OpenAI(api_key=self.openai_api_key)
+        # We only need speech-to-text here, no diarization
+        asr_backend = self.asr_backend or get_asr_backend(openai_api_key=self.openai_api_key)
+        if not asr_backend:
+            raise ValueError("OpenAI API key required for transcription (or set ASR_BACKEND=local)")
         
         # Step 1: Get speech-to-text transcription only
-        logger.info("🎙️  Step 1/2: Performing speech-to-text transcription...")
-        
-        # Check file size (Whisper has 25MB limit)
-        file_size_mb = audio_path.stat().st_size / (1024 * 1024)
-        if file_size_mb > 25:
-            raise ValueError(f"Audio file is {file_size_mb:.1f}MB (Whisper limit: 25MB). "
-                           "Please split the file into smaller segments first.")
-        
-        # Transcribe the audio
-        with open(audio_path, "rb") as audio_file:
-            transcript = openai_client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file,
-                response_format="text"
-            )
+        logger.info(f"🎙️  Step 1/2: Performing speech-to-text transcription ({asr_backend.name} backend)...")
+        
+        # Transcribe the audio (hosted Whisper rejects files over its upload limit)
+        if self.speech_transcoder:
+            with tempfile.TemporaryDirectory(prefix="gm-speech-") as speech_dir:
+                speech = self.speech_transcoder.transcode(
+                    audio_path, Path(speech_dir) / f"{audio_path.stem}{self.speech_transcoder.suffix}"
+                )
+                transcript = asr_backend.transcribe(str(speech.output)).text
+        else:
+            transcript = asr_backend.transcribe(str(audio_path)).text
         
         logger.info("✅ Speech-to-text transcription completed")
         
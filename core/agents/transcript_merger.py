@@ -3,19 +3,80 @@ Transcript Merger for Shadowdark GM Assistant
 
 This tool merges multiple segment transcripts into one cohesive transcript,
 handling speaker continuity and removing overlapping content at segment boundaries.
+
+Entries are placed on the recording's timeline using the splitter's segment
+manifest (or, without one, the segment durations and the splitter's default
+overlap). Duplicates are only looked for where two segments actually cover
+the same audio, by comparing MinHash signatures of word shingles between
+entries whose time ranges meet, so merging stays linear in the number of
+entries however many segments there are.
 """
 
 import os
 import logging
 import re
+import heapq
+import hashlib
+import random
+from collections import deque
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
 from datetime import datetime
 
+from .audio_splitter import AudioSplitter, SegmentManifest
+from ..data.transcript_store import (
+    TranscriptTableWriter, format_entry, iter_transcript_entries, open_transcript_entries,
+    pyarrow_available, store_path_for
+)
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+_MERSENNE_61 = (1 << 61) - 1
+
+class MinHasher:
+    """
+    MinHash signatures over word shingles.
+
+    The fraction of equal signature positions estimates the Jaccard
+    similarity of two shingle sets; with the set sizes that also gives how
+    much of the shorter text is contained in the longer one.
+    """
+
+    def __init__(self, num_perm: int = 64, shingle_size: int = 3, seed: int = 1):
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        rng = random.Random(seed)
+        self._perms = [(rng.randrange(1, _MERSENNE_61), rng.randrange(0, _MERSENNE_61)) for _ in range(num_perm)]
+
+    def shingles(self, text: str) -> set:
+        """Word n-grams of the normalized text (single words for very short texts)."""
+        words = re.findall(r"[a-z0-9']+", text.lower())
+        if len(words) < self.shingle_size:
+            return set(words)
+        return {" ".join(words[i:i + self.shingle_size]) for i in range(len(words) - self.shingle_size + 1)}
+
+    def signature(self, shingles: set) -> Tuple[int, ...]:
+        if not shingles:
+            return ()
+        hashed = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+        return tuple(min((a * h + b) % _MERSENNE_61 for h in hashed) for a, b in self._perms)
+
+    @staticmethod
+    def jaccard(sig1: Tuple[int, ...], sig2: Tuple[int, ...]) -> float:
+        if not sig1 or not sig2:
+            return 0.0
+        return sum(1 for x, y in zip(sig1, sig2) if x == y) / len(sig1)
+
+    @staticmethod
+    def containment(jaccard: float, size1: int, size2: int) -> float:
+        """Share of the smaller set found in the larger, derived from the Jaccard estimate."""
+        if not size1 or not size2:
+            return 0.0
+        intersection = jaccard * (size1 + size2) / (1 + jaccard)
+        return min(1.0, intersection / min(size1, size2))
+
 
 class TranscriptMerger:
     """
@@ -25,16 +86,45 @@ class TranscriptMerger:
     boundaries, and maintains proper formatting for manual review.
     """
     
-    def __init__(self):
-        self.overlap_threshold = 45  # seconds - look for overlaps within this range
+    def __init__(
+        self,
+        overlap_seconds: Optional[float] = None,
+        similarity_threshold: float = 0.6,
+        time_tolerance: float = 2.0
+    ):
+        """
+        Args:
+            overlap_seconds: Overlap assumed between consecutive segments when no
+                manifest is available (defaults to the splitter's overlap)
+            similarity_threshold: Share of the shorter entry's shingles that must
+                appear in the other entry for the two to count as duplicates
+            time_tolerance: Slack in seconds when matching entry times (timestamps
+                only have whole-second resolution)
+        """
+        self.overlap_seconds = AudioSplitter().overlap_seconds if overlap_seconds is None else overlap_seconds
+        self.similarity_threshold = similarity_threshold
+        self.time_tolerance = time_tolerance
+        self.minhash = MinHasher()
     
-    def merge_transcripts(self, transcript_files: List[str], output_path: str) -> str:
+    def merge_transcripts(
+        self,
+        transcript_files: List[str],
+        output_path: str,
+        manifest_path: Optional[str] = None
+    ) -> str:
         """
         Merge multiple transcript files into one cohesive transcript.
         
+        Transcripts are streamed: headers are read first, then the entries of
+        all segments are k-way merged by time and written as they are
+        resolved, so memory holds only the segments covering the current
+        time and the entries around the current overlap window.
+        
         Args:
             transcript_files: List of paths to transcript files to merge
             output_path: Path to save the merged transcript
+            manifest_path: Segment manifest written by ``AudioSplitter`` (looked up
+                next to the transcripts when omitted)
             
         Returns:
             Path to the merged transcript file
@@ -44,7 +134,7 @@ class TranscriptMerger:
         
         logger.info(f"🔗 Merging {len(transcript_files)} transcript files...")
         
-        # Parse all transcripts
+        # Read transcript headers (entries are streamed later)
         parsed_transcripts = []
         for file_path in transcript_files:
             logger.info(f"📄 Parsing: {Path(file_path).name}")
@@ -55,40 +145,67 @@ class TranscriptMerger:
         if not parsed_transcripts:
             raise ValueError("No valid transcripts found to merge")
         
-        # Validate speaker consistency across transcripts
-        self._validate_speaker_consistency(parsed_transcripts)
+        manifest = self._load_manifest(manifest_path, parsed_transcripts)
         
-        # Merge transcripts
-        merged_transcript = self._merge_parsed_transcripts(parsed_transcripts)
+        # Sort transcripts by source audio name (assumes chronological naming)
+        parsed_transcripts.sort(key=lambda t: t['file_path'].name)
         
-        # Write merged transcript
+        # Where each segment sits in the original recording
+        spans = self._place_segments(parsed_transcripts, manifest)
+        merged_metadata = self._combine_metadata(parsed_transcripts, spans, manifest)
+        
+        # Merge and write incrementally
         output_path = Path(output_path)
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(merged_transcript)
+        speakers = set()
+        self.duplicates_removed = 0
+        store = None
+        if pyarrow_available():
+            store = TranscriptTableWriter(store_path_for(output_path), metadata={
+                'source_audio': manifest.source if manifest else None,
+                'duration': merged_metadata['total_duration'],
+                'speakers': {sid: info['name'] for sid, info in merged_metadata['speakers'].items()}
+            })
+        try:
+            with open(output_path, 'w', encoding='utf-8') as f:
+                entries = self._iter_merged_entries(parsed_transcripts, spans)
+                written = self._write_merged_transcript(f, merged_metadata, entries, speakers, store)
+        finally:
+            # Closed after the markdown so the store counts as fresh
+            if store is not None:
+                store.close()
+        
+        if self.duplicates_removed:
+            logger.info(f"   🔄 Removed {self.duplicates_removed} duplicated entries from segment overlaps")
+        
+        # Validate speaker consistency across transcripts
+        self._validate_speaker_consistency(speakers)
         
-        logger.info(f"✅ Merged transcript saved to: {output_path}")
+        logger.info(f"✅ Merged transcript saved to: {output_path} ({written} entries)")
         return str(output_path)
     
-    def _validate_speaker_consistency(self, parsed_transcripts: List[Dict]) -> None:
+    def _load_manifest(self, manifest_path: Optional[str], parsed_transcripts: List[Dict]) -> Optional[SegmentManifest]:
+        """Load the given manifest, or find ``<stem>_manifest.json`` next to the transcripts."""
+        if manifest_path:
+            return SegmentManifest.load(Path(manifest_path))
+        
+        for transcript in parsed_transcripts:
+            source = transcript['metadata'].get('source_audio', '')
+            match = re.match(r'(.+)_segment_\d+', Path(source).stem)
+            if not match:
+                continue
+            candidate = transcript['file_path'].parent / f"{match.group(1)}_manifest.json"
+            if candidate.exists():
+                logger.info(f"🧭 Using segment manifest: {candidate.name}")
+                return SegmentManifest.load(candidate)
+        return None
+    
+    def _validate_speaker_consistency(self, all_speakers: set) -> None:
         """
         Validate that speaker names are consistent across transcripts.
         Issue warnings if inconsistencies are detected.
         """
-        all_speakers = set()
-        suspicious_speakers = set()
-        
-        for transcript in parsed_transcripts:
-            speakers_in_transcript = set()
-            
-            for entry in transcript.get('entries', []):
-                speaker = entry.get('speaker', '').strip()
-                if speaker:
-                    speakers_in_transcript.add(speaker)
-                    all_speakers.add(speaker)
-                    
-                    # Check for common AI-generated speaker patterns
-                    if 'Speaker_' in speaker or 'speaker_' in speaker:
-                        suspicious_speakers.add(speaker)
+        # Check for common AI-generated speaker patterns
+        suspicious_speakers = {s for s in all_speakers if 'Speaker_' in s or 'speaker_' in s}
         
         # Warn about potential consistency issues
         if suspicious_speakers:
@@ -97,7 +214,7 @@ class TranscriptMerger:
             for speaker in sorted(suspicious_speakers):
                 logger.warning(f"   - {speaker}")
             logger.warning("")
-            logger.warning("   🎯 RECOMMENDATION: Review transcripts before merging!")
+            logger.warning("   🎯 RECOMMENDATION: Review the merged transcript carefully!")
             logger.warning("   Each segment assigns Speaker_1, Speaker_2 independently.")
             logger.warning("   The same person might have different labels in each segment.")
             logger.warning("")
@@ -111,13 +228,13 @@ class TranscriptMerger:
     
     def _parse_transcript_file(self, file_path: str) -> Optional[Dict]:
         """
-        Parse a transcript file and extract structured data.
+        Read a transcript file's header (everything before ``## Transcript``).
         
         Args:
             file_path: Path to the transcript file
             
         Returns:
-            Dictionary with parsed transcript data or None if parsing fails
+            Dictionary with the file path and metadata, or None if parsing fails
         """
         file_path = Path(file_path)
         
@@ -126,42 +243,42 @@ class TranscriptMerger:
             return None
         
         try:
+            header = []
             with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Extract metadata
-            metadata = self._extract_metadata(content)
-            
-            # Extract transcript entries
-            entries = self._extract_transcript_entries(content)
+                for line in f:
+                    if line.startswith('## Transcript'):
+                        break
+                    header.append(line)
             
             return {
                 'file_path': file_path,
-                'metadata': metadata,
-                'entries': entries,
-                'raw_content': content
+                'metadata': self._extract_metadata("".join(header))
             }
             
         except Exception as e:
             logger.error(f"❌ Failed to parse {file_path}: {e}")
             return None
     
+    def _iter_file_entries(self, file_path: Path) -> Iterator[Dict]:
+        """Stream the entries of one transcript (from its columnar store when fresh)."""
+        return open_transcript_entries(file_path)
+    
     def _extract_metadata(self, content: str) -> Dict:
         """Extract metadata from transcript content."""
         metadata = {}
         
         # Extract source audio file
-        source_match = re.search(r'\\*\\*Source Audio:\\*\\* (.+)', content)
+        source_match = re.search(r'\*\*Source Audio:\*\* (.+)', content)
         if source_match:
             metadata['source_audio'] = source_match.group(1).strip()
         
         # Extract duration
-        duration_match = re.search(r'\\*\\*Duration:\\*\\* ([0-9.]+) seconds', content)
+        duration_match = re.search(r'\*\*Duration:\*\* ([0-9.]+) seconds', content)
         if duration_match:
             metadata['duration'] = float(duration_match.group(1))
         
         # Extract speakers
-        speaker_pattern = r'- \\*\\*(.+?)\\*\\* \\((.+?)\\): ([0-9.]+)s \\(([0-9.]+)%\\)'
+        speaker_pattern = r'- \*\*(.+?)\*\* \((.+?)\): ([0-9.]+)s \(([0-9.]+)%\)'
         speakers = {}
         for match in re.finditer(speaker_pattern, content):
             speaker_name = match.group(1)
@@ -179,98 +296,107 @@ class TranscriptMerger:
     
     def _extract_transcript_entries(self, content: str) -> List[Dict]:
         """Extract individual transcript entries with timestamps and speakers."""
-        entries = []
-        
-        # Find the transcript section
-        transcript_section_match = re.search(r'## Transcript\\s*\\n\\n(.+)', content, re.DOTALL)
-        if not transcript_section_match:
-            logger.warning("⚠️  No transcript section found in file")
-            return entries
-        
-        transcript_content = transcript_section_match.group(1)
-        
-        # Extract timestamp headers and content
-        # Pattern: ### MM:SS - MM:SS
-        timestamp_pattern = r'### ([0-9]{2}:[0-9]{2}) - ([0-9]{2}:[0-9]{2})\\n\\*\\*(.+?):\\*\\* (.+?)(?=\\n###|\\n---|$)'
+        return list(iter_transcript_entries(content.splitlines()))
+    
+    def _iter_merged_entries(self, transcripts: List[Dict], spans: List[Tuple[float, float]]) -> Iterator[Dict]:
+        """
+        Resolve overlaps on the merged entry stream.
         
-        for match in re.finditer(timestamp_pattern, transcript_content, re.DOTALL):
-            start_time = match.group(1)
-            end_time = match.group(2) 
-            speaker = match.group(3)
-            content_text = match.group(4).strip()
-            
-            # Convert timestamp to seconds for easier manipulation
-            start_seconds = self._timestamp_to_seconds(start_time)
-            end_seconds = self._timestamp_to_seconds(end_time)
+        An entry is held back only until no later entry can overlap it in
+        time; while held it is compared with incoming entries from the
+        neighbouring segment, and entries found to be duplicates are dropped.
+        """
+        tolerance = self.time_tolerance
+        pending = deque()
+        
+        for entry in self._iter_timeline(transcripts, spans):
+            while pending and pending[0]['adjusted_end'] + tolerance < entry['adjusted_start']:
+                done = pending.popleft()
+                if not done.get('duplicate'):
+                    yield done
             
-            entries.append({
-                'start_time': start_time,
-                'end_time': end_time,
-                'start_seconds': start_seconds,
-                'end_seconds': end_seconds,
-                'speaker': speaker,
-                'content': content_text
-            })
+            self._match_overlap(entry, pending, spans)
+            pending.append(entry)
         
-        return entries
-    
-    def _timestamp_to_seconds(self, timestamp: str) -> float:
-        """Convert MM:SS timestamp to seconds."""
-        try:
-            parts = timestamp.split(':')
-            minutes = int(parts[0])
-            seconds = int(parts[1])
-            return minutes * 60 + seconds
-        except:
-            return 0.0
-    
-    def _seconds_to_timestamp(self, seconds: float) -> str:
-        """Convert seconds to MM:SS timestamp."""
-        minutes = int(seconds // 60)
-        secs = int(seconds % 60)
-        return f"{minutes:02d}:{secs:02d}"
+        for entry in pending:
+            if not entry.get('duplicate'):
+                yield entry
     
-    def _merge_parsed_transcripts(self, transcripts: List[Dict]) -> str:
-        """Merge parsed transcripts into a single cohesive transcript."""
-        
-        # Sort transcripts by source audio name (assumes chronological naming)
-        transcripts.sort(key=lambda t: t['file_path'].name)
-        
-        # Combine metadata
-        merged_metadata = self._combine_metadata(transcripts)
-        
-        # Combine and deduplicate entries
-        all_entries = []
-        total_offset = 0.0
+    def _iter_timeline(self, transcripts: List[Dict], spans: List[Tuple[float, float]]) -> Iterator[Dict]:
+        """
+        K-way merge of the segment entry streams by global start time.
         
-        for i, transcript in enumerate(transcripts):
-            segment_entries = transcript['entries'].copy()
+        No entry of a segment starts before the segment itself, so a stream
+        is only opened once the merge reaches its segment's start and closes
+        when exhausted. Only the segments covering the current time (usually
+        one, two inside an overlap) are open at once, however many are merged.
+        """
+        order = sorted(range(len(spans)), key=lambda i: spans[i][0])
+        heap = []
+        next_stream = 0
+        
+        while True:
+            while next_stream < len(order) and (not heap or spans[order[next_stream]][0] <= heap[0][0]):
+                index = order[next_stream]
+                next_stream += 1
+                stream = self._placed_entries(transcripts[index]['file_path'], index, spans[index][0])
+                entry = next(stream, None)
+                if entry is not None:
+                    heapq.heappush(heap, (entry['adjusted_start'], index, entry, stream))
+            if not heap:
+                return
             
-            # Adjust timestamps for continuity (except first segment)
-            if i > 0:
-                for entry in segment_entries:
-                    entry['adjusted_start'] = entry['start_seconds'] + total_offset
-                    entry['adjusted_end'] = entry['end_seconds'] + total_offset
+            _, index, entry, stream = heap[0]
+            following = next(stream, None)
+            if following is None:
+                heapq.heappop(heap)
             else:
-                for entry in segment_entries:
-                    entry['adjusted_start'] = entry['start_seconds']
-                    entry['adjusted_end'] = entry['end_seconds']
-            
-            # Remove overlapping content from beginning of segment (except first)
-            if i > 0 and len(all_entries) > 0:
-                segment_entries = self._remove_overlap(all_entries, segment_entries)
-            
-            all_entries.extend(segment_entries)
-            
-            # Update offset for next segment
-            if segment_entries:
-                last_entry = segment_entries[-1]
-                total_offset = last_entry['adjusted_end']
+                heapq.heapreplace(heap, (following['adjusted_start'], index, following, stream))
+            yield entry
+    
+    def _placed_entries(self, file_path: Path, stream: int, segment_start: float) -> Iterator[Dict]:
+        for entry in self._iter_file_entries(file_path):
+            entry['stream'] = stream
+            entry['segment'] = stream + 1
+            entry['adjusted_start'] = segment_start + entry['start_seconds']
+            entry['adjusted_end'] = segment_start + entry['end_seconds']
+            yield entry
+    
+    def _place_segments(self, transcripts: List[Dict], manifest: Optional[SegmentManifest]) -> List[Tuple[float, float]]:
+        """
+        (start, end) of each transcript's segment in the original recording.
         
-        # Generate merged transcript
-        return self._generate_merged_transcript(merged_metadata, all_entries)
+        Uses the manifest when it covers the transcripts (matched by segment
+        file name, else by position); otherwise chains segment durations with
+        the splitter's overlap.
+        """
+        if manifest and manifest.segments:
+            by_name = {Path(seg.path).name: seg for seg in manifest.segments}
+            matched = [by_name.get(t['metadata'].get('source_audio', '')) for t in transcripts]
+            if all(matched):
+                return [(seg.start, seg.end) for seg in matched]
+            if len(manifest.segments) == len(transcripts):
+                ordered = sorted(manifest.segments, key=lambda seg: seg.index)
+                return [(seg.start, seg.end) for seg in ordered]
+            logger.warning(f"⚠️  Manifest has {len(manifest.segments)} segments for {len(transcripts)} transcripts; "
+                           f"estimating offsets from durations instead")
+        
+        spans = []
+        start = 0.0
+        for transcript in transcripts:
+            duration = transcript['metadata'].get('duration')
+            if not duration:
+                duration = max((e['end_seconds'] for e in self._iter_file_entries(transcript['file_path'])), default=0.0)
+            spans.append((start, start + duration))
+            start += max(duration - self.overlap_seconds, 0.0)
+        return spans
     
-    def _combine_metadata(self, transcripts: List[Dict]) -> Dict:
+    def _combine_metadata(
+        self,
+        transcripts: List[Dict],
+        spans: List[Tuple[float, float]],
+        manifest: Optional[SegmentManifest] = None
+    ) -> Dict:
         """Combine metadata from multiple transcripts."""
         combined = {
             'generated': datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
@@ -279,11 +405,17 @@ class TranscriptMerger:
             'speakers': {}
         }
         
-        # Collect source files and durations
+        # Overlapping segments cover some audio twice, so the recording length
+        # comes from the manifest or the last segment's end, not a sum
+        if manifest:
+            combined['total_duration'] = manifest.source_duration
+        elif spans:
+            combined['total_duration'] = max(end for _, end in spans)
+        
+        # Collect source files
         for transcript in transcripts:
             metadata = transcript['metadata']
             combined['source_files'].append(metadata.get('source_audio', 'Unknown'))
-            combined['total_duration'] += metadata.get('duration', 0.0)
             
             # Merge speaker information
             for speaker_id, speaker_info in metadata.get('speakers', {}).items():
@@ -297,56 +429,78 @@ class TranscriptMerger:
         
         # Recalculate percentages
         for speaker_info in combined['speakers'].values():
-            speaker_info['percentage'] = (speaker_info['total_duration'] / combined['total_duration']) * 100
+            total = combined['total_duration']
+            speaker_info['percentage'] = (speaker_info['total_duration'] / total) * 100 if total else 0.0
         
         return combined
     
-    def _remove_overlap(self, existing_entries: List[Dict], new_entries: List[Dict]) -> List[Dict]:
-        """Remove overlapping content from the beginning of new entries."""
-        if not existing_entries or not new_entries:
-            return new_entries
-        
-        # Look for similar content at the end of existing and start of new
-        # Simple approach: remove first few entries of new segment if they seem duplicated
-        
-        # Get last few entries from existing
-        last_existing = existing_entries[-3:] if len(existing_entries) >= 3 else existing_entries
-        first_new = new_entries[:3] if len(new_entries) >= 3 else new_entries
-        
-        # Simple overlap detection: if first new entries have very similar content to last existing
-        overlap_count = 0
-        for new_entry in first_new:
-            for existing_entry in last_existing:
-                # Check for similar speakers and content
-                if (new_entry['speaker'] == existing_entry['speaker'] and 
-                    len(new_entry['content']) > 10 and
-                    self._content_similarity(new_entry['content'], existing_entry['content']) > 0.7):
-                    overlap_count += 1
-                    break
-        
-        # If significant overlap detected, remove overlapping entries
-        if overlap_count >= 2:
-            logger.info(f"   🔄 Detected overlap - removing first {overlap_count} entries from segment")
-            return new_entries[overlap_count:]
-        
-        return new_entries
+    def _match_overlap(self, entry: Dict, pending: deque, spans: List[Tuple[float, float]]) -> None:
+        """
+        Compare an incoming entry with held entries from the neighbouring segment.
+        
+        Only entries inside the overlap window of two adjacent segments are
+        compared, and ``pending`` only holds entries that can still overlap
+        in time, so the work per entry is bounded by the overlap length rather
+        than by the transcript size. Matching entries must overlap in time and
+        share most of the shorter entry's shingles. Of each pair the shorter
+        one (usually cut off at a segment edge) is dropped; equal lengths keep
+        the one further from its segment's cut.
+        """
+        tolerance = self.time_tolerance
+        best, best_score = None, 0.0
+        
+        for other in pending:
+            if other.get('duplicate') or abs(other['stream'] - entry['stream']) != 1:
+                continue
+            old, new = (other, entry) if other['stream'] < entry['stream'] else (entry, other)
+            window_start, window_end = spans[new['stream']][0], spans[old['stream']][1]
+            if old['adjusted_end'] < window_start - tolerance or new['adjusted_start'] > window_end + tolerance:
+                continue
+            if (old['adjusted_start'] - tolerance > new['adjusted_end'] or
+                    new['adjusted_start'] - tolerance > old['adjusted_end']):
+                continue
+            
+            jaccard = self.minhash.jaccard(self._signature(old), self._signature(new))
+            score = self.minhash.containment(jaccard, old['_shingles'], new['_shingles'])
+            if score > best_score:
+                best, best_score = other, score
+        
+        if best is None or best_score < self.similarity_threshold:
+            return
+        
+        old, new = (best, entry) if best['stream'] < entry['stream'] else (entry, best)
+        if new['_shingles'] != old['_shingles']:
+            drop = new if new['_shingles'] < old['_shingles'] else old
+        else:
+            # Text closest to a cut is the most likely to be clipped
+            old_margin = spans[old['stream']][1] - old['adjusted_end']
+            new_margin = new['adjusted_start'] - spans[new['stream']][0]
+            drop = new if new_margin < old_margin else old
+        drop['duplicate'] = True
+        self.duplicates_removed += 1
     
-    def _content_similarity(self, content1: str, content2: str) -> float:
-        """Calculate simple content similarity between two strings."""
-        # Simple word-based similarity
-        words1 = set(content1.lower().split())
-        words2 = set(content2.lower().split())
-        
-        if not words1 or not words2:
-            return 0.0
-        
-        intersection = words1.intersection(words2)
-        union = words1.union(words2)
-        
-        return len(intersection) / len(union) if union else 0.0
+    def _signature(self, entry: Dict) -> Tuple[int, ...]:
+        if '_signature' not in entry:
+            shingles = self.minhash.shingles(entry['content'])
+            entry['_shingles'] = len(shingles)
+            entry['_signature'] = self.minhash.signature(shingles)
+        return entry['_signature']
     
-    def _generate_merged_transcript(self, metadata: Dict, entries: List[Dict]) -> str:
-        """Generate the final merged transcript content."""
+    def _write_merged_transcript(
+        self,
+        f: TextIO,
+        metadata: Dict,
+        entries: Iterable[Dict],
+        speakers: set,
+        store: Optional[TranscriptTableWriter] = None
+    ) -> int:
+        """
+        Write the merged transcript, streaming the entries (also into the
+        columnar store when one is given).
+        
+        Returns:
+            Number of entries written
+        """
         lines = []
         
         # Header
@@ -385,21 +539,27 @@ class TranscriptMerger:
         # Main transcript
         lines.append("## Transcript")
         lines.append("")
-        
-        if not entries:
-            lines.append("*No transcript entries found*")
-            return "\\n".join(lines)
+        f.write("\n".join(lines) + "\n")
         
         # Output entries with adjusted timestamps
+        written = 0
         for entry in entries:
-            start_time = self._seconds_to_timestamp(entry['adjusted_start'])
-            end_time = self._seconds_to_timestamp(entry['adjusted_end'])
-            
-            lines.append(f"### {start_time} - {end_time}")
-            lines.append(f"**{entry['speaker']}:** {entry['content']}")
-            lines.append("")
+            row = dict(
+                start=entry['adjusted_start'], end=entry['adjusted_end'], speaker=entry['speaker'],
+                text=entry['content'], confidence=entry.get('confidence'), segment=entry['segment']
+            )
+            f.write(format_entry(**row))
+            if store is not None:
+                store.append(**row)
+            speakers.add(entry['speaker'])
+            written += 1
+        
+        if not written:
+            f.write("*No transcript entries found*")
+            return 0
         
         # Footer
+        lines = []
         lines.append("---")
         lines.append("")
         lines.append("## Next Steps")
@@ -411,23 +571,24 @@ class TranscriptMerger:
         lines.append("./gm session summarize merged_transcript.md --out session_notes.md")
         lines.append("```")
         lines.append("")
-        
-        return "\\n".join(lines)
+        f.write("\n".join(lines))
+        return written
 
 
-def merge_transcript_files(transcript_files: List[str], output_path: str) -> str:
+def merge_transcript_files(transcript_files: List[str], output_path: str, manifest_path: Optional[str] = None) -> str:
     """
     Convenience function to merge multiple transcript files.
     
     Args:
         transcript_files: List of paths to transcript files
         output_path: Path to save merged transcript
+        manifest_path: Optional segment manifest from the splitter
         
     Returns:
         Path to the merged transcript file
     """
     merger = TranscriptMerger()
-    return merger.merge_transcripts(transcript_files, output_path)
+    return merger.merge_transcripts(transcript_files, output_path, manifest_path)
 
 
 if __name__ == "__main__":
@@ -442,7 +603,7 @@ if __name__ == "__main__":
     
     try:
         merged_path = merge_transcript_files(transcript_files, output_path)
-        print(f"\\n✅ Merged transcript created: {merged_path}")
+        print(f"\n✅ Merged transcript created: {merged_path}")
     except Exception as e:
         print(f"❌ Error: {e}")
         sys.exit(1)
\ No newline at end of file
@@ -0,0 +1,352 @@
+"""
+Voice Activity Detection for Shadowdark GM Assistant
+
+A session recording is full of silence: dice rolling, rule lookups, snack
+breaks. This stage runs between ``AudioSplitter`` and transcription /
+diarization: it maps where speech is, cuts the recording down to the
+voiced regions, and keeps a time-remap table so timestamps recognized in
+the trimmed audio can be moved back onto the original clock.
+
+Two detectors are available:
+- ``energy``: frame RMS from ``SilenceCutPlanner`` against the
+  recording's own noise floor (numpy only, always available)
+- ``webrtc``: the WebRTC GMM voice detector (``pip install webrtcvad``),
+  better at ignoring non-speech noise such as music or dice
+"""
+
+import json
+import logging
+import subprocess
+from bisect import bisect_right
+from pathlib import Path
+from dataclasses import dataclass, field, asdict
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .cut_planner import PIPE_SAMPLE_RATE, SilenceCutPlanner
+from .speech_transcoder import SpeechTranscoder
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+VAD_ENGINES = ("energy", "webrtc")
+WEBRTC_FRAME_MS = 30  # webrtcvad accepts 10, 20 or 30 ms frames
+
+
+@dataclass
+class TimeRemap:
+    """
+    Maps times in trimmed (voiced-only) audio back to the original recording.
+
+    Each voiced region contributes one row: where it starts in the trimmed
+    audio, where it starts in the original, and its length.
+    """
+    trimmed_starts: List[float] = field(default_factory=list)
+    source_starts: List[float] = field(default_factory=list)
+    durations: List[float] = field(default_factory=list)
+
+    @classmethod
+    def from_regions(cls, regions: List[Tuple[float, float]]) -> "TimeRemap":
+        remap = cls()
+        position = 0.0
+        for start, end in regions:
+            remap.trimmed_starts.append(position)
+            remap.source_starts.append(start)
+            remap.durations.append(end - start)
+            position += end - start
+        return remap
+
+    def to_source(self, t: float) -> float:
+        if not self.trimmed_starts:
+            return t
+        row = max(0, bisect_right(self.trimmed_starts, t) - 1)
+        offset = min(max(t - self.trimmed_starts[row], 0.0), self.durations[row])
+        return self.source_starts[row] + offset
+
+    def span_to_source(self, start: float, end: float) -> List[Tuple[float, float]]:
+        """
+        Map a trimmed-audio span onto the original clock.
+
+        A span that crosses a cut is split there, so it never claims the
+        silence that was removed between two voiced regions.
+        """
+        if not self.trimmed_starts:
+            return [(start, end)]
+        first = max(0, bisect_right(self.trimmed_starts, start) - 1)
+        last = max(first, bisect_right(self.trimmed_starts, end) - 1)
+        spans = []
+        for row in range(first, last + 1):
+            row_start = self.trimmed_starts[row]
+            lo = max(start, row_start)
+            hi = min(end, row_start + self.durations[row])
+            if hi > lo or (hi == lo and first == last):
+                spans.append((self.source_starts[row] + lo - row_start, self.source_starts[row] + hi - row_start))
+        return spans
+
+
+def mask_to_regions(
+    voiced: np.ndarray,
+    frame_seconds: float,
+    min_silence_seconds: float = 0.5,
+    min_speech_seconds: float = 0.3,
+    padding_seconds: float = 0.2
+) -> List[Tuple[float, float]]:
+    """
+    Turn a per-frame voiced mask into (start, end) regions in seconds.
+
+    Gaps shorter than ``min_silence_seconds`` are bridged, blips shorter
+    than ``min_speech_seconds`` dropped and each region padded so word
+    edges survive.
+    """
+    if voiced.size == 0:
+        return []
+    # Rising/falling edges of the voiced mask
+    edges = np.flatnonzero(np.diff(np.concatenate([[0], voiced.astype(np.int8), [0]])))
+    raw = [(s * frame_seconds, e * frame_seconds) for s, e in zip(edges[::2], edges[1::2])]
+
+    total = voiced.size * frame_seconds
+    regions: List[Tuple[float, float]] = []
+    for start, end in raw:
+        if regions and start - regions[-1][1] < min_silence_seconds:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+
+    padded = []
+    for start, end in regions:
+        if end - start < min_speech_seconds:
+            continue
+        start, end = max(0.0, start - padding_seconds), min(total, end + padding_seconds)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def voiced_regions(
+    energy: np.ndarray,
+    frame_seconds: float,
+    margin_db: float = 12.0,
+    floor_db: float = -50.0,
+    min_silence_seconds: float = 0.5,
+    min_speech_seconds: float = 0.3,
+    padding_seconds: float = 0.2
+) -> List[Tuple[float, float]]:
+    """
+    Voiced (start, end) regions of a recording from its frame RMS.
+
+    A frame is voiced when it is ``margin_db`` above the recording's noise
+    floor (10th percentile) and above ``floor_db`` dBFS.
+    """
+    if energy.size == 0:
+        return []
+    level_db = 20 * np.log10(np.maximum(energy, 1e-10))
+    threshold = max(float(np.percentile(level_db, 10)) + margin_db, floor_db)
+    return mask_to_regions(level_db > threshold, frame_seconds, min_silence_seconds,
+                           min_speech_seconds, padding_seconds)
+
+
+@dataclass
+class SpeechMap:
+    """Where speech is in one recording, and how much of it was silence."""
+    source: str
+    duration: float
+    engine: str
+    regions: List[Tuple[float, float]] = field(default_factory=list)
+
+    @property
+    def voiced_seconds(self) -> float:
+        return sum(end - start for start, end in self.regions)
+
+    @property
+    def removed_percent(self) -> float:
+        if self.duration <= 0:
+            return 0.0
+        return max(0.0, 100.0 * (1 - self.voiced_seconds / self.duration))
+
+    def remap(self) -> TimeRemap:
+        return TimeRemap.from_regions(self.regions)
+
+    def save(self, path: Path) -> None:
+        data = asdict(self)
+        data["removed_percent"] = round(self.removed_percent, 2)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+
+    @classmethod
+    def load(cls, path: Path) -> "SpeechMap":
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        data.pop("removed_percent", None)
+        data["regions"] = [tuple(region) for region in data["regions"]]
+        return cls(**data)
+
+
+class VoiceActivityDetector:
+    """
+    Finds speech in a recording and cuts it down to the voiced audio.
+
+    Usage:
+        vad = VoiceActivityDetector(engine="energy")
+        speech_map, voiced_path = vad.trim("session_segment_001.m4a", "work/")
+        original_time = speech_map.remap().to_source(recognized_time)
+    """
+
+    def __init__(
+        self,
+        engine: str = "energy",
+        aggressiveness: int = 2,
+        frame_seconds: float = 0.02,
+        min_silence_seconds: float = 0.5,
+        min_speech_seconds: float = 0.3,
+        padding_seconds: float = 0.2
+    ):
+        """
+        Args:
+            engine: "energy" (numpy RMS) or "webrtc" (requires webrtcvad)
+            aggressiveness: webrtcvad mode, 0 (keeps most) to 3 (drops most)
+            frame_seconds: Energy analysis frame length
+            min_silence_seconds: Shorter pauses stay inside a region
+            min_speech_seconds: Shorter bursts are treated as noise
+            padding_seconds: Kept on both sides of each region
+        """
+        if engine not in VAD_ENGINES:
+            raise ValueError(f"Unknown VAD engine '{engine}'. Choose from: {', '.join(VAD_ENGINES)}")
+        self.engine = engine
+        self.aggressiveness = aggressiveness
+        self.frame_seconds = frame_seconds
+        self.min_silence_seconds = min_silence_seconds
+        self.min_speech_seconds = min_speech_seconds
+        self.padding_seconds = padding_seconds
+        self.planner = SilenceCutPlanner(frame_seconds=frame_seconds)
+
+    @property
+    def description(self) -> str:
+        """Stable summary of the settings (used in pipeline stage keys)."""
+        detail = f"mode {self.aggressiveness}" if self.engine == "webrtc" else f"{self.frame_seconds}s frames"
+        return (f"{self.engine} ({detail}, silence {self.min_silence_seconds}s, "
+                f"speech {self.min_speech_seconds}s, padding {self.padding_seconds}s)")
+
+    def detect(self, audio_path: Path) -> SpeechMap:
+        """
+        Build the speech-region map of a recording.
+
+        Args:
+            audio_path: Path to the audio file
+
+        Returns:
+            SpeechMap with voiced regions in seconds
+        """
+        audio_path = Path(audio_path)
+        if self.engine == "webrtc":
+            voiced = self._webrtc_mask(audio_path)
+            frame_seconds = WEBRTC_FRAME_MS / 1000
+            regions = mask_to_regions(voiced, frame_seconds, self.min_silence_seconds,
+                                      self.min_speech_seconds, self.padding_seconds)
+        else:
+            energy = self.planner.energy_profile(audio_path)
+            voiced, frame_seconds = energy, self.frame_seconds
+            regions = voiced_regions(energy, frame_seconds, min_silence_seconds=self.min_silence_seconds,
+                                     min_speech_seconds=self.min_speech_seconds,
+                                     padding_seconds=self.padding_seconds)
+
+        speech_map = SpeechMap(source=str(audio_path), duration=voiced.size * frame_seconds,
+                               engine=self.engine, regions=regions)
+        logger.info(f"🔇 {audio_path.name}: {speech_map.voiced_seconds:.0f}s voiced of "
+                   f"{speech_map.duration:.0f}s ({speech_map.removed_percent:.1f}% silence removed)")
+        return speech_map
+
+    def trim(
+        self,
+        audio_path: Path,
+        output_dir: Path,
+        transcoder: Optional[SpeechTranscoder] = None
+    ) -> Tuple[SpeechMap, Optional[Path]]:
+        """
+        Detect speech and write only the voiced audio.
+
+        Args:
+            audio_path: Path to the audio file
+            output_dir: Where the trimmed file is written
+            transcoder: Encoding of the trimmed file (defaults to 16 kHz mono WAV)
+
+        Returns:
+            (speech map, trimmed audio path); the path is None when no speech
+            was found, in which case callers should fall back to the original
+        """
+        audio_path = Path(audio_path)
+        speech_map = self.detect(audio_path)
+        if not speech_map.regions:
+            logger.warning(f"⚠️  No speech detected in {audio_path.name}; keeping it untrimmed")
+            return speech_map, None
+
+        suffix = transcoder.suffix if transcoder else ".wav"
+        output_path = Path(output_dir) / f"{audio_path.stem}_voiced{suffix}"
+        self.extract(audio_path, speech_map.regions, output_path, transcoder)
+        return speech_map, output_path
+
+    def extract(
+        self,
+        audio_path: Path,
+        regions: List[Tuple[float, float]],
+        output_path: Path,
+        transcoder: Optional[SpeechTranscoder] = None
+    ) -> None:
+        """Concatenate the given regions of a recording into one file."""
+        selection = "+".join(f"between(t,{start:.3f},{end:.3f})" for start, end in regions)
+        script = Path(output_path).with_suffix(".filter")
+        script.write_text(f"aselect='{selection}',asetpts=N/SR/TB", encoding="utf-8")
+
+        if transcoder:
+            encoding = transcoder.ffmpeg_args()
+        else:
+            encoding = ['-ac', '1', '-ar', str(PIPE_SAMPLE_RATE), '-c:a', 'pcm_s16le']
+        cmd = ['ffmpeg', '-v', 'error', '-i', str(audio_path), '-filter_script:a', str(script)]
+        cmd += encoding + ['-y', str(output_path)]
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True)
+        finally:
+            script.unlink(missing_ok=True)
+        if result.returncode != 0:
+            raise RuntimeError(f"ffmpeg failed to extract voiced audio from {Path(audio_path).name}: {result.stderr}")
+
+    def _webrtc_mask(self, audio_path: Path) -> np.ndarray:
+        try:
+            import webrtcvad
+        except ImportError as e:
+            raise ImportError("The webrtc VAD engine requires webrtcvad: pip install webrtcvad") from e
+
+        vad = webrtcvad.Vad(self.aggressiveness)
+        frame_bytes = PIPE_SAMPLE_RATE * WEBRTC_FRAME_MS // 1000 * 2
+        return np.fromiter(
+            (vad.is_speech(frame, PIPE_SAMPLE_RATE) for frame in self._iter_pcm_frames(audio_path, frame_bytes)),
+            dtype=bool
+        )
+
+    def _iter_pcm_frames(self, audio_path: Path, frame_bytes: int) -> Iterator[bytes]:
+        """Stream 16 kHz mono 16-bit PCM frames through ffmpeg."""
+        cmd = [
+            'ffmpeg', '-v', 'error', '-i', str(audio_path),
+            '-ac', '1', '-ar', str(PIPE_SAMPLE_RATE), '-f', 's16le', '-'
+        ]
+        block_bytes = frame_bytes * 1000
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        try:
+            remainder = b""
+            while True:
+                data = process.stdout.read(block_bytes)
+                if not data:
+                    break
+                data = remainder + data
+                usable = len(data) - len(data) % frame_bytes
+                for offset in range(0, usable, frame_bytes):
+                    yield data[offset:offset + frame_bytes]
+                remainder = data[usable:]
+        finally:
+            process.stdout.close()
+            stderr = process.stderr.read().decode(errors="replace")
+            if process.wait() != 0:
+                raise RuntimeError(f"ffmpeg decode failed: {stderr}")
@@ -0,0 +1,390 @@
+"""
+Content-addressed blob store for Shadowdark GM Assistant
+
+Raw transcripts (and optionally the source audio) are too large to live in
+hot ``session`` rows: every read of the row would drag megabytes along. They
+are stored here instead, keyed by the SHA-256 of their content, and the row
+keeps only the URI::
+
+    blob://sha256/<hex digest>
+
+Identical content is stored once. Text blobs are zstd-compressed (audio is
+already compressed and is stored as-is); ranges and sizes always refer to
+the uncompressed bytes, so the digest doubles as a strong HTTP ETag.
+
+Two backends share the layout ``<prefix>/<hex[:2]>/<hex>[.zst]``:
+
+- ``LocalBlobStore`` - a directory (default)
+- ``S3BlobStore`` - any S3-compatible object store (AWS, MinIO, R2), needs boto3
+
+``get_blob_store()`` picks one from ``BLOB_STORE`` (``local`` or ``s3``).
+The ``zstandard`` package is optional; without it new blobs are stored
+uncompressed and only compressed blobs become unreadable.
+"""
+
+import os
+import shutil
+import hashlib
+import logging
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import BinaryIO, Iterator, Optional, Tuple, Union
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+URI_PREFIX = "blob://sha256/"
+ZSTD_SUFFIX = ".zst"
+READ_CHUNK_BYTES = 1024 * 1024
+DEFAULT_BLOB_DIR = Path.home() / ".local" / "share" / "shadowdark-gm" / "blobs"
+
+_missing_zstd_logged = False
+
+
+def zstd_available() -> bool:
+    try:
+        import zstandard  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _require_zstd():
+    try:
+        import zstandard
+    except ImportError:
+        raise ImportError("zstandard is required to read compressed blobs. Install with: pip install zstandard")
+    return zstandard
+
+
+def blob_uri(digest: str) -> str:
+    return URI_PREFIX + digest
+
+
+def parse_blob_uri(uri: Optional[str]) -> Optional[str]:
+    """The hex digest in a ``blob://sha256/...`` URI (None for anything else)."""
+    if not uri or not uri.startswith(URI_PREFIX):
+        return None
+    digest = uri[len(URI_PREFIX):]
+    if len(digest) != 64 or any(c not in "0123456789abcdef" for c in digest):
+        return None
+    return digest
+
+
+def parse_range_header(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range HTTP ``Range`` header.
+
+    Args:
+        header: Header value, e.g. ``bytes=0-1023``, ``bytes=1024-`` or ``bytes=-500``
+        size: Total size of the resource in bytes
+
+    Returns:
+        (start, end) with ``end`` exclusive, or None to serve the whole
+        resource (no header, another unit or several ranges)
+
+    Raises:
+        ValueError: The range cannot be satisfied (respond 416)
+    """
+    if not header or not header.startswith("bytes=") or "," in header:
+        return None
+    first, _, last = header[len("bytes="):].strip().partition("-")
+    try:
+        if not first:
+            suffix = int(last)
+            if suffix <= 0:
+                raise ValueError(f"Unsatisfiable range: {header}")
+            return max(0, size - suffix), size
+        start = int(first)
+        end = int(last) + 1 if last else size
+    except ValueError:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    if start >= size or end <= start:
+        raise ValueError(f"Unsatisfiable range: {header}")
+    return start, min(end, size)
+
+
+class BlobStore(ABC):
+    """
+    Content-addressed storage; subclasses provide the raw object operations.
+
+    Usage:
+        store = get_blob_store()
+        uri = store.put_text(transcript)
+        transcript = store.read_text(uri)
+    """
+
+    def __init__(self, compression_level: Optional[int] = None):
+        """
+        Args:
+            compression_level: zstd level for text blobs (defaults to BLOB_ZSTD_LEVEL, then 9)
+        """
+        self.compression_level = compression_level or int(os.getenv("BLOB_ZSTD_LEVEL", "9"))
+
+    # --- Backend primitives ---
+
+    @abstractmethod
+    def _exists(self, key: str) -> bool:
+        """Whether an object is stored under ``key``."""
+
+    @abstractmethod
+    def _open(self, key: str) -> BinaryIO:
+        """A readable binary stream of the stored object."""
+
+    @abstractmethod
+    def _store(self, key: str, source: BinaryIO) -> None:
+        """Write everything read from ``source`` under ``key``."""
+
+    @abstractmethod
+    def _remove(self, key: str) -> None:
+        """Delete the object under ``key`` (no error if it is missing)."""
+
+    # --- Public API ---
+
+    @staticmethod
+    def _key(digest: str, compressed: bool) -> str:
+        return f"{digest[:2]}/{digest}{ZSTD_SUFFIX if compressed else ''}"
+
+    def _locate(self, uri: str) -> Tuple[str, bool]:
+        digest = parse_blob_uri(uri)
+        if digest is None:
+            raise ValueError(f"Not a blob URI: {uri}")
+        for compressed in (True, False):
+            key = self._key(digest, compressed)
+            if self._exists(key):
+                return key, compressed
+        raise FileNotFoundError(f"Blob not found: {uri}")
+
+    def exists(self, uri: str) -> bool:
+        try:
+            self._locate(uri)
+            return True
+        except (ValueError, FileNotFoundError):
+            return False
+
+    def _compress(self, compress: bool) -> bool:
+        global _missing_zstd_logged
+        if compress and not zstd_available():
+            if not _missing_zstd_logged:
+                logger.warning("⚠️  zstandard not installed; storing blobs uncompressed (pip install zstandard)")
+                _missing_zstd_logged = True
+            return False
+        return compress
+
+    def put_file(self, path: Union[str, Path], digest: Optional[str] = None, compress: bool = True) -> str:
+        """
+        Store a file's contents (streamed, never fully in memory).
+
+        Args:
+            path: File to store
+            digest: Its SHA-256 if already known (e.g. hashed while uploading)
+            compress: zstd-compress it (pointless for audio)
+
+        Returns:
+            The blob URI
+        """
+        path = Path(path)
+        if digest is None:
+            hasher = hashlib.sha256()
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(READ_CHUNK_BYTES), b""):
+                    hasher.update(chunk)
+            digest = hasher.hexdigest()
+        uri = blob_uri(digest)
+        if self.exists(uri):
+            return uri
+
+        compress = self._compress(compress)
+        with open(path, "rb") as src:
+            if not compress:
+                self._store(self._key(digest, False), src)
+            else:
+                zstandard = _require_zstd()
+                with tempfile.TemporaryFile() as packed:
+                    zstandard.ZstdCompressor(level=self.compression_level).copy_stream(
+                        src, packed, size=path.stat().st_size
+                    )
+                    packed.seek(0)
+                    self._store(self._key(digest, True), packed)
+        logger.info(f"📦 Stored {path.name} as {uri}")
+        return uri
+
+    def put_bytes(self, data: bytes, compress: bool = True) -> str:
+        """Store ``data``; returns its blob URI (existing content is not written again)."""
+        digest = hashlib.sha256(data).hexdigest()
+        uri = blob_uri(digest)
+        if self.exists(uri):
+            return uri
+        with tempfile.TemporaryFile() as buffer:
+            compress = self._compress(compress)
+            if compress:
+                # compress() records the content size in the frame header (see size())
+                data = _require_zstd().ZstdCompressor(level=self.compression_level).compress(data)
+            buffer.write(data)
+            buffer.seek(0)
+            self._store(self._key(digest, compress), buffer)
+        return uri
+
+    def put_text(self, text: str) -> str:
+        return self.put_bytes(text.encode("utf-8"))
+
+    def _reader(self, key: str, compressed: bool) -> BinaryIO:
+        raw = self._open(key)
+        if not compressed:
+            return raw
+        return _require_zstd().ZstdDecompressor().stream_reader(raw, closefd=True)
+
+    def size(self, uri: str) -> int:
+        """Uncompressed size in bytes."""
+        key, compressed = self._locate(uri)
+        if compressed:
+            zstandard = _require_zstd()
+            with self._open(key) as raw:
+                frame_size = zstandard.frame_content_size(raw.read(18))
+            if frame_size >= 0:
+                return frame_size
+        total = 0
+        with self._reader(key, compressed) as reader:
+            for chunk in iter(lambda: reader.read(READ_CHUNK_BYTES), b""):
+                total += len(chunk)
+        return total
+
+    def iter_range(self, uri: str, start: int = 0, end: Optional[int] = None,
+                   chunk_bytes: int = READ_CHUNK_BYTES) -> Iterator[bytes]:
+        """
+        Yield the uncompressed bytes ``[start, end)`` in chunks.
+
+        Compressed blobs are decompressed from the start and the bytes
+        before ``start`` discarded; transcripts are small enough for that.
+        """
+        key, compressed = self._locate(uri)
+        with self._reader(key, compressed) as reader:
+            skip = start
+            while skip > 0:
+                dropped = reader.read(min(skip, chunk_bytes))
+                if not dropped:
+                    return
+                skip -= len(dropped)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                chunk = reader.read(chunk_bytes if remaining is None else min(chunk_bytes, remaining))
+                if not chunk:
+                    return
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def read(self, uri: str, start: int = 0, end: Optional[int] = None) -> bytes:
+        return b"".join(self.iter_range(uri, start, end))
+
+    def read_text(self, uri: str) -> str:
+        return self.read(uri).decode("utf-8")
+
+    def delete(self, uri: str) -> bool:
+        try:
+            key, _ = self._locate(uri)
+        except (ValueError, FileNotFoundError):
+            return False
+        self._remove(key)
+        return True
+
+
+class LocalBlobStore(BlobStore):
+    """Blobs in a local directory (``BLOB_STORE_DIR``)."""
+
+    def __init__(self, directory: Optional[Union[str, Path]] = None, compression_level: Optional[int] = None):
+        super().__init__(compression_level)
+        self.directory = Path(directory or os.getenv("BLOB_STORE_DIR") or DEFAULT_BLOB_DIR)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.directory / key
+
+    def _exists(self, key: str) -> bool:
+        return self._path(key).exists()
+
+    def _open(self, key: str) -> BinaryIO:
+        return open(self._path(key), "rb")
+
+    def _store(self, key: str, source: BinaryIO) -> None:
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write beside the target and rename, so readers never see a partial blob
+        fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".incoming-")
+        try:
+            with os.fdopen(fd, "wb") as dst:
+                shutil.copyfileobj(source, dst, READ_CHUNK_BYTES)
+            os.replace(tmp, path)
+        except BaseException:
+            Path(tmp).unlink(missing_ok=True)
+            raise
+
+    def _remove(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+
+class S3BlobStore(BlobStore):
+    """Blobs in an S3-compatible bucket (``BLOB_STORE_BUCKET``); requires boto3."""
+
+    def __init__(self, bucket: Optional[str] = None, prefix: Optional[str] = None,
+                 endpoint_url: Optional[str] = None, compression_level: Optional[int] = None):
+        super().__init__(compression_level)
+        self.bucket = bucket or os.getenv("BLOB_STORE_BUCKET")
+        if not self.bucket:
+            raise ValueError("S3 blob store needs a bucket (set BLOB_STORE_BUCKET)")
+        self.prefix = (prefix if prefix is not None else os.getenv("BLOB_STORE_PREFIX", "blobs")).strip("/")
+        self.endpoint_url = endpoint_url or os.getenv("BLOB_STORE_ENDPOINT_URL") or None
+        try:
+            import boto3
+        except ImportError:
+            raise ImportError("boto3 is required for the S3 blob store. Install with: pip install boto3")
+        self.client = boto3.client("s3", endpoint_url=self.endpoint_url)
+
+    def _object_key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=self._object_key(key))
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _open(self, key: str) -> BinaryIO:
+        return self.client.get_object(Bucket=self.bucket, Key=self._object_key(key))["Body"]
+
+    def _store(self, key: str, source: BinaryIO) -> None:
+        self.client.upload_fileobj(source, self.bucket, self._object_key(key))
+
+    def _remove(self, key: str) -> None:
+        self.client.delete_object(Bucket=self.bucket, Key=self._object_key(key))
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """The process-wide blob store chosen by ``BLOB_STORE`` (``local`` or ``s3``)."""
+    global _store
+    with _store_lock:
+        if _store is None:
+            backend = os.getenv("BLOB_STORE", "local").strip().lower()
+            if backend == "s3":
+                _store = S3BlobStore()
+            elif backend == "local":
+                _store = LocalBlobStore()
+            else:
+                raise ValueError(f"Unknown BLOB_STORE '{backend}' (expected 'local' or 's3')")
+    return _store
+
+
+def store_audio_enabled() -> bool:
+    """Whether source recordings are copied into the blob store (``BLOB_STORE_AUDIO``)."""
+    return os.getenv("BLOB_STORE_AUDIO", "").strip().lower() in ("1", "true", "yes", "on")
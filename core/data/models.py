@@ -1,7 +1,7 @@
 
 from typing import Optional, List, Dict
 from sqlmodel import SQLModel, Field, JSON, Column, Relationship
-from sqlalchemy import String, Integer
+from sqlalchemy import Index, String, Integer
 from pgvector.sqlalchemy import Vector
 
 # --- Core domain tables ---
@@ -13,6 +13,9 @@ class Campaign(SQLModel, table=True):
     house_rules: Optional[List[str]] = Field(default=None, sa_column=Column(JSON))
 
 class Session(SQLModel, table=True):
+    # Keyset pagination of GET /sessions (migrations/002_session_campaign_id_index.sql)
+    __table_args__ = (Index("ix_session_campaign_id_id", "campaign_id", "id"),)
+
     id: Optional[int] = Field(default=None, primary_key=True)
     campaign_id: Optional[int] = Field(default=None, foreign_key="campaign.id")
     date: Optional[str] = None
@@ -0,0 +1,473 @@
+"""
+Columnar transcript store for Shadowdark GM Assistant
+
+The markdown transcripts are the human review format; this module holds the
+canonical machine format next to them: one row per utterance with segment
+start/end, speaker, text, confidence and source segment, stored as Parquet
+(``<name>_transcript.parquet`` beside ``<name>_transcript.md``).
+
+The two formats round-trip losslessly. Each markdown entry header carries
+the exact values in an HTML comment that renders invisibly::
+
+    ### 01:05 - 01:09 <!-- start=65.320 end=69.870 segment=2 confidence=0.910 -->
+    **GM:** You see a door.
+
+Readers use the Parquet file while it is at least as new as the markdown
+and fall back to parsing the markdown once it has been edited. pyarrow is
+optional; without it only the markdown is written and read.
+"""
+
+import re
+import json
+import logging
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+TRANSCRIPT_COLUMNS = ("start", "end", "speaker", "text", "confidence", "segment")
+PLACEHOLDER_TEXT = "*[Edit this section with the actual speech content]*"
+STORE_SUFFIX = ".parquet"
+
+# ### MM:SS - MM:SS [<!-- exact values -->] (minutes may run past 99 in long sessions)
+_TIMESTAMP_HEADER = re.compile(
+    r'^### ([0-9]+:[0-9]{2}(?::[0-9]{2})?) - ([0-9]+:[0-9]{2}(?::[0-9]{2})?)\s*(?:<!--(.*?)-->)?\s*$'
+)
+_SPEAKER_LINE = re.compile(r'^\*\*(.+?):\*\* (.*)$')
+_SPEAKER_SUMMARY = re.compile(r'^- \*\*(.+?)\*\* \((.+?)\)')
+
+_missing_pyarrow_logged = False
+
+
+def pyarrow_available() -> bool:
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise ImportError("pyarrow is required for the columnar transcript store. Install with: pip install pyarrow")
+    return pa, pq
+
+
+def timestamp_to_seconds(timestamp: str) -> float:
+    """Convert MM:SS (or H:MM:SS) timestamp to seconds."""
+    try:
+        total = 0
+        for part in timestamp.split(':'):
+            total = total * 60 + int(part)
+        return float(total)
+    except ValueError:
+        return 0.0
+
+
+def format_timestamp(seconds: float) -> str:
+    """Format seconds as MM:SS."""
+    minutes = int(seconds // 60)
+    secs = int(seconds % 60)
+    return f"{minutes:02d}:{secs:02d}"
+
+
+def format_entry(
+    start: float,
+    end: float,
+    speaker: str,
+    text: str,
+    confidence: Optional[float] = None,
+    segment: Optional[int] = None
+) -> str:
+    """Render one transcript entry as markdown (header, speaker line, blank line)."""
+    exact = f"start={start:.3f} end={end:.3f}"
+    if segment is not None:
+        exact += f" segment={segment}"
+    if confidence is not None:
+        exact += f" confidence={confidence:.3f}"
+    return (f"### {format_timestamp(start)} - {format_timestamp(end)} <!-- {exact} -->\n"
+            f"**{speaker}:** {text or PLACEHOLDER_TEXT}\n\n")
+
+
+def iter_transcript_entries(lines: Iterable[str]) -> Iterator[Dict]:
+    """
+    Yield the entries of a transcript's ``## Transcript`` section, line by line.
+
+    Each entry is a ``### start - end`` header followed by a
+    ``**Speaker:** text`` line; text continues over following lines until
+    the next header. The section ends at a ``---`` rule or the next heading.
+    Exact times, confidence and segment are taken from the header comment
+    when present.
+
+    Args:
+        lines: Transcript lines (an open file works)
+
+    Yields:
+        Entry dicts with start/end timestamps and seconds, speaker, content,
+        confidence and segment (None when not recorded)
+    """
+    in_section = False
+    header = None
+    entry = None
+
+    for line in lines:
+        line = line.rstrip('\n')
+        if not in_section:
+            in_section = line.startswith('## Transcript')
+            continue
+        if line.startswith('---') or line.startswith('## '):
+            break
+
+        match = _TIMESTAMP_HEADER.match(line)
+        if match:
+            if entry:
+                yield _finish_entry(entry)
+            entry = None
+            header = match
+            continue
+
+        if header is not None:
+            speaker = _SPEAKER_LINE.match(line)
+            if speaker:
+                entry = _start_entry(header, speaker.group(1), speaker.group(2))
+            header = None
+        elif entry is not None:
+            entry['content'].append(line)
+
+    if entry:
+        yield _finish_entry(entry)
+
+
+def _start_entry(header: re.Match, speaker: str, first_line: str) -> Dict:
+    start_time, end_time, comment = header.groups()
+    exact = dict(pair.split('=', 1) for pair in (comment or '').split() if '=' in pair)
+    return {
+        'start_time': start_time,
+        'end_time': end_time,
+        'start_seconds': float(exact['start']) if 'start' in exact else timestamp_to_seconds(start_time),
+        'end_seconds': float(exact['end']) if 'end' in exact else timestamp_to_seconds(end_time),
+        'speaker': speaker,
+        'content': [first_line],
+        'confidence': float(exact['confidence']) if 'confidence' in exact else None,
+        'segment': int(exact['segment']) if 'segment' in exact else None
+    }
+
+
+def _finish_entry(entry: Dict) -> Dict:
+    content = "\n".join(entry['content']).strip()
+    entry['content'] = "" if content == PLACEHOLDER_TEXT else content
+    return entry
+
+
+@dataclass
+class TranscriptTable:
+    """
+    A transcript held column-wise.
+
+    Times are seconds into the recording, rounded to milliseconds and
+    confidence to three decimals, which is what the markdown comment
+    records, so a table survives a markdown round trip unchanged.
+    """
+    start: List[float] = field(default_factory=list)
+    end: List[float] = field(default_factory=list)
+    speaker: List[str] = field(default_factory=list)
+    text: List[str] = field(default_factory=list)
+    confidence: List[Optional[float]] = field(default_factory=list)
+    segment: List[int] = field(default_factory=list)
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.start)
+
+    def append(
+        self,
+        start: float,
+        end: float,
+        speaker: str,
+        text: str,
+        confidence: Optional[float] = None,
+        segment: int = 0
+    ) -> None:
+        self.start.append(round(float(start), 3))
+        self.end.append(round(float(end), 3))
+        self.speaker.append(speaker)
+        self.text.append(text.strip())
+        self.confidence.append(None if confidence is None else round(float(confidence), 3))
+        self.segment.append(int(segment))
+
+    def rows(self) -> Iterator[Dict]:
+        for values in zip(self.start, self.end, self.speaker, self.text, self.confidence, self.segment):
+            yield dict(zip(TRANSCRIPT_COLUMNS, values))
+
+    def filter(
+        self,
+        speakers: Optional[Iterable[str]] = None,
+        start: Optional[float] = None,
+        end: Optional[float] = None
+    ) -> "TranscriptTable":
+        """Rows by the given speakers that overlap ``[start, end]``."""
+        wanted = set(speakers) if speakers is not None else None
+        result = TranscriptTable(metadata=dict(self.metadata))
+        for row in self.rows():
+            if wanted is not None and row['speaker'] not in wanted:
+                continue
+            if start is not None and row['end'] < start:
+                continue
+            if end is not None and row['start'] > end:
+                continue
+            result.append(**row)
+        return result
+
+    def to_dialogue(self) -> str:
+        """Plain ``Speaker: text`` lines, e.g. for an LLM prompt."""
+        return "\n".join(f"{speaker}: {text}" for speaker, text in zip(self.speaker, self.text) if text)
+
+    def to_markdown(self) -> str:
+        """Render as a review transcript that ``from_markdown`` reads back unchanged."""
+        metadata = self.metadata
+        duration = metadata.get('duration') or (max(self.end) if self.end else 0.0)
+        lines = ["# Session Transcript", ""]
+        if metadata.get('source_audio'):
+            lines.append(f"**Source Audio:** {metadata['source_audio']}")
+        lines.append(f"**Duration:** {duration:.1f} seconds ({duration/60:.1f} minutes)")
+        lines.append(f"**Speakers:** {len(metadata.get('speakers', {}))} detected")
+        lines.append("")
+        lines.append("## Speaker Summary")
+        lines.append("")
+        for speaker_id, name in metadata.get('speakers', {}).items():
+            lines.append(f"- **{name}** ({speaker_id})")
+        lines.append("")
+        lines.append("## Transcript")
+        lines.append("")
+        body = "".join(format_entry(**row) for row in self.rows())
+        return "\n".join(lines) + "\n" + body + "---\n"
+
+    @classmethod
+    def from_markdown(cls, lines: Iterable[str]) -> "TranscriptTable":
+        """Build a table from review-format markdown lines (a string is split for you)."""
+        if isinstance(lines, str):
+            lines = lines.splitlines()
+        lines = iter(lines)
+
+        table = cls()
+        speakers = {}
+        header_lines = []
+        for line in lines:
+            header_lines.append(line)
+            if line.startswith('## Transcript'):
+                break
+            summary = _SPEAKER_SUMMARY.match(line)
+            if summary:
+                speakers[summary.group(2)] = summary.group(1)
+
+        header = "\n".join(header_lines)
+        source = re.search(r'\*\*Source Audio:\*\* (.+)', header)
+        duration = re.search(r'\*\*Duration:\*\* ([0-9.]+) seconds', header)
+        if source:
+            table.metadata['source_audio'] = source.group(1).strip()
+        if duration:
+            table.metadata['duration'] = float(duration.group(1))
+        table.metadata['speakers'] = speakers
+
+        # Hand the parser the section heading it expects, then the remaining lines
+        for entry in iter_transcript_entries(_chain(['## Transcript'], lines)):
+            table.append(
+                entry['start_seconds'], entry['end_seconds'], entry['speaker'], entry['content'],
+                entry['confidence'], entry['segment'] if entry['segment'] is not None else 0
+            )
+        return table
+
+
+def _chain(*iterables):
+    for iterable in iterables:
+        yield from iterable
+
+
+def store_path_for(transcript_path: Path) -> Path:
+    """Parquet path kept beside a markdown transcript."""
+    return Path(transcript_path).with_suffix(STORE_SUFFIX)
+
+
+def _fresh_store(transcript_path: Path) -> Optional[Path]:
+    """The Parquet file for a transcript, if it exists and the markdown was not edited since."""
+    store = store_path_for(transcript_path)
+    if not store.exists() or not pyarrow_available():
+        return None
+    if transcript_path.exists() and transcript_path.stat().st_mtime > store.stat().st_mtime:
+        return None
+    return store
+
+
+def save_table(table: TranscriptTable, path: Path) -> Path:
+    """
+    Write a table as Parquet (metadata goes in the schema metadata).
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    pa, pq = _require_pyarrow()
+    arrow_table = pa.table(
+        {name: getattr(table, name) for name in TRANSCRIPT_COLUMNS},
+        schema=_arrow_schema(pa, table.metadata)
+    )
+    pq.write_table(arrow_table, str(path))
+    return Path(path)
+
+
+def load_table(
+    path: Path,
+    speakers: Optional[Iterable[str]] = None,
+    start: Optional[float] = None,
+    end: Optional[float] = None
+) -> TranscriptTable:
+    """
+    Read a Parquet transcript, pushing speaker/time filters down to the reader.
+
+    Args:
+        path: Parquet file
+        speakers: Only rows by these speakers
+        start: Only rows ending at or after this time
+        end: Only rows starting at or before this time
+
+    Raises:
+        ImportError: If pyarrow is not installed
+    """
+    pa, pq = _require_pyarrow()
+    filters = []
+    if speakers is not None:
+        filters.append(("speaker", "in", list(speakers)))
+    if start is not None:
+        filters.append(("end", ">=", start))
+    if end is not None:
+        filters.append(("start", "<=", end))
+
+    arrow_table = pq.read_table(str(path), filters=filters or None)
+    columns = arrow_table.to_pydict()
+    table = TranscriptTable(**{name: columns[name] for name in TRANSCRIPT_COLUMNS})
+    raw = (arrow_table.schema.metadata or {}).get(b"transcript")
+    table.metadata = json.loads(raw) if raw else {}
+    return table
+
+
+def iter_store_entries(path: Path, batch_size: int = 4096) -> Iterator[Dict]:
+    """Stream a Parquet transcript as merger-style entry dicts, one record batch at a time."""
+    _, pq = _require_pyarrow()
+    parquet_file = pq.ParquetFile(str(path))
+    for batch in parquet_file.iter_batches(batch_size=batch_size, columns=list(TRANSCRIPT_COLUMNS)):
+        columns = batch.to_pydict()
+        for start, end, speaker, text, confidence, segment in zip(*(columns[name] for name in TRANSCRIPT_COLUMNS)):
+            yield {
+                'start_time': format_timestamp(start),
+                'end_time': format_timestamp(end),
+                'start_seconds': start,
+                'end_seconds': end,
+                'speaker': speaker,
+                'content': text,
+                'confidence': confidence,
+                'segment': segment
+            }
+
+
+def _arrow_schema(pa, metadata: Dict[str, Any]):
+    return pa.schema(
+        [
+            ("start", pa.float64()),
+            ("end", pa.float64()),
+            ("speaker", pa.string()),
+            ("text", pa.string()),
+            ("confidence", pa.float64()),
+            ("segment", pa.int32()),
+        ],
+        metadata={b"transcript": json.dumps(metadata).encode("utf-8")}
+    )
+
+
+class TranscriptTableWriter:
+    """
+    Writes a Parquet transcript incrementally, in row groups of ``batch_size``.
+
+    Used by the merger so a merged session never has to be held in memory.
+    """
+
+    def __init__(self, path: Path, metadata: Optional[Dict[str, Any]] = None, batch_size: int = 4096):
+        self.pa, pq = _require_pyarrow()
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._schema = _arrow_schema(self.pa, metadata or {})
+        self._writer = pq.ParquetWriter(str(self.path), self._schema)
+        self._buffer = TranscriptTable()
+        self.rows_written = 0
+
+    def append(self, **row) -> None:
+        self._buffer.append(**row)
+        if len(self._buffer) >= self.batch_size:
+            self._flush()
+
+    def _flush(self) -> None:
+        if not len(self._buffer):
+            return
+        batch = self.pa.table({name: getattr(self._buffer, name) for name in TRANSCRIPT_COLUMNS}, schema=self._schema)
+        self._writer.write_table(batch)
+        self.rows_written += len(self._buffer)
+        self._buffer = TranscriptTable()
+
+    def close(self) -> None:
+        self._flush()
+        self._writer.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def write_transcript_store(table: TranscriptTable, transcript_path: Path) -> Optional[Path]:
+    """
+    Save a table beside its markdown transcript, if pyarrow is installed.
+
+    Call after the markdown is written so the store counts as fresh.
+
+    Returns:
+        Path to the Parquet file, or None when pyarrow is unavailable
+    """
+    global _missing_pyarrow_logged
+    if not pyarrow_available():
+        if not _missing_pyarrow_logged:
+            logger.info("ℹ️  pyarrow not installed; skipping the columnar transcript store (markdown only)")
+            _missing_pyarrow_logged = True
+        return None
+
+    path = save_table(table, store_path_for(transcript_path))
+    logger.info(f"🗃️  Transcript store saved to: {path} ({len(table)} rows)")
+    return path
+
+
+def open_transcript_entries(transcript_path: Path) -> Iterator[Dict]:
+    """
+    Stream entries for a markdown transcript: from its fresh Parquet store
+    when there is one, otherwise by parsing the markdown.
+    """
+    transcript_path = Path(transcript_path)
+    store = _fresh_store(transcript_path)
+    if store is not None:
+        yield from iter_store_entries(store)
+        return
+    with open(transcript_path, 'r', encoding='utf-8') as f:
+        yield from iter_transcript_entries(f)
+
+
+def load_transcript(transcript_path: Path) -> TranscriptTable:
+    """Load a transcript as a table, preferring its fresh Parquet store over the markdown."""
+    transcript_path = Path(transcript_path)
+    store = _fresh_store(transcript_path)
+    if store is not None:
+        return load_table(store)
+    with open(transcript_path, 'r', encoding='utf-8') as f:
+        return TranscriptTable.from_markdown(f)
@@ -5,6 +5,7 @@ import numpy as np
 from sqlalchemy import text
 from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
+from core import metrics
 from .models import Chunk, Document, EMBED_DIM
 
 def _hash_token(token: str, dim: int) -> int:
@@ -12,13 +13,14 @@ def _hash_token(token: str, dim: int) -> int:
     return h % dim
 
 def embed_local(text: str, dim: int = EMBED_DIM) -> List[float]:
-    vec = np.zeros(dim, dtype=np.float32)
-    tokens = re.findall(r"\w+", text.lower())
-    for t in tokens:
-        idx = _hash_token(t, dim)
-        vec[idx] += 1.0
-    n = np.linalg.norm(vec) or 1.0
-    return (vec / n).tolist()
+    with metrics.timer("gm_embedding_seconds"):
+        vec = np.zeros(dim, dtype=np.float32)
+        tokens = re.findall(r"\w+", text.lower())
+        for t in tokens:
+            idx = _hash_token(t, dim)
+            vec[idx] += 1.0
+        n = np.linalg.norm(vec) or 1.0
+        return (vec / n).tolist()
 
 def upsert_chunks(sess: Session, doc: Document, chunks: List[Tuple[str, Dict]], classify_content: bool = True):
     """
@@ -52,18 +54,12 @@ def upsert_chunks(sess: Session, doc: Document, chunks: List[Tuple[str, Dict]],
         sess.add(c)
     sess.commit()
 
-def query(sess: Session, qtext: str, k: int = 5, chunk_types: List[str] = None) -> List[Chunk]:
+def _nearest_chunk_ids(qtext: str, k: int, chunk_types: List[str] = None):
     """
-    Query chunks with optional filtering by content types
-    
-    Args:
-        sess: Database session
-        qtext: Query text 
-        k: Number of results to return
-        chunk_types: Optional list of chunk types to filter by (e.g., ['monster', 'spell'])
-    
-    Returns:
-        List of most relevant chunks
+    Statement for the ids of the ``k`` chunks nearest to ``qtext``.
+
+    The SQL text is the same on every call (only the parameters change), so
+    the driver can prepare it server-side once and reuse the plan.
     """
     qvec = embed_local(qtext)
     
@@ -73,30 +69,61 @@ def query(sess: Session, qtext: str, k: int = 5, chunk_types: List[str] = None)
     # Build query with optional type filtering
     if chunk_types:
         type_filter = "AND c.chunk_type = ANY(:types)"
-        stmt = text(f"""
+        return text(f"""
             SELECT c.id FROM chunk c
             WHERE 1=1 {type_filter}
             ORDER BY c.embedding <=> CAST(:qvec AS vector)
             LIMIT :k
         """).bindparams(qvec=vec_str, k=k, types=chunk_types)
-    else:
-        stmt = text("""
-            SELECT c.id FROM chunk c
-            ORDER BY c.embedding <=> CAST(:qvec AS vector)
-            LIMIT :k
-        """).bindparams(qvec=vec_str, k=k)
-    
-    result = sess.exec(stmt)
-    ids = [r[0] for r in result]
-    
-    if not ids:
-        return []
-    
+    return text("""
+        SELECT c.id FROM chunk c
+        ORDER BY c.embedding <=> CAST(:qvec AS vector)
+        LIMIT :k
+    """).bindparams(qvec=vec_str, k=k)
+
+def _chunks_by_id(ids: List[int]):
     # Load chunks with document relationships
-    chunks = sess.exec(
+    return (
         select(Chunk)
         .options(selectinload(Chunk.document))
         .where(Chunk.id.in_(ids))
-    ).all()
+    )
+
+def query(sess: Session, qtext: str, k: int = 5, chunk_types: List[str] = None) -> List[Chunk]:
+    """
+    Query chunks with optional filtering by content types
     
-    return list(chunks)
+    Args:
+        sess: Database session
+        qtext: Query text 
+        k: Number of results to return
+        chunk_types: Optional list of chunk types to filter by (e.g., ['monster', 'spell'])
+    
+    Returns:
+        List of most relevant chunks
+    """
+    with metrics.timer("gm_retrieval_seconds", mode="sync"):
+        result = sess.exec(_nearest_chunk_ids(qtext, k, chunk_types))
+        ids = [r[0] for r in result]
+        
+        if not ids:
+            return []
+        
+        return list(sess.exec(_chunks_by_id(ids)).all())
+
+async def query_async(sess, qtext: str, k: int = 5, chunk_types: List[str] = None) -> List[Chunk]:
+    """
+    ``query`` on an ``AsyncSession`` (see core/data/db.py).
+    
+    Returns:
+        List of most relevant chunks
+    """
+    with metrics.timer("gm_retrieval_seconds", mode="async"):
+        result = await sess.execute(_nearest_chunk_ids(qtext, k, chunk_types))
+        ids = [r[0] for r in result]
+        
+        if not ids:
+            return []
+        
+        result = await sess.exec(_chunks_by_id(ids))
+        return list(result.all())
@@ -9,6 +9,8 @@ from typing import Optional, Dict, Any
 from notion_client import Client
 from notion_client.errors import APIResponseError
 
+from core import metrics
+
 
 class NotionSync:
     """Handle Notion API integration for session notes."""
@@ -73,7 +75,8 @@ class NotionSync:
         blocks = self._markdown_to_blocks(content)
         
         try:
-            response = self.client.pages.create(
+            response = self._call(
+                "pages.create", self.client.pages.create,
                 parent={"database_id": target_db},
                 properties=page_properties,
                 children=blocks
@@ -106,22 +109,33 @@ class NotionSync:
             self._clear_page_content(page_id)
             
             # Add new content
-            self.client.blocks.children.append(
+            self._call(
+                "blocks.children.append", self.client.blocks.children.append,
                 block_id=page_id,
                 children=blocks
             )
             
             # Update properties if provided
             if properties:
-                self.client.pages.update(
+                self._call(
+                    "pages.update", self.client.pages.update,
                     page_id=page_id,
                     properties=properties
                 )
             
-            return self.client.pages.retrieve(page_id=page_id)
+            return self._call("pages.retrieve", self.client.pages.retrieve, page_id=page_id)
         except APIResponseError as e:
             raise Exception(f"Failed to update Notion page: {e}")
     
+    def _call(self, operation: str, func, **kwargs):
+        """Call the Notion API, recording latency and failures."""
+        try:
+            with metrics.timer("gm_notion_request_seconds", operation=operation):
+                return func(**kwargs)
+        except Exception:
+            metrics.inc("gm_notion_errors_total", operation=operation)
+            raise
+    
     def _markdown_to_blocks(self, content: str) -> list:
         """
         Convert markdown content to Notion blocks.
@@ -248,11 +262,11 @@ class NotionSync:
         """Clear all blocks from a Notion page."""
         try:
             # Get all blocks
-            blocks = self.client.blocks.children.list(block_id=page_id)
+            blocks = self._call("blocks.children.list", self.client.blocks.children.list, block_id=page_id)
             
             # Delete each block
             for block in blocks['results']:
-                self.client.blocks.delete(block_id=block['id'])
+                self._call("blocks.delete", self.client.blocks.delete, block_id=block['id'])
         except APIResponseError as e:
             # If we can't clear content, that's okay - we'll append instead
             pass
@@ -266,7 +280,7 @@ class NotionSync:
         """
         try:
             # Try to list users (basic API test)
-            self.client.users.list()
+            self._call("users.list", self.client.users.list)
             return True
         except Exception:
             return False
\ No newline at end of file
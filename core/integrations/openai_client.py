@@ -0,0 +1,352 @@
+"""
+Shared OpenAI client for Shadowdark GM Assistant.
+
+Every agent used to build its own ``OpenAI()`` client with no retries and
+no idea of the account's rate limits, so concurrent summaries and chats
+failed on the first 429. ``OpenAIService`` wraps one client per process
+(one HTTP connection pool) and adds:
+
+- token buckets per model for requests/min and tokens/min, reserved before
+  each call so callers queue instead of being rejected
+- exponential backoff with jitter on 429, 5xx, timeouts and connection
+  errors, honouring ``Retry-After`` (a 429 for exhausted quota is not retried)
+- a bounded number of calls in flight
+
+``chat`` / ``transcribe`` are the sync facade and ``achat`` the asyncio one;
+both share the buckets. Limits apply per process, so with several API
+workers or job processes set them to that process's share of the account.
+"""
+
+import os
+import time
+import random
+import asyncio
+import logging
+import threading
+import contextvars
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple
+
+from core import metrics
+
+# Configure logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+@dataclass
+class UsageTotals:
+    """Token usage of the OpenAI calls made inside one ``track_usage`` block."""
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    calls: int = 0
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+
+_current_usage: contextvars.ContextVar = contextvars.ContextVar("openai_usage", default=None)
+
+
+@contextmanager
+def track_usage() -> Iterator[UsageTotals]:
+    """
+    Collect token usage of the calls made in this thread / task.
+
+    Usage:
+        with track_usage() as usage:
+            notes = summarize_text(transcript)
+        print(usage.total_tokens)
+    """
+    usage = UsageTotals()
+    token = _current_usage.set(usage)
+    try:
+        yield usage
+    finally:
+        _current_usage.reset(token)
+
+
+def _env_number(name: str, default: float) -> float:
+    return float(os.getenv(name, str(default)))
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at ``per_minute``.
+
+    ``reserve`` always succeeds and returns how long the caller must wait;
+    reservations beyond the balance put the bucket in debt, so later
+    callers queue behind earlier ones.
+    """
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take ``amount`` tokens; returns seconds until they are actually available."""
+        amount = min(amount, self.capacity)  # a single oversized call must still get through
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def refund(self, amount: float) -> None:
+        """Return tokens that were reserved but not used."""
+        with self._lock:
+            self._tokens = min(self.capacity, self._tokens + amount)
+
+
+def estimate_chat_tokens(kwargs: Dict[str, Any]) -> int:
+    """Tokens a chat call counts against the limit: prompt (~4 chars/token) plus the completion cap."""
+    prompt_chars = 0
+    for message in kwargs.get("messages", []):
+        content = message.get("content") or ""
+        prompt_chars += len(content) if isinstance(content, str) else len(str(content))
+    completion = kwargs.get("max_completion_tokens") or kwargs.get("max_tokens") or 0
+    return prompt_chars // 4 + completion
+
+
+def retry_delay(error: Exception, attempt: int, base_delay: float, max_delay: float) -> Optional[float]:
+    """
+    Seconds to wait before retrying after ``error``, or None if it is not retryable.
+
+    Uses the server's ``Retry-After`` when given, otherwise exponential
+    backoff with full jitter.
+    """
+    import openai
+
+    if isinstance(error, (openai.APIConnectionError, openai.APITimeoutError)):
+        pass
+    elif isinstance(error, openai.APIStatusError):
+        if error.status_code not in RETRYABLE_STATUS and error.status_code < 500:
+            return None
+        if getattr(error, "code", None) == "insufficient_quota":
+            return None  # billing, not rate: retrying cannot help
+        retry_after = error.response.headers.get("retry-after") if error.response is not None else None
+        if retry_after:
+            try:
+                return min(float(retry_after), max_delay)
+            except ValueError:
+                pass
+    else:
+        return None
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class OpenAIService:
+    """
+    Rate-limited, retrying access to the OpenAI API.
+
+    Usage:
+        llm = get_openai_service()
+        response = llm.chat(agent="session_scribe", model="gpt-5", messages=[...])
+        response = await llm.achat(agent="gm_chat", model="gpt-5", messages=[...])
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            api_key: OpenAI API key (defaults to OPENAI_API_KEY)
+            requests_per_minute: Per-model request limit (defaults to OPENAI_RPM, then 500; 0 = unlimited)
+            tokens_per_minute: Per-model token limit (defaults to OPENAI_TPM, then 500000; 0 = unlimited)
+            max_concurrency: Calls in flight per facade (defaults to OPENAI_MAX_CONCURRENCY, then 8)
+            max_retries: Retries after the first attempt (defaults to OPENAI_MAX_RETRIES, then 5)
+            base_delay: First backoff step in seconds
+            max_delay: Longest single wait in seconds
+            timeout: Per-request timeout in seconds (defaults to OPENAI_TIMEOUT, then 600)
+        """
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        if not self.api_key:
+            raise ValueError("OpenAI API key required (set OPENAI_API_KEY)")
+        self.requests_per_minute = requests_per_minute if requests_per_minute is not None else _env_number("OPENAI_RPM", 500)
+        self.tokens_per_minute = tokens_per_minute if tokens_per_minute is not None else _env_number("OPENAI_TPM", 500000)
+        self.max_concurrency = max_concurrency or int(_env_number("OPENAI_MAX_CONCURRENCY", 8))
+        self.max_retries = max_retries if max_retries is not None else int(_env_number("OPENAI_MAX_RETRIES", 5))
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.timeout = timeout or _env_number("OPENAI_TIMEOUT", 600)
+
+        self._client = None
+        self._async_client = None
+        self._buckets: Dict[str, Tuple[Optional[TokenBucket], Optional[TokenBucket]]] = {}
+        self._lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._async_semaphores: Dict[int, asyncio.Semaphore] = {}
+
+    # --- clients ---------------------------------------------------------
+
+    @property
+    def client(self):
+        """The underlying sync ``OpenAI`` client (its own retries are off; this class retries)."""
+        with self._lock:
+            if self._client is None:
+                from openai import OpenAI
+                self._client = OpenAI(api_key=self.api_key, max_retries=0, timeout=self.timeout)
+            return self._client
+
+    @property
+    def async_client(self):
+        with self._lock:
+            if self._async_client is None:
+                from openai import AsyncOpenAI
+                self._async_client = AsyncOpenAI(api_key=self.api_key, max_retries=0, timeout=self.timeout)
+            return self._async_client
+
+    # --- sync facade -----------------------------------------------------
+
+    def chat(self, agent: str = "default", **kwargs):
+        """
+        ``chat.completions.create`` with rate limiting and retries.
+
+        Args:
+            agent: Caller name for metrics
+            **kwargs: Arguments for ``chat.completions.create`` (``model`` required)
+        """
+        model = kwargs["model"]
+        estimate = estimate_chat_tokens(kwargs)
+        response = self._call_sync(model, estimate, lambda: self.client.chat.completions.create(**kwargs),
+                                   agent=agent)
+        self._settle(model, estimate, response, agent)
+        return response
+
+    def transcribe(self, audio_path: str, **kwargs):
+        """``audio.transcriptions.create`` for a file, with rate limiting and retries."""
+        model = kwargs.get("model", "whisper-1")
+
+        def call():
+            with open(Path(audio_path), "rb") as audio_file:  # reopened per attempt
+                return self.client.audio.transcriptions.create(file=audio_file, **kwargs)
+
+        return self._call_sync(model, 0, call, agent="whisper")
+
+    # --- async facade ----------------------------------------------------
+
+    async def achat(self, agent: str = "default", **kwargs):
+        """Async ``chat`` (same buckets, its own in-flight limit per event loop)."""
+        model = kwargs["model"]
+        estimate = estimate_chat_tokens(kwargs)
+        semaphore = self._async_semaphore()
+        for attempt in range(self.max_retries + 1):
+            wait = self._reserve(model, estimate)
+            if wait:
+                metrics.observe("gm_llm_wait_seconds", wait, model=model)
+                await asyncio.sleep(wait)
+            try:
+                async with semaphore:
+                    with metrics.timer("gm_llm_request_seconds", agent=agent, model=model):
+                        response = await self.async_client.chat.completions.create(**kwargs)
+                self._settle(model, estimate, response, agent)
+                return response
+            except Exception as e:
+                self._release(model, estimate)
+                delay = self._retry_or_raise(e, attempt, model)
+                await asyncio.sleep(delay)
+
+    # --- internals -------------------------------------------------------
+
+    def _call_sync(self, model: str, estimate: int, call: Callable[[], Any], agent: str):
+        for attempt in range(self.max_retries + 1):
+            wait = self._reserve(model, estimate)
+            if wait:
+                metrics.observe("gm_llm_wait_seconds", wait, model=model)
+                time.sleep(wait)
+            try:
+                with self._semaphore:
+                    with metrics.timer("gm_llm_request_seconds", agent=agent, model=model):
+                        return call()
+            except Exception as e:
+                self._release(model, estimate)
+                time.sleep(self._retry_or_raise(e, attempt, model))
+
+    def _retry_or_raise(self, error: Exception, attempt: int, model: str) -> float:
+        """Backoff before the next attempt; re-raises when out of retries or not retryable."""
+        delay = retry_delay(error, attempt, self.base_delay, self.max_delay)
+        if delay is None or attempt >= self.max_retries:
+            raise error
+        metrics.inc("gm_llm_retries_total", model=model, error=type(error).__name__)
+        logger.warning(f"⏳ OpenAI {type(error).__name__} on {model}; retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+        return delay
+
+    def _limits(self, model: str) -> Tuple[Optional[TokenBucket], Optional[TokenBucket]]:
+        with self._lock:
+            if model not in self._buckets:
+                self._buckets[model] = (
+                    TokenBucket(self.requests_per_minute) if self.requests_per_minute > 0 else None,
+                    TokenBucket(self.tokens_per_minute) if self.tokens_per_minute > 0 else None,
+                )
+            return self._buckets[model]
+
+    def _reserve(self, model: str, tokens: int) -> float:
+        requests, token_bucket = self._limits(model)
+        wait = requests.reserve(1) if requests else 0.0
+        if token_bucket and tokens:
+            wait = max(wait, token_bucket.reserve(tokens))
+        return wait
+
+    def _release(self, model: str, tokens: int) -> None:
+        """Give back the token reservation of a failed attempt (its retry reserves again)."""
+        token_bucket = self._limits(model)[1]
+        if token_bucket and tokens:
+            token_bucket.refund(min(tokens, token_bucket.capacity))
+
+    def _settle(self, model: str, estimate: int, response, agent: str) -> None:
+        """Refund the unused part of the token reservation and record usage."""
+        metrics.record_token_usage(agent, model, response)
+        usage = getattr(response, "usage", None)
+        tracked = _current_usage.get()
+        if tracked is not None:
+            tracked.calls += 1
+            tracked.prompt_tokens += getattr(usage, "prompt_tokens", 0) or 0
+            tracked.completion_tokens += getattr(usage, "completion_tokens", 0) or 0
+        total = getattr(usage, "total_tokens", None)
+        token_bucket = self._limits(model)[1]
+        if token_bucket and total is not None and total < estimate:
+            token_bucket.refund(estimate - total)
+
+    def _async_semaphore(self) -> asyncio.Semaphore:
+        loop_id = id(asyncio.get_running_loop())
+        with self._lock:
+            if loop_id not in self._async_semaphores:
+                self._async_semaphores[loop_id] = asyncio.Semaphore(self.max_concurrency)
+            return self._async_semaphores[loop_id]
+
+
+_services: Dict[str, OpenAIService] = {}
+_services_lock = threading.Lock()
+
+
+def get_openai_service(api_key: Optional[str] = None) -> Optional[OpenAIService]:
+    """
+    The process-wide service for ``api_key`` (defaults to OPENAI_API_KEY).
+
+    Returns:
+        OpenAIService, or None when no key is configured
+    """
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not api_key:
+        return None
+    with _services_lock:
+        if api_key not in _services:
+            _services[api_key] = OpenAIService(api_key=api_key)
+        return _services[api_key]
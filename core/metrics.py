@@ -0,0 +1,217 @@
+"""
+Metrics for the Shadowdark GM Assistant
+
+A small in-process registry of counters, gauges and histograms, rendered
+in the Prometheus text exposition format (the API serves it at
+``/metrics``). Agents record what they do with module-level helpers:
+
+    from core import metrics
+
+    with metrics.timer("gm_retrieval_seconds", mode="sync"):
+        ...
+    metrics.inc("gm_llm_tokens_total", response.usage.prompt_tokens, agent="gm_chat", kind="prompt")
+
+Recording is off unless ``METRICS_ENABLED`` is set. While off, ``timer``
+returns a shared no-op context manager and ``inc``/``observe``/``set_gauge``
+return after one flag check, so instrumented hot paths (``embed_local``
+runs once per chunk) pay a function call and nothing else.
+
+Background jobs run in their own processes: ``snapshot()`` there and
+``merge()`` in the API process carry their samples over (see
+apps/api/jobs.py). Long-lived workers that report after every task
+(core/agents/diarization_pool.py) send ``drain()`` instead, so no sample
+is merged twice.
+"""
+
+import os
+import time
+import bisect
+import threading
+from contextlib import contextmanager, nullcontext
+from typing import Dict, Iterator, List, Optional, Tuple
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+# Bucket upper bounds, in seconds unless stated otherwise
+FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+REQUEST_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+SLOW_BUCKETS = (1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1200.0, 3600.0)
+RATIO_BUCKETS = (0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 1.5, 2.0, 5.0)
+
+# name -> (type, help, buckets)
+METRICS = {
+    "gm_retrieval_seconds": ("histogram", "Vector search latency (vector_store.query)", REQUEST_BUCKETS),
+    "gm_embedding_seconds": ("histogram", "Time to embed one text (embed_local)", FAST_BUCKETS),
+    "gm_llm_request_seconds": ("histogram", "OpenAI API call latency (chat and transcription)", SLOW_BUCKETS),
+    "gm_llm_tokens_total": ("counter", "OpenAI tokens used", None),
+    "gm_llm_wait_seconds": ("histogram", "Time an OpenAI call waited for the rate limiter", REQUEST_BUCKETS),
+    "gm_llm_retries_total": ("counter", "OpenAI calls retried after 429/5xx/timeouts", None),
+    "gm_diarization_realtime_factor": ("histogram", "Diarization processing time divided by audio duration", RATIO_BUCKETS),
+    "gm_diarization_audio_seconds_total": ("counter", "Audio seconds diarized (cache misses only)", None),
+    "gm_ffmpeg_split_seconds": ("histogram", "Wall-clock time to split a recording with ffmpeg", SLOW_BUCKETS),
+    "gm_notion_request_seconds": ("histogram", "Notion API call latency", REQUEST_BUCKETS),
+    "gm_notion_errors_total": ("counter", "Failed Notion API calls", None),
+    "gm_jobs_total": ("counter", "Background jobs finished, by kind and status", None),
+    "gm_job_queue_depth": ("gauge", "Background jobs by state (queued, running)", None),
+}
+
+_enabled = os.getenv("METRICS_ENABLED", "").strip().lower() in ("1", "true", "yes", "on")
+_lock = threading.Lock()
+_values: Dict[str, Dict[LabelKey, object]] = {}   # counters/gauges: float; histograms: [bucket counts, sum, count]
+_NOOP = nullcontext()
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def enable(on: bool = True) -> None:
+    """Switch recording on or off at runtime (tests, CLI flags)."""
+    global _enabled
+    _enabled = on
+
+
+def _key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def inc(name: str, amount: float = 1.0, **labels) -> None:
+    """Add to a counter."""
+    if not _enabled:
+        return
+    key = _key(labels)
+    with _lock:
+        series = _values.setdefault(name, {})
+        series[key] = series.get(key, 0.0) + amount
+
+
+def set_gauge(name: str, value: float, **labels) -> None:
+    if not _enabled:
+        return
+    with _lock:
+        _values.setdefault(name, {})[_key(labels)] = float(value)
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record one histogram sample."""
+    if not _enabled:
+        return
+    buckets = METRICS[name][2]
+    key = _key(labels)
+    with _lock:
+        series = _values.setdefault(name, {})
+        entry = series.get(key)
+        if entry is None:
+            entry = series[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+        entry[0][bisect.bisect_left(buckets, value)] += 1
+        entry[1] += value
+        entry[2] += 1
+
+
+@contextmanager
+def _timed(name: str, labels: Dict[str, object]) -> Iterator[None]:
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(name, time.perf_counter() - start, **labels)
+
+
+def timer(name: str, **labels):
+    """Context manager recording the block's wall-clock seconds in histogram ``name``."""
+    if not _enabled:
+        return _NOOP
+    return _timed(name, labels)
+
+
+def record_token_usage(agent: str, model: str, response) -> None:
+    """Count prompt/completion tokens from an OpenAI response (if it reports usage)."""
+    usage = getattr(response, "usage", None) if _enabled else None
+    if usage is None:
+        return
+    inc("gm_llm_tokens_total", getattr(usage, "prompt_tokens", 0) or 0, agent=agent, model=model, kind="prompt")
+    inc("gm_llm_tokens_total", getattr(usage, "completion_tokens", 0) or 0, agent=agent, model=model, kind="completion")
+
+
+def _copy_values() -> Dict[str, List]:
+    # Caller holds _lock
+    return {
+        name: [(key, [list(v[0]), v[1], v[2]] if isinstance(v, list) else v) for key, v in series.items()]
+        for name, series in _values.items()
+    }
+
+
+def snapshot() -> Dict[str, List]:
+    """Picklable copy of the recorded samples (for ``merge`` in another process)."""
+    with _lock:
+        return _copy_values()
+
+
+def drain() -> Dict[str, List]:
+    """``snapshot()`` and clear the registry in one step (samples since the last drain)."""
+    with _lock:
+        samples = _copy_values()
+        _values.clear()
+        return samples
+
+
+def merge(samples: Optional[Dict[str, List]]) -> None:
+    """Add samples from another process's ``snapshot()`` (gauges are overwritten)."""
+    if not _enabled or not samples:
+        return
+    with _lock:
+        for name, series in samples.items():
+            target = _values.setdefault(name, {})
+            kind = METRICS.get(name, ("counter",))[0]
+            for key, value in series:
+                key = tuple(tuple(pair) for pair in key)
+                current = target.get(key)
+                if kind == "histogram":
+                    if current is None:
+                        target[key] = [list(value[0]), value[1], value[2]]
+                    else:
+                        current[0] = [a + b for a, b in zip(current[0], value[0])]
+                        current[1] += value[1]
+                        current[2] += value[2]
+                elif kind == "gauge" or current is None:
+                    target[key] = value
+                else:
+                    target[key] = current + value
+
+
+def reset() -> None:
+    with _lock:
+        _values.clear()
+
+
+def _format_labels(key: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = key + extra
+    if not pairs:
+        return ""
+    escaped = (v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, v in pairs)
+    return "{" + ",".join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + "}"
+
+
+def render() -> str:
+    """All recorded metrics in the Prometheus text format (version 0.0.4)."""
+    lines = []
+    with _lock:
+        for name, (kind, help_text, buckets) in METRICS.items():
+            series = _values.get(name)
+            if not series:
+                continue
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(series.items()):
+                if kind != "histogram":
+                    lines.append(f"{name}{_format_labels(key)} {value:g}")
+                    continue
+                counts, total, count = value
+                cumulative = 0
+                for bound, bucket_count in zip(list(buckets) + ["+Inf"], counts):
+                    cumulative += bucket_count
+                    le = bound if isinstance(bound, str) else f"{bound:g}"
+                    lines.append(f"{name}_bucket{_format_labels(key, (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total:g}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+    return "\n".join(lines) + "\n"
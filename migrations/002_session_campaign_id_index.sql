@@ -0,0 +1,7 @@
+-- Composite index for keyset pagination of GET /sessions
+-- (WHERE campaign_id = ? AND id > ? ORDER BY id LIMIT ?) and the per-campaign COUNT.
+-- New databases get it from SQLModel.metadata.create_all; run this on existing ones.
+-- CONCURRENTLY avoids locking the table but cannot run inside a transaction block,
+-- so run it with plain psql: psql "$DATABASE_URL" -f migrations/002_session_campaign_id_index.sql
+
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_session_campaign_id_id ON session (campaign_id, id);
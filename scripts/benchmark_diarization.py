@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Benchmark the diarization CPU modes against the float32 pipeline.
+
+For each mode the script reports the real-time factor (processing time /
+audio duration, lower is better) and the frame-level agreement with the
+float32 ("default") result after mapping speaker labels. The cache is
+disabled so every mode runs the full pipeline.
+
+Usage:
+    python scripts/benchmark_diarization.py session.wav --modes default int8 onnx-int8 --threads 4
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+from collections import defaultdict
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.cpu_inference import CPU_MODES
+from core.agents.diarizer import SpeakerDiarizer
+
+FRAME_SECONDS = 0.01
+
+
+def frame_labels(segments, total_duration):
+    """Rasterize segments into one speaker label (or None) per 10ms frame."""
+    labels = [None] * int(total_duration / FRAME_SECONDS + 1)
+    for seg in segments:
+        start = int(seg.start_time / FRAME_SECONDS)
+        end = min(int(seg.end_time / FRAME_SECONDS), len(labels))
+        for i in range(start, end):
+            labels[i] = seg.speaker_id
+    return labels
+
+
+def agreement(reference, hypothesis):
+    """
+    Fraction of frames labelled identically after a greedy speaker mapping.
+
+    Hypothesis speakers are mapped to the reference speaker they overlap
+    most, largest overlaps first, each reference speaker used once.
+    """
+    overlap = defaultdict(int)
+    for ref, hyp in zip(reference, hypothesis):
+        if ref is not None and hyp is not None:
+            overlap[(hyp, ref)] += 1
+
+    mapping, used = {}, set()
+    for (hyp, ref), _ in sorted(overlap.items(), key=lambda item: item[1], reverse=True):
+        if hyp not in mapping and ref not in used:
+            mapping[hyp] = ref
+            used.add(ref)
+
+    frames = max(len(reference), len(hypothesis))
+    matched = sum(
+        1 for ref, hyp in zip(reference, hypothesis)
+        if (ref is None and hyp is None) or (hyp is not None and mapping.get(hyp) == ref)
+    )
+    return matched / frames if frames else 1.0
+
+
+def run_mode(audio_path, mode, args):
+    diarizer = SpeakerDiarizer(
+        use_cache=False,
+        cpu_mode=mode,
+        intra_op_threads=args.threads,
+        inter_op_threads=args.interop_threads
+    )
+    diarizer._load_pipeline()  # exclude model loading / ONNX export from the timing
+
+    start = time.perf_counter()
+    result = diarizer.diarize_audio(audio_path, min_speakers=args.min_speakers, max_speakers=args.max_speakers)
+    elapsed = time.perf_counter() - start
+    return result, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark diarization CPU inference modes")
+    parser.add_argument("audio", help="Audio file to diarize")
+    parser.add_argument("--modes", nargs="+", choices=CPU_MODES, default=list(CPU_MODES),
+                        help="Modes to benchmark (default: all)")
+    parser.add_argument("--threads", type=int, help="Intra-op threads")
+    parser.add_argument("--interop-threads", type=int, help="Inter-op threads")
+    parser.add_argument("--min-speakers", type=int, help="Minimum number of speakers")
+    parser.add_argument("--max-speakers", type=int, help="Maximum number of speakers")
+    args = parser.parse_args()
+
+    modes = list(args.modes)
+    if "default" not in modes:
+        modes.insert(0, "default")  # float32 reference for agreement
+
+    results = {}
+    for mode in modes:
+        print(f"⏱️  Running {mode}...")
+        results[mode] = run_mode(args.audio, mode, args)
+
+    reference, _ = results["default"]
+    ref_frames = frame_labels(reference.segments, reference.total_duration)
+
+    print(f"\n{'Mode':<12} {'Time (s)':>10} {'RTF':>8} {'Speakers':>9} {'Agreement':>10}")
+    print("-" * 53)
+    for mode, (result, elapsed) in results.items():
+        rtf = elapsed / result.total_duration if result.total_duration else 0.0
+        agree = agreement(ref_frames, frame_labels(result.segments, result.total_duration))
+        print(f"{mode:<12} {elapsed:>10.1f} {rtf:>8.3f} {result.num_speakers:>9} {agree:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark transcript parsing and merging on multi-MB transcripts.
+
+Generates synthetic segment transcripts (each segment repeats the last
+30 seconds of the previous one, like the splitter's overlap), then reports:
+- parse time of the previous whole-file DOTALL regex versus the streaming
+  line parser on one large transcript
+- merge time and peak Python memory (tracemalloc) as the number of
+  segments grows, which should stay flat for the streaming merger
+
+Usage:
+    python scripts/benchmark_merger.py
+    python scripts/benchmark_merger.py --entries-per-segment 20000 --segments 2 8 32
+"""
+
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+import re
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.transcript_merger import TranscriptMerger, iter_transcript_entries
+
+SECONDS_PER_ENTRY = 6.0
+OVERLAP_SECONDS = 30.0
+WORDS = ("the goblin king raises his rusty crown party rolls initiative torch flickers "
+         "dungeon door locked trap spell scroll sword shield dragon cave treasure map").split()
+
+# The parser the streaming one replaced (minutes widened so long files still match)
+OLD_PATTERN = r'### ([0-9]+:[0-9]{2}) - ([0-9]+:[0-9]{2})\n\*\*(.+?):\*\* (.+?)(?=\n###|\n---|$)'
+
+
+def write_segment(path: Path, index: int, entries: int, rng: random.Random, repeat=()) -> list:
+    """Write one segment transcript of 6-second entries; returns the texts of its last 30 seconds."""
+    duration = entries * SECONDS_PER_ENTRY
+    texts = []
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"# Session Transcript\n\n**Source Audio:** bench_segment_{index:03d}.m4a\n")
+        f.write(f"**Duration:** {duration:.1f} seconds ({duration / 60:.1f} minutes)\n\n## Transcript\n\n")
+        for i in range(entries):
+            start = i * SECONDS_PER_ENTRY
+            end = start + SECONDS_PER_ENTRY - 1
+            if i < len(repeat):
+                text = repeat[i]
+            else:
+                text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(8, 40)))
+            texts.append(text)
+            f.write(f"### {int(start // 60):02d}:{int(start % 60):02d} - {int(end // 60):02d}:{int(end % 60):02d}\n")
+            f.write(f"**Speaker_{rng.randint(1, 5)}:** {text}\n\n")
+        f.write("---\n")
+    return texts[-int(OVERLAP_SECONDS // SECONDS_PER_ENTRY):]
+
+
+def bench_parse(path: Path) -> None:
+    size_mb = path.stat().st_size / (1024 * 1024)
+    print(f"\n📄 Parsing one {size_mb:.1f}MB transcript")
+
+    start = time.perf_counter()
+    content = path.read_text(encoding="utf-8")
+    section = re.search(r'## Transcript\s*\n\n(.+)', content, re.DOTALL).group(1)
+    old_count = sum(1 for _ in re.finditer(OLD_PATTERN, section, re.DOTALL))
+    old_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    with open(path, "r", encoding="utf-8") as f:
+        new_count = sum(1 for _ in iter_transcript_entries(f))
+    new_seconds = time.perf_counter() - start
+
+    print(f"   whole-file regex: {old_count} entries in {old_seconds:.2f}s")
+    print(f"   streaming parser: {new_count} entries in {new_seconds:.2f}s")
+
+
+def bench_merge(directory: Path, segments: int, entries: int, rng: random.Random) -> None:
+    files = []
+    repeat = ()
+    for index in range(1, segments + 1):
+        path = directory / f"bench_segment_{index:03d}_transcript.md"
+        repeat = write_segment(path, index, entries, rng, repeat)
+        files.append(str(path))
+    input_mb = sum(Path(f).stat().st_size for f in files) / (1024 * 1024)
+
+    output = directory / f"merged_{segments}.md"
+    merger = TranscriptMerger(overlap_seconds=OVERLAP_SECONDS)
+    start = time.perf_counter()
+    merger.merge_transcripts(files, str(output))
+    seconds = time.perf_counter() - start
+
+    # Separate run: tracemalloc slows allocation-heavy code considerably
+    tracemalloc.start()
+    TranscriptMerger(overlap_seconds=OVERLAP_SECONDS).merge_transcripts(files, str(output))
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    print(f"{segments:>9} {input_mb:>10.1f} {seconds:>9.2f} {input_mb / seconds:>8.1f} "
+          f"{merger.duplicates_removed:>11} {peak / (1024 * 1024):>10.2f}")
+    for path in files:
+        Path(path).unlink()
+    output.unlink()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark transcript parsing and merging")
+    parser.add_argument("--entries-per-segment", type=int, default=10000, help="Entries in each generated segment")
+    parser.add_argument("--segments", type=int, nargs="+", default=[2, 8, 32], help="Segment counts to merge")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    import logging
+    logging.getLogger("core.agents.transcript_merger").setLevel(logging.ERROR)
+
+    rng = random.Random(args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        single = tmp / "single_transcript.md"
+        write_segment(single, 1, args.entries_per_segment * 4, rng)
+        bench_parse(single)
+        single.unlink()
+
+        print(f"\n🔗 Merging segments of {args.entries_per_segment} entries each")
+        print(f"{'Segments':>9} {'Input (MB)':>10} {'Time (s)':>9} {'MB/s':>8} {'Duplicates':>11} {'Peak (MB)':>10}")
+        for segments in args.segments:
+            bench_merge(tmp, segments, args.entries_per_segment, rng)
+
+    print("\nPeak is Python heap allocations during the merge (tracemalloc), excluding file buffers.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark the audio splitter engines on a long recording.
+
+Compares the old per-segment output-seeking extraction (``-ss`` after
+``-i``, which decodes the file from the start for every segment) with the
+``parallel`` input-seeking engine and the single-pass ``segment`` engine.
+Without an input file, a 4-hour stereo AAC test recording is generated
+with ffmpeg first.
+
+Usage:
+    python scripts/benchmark_splitter.py                      # generate a 4h file
+    python scripts/benchmark_splitter.py session.m4a --segment-duration 600
+"""
+
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.audio_splitter import AudioSplitter, plan_segments
+
+
+def generate_test_audio(path: Path, hours: float) -> None:
+    """Encode pink noise as stereo 128kbps AAC (roughly a 230MB file for 4 hours)."""
+    print(f"🎛️  Generating {hours:g}h test recording at {path}...")
+    cmd = [
+        'ffmpeg', '-v', 'error',
+        '-f', 'lavfi', '-i', f"anoisesrc=color=pink:sample_rate=44100:duration={hours * 3600}",
+        '-ac', '2', '-c:a', 'aac', '-b:a', '128k',
+        '-y', str(path)
+    ]
+    subprocess.run(cmd, check=True)
+
+
+def split_output_seeking(audio_path: Path, output_dir: Path, segment_duration: float, overlap: float) -> int:
+    """The previous extraction strategy, kept here as the baseline."""
+    total = AudioSplitter().get_audio_duration(audio_path)
+    plan = plan_segments(total, segment_duration, overlap)
+    for index, (start, end) in enumerate(plan, 1):
+        output_path = output_dir / f"{audio_path.stem}_segment_{index:03d}{audio_path.suffix}"
+        cmd = [
+            'ffmpeg', '-v', 'error', '-i', str(audio_path),
+            '-ss', str(start), '-t', str(end - start),
+            '-c', 'copy', '-avoid_negative_ts', 'make_zero', '-y', str(output_path)
+        ]
+        subprocess.run(cmd, check=True)
+    return len(plan)
+
+
+def timed(label, func, results):
+    start = time.perf_counter()
+    count = func()
+    elapsed = time.perf_counter() - start
+    results.append((label, count, elapsed))
+    print(f"   {label}: {count} segments in {elapsed:.1f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark audio splitter engines")
+    parser.add_argument("audio", nargs="?", help="Audio file to split (default: generate a test recording)")
+    parser.add_argument("--hours", type=float, default=4.0, help="Length of the generated recording")
+    parser.add_argument("--segment-duration", type=float, default=300.0, help="Segment length in seconds")
+    parser.add_argument("--workers", type=int, help="Parallel ffmpeg processes")
+    parser.add_argument("--skip-baseline", action="store_true", help="Skip the slow output-seeking baseline")
+    args = parser.parse_args()
+
+    if not shutil.which("ffmpeg"):
+        print("❌ ffmpeg not found on PATH")
+        sys.exit(1)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        audio_path = Path(args.audio) if args.audio else tmp / "benchmark.m4a"
+        if not args.audio:
+            generate_test_audio(audio_path, args.hours)
+
+        splitter = AudioSplitter()
+        results = []
+        print(f"\n⏱️  Splitting {audio_path.name} into {args.segment_duration / 60:g}-minute segments")
+
+        def run(engine):
+            output_dir = tmp / engine
+            output_dir.mkdir()
+            return len(splitter.split_audio(
+                str(audio_path), str(output_dir), engine=engine,
+                max_workers=args.workers, segment_duration=args.segment_duration
+            ))
+
+        if not args.skip_baseline:
+            baseline_dir = tmp / "baseline"
+            baseline_dir.mkdir()
+            timed("output-seeking (old)", lambda: split_output_seeking(
+                audio_path, baseline_dir, args.segment_duration, splitter.overlap_seconds), results)
+        timed("parallel", lambda: run("parallel"), results)
+        timed("segment", lambda: run("segment"), results)
+
+    print(f"\n{'Engine':<22} {'Segments':>9} {'Time (s)':>10}")
+    print("-" * 43)
+    for label, count, elapsed in results:
+        print(f"{label:<22} {count:>9} {elapsed:>10.1f}")
+    print("\nNote: parallel/segment times include hashing the source and segments for the manifest.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Benchmark how much model memory the job executors share when they fork from a preloaded parent.
+
+Builds the process shape of a Gunicorn deployment without Gunicorn: a
+master that preloads, ``--web-workers`` forked API workers that serve no
+model, and a ``JobRunner`` whose ``--executors`` either fork from the
+master after it loaded the model (``fork``, the JOB_BACKEND=redis setup)
+or are spawned and load their own copy (``spawn``, the in-memory queue).
+Every executor runs one job that reads the whole model, then RSS and PSS
+of each process are reported. Summed PSS is what the deployment really
+uses; summed RSS counts shared pages once per process.
+
+``--model diarization`` loads the real pyannote pipeline (needs torch,
+pyannote.audio and a HuggingFace token). ``--model stand-in`` uses a
+numpy array of ``--stand-in-mb`` MB in its place, so the sharing can be
+measured on hosts without them.
+
+Usage:
+    python scripts/benchmark_worker_memory.py --model stand-in --stand-in-mb 512
+    python scripts/benchmark_worker_memory.py --model diarization --executors 4 --save fork.json
+"""
+
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from apps.api.jobs import Job, JobRunner, MemoryJobStore, load_audio_models
+from apps.api.preload import freeze_heap, memory_report, preload, preload_models
+
+_stand_in = None
+
+
+def load_stand_in() -> None:
+    """Allocate the stand-in weights once per process (inherited by forked children)."""
+    global _stand_in
+    if _stand_in is None:
+        import numpy as np
+        megabytes = int(os.environ["BENCH_STAND_IN_MB"])
+        _stand_in = np.random.default_rng(0).standard_normal(megabytes * 1024 * 1024 // 8)
+
+
+def warm_up_stand_in() -> None:
+    load_stand_in()
+
+
+def read_stand_in(params, progress) -> float:
+    time.sleep(params["hold_seconds"])  # keeps every executor busy, so each one takes a job
+    return float(_stand_in.sum())
+
+
+def read_diarization(params, progress) -> bool:
+    time.sleep(params["hold_seconds"])
+    return load_audio_models()
+
+
+def measure(mode: str, model: str, executors: int, web_workers: int) -> Dict:
+    """Start one deployment shape, run a job per executor and report every process."""
+    if mode == "fork":
+        # What the Gunicorn master does before it forks anything
+        preload()
+        if model == "stand-in":
+            load_stand_in()
+        else:
+            preload_models()
+        freeze_heap()
+
+    workers: List[int] = []
+    for _ in range(web_workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.pause()  # an idle API worker
+            os._exit(0)
+        workers.append(pid)
+
+    job = read_stand_in if model == "stand-in" else read_diarization
+    warm_up = warm_up_stand_in if model == "stand-in" else load_audio_models
+    store = MemoryJobStore(retention_seconds=600)
+    runner = JobRunner(store, num_workers=executors, job_types={"read": job}, warm_up=warm_up,
+                       poll_seconds=0.1, start_method=mode)
+    try:
+        runner.start()
+        jobs = [Job(kind="read", params={"hold_seconds": 1.0}) for _ in range(executors)]
+        for queued in jobs:
+            store.add(queued, capacity=executors)
+        runner.wake()
+        for queued in jobs:
+            while store.get(queued.id).status not in ("succeeded", "failed"):
+                time.sleep(0.1)
+            if store.get(queued.id).status == "failed":
+                raise SystemExit(f"❌ Job failed: {store.get(queued.id).error}")
+
+        rows = [{"role": "master", "pid": os.getpid(), **memory_report()}]
+        rows += [{"role": "web worker", "pid": pid, **memory_report(pid)} for pid in workers]
+        rows += [{"role": "executor", "pid": executor.process.pid, **memory_report(executor.process.pid)}
+                 for executor in runner._executors.values()]
+    finally:
+        runner.shutdown()
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+            os.waitpid(pid, 0)
+
+    executor_rows = [row for row in rows if row["role"] == "executor"]
+    return {
+        "mode": mode,
+        "model": model,
+        "processes": rows,
+        "totals": {
+            "rss_mb": round(sum(row.get("rss_mb", 0) for row in rows), 1),
+            "pss_mb": round(sum(row.get("pss_mb", 0) for row in rows), 1),
+            "executor_rss_mb": round(sum(row.get("rss_mb", 0) for row in executor_rows) / len(executor_rows), 1),
+            "executor_pss_mb": round(sum(row.get("pss_mb", 0) for row in executor_rows) / len(executor_rows), 1),
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("fork", "spawn"), help="Only this executor start method (default: both)")
+    parser.add_argument("--model", choices=("stand-in", "diarization"), default="stand-in")
+    parser.add_argument("--stand-in-mb", type=int, default=512, help="Size of the stand-in weights")
+    parser.add_argument("--executors", type=int, default=2)
+    parser.add_argument("--web-workers", type=int, default=2)
+    parser.add_argument("--save", help="Write the measurements to this JSON file")
+    args = parser.parse_args()
+
+    os.environ["BENCH_STAND_IN_MB"] = str(args.stand_in_mb)
+    results = []
+    for mode in ([args.mode] if args.mode else ["spawn", "fork"]):
+        # Each mode in a fresh child, so the fork run's preloaded model does not leak into the next
+        reader, writer = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(reader)
+            with os.fdopen(writer, "w") as f:
+                json.dump(measure(mode, args.model, args.executors, args.web_workers), f)
+            os._exit(0)
+        os.close(writer)
+        with os.fdopen(reader) as f:
+            output = f.read()
+        os.waitpid(pid, 0)
+        if not output:
+            raise SystemExit(f"❌ The {mode} run failed")
+        results.append(json.loads(output))
+
+    for result in results:
+        print(f"\n🧪 {result['mode']} executors, {result['model']} model")
+        print(f"{'role':>12}{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared':>10}{'private':>10}")
+        for row in result["processes"]:
+            print(f"{row['role']:>12}{row['pid']:>8}{row.get('rss_mb', 0):>10.1f}{row.get('pss_mb', 0):>10.1f}"
+                  f"{row.get('shared_mb', 0):>10.1f}{row.get('private_mb', 0):>10.1f}")
+        totals = result["totals"]
+        print(f"📊 {totals['pss_mb']:.0f} MB summed PSS ({totals['rss_mb']:.0f} MB summed RSS); "
+              f"per executor {totals['executor_rss_mb']:.0f} MB RSS, {totals['executor_pss_mb']:.0f} MB PSS")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Measurements saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
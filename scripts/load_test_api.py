@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Load-test the database-backed API endpoints.
+
+Drives a running API with concurrent clients for a fixed time per endpoint
+and reports requests/sec, latency percentiles and errors. Save one run
+with ``--save`` and pass it to a later run with ``--compare`` to get a
+before/after table, e.g. around a change to the pool settings in
+core/data/db.py:
+
+    DB_POOL_SIZE=5 DB_PREPARE_THRESHOLD=none uvicorn apps.api.main:app --workers 1
+    python scripts/load_test_api.py --save before.json
+
+    DB_POOL_SIZE=20 uvicorn apps.api.main:app --workers 1
+    python scripts/load_test_api.py --compare before.json
+
+No runs have been recorded for the pooled engines in core/data/db.py yet;
+the README says so until there are numbers to report.
+
+Only the standard library is used, so the client does not compete with the
+server for an event loop. Run it from a different machine (or at least
+pinned to other cores) when the numbers matter.
+
+Usage:
+    python scripts/load_test_api.py --url http://localhost:8000 --concurrency 32 --seconds 20
+"""
+
+import json
+import time
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+# (name, method, path, JSON body)
+SCENARIOS = [
+    ("health", "GET", "/health", None),
+    ("list_sessions", "GET", "/sessions?limit=20", None),
+    ("rag_query", "POST", "/rag/query", {"query": "how does the torch timer work in combat", "k": 5}),
+]
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run_scenario(base_url: str, method: str, path: str, body: Optional[dict],
+                 concurrency: int, seconds: float, timeout: float) -> Dict[str, float]:
+    """Hammer one endpoint with ``concurrency`` clients for ``seconds``."""
+    data = json.dumps(body).encode() if body is not None else None
+    headers = {"Content-Type": "application/json"} if data else {}
+    latencies, errors = [], [0]
+    lock = threading.Lock()
+    deadline = time.perf_counter() + seconds
+
+    def client():
+        local, failed = [], 0
+        while time.perf_counter() < deadline:
+            request = urllib.request.Request(base_url + path, data=data, headers=headers, method=method)
+            start = time.perf_counter()
+            try:
+                with urllib.request.urlopen(request, timeout=timeout) as response:
+                    response.read()
+                local.append(time.perf_counter() - start)
+            except (urllib.error.URLError, OSError):
+                failed += 1
+        with lock:
+            latencies.extend(local)
+            errors[0] += failed
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for _ in range(concurrency):
+            executor.submit(client)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": len(latencies),
+        "errors": errors[0],
+        "rps": len(latencies) / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients per scenario")
+    parser.add_argument("--seconds", type=float, default=20.0, help="Duration of each scenario")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout")
+    parser.add_argument("--scenarios", nargs="+", choices=[s[0] for s in SCENARIOS],
+                        help="Subset of scenarios to run (default: all)")
+    parser.add_argument("--save", help="Write the results to this JSON file")
+    parser.add_argument("--compare", help="Results JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    print(f"🚦 {args.url}: {args.concurrency} clients, {args.seconds:.0f}s per scenario")
+    results = {}
+    for name, method, path, body in SCENARIOS:
+        if args.scenarios and name not in args.scenarios:
+            continue
+        # Short warm-up so pool connections and prepared statements exist before measuring
+        run_scenario(args.url, method, path, body, args.concurrency, min(2.0, args.seconds), args.timeout)
+        results[name] = run_scenario(args.url, method, path, body, args.concurrency, args.seconds, args.timeout)
+
+    header = f"{'scenario':<16}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'errors':>8}"
+    if baseline:
+        header += f"{'before':>10}{'change':>9}"
+    print("\n" + header)
+    for name, r in results.items():
+        line = f"{name:<16}{r['rps']:>10.1f}{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['errors']:>8}"
+        before = baseline.get(name)
+        if before:
+            change = (r["rps"] / before["rps"] - 1) * 100 if before["rps"] else 0.0
+            line += f"{before['rps']:>10.1f}{change:>+8.0f}%"
+        print(line)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"url": args.url, "concurrency": args.concurrency, "seconds": args.seconds,
+                       "results": results}, f, indent=2)
+        print(f"\n💾 Results saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
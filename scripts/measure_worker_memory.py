@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Measure the memory of a running API deployment: master, worker and their children (Linux).
+
+Lists the Gunicorn/Uvicorn master and every process under it, with RSS,
+PSS, shared and private MB. Shared pages are counted in full in every
+process's RSS, so summed RSS overstates what preloading costs; summed PSS
+is what the deployment really uses.
+
+Compare the two server modes once the worker is warm (``/ready`` returns
+200) and after a few requests:
+
+    API_PRELOAD=0 gunicorn -c apps/api/gunicorn_conf.py apps.api.main:app
+    python scripts/measure_worker_memory.py --save no_preload.json
+
+    gunicorn -c apps/api/gunicorn_conf.py apps.api.main:app
+    python scripts/measure_worker_memory.py --compare no_preload.json
+
+Usage:
+    python scripts/measure_worker_memory.py [--pid MASTER_PID]
+"""
+
+import os
+import sys
+import json
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from apps.api.preload import memory_report
+
+
+def _cmdline(pid: int) -> str:
+    try:
+        return Path(f"/proc/{pid}/cmdline").read_bytes().replace(b"\0", b" ").decode(errors="replace").strip()
+    except OSError:
+        return ""
+
+
+def _parent(pid: int) -> Optional[int]:
+    try:
+        stat = Path(f"/proc/{pid}/stat").read_text()
+    except OSError:
+        return None
+    # The command name can contain spaces; the fields after its ")" are fixed
+    return int(stat.rsplit(")", 1)[1].split()[1])
+
+
+def find_master() -> Optional[int]:
+    """The oldest gunicorn/uvicorn process serving apps.api.main whose parent is not one too."""
+    candidates = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            command = _cmdline(int(entry))
+            if "apps.api.main" in command and ("gunicorn" in command or "uvicorn" in command):
+                candidates.append(int(entry))
+    masters = [pid for pid in candidates if _parent(pid) not in candidates]
+    return min(masters) if masters else None
+
+
+def process_tree(root: int) -> List[int]:
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            parent = _parent(int(entry))
+            if parent is not None:
+                children.setdefault(parent, []).append(int(entry))
+    tree, pending = [], [root]
+    while pending:
+        pid = pending.pop(0)
+        tree.append(pid)
+        pending.extend(sorted(children.get(pid, [])))
+    return tree
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pid", type=int, help="Master process id (default: found from the command line)")
+    parser.add_argument("--save", help="Write the measurements to this JSON file")
+    parser.add_argument("--compare", help="Measurements JSON from an earlier run to compare against")
+    args = parser.parse_args()
+
+    master = args.pid or find_master()
+    if master is None:
+        raise SystemExit("❌ No API master process found; pass --pid")
+
+    rows = []
+    for pid in process_tree(master):
+        report = memory_report(pid)
+        if report:
+            rows.append({"pid": pid, "command": _cmdline(pid)[:60], **report})
+
+    print(f"{'pid':>8}{'RSS MB':>10}{'PSS MB':>10}{'shared':>10}{'private':>10}  command")
+    for row in rows:
+        print(f"{row['pid']:>8}{row.get('rss_mb', 0):>10.1f}{row.get('pss_mb', 0):>10.1f}"
+              f"{row.get('shared_mb', 0):>10.1f}{row.get('private_mb', 0):>10.1f}  {row['command']}")
+
+    totals = {
+        "processes": len(rows),
+        "rss_mb": round(sum(row.get("rss_mb", 0) for row in rows), 1),
+        "pss_mb": round(sum(row.get("pss_mb", 0) for row in rows), 1),
+    }
+    workers = rows[1:]
+    if workers:
+        totals["pss_mb_per_worker"] = round(sum(row.get("pss_mb", 0) for row in workers) / len(workers), 1)
+    print(f"\n📊 {totals['processes']} processes: {totals['rss_mb']:.0f} MB summed RSS, "
+          f"{totals['pss_mb']:.0f} MB summed PSS"
+          + (f", {totals['pss_mb_per_worker']:.0f} MB PSS per child" if workers else ""))
+
+    if args.compare:
+        with open(args.compare) as f:
+            before = json.load(f)["totals"]
+        change = (totals["pss_mb"] / before["pss_mb"] - 1) * 100 if before.get("pss_mb") else 0.0
+        print(f"   before: {before['pss_mb']:.0f} MB summed PSS ({change:+.0f}%)")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"master": master, "processes": rows, "totals": totals}, f, indent=2)
+        print(f"💾 Measurements saved to {args.save}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Move raw transcripts out of the session table into the blob store.
+
+Sessions saved before the blob store existed keep the whole transcript in
+``session.gm_notes_md``. This copies each one into the blob store
+(core/data/blob_store.py), sets ``transcript_uri`` and clears the column,
+in batches of ``--batch-size`` rows committed one at a time, so it can be
+stopped and rerun. Postgres only returns the space to the OS after
+``VACUUM FULL session`` (which locks the table); a plain VACUUM makes it
+reusable for new rows.
+
+Usage:
+    python scripts/migrate_transcripts_to_blobs.py --dry-run
+    python scripts/migrate_transcripts_to_blobs.py --batch-size 100
+"""
+
+import argparse
+
+from sqlmodel import select
+
+from core.data.blob_store import get_blob_store
+from core.data.db import session_scope
+from core.data.models import Session as SessionModel
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=50, help="Sessions per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="Only count the sessions and bytes to move")
+    args = parser.parse_args()
+
+    store = get_blob_store()
+    moved, moved_bytes, last_id = 0, 0, 0
+    while True:
+        with session_scope() as sess:
+            rows = sess.exec(
+                select(SessionModel)
+                .where(SessionModel.id > last_id, SessionModel.gm_notes_md.is_not(None),
+                       SessionModel.transcript_uri.is_(None))
+                .order_by(SessionModel.id)
+                .limit(args.batch_size)
+            ).all()
+            if not rows:
+                break
+            for row in rows:
+                moved_bytes += len(row.gm_notes_md.encode("utf-8"))
+                if not args.dry_run:
+                    row.transcript_uri = store.put_text(row.gm_notes_md)
+                    row.gm_notes_md = None
+                    sess.add(row)
+            if not args.dry_run:
+                sess.commit()
+            moved += len(rows)
+            last_id = rows[-1].id
+        print(f"📦 {moved} sessions ({moved_bytes / 1e6:.1f} MB of transcript text)")
+
+    verb = "Would move" if args.dry_run else "Moved"
+    print(f"✅ {verb} {moved} transcripts ({moved_bytes / 1e6:.1f} MB) to the blob store")
+
+
+if __name__ == "__main__":
+    main()
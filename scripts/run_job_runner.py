@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Run the background job executors for a shared (Redis) job queue.
+
+With ``JOB_BACKEND=redis`` the API workers only queue and read jobs; this
+process claims them and runs them on long-lived executor processes that
+keep the diarization model loaded between jobs. Run one per host, next to
+the API (uploads are handed over through ``JOB_DIR``). Under Gunicorn the
+master forks one already (set API_JOB_RUNNER=0 to use this instead).
+
+Usage:
+    JOB_BACKEND=redis python scripts/run_job_runner.py [--workers N]
+"""
+
+import sys
+import argparse
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent
+sys.path.insert(0, str(project_root))
+
+from apps.api.jobs import run_job_runner
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=None,
+                        help="Executor processes, i.e. jobs at once (default: JOB_MAX_CONCURRENCY, then 2)")
+    args = parser.parse_args()
+    run_job_runner(num_workers=args.workers)
+
+
+if __name__ == "__main__":
+    main()
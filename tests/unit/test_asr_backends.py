@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for ASR backend chunk packing
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.asr_backends import LocalWhisperBackend, WHISPER_SAMPLE_RATE
+
+SR = WHISPER_SAMPLE_RATE
+
+
+def _seconds(chunks):
+    return [(start / SR, end / SR) for start, end in chunks]
+
+
+def test_nearby_regions_are_packed_together():
+    backend = LocalWhisperBackend(num_workers=1, max_chunk_seconds=30)
+    chunks = backend._pack_chunks([(0, 5 * SR), (6 * SR, 10 * SR), (11 * SR, 20 * SR)])
+    assert _seconds(chunks) == [(0, 20)]
+
+
+def test_long_silence_starts_new_chunk():
+    backend = LocalWhisperBackend(num_workers=1, max_chunk_seconds=30)
+    chunks = backend._pack_chunks([(0, 5 * SR), (60 * SR, 65 * SR)])
+    assert _seconds(chunks) == [(0, 5), (60, 65)]
+
+
+def test_chunks_never_exceed_maximum_length():
+    backend = LocalWhisperBackend(num_workers=1, max_chunk_seconds=30)
+    chunks = backend._pack_chunks([(0, 20 * SR), (21 * SR, 45 * SR), (46 * SR, 120 * SR)])
+    assert all(end - start <= 30 * SR for start, end in chunks)
+    assert _seconds(chunks) == [(0, 20), (21, 45), (46, 76), (76, 106), (106, 120)]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
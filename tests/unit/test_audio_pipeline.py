@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the pipeline DAG executor and job manifest
+"""
+
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.audio_pipeline import JobManifest, PipelineError, PipelineExecutor, PipelineStage
+
+
+def _diamond(calls, fail=None):
+    """a -> (b || c) -> d, each writing a file artifact."""
+    lock = threading.Lock()
+
+    def make(name):
+        def run(ctx):
+            with lock:
+                calls.append(name)
+            if name == fail:
+                raise RuntimeError("boom")
+            path = ctx.stage_dir / f"{name}.txt"
+            inputs = "".join(Path(out["file"]).read_text() for out in ctx.inputs.values())
+            path.write_text(inputs + name)
+            return {"file": str(path), "artifacts": {"file": path}}
+        return run
+
+    return [
+        PipelineStage("a", make("a"), params={"source": "hash-1"}),
+        PipelineStage("b", make("b"), deps=["a"]),
+        PipelineStage("c", make("c"), deps=["a"]),
+        PipelineStage("d", make("d"), deps=["b", "c"]),
+    ]
+
+
+def _executor(work_dir):
+    return PipelineExecutor(JobManifest(Path(work_dir) / "job.json"), work_dir, max_workers=2)
+
+
+def test_runs_in_dependency_order():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        outputs = _executor(tmp).run(_diamond(calls))
+        assert calls[0] == "a" and calls[-1] == "d"
+        assert Path(outputs["d"]["file"]).read_text() in ("abacd", "acabd")
+
+
+def test_resume_skips_completed_stages():
+    with tempfile.TemporaryDirectory() as tmp:
+        _executor(tmp).run(_diamond([]))
+
+        calls = []
+        executor = _executor(tmp)
+        executor.run(_diamond(calls))
+        assert calls == []
+        assert sorted(executor.skipped) == ["a", "b", "c", "d"]
+
+
+def test_missing_artifact_reruns_only_that_stage():
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = _executor(tmp).run(_diamond([]))
+        Path(outputs["b"]["file"]).unlink()
+
+        # d is keyed by b's inputs, not b's file, so its output is still valid
+        calls = []
+        _executor(tmp).run(_diamond(calls))
+        assert calls == ["b"]
+
+
+def test_artifact_rewritten_with_same_size_reruns_stage():
+    with tempfile.TemporaryDirectory() as tmp:
+        outputs = _executor(tmp).run(_diamond([]))
+        path = Path(outputs["a"]["file"])
+        path.write_text("z")
+
+        calls = []
+        _executor(tmp).run(_diamond(calls))
+        assert calls == ["a"]
+
+        # Touching a file without changing it keeps the stage done
+        path.write_text("a")
+        calls = []
+        _executor(tmp).run(_diamond(calls))
+        assert calls == []
+
+
+def test_failure_blocks_dependents_and_resume_finishes():
+    with tempfile.TemporaryDirectory() as tmp:
+        calls = []
+        try:
+            _executor(tmp).run(_diamond(calls, fail="b"))
+            assert False, "expected PipelineError"
+        except PipelineError as e:
+            assert set(e.failed) == {"b", "d"}
+        assert "d" not in calls
+
+        calls = []
+        _executor(tmp).run(_diamond(calls))
+        assert calls == ["b", "d"]
+
+
+def test_changed_params_invalidate_downstream_keys():
+    with tempfile.TemporaryDirectory() as tmp:
+        _executor(tmp).run(_diamond([]))
+
+        stages = _diamond(calls := [])
+        stages[0].params = {"source": "hash-2"}
+        _executor(tmp).run(stages)
+        assert sorted(calls) == ["a", "b", "c", "d"]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for audio splitter planning and the segment manifest
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.audio_splitter import AudioSplitter, SegmentInfo, SegmentManifest, plan_segments
+
+
+def test_plan_without_overlap_is_contiguous():
+    assert plan_segments(25.0, 10.0) == [(0.0, 10.0), (10.0, 20.0), (20.0, 25.0)]
+
+
+def test_plan_with_overlap_steps_back():
+    assert plan_segments(25.0, 10.0, overlap=2.0) == [(0.0, 10.0), (8.0, 18.0), (16.0, 25.0)]
+
+
+def test_plan_rejects_overlap_longer_than_segment():
+    try:
+        plan_segments(100.0, 10.0, overlap=10.0)
+    except ValueError:
+        return
+    assert False, "expected ValueError"
+
+
+def test_manifest_round_trip():
+    manifest = SegmentManifest(
+        source="session.m4a",
+        source_sha256="abc",
+        source_duration=20.0,
+        engine="parallel",
+        overlap_seconds=2.0,
+        segments=[SegmentInfo(1, "s1.m4a", 0.0, 10.0, 10.0, 0.0, 100, "h1"),
+                  SegmentInfo(2, "s2.m4a", 8.0, 20.0, 12.0, 2.0, 120, "h2")],
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "manifest.json"
+        manifest.save(path)
+        assert SegmentManifest.load(path) == manifest
+
+
+def test_unsplit_file_clears_the_previous_manifest():
+    with tempfile.TemporaryDirectory() as tmp:
+        audio = Path(tmp) / "short.wav"
+        audio.write_bytes(b"RIFF" + b"\0" * 1024)
+        splitter = AudioSplitter()
+        splitter.last_manifest = SegmentManifest(
+            source="earlier.m4a", source_sha256="abc", source_duration=3600.0,
+            engine="parallel", overlap_seconds=30.0
+        )
+        assert splitter.split_audio(str(audio)) == [audio]
+        assert splitter.last_manifest is None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
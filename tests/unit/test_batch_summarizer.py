@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for concurrent batch summarization
+"""
+
+import sys
+import time
+import threading
+from pathlib import Path
+from contextlib import contextmanager
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.batch_summarizer import BatchItem, BatchSummarizer
+
+
+@contextmanager
+def fake_session():
+    yield object()
+
+
+def test_runs_concurrently_and_keeps_input_order():
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def summarize(transcript, **kwargs):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return f"notes for {transcript}"
+
+    summarizer = BatchSummarizer(max_workers=3, summarize=summarize, persist=lambda *args: None)
+    report = summarizer.run([BatchItem(name=f"s{i}", transcript=f"t{i}") for i in range(6)])
+
+    assert [item.name for item in report.items] == [f"s{i}" for i in range(6)]
+    assert report.items[4].notes == "notes for t4"
+    assert report.succeeded == 6 and report.max_workers == 3
+    assert peak[0] == 3
+
+
+def test_failures_are_reported_per_item():
+    def summarize(transcript, **kwargs):
+        if transcript == "bad":
+            raise RuntimeError("model unavailable")
+        return "notes"
+
+    saved = []
+
+    def persist(sess, campaign_id, transcript, notes):
+        saved.append((campaign_id, transcript))
+        return len(saved)
+
+    summarizer = BatchSummarizer(max_workers=2, summarize=summarize, persist=persist)
+    report = summarizer.run(
+        [BatchItem("a", "good"), BatchItem("b", "bad")],
+        campaign_id=7,
+        session_factory=fake_session
+    )
+
+    assert saved == [(7, "good")]
+    assert report.items[0].session_id == 1
+    assert report.items[1].status == "failed"
+    assert "model unavailable" in report.items[1].error
+    assert "notes" not in report.to_dict(include_notes=False)["items"][0]
+
+
+def test_unsaved_notes_mark_item_failed():
+    summarizer = BatchSummarizer(summarize=lambda transcript, **kwargs: "notes", persist=lambda *args: None)
+    report = summarizer.run([BatchItem("a", "good")], campaign_id=1, session_factory=fake_session)
+
+    assert report.failed == 1
+    assert report.items[0].notes == "notes"
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the content-addressed blob store
+"""
+
+import sys
+import hashlib
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.data.blob_store import BlobStore, LocalBlobStore, blob_uri, parse_blob_uri, parse_range_header
+
+
+def test_text_round_trip_and_deduplication():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalBlobStore(tmp)
+        text = "### 01:05 - 01:09\n**GM:** You see a door. 🚪\n" * 2000
+        uri = store.put_text(text)
+
+        assert uri == blob_uri(hashlib.sha256(text.encode("utf-8")).hexdigest())
+        assert store.put_text(text) == uri
+        assert len([p for p in Path(tmp).rglob("*") if p.is_file()]) == 1
+        assert store.read_text(uri) == text
+        assert store.size(uri) == len(text.encode("utf-8"))
+
+
+def test_ranges_refer_to_uncompressed_bytes():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalBlobStore(tmp)
+        data = bytes(range(256)) * 4096
+        uri = store.put_bytes(data)
+
+        assert store.read(uri, 1000, 1010) == data[1000:1010]
+        assert b"".join(store.iter_range(uri, 5, None, chunk_bytes=7)) == data[5:]
+
+        source = Path(tmp) / "audio.m4a"
+        source.write_bytes(data[:5000])
+        file_uri = store.put_file(source, compress=False)
+        assert store.read(file_uri, 4990) == data[4990:5000]
+        assert store.delete(file_uri) and not store.exists(file_uri)
+
+
+def test_range_header_parsing():
+    assert parse_range_header(None, 100) is None
+    assert parse_range_header("bytes=0-9", 100) == (0, 10)
+    assert parse_range_header("bytes=90-", 100) == (90, 100)
+    assert parse_range_header("bytes=-30", 100) == (70, 100)
+    assert parse_range_header("bytes=50-500", 100) == (50, 100)
+    assert parse_range_header("bytes=0-1,5-9", 100) is None
+    for unsatisfiable in ("bytes=100-", "bytes=9-2", "bytes=-0", "bytes=a-b"):
+        try:
+            parse_range_header(unsatisfiable, 100)
+            assert False, unsatisfiable
+        except ValueError:
+            pass
+    assert parse_blob_uri("sha256:abc") is None
+    assert parse_blob_uri(blob_uri("a" * 64)) == "a" * 64
+
+
+def test_backends_must_implement_every_primitive():
+    class NoRemove(BlobStore):
+        def _exists(self, key):
+            return False
+
+        def _open(self, key):
+            raise FileNotFoundError(key)
+
+        def _store(self, key, source):
+            pass
+
+    for cls in (BlobStore, NoRemove):
+        try:
+            cls()
+            raise AssertionError(f"expected TypeError for {cls.__name__}")
+        except TypeError as e:
+            assert "abstract" in str(e)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
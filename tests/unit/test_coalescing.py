@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for single-flight request coalescing
+"""
+
+import sys
+import time
+import asyncio
+import threading
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from apps.api.coalescing import IdempotencyConflictError, SingleFlight, request_key
+
+
+def test_concurrent_identical_requests_share_one_run():
+    flights = SingleFlight(ttl_seconds=0)
+    key, fingerprint = request_key("summarize", "abc", {"campaign_id": 1})
+    calls, results = [], []
+
+    def summarize():
+        calls.append(1)
+        time.sleep(0.1)
+        return {"notes": "shared"}
+
+    threads = [threading.Thread(target=lambda: results.append(flights.run(key, fingerprint, summarize)))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert sorted(shared for _, shared in results) == [False, True, True, True]
+    assert all(result == {"notes": "shared"} for result, _ in results)
+    # ttl 0: nothing is replayed once the run is over
+    assert flights.run(key, fingerprint, summarize)[1] is False
+
+
+def test_async_joiners_survive_leader_cancellation():
+    flights = SingleFlight(ttl_seconds=60)
+    key, fingerprint = request_key("diarize", "abc", {"max_speakers": 4})
+    calls, joined = [], []
+
+    async def diarize():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "timeline"
+
+    async def run():
+        leader = asyncio.ensure_future(flights.arun(key, fingerprint, diarize))
+        await asyncio.sleep(0)
+        follower = asyncio.ensure_future(flights.arun(key, fingerprint, diarize, on_join=lambda: joined.append(1)))
+        await asyncio.sleep(0.01)
+        leader.cancel()                      # e.g. the first client disconnected
+        shared_result = await follower
+        replayed = await flights.arun(key, fingerprint, diarize)
+        return shared_result, replayed
+
+    shared_result, replayed = asyncio.run(run())
+    assert shared_result == ("timeline", True)
+    assert replayed == ("timeline", True)
+    assert len(calls) == 1 and joined == [1]
+    assert flights.stats == {"started": 1, "joined": 1, "replayed": 1}
+
+
+def test_failures_are_not_replayed_and_keys_are_checked():
+    flights = SingleFlight(ttl_seconds=60)
+    key, fingerprint = request_key("summarize", "abc", {}, idempotency_key="retry-1")
+
+    def fail():
+        raise RuntimeError("model unavailable")
+
+    try:
+        flights.run(key, fingerprint, fail)
+        assert False
+    except RuntimeError:
+        pass
+    assert flights.run(key, fingerprint, lambda: "notes") == ("notes", False)
+
+    other_key, other_fingerprint = request_key("summarize", "def", {}, idempotency_key="retry-1")
+    assert other_key == key and other_fingerprint != fingerprint
+    try:
+        flights.run(other_key, other_fingerprint, lambda: "other notes")
+        assert False
+    except IdempotencyConflictError as e:
+        assert e.key == "retry-1"
+
+
+def test_retry_after_failure_or_partial_result_recomputes():
+    flights = SingleFlight(ttl_seconds=60)
+    key, fingerprint = request_key("summarize", "abc", {"sync_to_notion": True})
+    attempts = []
+
+    def summarize():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise RuntimeError("LLM timed out")
+        if len(attempts) == 2:
+            return {"notes": "notes", "notion_error": "Notion unavailable"}
+        return {"notes": "notes", "notion_page_url": "https://notion.so/page"}
+
+    def complete(result):
+        return not result.get("notion_error")
+
+    try:
+        flights.run(key, fingerprint, summarize, replay_if=complete)
+        assert False
+    except RuntimeError:
+        pass
+    partial, shared = flights.run(key, fingerprint, summarize, replay_if=complete)
+    assert partial["notion_error"] and not shared
+    full, shared = flights.run(key, fingerprint, summarize, replay_if=complete)
+    assert full["notion_page_url"] and not shared
+    # Only the complete result is replayed
+    assert flights.run(key, fingerprint, summarize, replay_if=complete) == (full, True)
+    assert len(attempts) == 3
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for CPU inference modes (torch, pyannote and onnxruntime are mocked)
+"""
+
+import sys
+import importlib
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+HEAVY_MODULES = ("torch", "librosa", "soundfile", "pyannote", "pyannote.audio", "pyannote.core")
+
+
+def import_with_stubs(module_name: str):
+    """
+    Import ``module_name`` against mocked heavy dependencies.
+
+    Returns the module and the fake torch; call inside ``mock.patch.dict(sys.modules)``
+    so the stubs and the stubbed import are dropped afterwards.
+    """
+    stubs = {name: mock.MagicMock(name=name) for name in HEAVY_MODULES}
+    sys.modules.update(stubs)
+    for name in ("core.agents.cpu_inference", module_name):
+        sys.modules.pop(name, None)
+    return importlib.import_module(module_name), stubs["torch"]
+
+
+def fake_pipeline():
+    segmentation_model = mock.MagicMock(name="segmentation")
+    segmentation_model.hparams = {"sample_rate": 16000}
+    return SimpleNamespace(
+        _segmentation=SimpleNamespace(model=segmentation_model, duration=5.0),
+        _embedding=SimpleNamespace(model_=mock.MagicMock(name="embedding"))
+    )
+
+
+def test_modes_are_validated_and_tag_the_cache_key():
+    with mock.patch.dict(sys.modules):
+        diarizer, _ = import_with_stubs("core.agents.diarizer")
+        assert diarizer.SpeakerDiarizer(use_cache=False).cache_model_id == diarizer.DIARIZATION_MODEL_ID
+        quantized = diarizer.SpeakerDiarizer(use_cache=False, cpu_mode="onnx-int8")
+        assert quantized.cache_model_id == f"{diarizer.DIARIZATION_MODEL_ID}@onnx-int8"
+        try:
+            diarizer.SpeakerDiarizer(use_cache=False, cpu_mode="fp16")
+            raise AssertionError("expected ValueError")
+        except ValueError as e:
+            assert "fp16" in str(e)
+
+        cpu_inference = sys.modules["core.agents.cpu_inference"]
+        try:
+            cpu_inference.optimize_pipeline_for_cpu(fake_pipeline(), mode="fp16")
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+
+
+def test_default_mode_leaves_models_alone():
+    with mock.patch.dict(sys.modules):
+        cpu_inference, torch = import_with_stubs("core.agents.cpu_inference")
+        pipeline = fake_pipeline()
+        segmentation = pipeline._segmentation.model
+        assert cpu_inference.optimize_pipeline_for_cpu(pipeline, mode="default", intra_op_threads=4) is pipeline
+        assert pipeline._segmentation.model is segmentation
+        torch.ao.quantization.quantize_dynamic.assert_not_called()
+        torch.set_num_threads.assert_called_once_with(4)
+
+
+def test_int8_quantizes_both_models():
+    with mock.patch.dict(sys.modules):
+        cpu_inference, torch = import_with_stubs("core.agents.cpu_inference")
+        torch.ao.quantization.quantize_dynamic.side_effect = lambda model, layers, dtype: ("int8", model)
+        pipeline = fake_pipeline()
+        segmentation, embedding = pipeline._segmentation.model, pipeline._embedding.model_
+
+        cpu_inference.optimize_pipeline_for_cpu(pipeline, mode="int8")
+        assert pipeline._segmentation.model == ("int8", segmentation)
+        assert pipeline._embedding.model_ == ("int8", embedding)
+        torch.onnx.export.assert_not_called()
+
+
+def test_onnx_runs_segmentation_and_falls_back_to_int8():
+    with mock.patch.dict(sys.modules), tempfile.TemporaryDirectory() as tmp:
+        cpu_inference, torch = import_with_stubs("core.agents.cpu_inference")
+        torch.ao.quantization.quantize_dynamic.side_effect = lambda model, layers, dtype: ("int8", model)
+        torch.onnx.export.side_effect = lambda model, dummy, path, **kwargs: Path(path).write_bytes(b"onnx")
+        runners = []
+
+        def fake_runner(path, intra, inter):
+            runners.append(path)
+            return lambda *args, **kwargs: "onnx output"
+
+        with mock.patch.object(cpu_inference, "DEFAULT_ONNX_DIR", Path(tmp)), \
+                mock.patch.object(cpu_inference, "OnnxRunner", side_effect=fake_runner):
+            pipeline = fake_pipeline()
+            segmentation, embedding = pipeline._segmentation.model, pipeline._embedding.model_
+            cpu_inference.optimize_pipeline_for_cpu(pipeline, mode="onnx", model_tag="test")
+
+            # Segmentation runs under onnxruntime; the embedding model is never exported
+            assert pipeline._segmentation.model is segmentation
+            assert segmentation.forward() == "onnx output"
+            assert runners == [Path(tmp) / "test-segmentation.onnx"]
+            assert torch.onnx.export.call_count == 1
+            assert pipeline._embedding.model_ == ("int8", embedding)
+
+            # A failed export falls back to int8 quantization
+            (Path(tmp) / "test-segmentation.onnx").unlink()
+            torch.onnx.export.side_effect = RuntimeError("unsupported operator")
+            pipeline = fake_pipeline()
+            segmentation = pipeline._segmentation.model
+            cpu_inference.optimize_pipeline_for_cpu(pipeline, mode="onnx", model_tag="test")
+            assert pipeline._segmentation.model == ("int8", segmentation)
+            assert len(runners) == 1
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
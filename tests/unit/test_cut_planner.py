@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the silence-aware cut planner
+"""
+
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.cut_planner import SilenceCutPlanner
+
+
+class ArrayPlanner(SilenceCutPlanner):
+    """Planner fed from an in-memory signal instead of a file."""
+
+    def __init__(self, signal, sample_rate, **kwargs):
+        super().__init__(**kwargs)
+        self.signal = signal
+        self.sample_rate = sample_rate
+
+    def _iter_blocks(self, audio_path):
+        block = int(self.block_seconds * self.sample_rate)
+        for start in range(0, len(self.signal), block):
+            yield self.signal[start:start + block], self.sample_rate
+
+
+def _speech_with_pauses(duration, pauses, sample_rate=1000):
+    """Loud noise with silent (start, end) pauses."""
+    rng = np.random.default_rng(0)
+    signal = rng.uniform(-1, 1, int(duration * sample_rate)).astype(np.float32)
+    for start, end in pauses:
+        signal[int(start * sample_rate):int(end * sample_rate)] = 0.0
+    return signal
+
+
+def test_energy_profile_streams_across_blocks():
+    signal = _speech_with_pauses(10.0, [(4.0, 5.0)])
+    planner = ArrayPlanner(signal, 1000, frame_seconds=0.1, block_seconds=0.25)
+    energy = planner.energy_profile(Path("unused"))
+    assert len(energy) == 100
+    assert energy[45] == 0.0
+    assert energy[20] > 0.5
+
+
+def test_cuts_land_in_pauses_before_target():
+    signal = _speech_with_pauses(100.0, [(22.0, 23.0), (51.0, 52.0)])
+    planner = ArrayPlanner(signal, 1000, tolerance_seconds=10.0, frame_seconds=0.1, min_pause_seconds=0.3)
+    plan = planner.plan(Path("unused"), total_duration=100.0, segment_duration=30.0)
+
+    assert 22.0 <= plan[0][1] <= 23.0
+    assert 51.0 <= plan[1][1] <= 52.0
+    assert plan[-1][1] == 100.0
+    # contiguous, no overlap, never longer than requested
+    assert all(a[1] == b[0] for a, b in zip(plan, plan[1:]))
+    assert all(end - start <= 30.0 for start, end in plan)
+
+
+def test_choose_cut_prefers_frame_nearest_target_on_ties():
+    planner = SilenceCutPlanner(frame_seconds=1.0, min_pause_seconds=1.0)
+    energy = np.ones(20)
+    assert planner.choose_cut(energy, target_frame=15, window_frames=5) == 15
+
+
+def _fake_soundfile(blocks):
+    def iter_blocks(path, **kwargs):
+        for block in blocks:
+            if isinstance(block, Exception):
+                raise block
+            yield block
+    return SimpleNamespace(info=lambda path: SimpleNamespace(samplerate=1000), blocks=iter_blocks)
+
+
+def test_ffmpeg_fallback_only_when_soundfile_cannot_open():
+    planner = SilenceCutPlanner(block_seconds=0.25)
+    ffmpeg_blocks = [(np.zeros(250, dtype=np.float32), 16000)]
+
+    # Unsupported container: the first read fails, ffmpeg takes over
+    with mock.patch.dict(sys.modules, {"soundfile": _fake_soundfile([RuntimeError("Format not recognised")])}), \
+            mock.patch.object(planner, "_iter_ffmpeg_blocks", return_value=iter(ffmpeg_blocks)) as ffmpeg:
+        assert list(planner._iter_blocks(Path("session.m4a"))) == ffmpeg_blocks
+        ffmpeg.assert_called_once()
+
+    # A read error after the first block is raised, not retried from the start
+    good = np.ones((250, 2), dtype=np.float32)
+    with mock.patch.dict(sys.modules, {"soundfile": _fake_soundfile([good, OSError("truncated file")])}), \
+            mock.patch.object(planner, "_iter_ffmpeg_blocks") as ffmpeg:
+        blocks = planner._iter_blocks(Path("session.wav"))
+        block, rate = next(blocks)
+        assert rate == 1000 and block.shape == (250,)
+        try:
+            next(blocks)
+            raise AssertionError("expected OSError")
+        except OSError:
+            pass
+        ffmpeg.assert_not_called()
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the shared database engine settings (no database needed)
+"""
+
+import os
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.data import db
+
+
+def test_prepare_threshold_parsing():
+    for value, expected in (("1", 1), ("5", 5), (" 0 ", 0), ("none", None), ("OFF", None), ("", None)):
+        with mock.patch.dict(os.environ, {"DB_PREPARE_THRESHOLD": value}):
+            assert db._prepare_threshold() == expected, value
+    with mock.patch.dict(os.environ):
+        os.environ.pop("DB_PREPARE_THRESHOLD", None)
+        assert db._prepare_threshold() == 1
+    with mock.patch.dict(os.environ, {"DB_PREPARE_THRESHOLD": "sometimes"}):
+        try:
+            db._prepare_threshold()
+            raise AssertionError("expected ValueError")
+        except ValueError:
+            pass
+
+
+def test_engine_options_read_the_environment():
+    env = {"DB_POOL_SIZE": "4", "DB_MAX_OVERFLOW": "2", "DB_POOL_TIMEOUT": "7.5",
+           "DB_POOL_RECYCLE": "60", "DB_PREPARE_THRESHOLD": "none", "DB_CONNECT_TIMEOUT": "3"}
+    with mock.patch.dict(os.environ, env):
+        options = db.engine_options()
+    assert options == {
+        "pool_pre_ping": True,
+        "pool_size": 4,
+        "max_overflow": 2,
+        "pool_timeout": 7.5,
+        "pool_recycle": 60,
+        "connect_args": {"prepare_threshold": None, "connect_timeout": 3},
+    }
+
+
+def test_overrides_win_and_connect_args_are_merged():
+    with mock.patch.dict(os.environ, {"DB_PREPARE_THRESHOLD": "1", "DB_CONNECT_TIMEOUT": "10"}):
+        options = db.engine_options(pool_size=2, echo=True, connect_args={"connect_timeout": 1, "application_name": "gm"})
+    assert options["pool_size"] == 2 and options["echo"] is True
+    # Overridden keys replace the defaults; the rest of connect_args is kept
+    assert options["connect_args"] == {"prepare_threshold": 1, "connect_timeout": 1, "application_name": "gm"}
+
+    # Without connect_args in the overrides the defaults stay as they are
+    assert db.engine_options(max_overflow=0)["connect_args"]["prepare_threshold"] == 1
+
+
+def test_sync_engine_is_built_once_with_the_options():
+    with mock.patch.object(db, "_engine", None), mock.patch.object(db, "create_engine") as create_engine:
+        first = db.get_engine(pool_size=3)
+        second = db.get_engine(pool_size=50)
+        assert first is second
+        create_engine.assert_called_once()
+        url, kwargs = create_engine.call_args[0][0], create_engine.call_args[1]
+        assert url == db.database_url()
+        assert kwargs["pool_size"] == 3 and kwargs["pool_pre_ping"] is True
+
+        db.dispose_engine()
+        first.dispose.assert_called_once_with()
+        assert db._engine is None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
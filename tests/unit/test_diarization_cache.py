@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the on-disk diarization cache
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.diarization_cache import DiarizationCache, compute_audio_hash
+
+RAW_SEGMENTS = [
+    {"start_time": 0.0, "end_time": 4.2, "speaker_id": "SPEAKER_00", "duration": 4.2},
+    {"start_time": 4.5, "end_time": 4.9, "speaker_id": "SPEAKER_01", "duration": 0.4},
+    {"start_time": 5.0, "end_time": 9.0, "speaker_id": "SPEAKER_00", "duration": 4.0},
+]
+SEGMENTS = [
+    {"start_time": 0.0, "end_time": 9.0, "speaker_id": "SPEAKER_00", "duration": 9.0},
+]
+
+
+def _put(cache: DiarizationCache, key: str, audio_name: str = "session.wav"):
+    return cache.put(
+        key,
+        audio_hash="abc",
+        audio_name=audio_name,
+        model_id="pyannote/test",
+        quality="balanced",
+        min_speakers=2,
+        max_speakers=6,
+        raw_segments=RAW_SEGMENTS,
+        segments=SEGMENTS,
+        total_duration=9.0,
+    )
+
+
+def test_key_depends_on_every_component():
+    base = DiarizationCache.make_key("abc", "model", "balanced", 2, 6)
+    assert base == DiarizationCache.make_key("abc", "model", "balanced", 2, 6)
+    assert base != DiarizationCache.make_key("abd", "model", "balanced", 2, 6)
+    assert base != DiarizationCache.make_key("abc", "other", "balanced", 2, 6)
+    assert base != DiarizationCache.make_key("abc", "model", "precise", 2, 6)
+    assert base != DiarizationCache.make_key("abc", "model", "balanced", None, 6)
+    assert base != DiarizationCache.make_key("abc", "model", "balanced", 2, None)
+
+
+def test_round_trip_with_rttm():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiarizationCache(tmp)
+        key = cache.make_key("abc", "pyannote/test", "balanced", 2, 6)
+        assert cache.get(key) is None
+
+        _put(cache, key, "my session.wav")
+        payload = cache.get(key)
+        assert payload["segments"] == SEGMENTS
+        assert payload["total_duration"] == 9.0
+
+        rttm = cache.read_rttm(key).splitlines()
+        assert len(rttm) == len(RAW_SEGMENTS)
+        assert rttm[0] == "SPEAKER my_session 1 0.000 4.200 <NA> <NA> SPEAKER_00 <NA> <NA>"
+
+
+def test_prune_by_size_evicts_least_recently_used():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiarizationCache(tmp)
+        _put(cache, "old")
+        time.sleep(0.01)
+        _put(cache, "new")
+
+        entry_size = cache.list_entries()[0].size_bytes
+        removed = cache.prune(max_size_mb=(entry_size * 1.5) / (1024 * 1024))
+
+        assert [entry.key for entry in removed] == ["old"]
+        assert [entry.key for entry in cache.list_entries()] == ["new"]
+
+
+def test_prune_by_age_and_clear():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = DiarizationCache(tmp)
+        _put(cache, "a")
+        _put(cache, "b")
+
+        assert cache.prune(max_age_days=1) == []
+        assert len(cache.prune(max_age_days=0)) == 2
+        assert cache.list_entries() == []
+
+        _put(cache, "c")
+        assert cache.clear() == 1
+
+
+def test_compute_audio_hash_streams_file():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "audio.bin"
+        path.write_bytes(b"x" * 3000)
+        assert compute_audio_hash(path, chunk_size=1024) == compute_audio_hash(path)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
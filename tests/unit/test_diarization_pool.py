@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for diarization pool scheduling and CPU planning
+"""
+
+import os
+import sys
+import time
+import signal
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core import metrics
+from core.agents.diarization_pool import DiarizationJob, DiarizationWorkerPool, FairJobQueue, plan_cpu_sets
+
+
+def _stub_worker(worker_id, cpus, threads, options, tasks, results):
+    # Stands in for the torch worker: "hang" jobs record the pid and never finish
+    results.send(("warm", None, True, 0.0))
+    while True:
+        job = tasks.recv()
+        if job is None:
+            break
+        if job.audio_path.endswith("hang.wav"):
+            Path(job.audio_path + ".pid").write_text(str(os.getpid()))
+            time.sleep(60)
+        if metrics.enabled():
+            metrics.observe("gm_diarization_realtime_factor", 0.1, cpu_mode="default")
+            results.send(("metrics", job.job_id, metrics.drain(), 0.0))
+        results.send(("done", job.job_id, SimpleNamespace(total_duration=1.0), 0.1))
+
+
+class StubPool(DiarizationWorkerPool):
+    worker_main = staticmethod(_stub_worker)
+
+
+def test_cpu_sets_are_disjoint_when_cores_suffice():
+    sets = plan_cpu_sets(4, 8, cpus=list(range(32)))
+    assert sets[0] == list(range(0, 8))
+    assert sets[3] == list(range(24, 32))
+    assert len({cpu for cpu_set in sets for cpu in cpu_set}) == 32
+
+
+def test_cpu_sets_default_to_even_split():
+    assert plan_cpu_sets(3, cpus=[0, 1, 2, 3, 4, 5, 6]) == [[0, 1], [2, 3], [4, 5]]
+
+
+def test_queue_round_robins_across_sessions():
+    queue = FairJobQueue()
+    for i in range(3):
+        queue.put(DiarizationJob(audio_path=f"a{i}.wav", session_id="a"))
+    queue.put(DiarizationJob(audio_path="b0.wav", session_id="b"))
+    queue.put(DiarizationJob(audio_path="c0.wav", session_id="c"))
+
+    order = [queue.get(timeout=0).audio_path for _ in range(5)]
+    assert order == ["a0.wav", "b0.wav", "c0.wav", "a1.wav", "a2.wav"]
+    assert queue.get(timeout=0) is None
+
+
+def test_close_returns_pending_jobs():
+    queue = FairJobQueue()
+    queue.put(DiarizationJob(audio_path="a.wav", session_id="a"))
+    assert [job.audio_path for job in queue.close()] == ["a.wav"]
+    assert queue.get() is None
+
+
+def test_dead_worker_fails_its_job_and_is_replaced():
+    pool = StubPool(num_workers=1, pin_cpus=False).start()
+    try:
+        assert pool.wait_until_warm(timeout=30)
+        with tempfile.TemporaryDirectory() as tmp:
+            pid_file = Path(tmp) / "hang.wav.pid"
+            hung = pool.submit(str(Path(tmp) / "hang.wav"))
+            deadline = time.time() + 30
+            while not pid_file.exists() and time.time() < deadline:
+                time.sleep(0.05)
+            os.kill(int(pid_file.read_text()), signal.SIGKILL)
+
+        try:
+            hung.result(timeout=30)
+            assert False
+        except RuntimeError as e:
+            assert "died" in str(e)
+
+        # The replacement worker serves the next job
+        assert pool.submit("ok.wav").result(timeout=30).total_duration == 1.0
+        stats = pool.stats()
+        assert stats.workers_restarted == 1
+        assert stats.jobs_failed == 1 and stats.jobs_completed == 1
+    finally:
+        pool.shutdown(wait=False)
+
+
+def test_shutdown_without_wait_settles_every_future():
+    pool = StubPool(num_workers=1, pin_cpus=False).start()
+    assert pool.wait_until_warm(timeout=30)
+    with tempfile.TemporaryDirectory() as tmp:
+        running = pool.submit(str(Path(tmp) / "hang.wav"))
+        queued = pool.submit("later.wav")
+        deadline = time.time() + 30
+        while not (Path(tmp) / "hang.wav.pid").exists() and time.time() < deadline:
+            time.sleep(0.05)
+        pool.shutdown(wait=False)
+
+    assert running.done() and queued.done()
+    assert queued.cancelled()
+    try:
+        running.result(timeout=0)
+        assert False
+    except RuntimeError:
+        pass
+
+
+def test_worker_metrics_are_merged_once_per_job():
+    metrics.enable(True)
+    metrics.reset()
+    # Spawned workers read METRICS_ENABLED like any other process
+    with mock.patch.dict(os.environ, {"METRICS_ENABLED": "1"}):
+        pool = StubPool(num_workers=1, pin_cpus=False).start()
+    try:
+        for name in ("a.wav", "b.wav"):
+            pool.submit(name).result(timeout=30)
+        rendered = metrics.render()
+        # Two jobs, two samples: each drain carries only what is new
+        assert 'gm_diarization_realtime_factor_count{cpu_mode="default"} 2' in rendered
+    finally:
+        pool.shutdown()
+        metrics.reset()
+        metrics.enable(False)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
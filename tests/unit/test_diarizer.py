@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for combined diarization and transcription (pipeline and ASR backend are stubbed)
+"""
+
+import sys
+import time
+import tempfile
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from tests.unit.test_cpu_inference import import_with_stubs
+
+STAGE_SECONDS = 0.3
+
+
+class StubAnnotation:
+    """Two speakers taking turns, in the pyannote itertracks() shape."""
+
+    def itertracks(self, yield_label=False):
+        for start, end, speaker in ((0.0, 4.0, "SPEAKER_00"), (4.0, 9.0, "SPEAKER_01")):
+            yield SimpleNamespace(start=start, end=end, duration=end - start), None, speaker
+
+
+def stub_pipeline(fail: bool = False):
+    def run(path):
+        time.sleep(STAGE_SECONDS)
+        if fail:
+            raise RuntimeError("pipeline crashed")
+        return StubAnnotation()
+    return run
+
+
+def stub_backend(diarizer_module, delay: float = STAGE_SECONDS):
+    class StubBackend(diarizer_module.ASRBackend):
+        name = "stub"
+
+        def __init__(self):
+            self.calls = []
+
+        def transcribe(self, audio_path):
+            self.calls.append(audio_path)
+            time.sleep(delay)
+            return diarizer_module.TranscriptionResult(text="Roll for initiative. I attack the goblin.", backend="stub")
+
+    return StubBackend()
+
+
+def make_diarizer(diarizer_module, backend, fail: bool = False):
+    diarizer = diarizer_module.SpeakerDiarizer(use_cache=False, asr_backend=backend)
+    diarizer.pipeline = stub_pipeline(fail)
+    return diarizer
+
+
+def write_audio(tmp: str) -> str:
+    path = Path(tmp) / "session.wav"
+    path.write_bytes(b"RIFF" + b"\0" * 64)
+    return str(path)
+
+
+def test_concurrent_run_overlaps_and_records_timings():
+    with mock.patch.dict(sys.modules), tempfile.TemporaryDirectory() as tmp:
+        module, _ = import_with_stubs("core.agents.diarizer")
+        backend = stub_backend(module)
+        diarizer = make_diarizer(module, backend)
+
+        result, transcript = diarizer.diarize_and_transcribe(write_audio(tmp))
+
+        assert transcript.startswith("Roll for initiative")
+        assert len(backend.calls) == 1
+        assert {segment.speaker_id for segment in result.segments} == {"SPEAKER_00", "SPEAKER_01"}
+        timings = diarizer.last_timings
+        assert timings.concurrent
+        assert timings.diarization_seconds >= STAGE_SECONDS
+        assert timings.transcription_seconds >= STAGE_SECONDS
+        # Both stages ran side by side, so the wall clock is about one stage, not two
+        assert timings.total_seconds < 2 * STAGE_SECONDS
+        assert timings.overlapped_seconds > STAGE_SECONDS / 2
+
+
+def test_sequential_run_does_not_overlap():
+    with mock.patch.dict(sys.modules), tempfile.TemporaryDirectory() as tmp:
+        module, _ = import_with_stubs("core.agents.diarizer")
+        diarizer = make_diarizer(module, stub_backend(module))
+
+        _, transcript = diarizer.diarize_and_transcribe(write_audio(tmp), concurrent=False)
+
+        assert transcript
+        timings = diarizer.last_timings
+        assert not timings.concurrent
+        assert timings.total_seconds >= 2 * STAGE_SECONDS
+        assert timings.overlapped_seconds < STAGE_SECONDS / 2
+
+
+def test_asr_errors_propagate_from_the_worker_thread():
+    with mock.patch.dict(sys.modules), tempfile.TemporaryDirectory() as tmp:
+        module, _ = import_with_stubs("core.agents.diarizer")
+        diarizer = make_diarizer(module, stub_backend(module))
+        diarizer.last_timings = None
+
+        with mock.patch.object(diarizer, "transcribe_audio", side_effect=RuntimeError("upload rejected")):
+            try:
+                diarizer.diarize_and_transcribe(write_audio(tmp))
+                raise AssertionError("expected RuntimeError")
+            except RuntimeError as e:
+                assert "upload rejected" in str(e)
+        # A failed run leaves no timings behind
+        assert diarizer.last_timings is None
+
+
+def test_diarization_failure_does_not_wait_for_the_upload():
+    with mock.patch.dict(sys.modules), tempfile.TemporaryDirectory() as tmp:
+        module, _ = import_with_stubs("core.agents.diarizer")
+        diarizer = make_diarizer(module, stub_backend(module, delay=5 * STAGE_SECONDS), fail=True)
+        audio = write_audio(tmp)
+
+        start = time.perf_counter()
+        with mock.patch.object(diarizer, "_convert_audio_format", return_value=Path(audio)):
+            try:
+                diarizer.diarize_and_transcribe(audio)
+                raise AssertionError("expected RuntimeError")
+            except RuntimeError as e:
+                assert "pipeline crashed" in str(e)
+        # Direct attempt plus the retry on "converted" audio, but not the slow upload
+        assert time.perf_counter() - start < 4 * STAGE_SECONDS
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the API background jobs: stores, warm executors and the manager
+"""
+
+import os
+import sys
+import time
+import uuid
+import asyncio
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from apps.api.jobs import (Job, JobCancelledError, JobManager, JobRunner, MemoryJobStore, QueueFullError,
+                           RedisJobStore, wait_for_job)
+
+WARMED = []
+PRELOADED = {}
+
+
+def warm_up():
+    WARMED.append(os.getpid())
+
+
+def echo_job(params, progress):
+    progress(0.5, "Halfway")
+    return {"echo": params["value"]}
+
+
+def sleep_job(params, progress):
+    progress(0.1, "Sleeping")
+    time.sleep(params.get("seconds", 30))
+    return "woke"
+
+
+def failing_job(params, progress):
+    raise ValueError("bad audio")
+
+
+def warm_job(params, progress):
+    return {"pid": os.getpid(), "warm_ups": len(WARMED)}
+
+
+def preloaded_job(params, progress):
+    return {"pid": os.getpid(), "preloaded": PRELOADED.get("by")}
+
+
+def crashing_job(params, progress):
+    os._exit(3)
+
+
+JOB_TYPES = {"echo": echo_job, "sleep": sleep_job, "fail": failing_job, "warm": warm_job, "crash": crashing_job,
+             "preloaded": preloaded_job}
+
+
+def make_manager(tmp, **kwargs) -> JobManager:
+    kwargs.setdefault("store", MemoryJobStore(retention_seconds=3600))
+    return JobManager(work_dir=tmp, job_types=JOB_TYPES, warm_up=warm_up, **kwargs).start()
+
+
+def wait_for(manager, job_id, states, timeout=30.0) -> Job:
+    deadline = time.time() + timeout
+    while True:
+        job = manager.get(job_id)
+        if job.status in states:
+            return job
+        assert time.time() < deadline, f"job stuck in {job.status}"
+        time.sleep(0.05)
+
+
+def job_stores():
+    """The in-memory store, plus Redis when the package is installed and a server answers."""
+    stores = [MemoryJobStore(retention_seconds=60)]
+    try:
+        store = RedisJobStore(retention_seconds=60, prefix=f"gm:test:{uuid.uuid4().hex[:8]}:")
+        store.client.ping()
+        stores.append(store)
+    except Exception:
+        pass  # no redis package or server here
+    return stores
+
+
+def test_store_state_transitions():
+    for store in job_stores():
+        first = Job(kind="echo", params={"value": 1, "filename": "a.wav"})
+        second = Job(kind="echo", params={"value": 2})
+        store.add(first, capacity=2)
+        store.add(second, capacity=2)
+        try:
+            store.add(Job(kind="echo", params={}), capacity=2)
+            raise AssertionError("expected QueueFullError")
+        except QueueFullError as e:
+            assert e.admitted == 2 and e.retry_after == 30
+
+        # FIFO claims; progress only while running
+        store.set_progress(first.id, 0.4, "ignored")
+        assert store.get(first.id).progress == 0.0
+        claimed = store.claim("runner-a")
+        assert claimed.id == first.id and claimed.status == "running" and claimed.started_at
+        store.set_progress(first.id, 0.4, "Diarizing")
+        assert store.get(first.id).message == "Diarizing"
+
+        # A queued job can be cancelled before anyone claims it
+        assert store.cancel(second.id).status == "cancelled"
+        assert store.claim("runner-a") is None
+
+        done = store.finish(first.id, "succeeded", result={"echo": 1}, message="Done")
+        assert done.result == {"echo": 1} and done.progress == 1.0 and done.params["filename"] == "a.wav"
+        # Final states stick: a late failure or cancel changes nothing
+        assert store.finish(first.id, "failed", error="late") is None
+        assert store.cancel(first.id).status == "succeeded"
+        assert store.admitted() == 0
+        assert [job.id for job in store.list()] == [first.id, second.id]
+
+
+def test_job_result_and_failure():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, max_concurrency=2)
+        try:
+            upload = manager.upload_path(".wav")
+            upload.write_bytes(b"x")
+            job = manager.submit("echo", {"value": 7, "filename": "a.wav"}, input_path=str(upload))
+            job = wait_for(manager, job.id, {"succeeded"})
+            assert job.result == {"echo": 7} and job.progress == 1.0
+            assert not upload.exists()
+
+            failed = wait_for(manager, manager.submit("fail", {}).id, {"failed"})
+            assert "ValueError: bad audio" in failed.error
+        finally:
+            manager.shutdown()
+
+
+def test_executors_stay_warm_between_jobs():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, max_concurrency=1)
+        try:
+            results = [wait_for(manager, manager.submit("warm", {}).id, {"succeeded"}).result for _ in range(3)]
+            # One executor ran every job and warmed up once
+            assert len({result["pid"] for result in results}) == 1
+            assert all(result["warm_ups"] == 1 for result in results)
+            assert results[0]["pid"] != os.getpid()
+
+            # An executor that dies fails its job and is replaced by a fresh one
+            crashed = wait_for(manager, manager.submit("crash", {}).id, {"failed"})
+            assert "exited with code 3" in crashed.error
+            after = wait_for(manager, manager.submit("warm", {}).id, {"succeeded"}).result
+            assert after["pid"] != results[0]["pid"] and after["warm_ups"] == 1
+        finally:
+            manager.shutdown()
+
+
+def test_forked_executors_share_what_the_parent_loaded():
+    PRELOADED["by"] = os.getpid()
+    try:
+        store = MemoryJobStore(retention_seconds=3600)
+        runner = JobRunner(store, num_workers=1, job_types=JOB_TYPES, start_method="fork").start()
+        try:
+            job = Job(kind="preloaded", params={})
+            store.add(job, capacity=1)
+            runner.wake()
+            deadline = time.time() + 30
+            while store.get(job.id).status != "succeeded":
+                assert time.time() < deadline, f"job stuck in {store.get(job.id).status}"
+                time.sleep(0.05)
+            result = store.get(job.id).result
+            assert result["pid"] != os.getpid() and result["preloaded"] == os.getpid()
+        finally:
+            runner.shutdown()
+    finally:
+        PRELOADED.clear()
+
+
+def test_admission_control_and_cancel():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, max_concurrency=1, max_queued=1)
+        try:
+            running = manager.submit("sleep", {})
+            queued = manager.submit("sleep", {})
+            try:
+                manager.submit("sleep", {})
+                raise AssertionError("expected QueueFullError")
+            except QueueFullError as e:
+                assert e.retry_after > 0
+
+            wait_for(manager, running.id, {"running"})
+            assert manager.get(queued.id).status == "queued"
+            assert manager.cancel(queued.id).status == "cancelled"
+            assert manager.cancel(running.id).status == "cancelled"
+
+            # The freed slots admit and run new work on a replacement executor
+            job = wait_for(manager, manager.submit("echo", {"value": 1}).id, {"succeeded"})
+            assert job.result == {"echo": 1}
+            assert manager.stats()["cancelled"] == 2
+        finally:
+            manager.shutdown()
+
+
+def test_waiting_on_a_cancelled_job_and_disconnecting():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = make_manager(tmp, max_concurrency=2)
+        try:
+            async def run():
+                assert await wait_for_job(manager, manager.submit("echo", {"value": 3}).id, 0.05) == {"echo": 3}
+
+                cancelled = manager.submit("sleep", {})
+                waiter = asyncio.ensure_future(wait_for_job(manager, cancelled.id, 0.05))
+                await asyncio.sleep(0.1)
+                manager.cancel(cancelled.id)
+                try:
+                    await waiter
+                    raise AssertionError("expected JobCancelledError")
+                except JobCancelledError as e:
+                    assert e.job_id == cancelled.id
+
+                # The client going away cancels the wait, not the job
+                running = manager.submit("sleep", {})
+                waiter = asyncio.ensure_future(wait_for_job(manager, running.id, 0.05))
+                await asyncio.sleep(0.1)
+                waiter.cancel()
+                try:
+                    await waiter
+                    raise AssertionError("expected CancelledError")
+                except asyncio.CancelledError:
+                    pass
+                assert manager.get(running.id).status in ("queued", "running")
+
+            asyncio.run(run())
+        finally:
+            manager.shutdown()
+
+
+def test_client_only_manager_leaves_jobs_to_the_runner():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = MemoryJobStore(retention_seconds=3600)
+        manager = make_manager(tmp, store=store, run_jobs=False)
+        job = manager.submit("echo", {"value": 1})
+        time.sleep(0.2)
+        assert manager.runner is None and manager.get(job.id).status == "queued"
+        # Shutting an API process down does not cancel shared jobs
+        manager.shutdown()
+        assert store.get(job.id).status == "queued"
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
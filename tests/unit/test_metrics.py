@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the metrics registry and its Prometheus rendering
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core import metrics
+
+
+def test_disabled_records_nothing():
+    metrics.enable(False)
+    metrics.reset()
+    with metrics.timer("gm_retrieval_seconds", mode="sync"):
+        pass
+    metrics.inc("gm_jobs_total", kind="diarize", status="succeeded")
+    assert metrics.render() == "\n"
+
+
+def test_histogram_and_counter_rendering():
+    metrics.enable(True)
+    metrics.reset()
+    try:
+        metrics.observe("gm_diarization_realtime_factor", 0.05, cpu_mode="default")
+        metrics.observe("gm_diarization_realtime_factor", 0.4, cpu_mode="default")
+        metrics.observe("gm_diarization_realtime_factor", 9.0, cpu_mode="default")
+        metrics.inc("gm_llm_tokens_total", 120, agent="gm_chat", model="gpt-5", kind="prompt")
+        text = metrics.render()
+    finally:
+        metrics.enable(False)
+
+    assert "# TYPE gm_diarization_realtime_factor histogram" in text
+    assert 'gm_diarization_realtime_factor_bucket{cpu_mode="default",le="0.05"} 1' in text
+    assert 'gm_diarization_realtime_factor_bucket{cpu_mode="default",le="0.5"} 2' in text
+    assert 'gm_diarization_realtime_factor_bucket{cpu_mode="default",le="+Inf"} 3' in text
+    assert 'gm_diarization_realtime_factor_count{cpu_mode="default"} 3' in text
+    assert 'gm_llm_tokens_total{agent="gm_chat",kind="prompt",model="gpt-5"} 120' in text
+
+
+def test_snapshot_merges_across_processes():
+    metrics.enable(True)
+    metrics.reset()
+    try:
+        metrics.observe("gm_ffmpeg_split_seconds", 12.0, engine="parallel")
+        metrics.inc("gm_notion_errors_total", operation="pages.create")
+        worker = metrics.snapshot()
+        metrics.merge(worker)
+        text = metrics.render()
+    finally:
+        metrics.enable(False)
+        metrics.reset()
+
+    assert 'gm_ffmpeg_split_seconds_count{engine="parallel"} 2' in text
+    assert 'gm_ffmpeg_split_seconds_sum{engine="parallel"} 24' in text
+    assert 'gm_notion_errors_total{operation="pages.create"} 2' in text
+
+
+def test_drain_returns_only_new_samples():
+    metrics.enable(True)
+    metrics.reset()
+    try:
+        metrics.inc("gm_diarization_audio_seconds_total", 30.0)
+        first = metrics.drain()
+        metrics.inc("gm_diarization_audio_seconds_total", 10.0)
+        second = metrics.drain()
+        assert metrics.snapshot() == {}
+        metrics.merge(first)
+        metrics.merge(second)
+        text = metrics.render()
+    finally:
+        metrics.enable(False)
+        metrics.reset()
+
+    assert "gm_diarization_audio_seconds_total 40" in text
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
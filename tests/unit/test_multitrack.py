@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for multitrack voice trimming, time remapping and track discovery
+"""
+
+import sys
+import tempfile
+import zipfile
+from pathlib import Path
+
+import numpy as np
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.asr_backends import ASRBackend, TranscriptionResult
+from core.agents.multitrack import MultitrackTranscriber, group_regions, speaker_from_filename
+from core.agents.vad import TimeRemap, voiced_regions
+
+
+class NullBackend(ASRBackend):
+    name = "null"
+
+    def transcribe(self, audio_path: str) -> TranscriptionResult:
+        return TranscriptionResult(text="")
+
+
+def test_voiced_regions_bridge_short_gaps_and_pad():
+    frame = 0.1
+    energy = np.full(100, 1e-4)
+    energy[10:20] = 0.1    # 1.0s - 2.0s
+    energy[22:30] = 0.1    # 0.2s gap: bridged
+    energy[60:61] = 0.1    # 0.1s blip: dropped
+    regions = voiced_regions(energy, frame, padding_seconds=0.2)
+    assert len(regions) == 1
+    assert np.allclose(regions[0], (0.8, 3.2))
+
+
+def test_remap_returns_source_times():
+    remap = TimeRemap.from_regions([(10.0, 12.0), (30.0, 35.0)])
+    assert remap.to_source(0.5) == 10.5
+    assert remap.to_source(2.0) == 30.0
+    assert remap.to_source(4.0) == 32.0
+
+
+def test_group_regions_respects_upload_limit():
+    groups = group_regions([(0.0, 40.0), (100.0, 130.0)], max_seconds=50.0)
+    assert groups == [[(0.0, 40.0), (100.0, 110.0)], [(110.0, 130.0)]]
+    assert group_regions([(0.0, 5.0)], None) == [[(0.0, 5.0)]]
+
+
+def test_discover_tracks_from_zip():
+    assert speaker_from_filename("1-alice") == "alice"
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        archive = tmp / "session.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("craig/2-bob.flac", b"x")
+            zf.writestr("craig/1-alice.flac", b"x")
+            zf.writestr("craig/info.txt", b"x")
+        extract = tmp / "out"
+        extract.mkdir()
+        tracks = MultitrackTranscriber(asr_backend=NullBackend()).discover_tracks(archive, extract)
+        assert [t.speaker for t in tracks] == ["alice", "bob"]
+        assert all(t.path.parent == extract for t in tracks)
+
+
+def test_duplicate_speaker_names_stay_apart():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        archive = tmp / "session.zip"
+        with zipfile.ZipFile(archive, "w") as zf:
+            zf.writestr("night1/1-alice.flac", b"first")
+            zf.writestr("night2/1-alice.flac", b"second")
+            zf.writestr("2-alice.flac", b"third")
+        extract = tmp / "out"
+        extract.mkdir()
+        tracks = MultitrackTranscriber(asr_backend=NullBackend()).discover_tracks(archive, extract)
+        assert [t.speaker for t in tracks] == ["alice", "alice (2)", "alice (3)"]
+        assert [t.index for t in tracks] == [0, 1, 2]
+        assert sorted(t.path.read_bytes() for t in tracks) == [b"first", b"second", b"third"]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the shared OpenAI client's rate limiting
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.integrations import openai_client
+from core.integrations.openai_client import OpenAIService, TokenBucket, estimate_chat_tokens
+
+
+class FakeCompletions:
+    """Stands in for ``client.chat.completions`` (sync or async)."""
+
+    def __init__(self, total_tokens: int, is_async: bool = False, failures: int = 0):
+        self.total_tokens = total_tokens
+        self.is_async = is_async
+        self.failures = failures
+        self.calls = 0
+
+    def _response(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("429 Too Many Requests")
+        return SimpleNamespace(usage=SimpleNamespace(prompt_tokens=5, completion_tokens=self.total_tokens - 5,
+                                                     total_tokens=self.total_tokens))
+
+    def create(self, **kwargs):
+        if self.is_async:
+            async def respond():
+                return self._response()
+            return respond()
+        return self._response()
+
+
+def fake_client(completions):
+    return SimpleNamespace(chat=SimpleNamespace(completions=completions))
+
+
+def test_token_bucket_queues_callers_in_debt():
+    bucket = TokenBucket(per_minute=60)          # one token per second
+    assert bucket.reserve(60) == 0.0
+    assert abs(bucket.reserve(2) - 2.0) < 0.05   # two seconds of refill needed
+    assert abs(bucket.reserve(1) - 3.0) < 0.05   # queued behind the previous reservation
+    bucket.refund(4)
+    assert bucket.reserve(1) < 0.05
+
+
+def test_estimate_counts_prompt_and_completion_cap():
+    kwargs = {"messages": [{"role": "user", "content": "x" * 400}], "max_completion_tokens": 1000}
+    assert estimate_chat_tokens(kwargs) == 1100
+
+
+def test_unused_reservation_is_refunded():
+    service = OpenAIService(api_key="sk-test", requests_per_minute=100, tokens_per_minute=5000)
+    service._client = fake_client(FakeCompletions(total_tokens=100))
+    messages = [{"role": "user", "content": "hello"}]
+    for _ in range(3):
+        service.chat(agent="test", model="gpt-test", messages=messages, max_completion_tokens=2000)
+
+    # Without refunds the third call would have waited for the 5000 token/min bucket
+    assert service._limits("gpt-test")[1].reserve(0) == 0.0
+    assert service._client.chat.completions.calls == 3
+
+
+def test_async_facade_shares_the_buckets():
+    service = OpenAIService(api_key="sk-test", requests_per_minute=2, tokens_per_minute=0, max_concurrency=1)
+    service._async_client = fake_client(FakeCompletions(total_tokens=10, is_async=True))
+
+    async def run():
+        return await asyncio.gather(*[
+            service.achat(agent="test", model="gpt-test", messages=[{"role": "user", "content": "hi"}])
+            for _ in range(2)
+        ])
+
+    assert len(asyncio.run(run())) == 2
+    # Both requests of the 2/min allowance are used: the next caller must wait
+    assert service._reserve("gpt-test", 0) > 0
+
+
+def test_failed_attempts_release_their_reservation():
+    messages = [{"role": "user", "content": "hello"}]
+    with mock.patch.object(openai_client, "retry_delay", return_value=0.0):
+        service = OpenAIService(api_key="sk-test", requests_per_minute=0, tokens_per_minute=5000)
+        service._client = fake_client(FakeCompletions(total_tokens=100, failures=3))
+        service.chat(agent="test", model="gpt-test", messages=messages, max_completion_tokens=2000)
+
+        service._async_client = fake_client(FakeCompletions(total_tokens=100, is_async=True, failures=3))
+        asyncio.run(service.achat(agent="test", model="gpt-test", messages=messages, max_completion_tokens=2000))
+
+    # Eight attempts of ~2000 tokens each, but only the two successes used anything
+    bucket = service._limits("gpt-test")[1]
+    assert service._client.chat.completions.calls == 4
+    assert bucket.reserve(0) == 0.0
+    assert bucket._tokens > 5000 - 2 * 100 - 50
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for pre-fork preloading and the readiness gate
+"""
+
+import os
+import sys
+import runpy
+from pathlib import Path
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from apps.api.preload import Readiness, memory_report, preload
+
+
+def test_readiness_waits_for_every_check():
+    readiness = Readiness("database", "models")
+    readiness.mark("database")
+    assert not readiness.ready
+
+    readiness.mark("models")
+    readiness.expect("diarization_pool")
+    assert not readiness.ready
+    readiness.mark("diarization_pool", detail="2/2 workers loaded the model")
+
+    state = readiness.snapshot()
+    assert state["ready"] is True
+    assert state["checks"]["diarization_pool"]["detail"] == "2/2 workers loaded the model"
+
+
+def test_preload_skips_missing_modules():
+    timings = preload(["json", "not_a_real_module_for_preload"], tiktoken_models=())
+    assert list(timings) == ["json"]
+
+
+def test_memory_report_on_linux():
+    report = memory_report()
+    if Path("/proc/self/smaps_rollup").exists():
+        assert report["rss_mb"] > 0 and "pss_mb" in report
+    else:
+        assert report == {}
+
+
+def load_gunicorn_conf(**env):
+    with mock.patch.dict(os.environ, env):
+        for name in ("JOB_BACKEND", "WEB_CONCURRENCY", "API_JOB_RUNNER"):
+            if name not in env:
+                os.environ.pop(name, None)
+        return runpy.run_path(str(project_root / "apps" / "api" / "gunicorn_conf.py"))
+
+
+def test_gunicorn_workers_need_the_shared_job_queue():
+    conf = load_gunicorn_conf()
+    assert conf["workers"] == 1 and not conf["run_job_runner"]
+    assert "post_fork" not in conf  # collection stays on; the heap is frozen instead
+
+    shared = load_gunicorn_conf(JOB_BACKEND="redis")
+    assert shared["workers"] == 2 and shared["run_job_runner"]
+    assert load_gunicorn_conf(JOB_BACKEND="redis", WEB_CONCURRENCY="4", API_JOB_RUNNER="0")["run_job_runner"] is False
+
+    try:
+        load_gunicorn_conf(WEB_CONCURRENCY="3")
+        raise AssertionError("expected RuntimeError")
+    except RuntimeError as e:
+        assert "JOB_BACKEND=redis" in str(e)
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for GET /sessions paging and the cached session count (statements are compiled, no database needed)
+"""
+
+import sys
+import asyncio
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from sqlalchemy.dialects import postgresql
+
+from apps.api import main
+
+
+class FakeSession:
+    """Records the statements it is given and answers with canned rows."""
+
+    def __init__(self, rows=(), count=0):
+        self.rows = list(rows)
+        self.count = count
+        self.statements = []
+
+    async def exec(self, statement):
+        self.statements.append(compiled(statement))
+        return SimpleNamespace(all=lambda: self.rows, one=lambda: self.count)
+
+
+def compiled(statement) -> str:
+    return " ".join(str(statement.compile(dialect=postgresql.dialect(),
+                                          compile_kwargs={"literal_binds": True})).split())
+
+
+def session_rows(*ids):
+    return [SimpleNamespace(id=i, campaign_id=1, date=None, has_notes=True, has_transcript=False) for i in ids]
+
+
+def list_page(sess, **params):
+    return asyncio.run(main.list_sessions(sess=sess, **{"campaign_id": None, "limit": 20, "after_id": None,
+                                                        "offset": 0, **params}))
+
+
+def test_keyset_page_selects_listed_columns_only():
+    with mock.patch.dict(main._session_counts, clear=True):
+        sess = FakeSession(rows=session_rows(11, 12), count=40)
+        page = list_page(sess, campaign_id=1, limit=2, after_id=10)
+
+        listing = sess.statements[0]
+        assert "session.campaign_id = 1" in listing and "session.id > 10" in listing
+        assert "ORDER BY session.id" in listing and "LIMIT 2" in listing and "OFFSET" not in listing
+        # Flags are computed in SQL; the text columns themselves are never selected
+        assert "session.summary_md IS NOT NULL AS has_notes" in listing
+        assert "session.summary_md," not in listing and "session.gm_notes_md," not in listing
+
+        assert [row["id"] for row in page["sessions"]] == [11, 12]
+        assert page["total"] == 40
+        # A full page points at the next one; a short page ends the listing
+        assert page["next_after_id"] == 12
+        assert list_page(FakeSession(rows=session_rows(13), count=40), limit=2, after_id=12)["next_after_id"] is None
+
+
+def test_offset_is_ignored_once_after_id_is_given():
+    with mock.patch.dict(main._session_counts, clear=True):
+        sess = FakeSession()
+        list_page(sess, offset=40)
+        assert "OFFSET 40" in sess.statements[0]
+
+        sess = FakeSession()
+        list_page(sess, offset=40, after_id=5)
+        assert "OFFSET" not in sess.statements[0] and "session.id > 5" in sess.statements[0]
+
+        sess = FakeSession()
+        list_page(sess, limit=1000)
+        assert "LIMIT 100" in sess.statements[0]
+
+
+def test_counts_are_cached_per_campaign_until_the_ttl():
+    now = [0.0]
+    with mock.patch.dict(main._session_counts, clear=True), \
+            mock.patch.object(main, "SESSION_COUNT_TTL", 60), \
+            mock.patch.object(main.time, "monotonic", lambda: now[0]):
+        sess = FakeSession(count=7)
+        assert asyncio.run(main._count_sessions(sess, 1)) == 7          # miss: counted at t=0
+        sess.count = 8
+        now[0] = 30.0
+        assert asyncio.run(main._count_sessions(sess, 1)) == 7          # cached
+        assert asyncio.run(main._count_sessions(sess, None)) == 8       # other key: counted
+        sess.count = 9
+        now[0] = 80.0
+        assert asyncio.run(main._count_sessions(sess, 1)) == 9          # expired: counted again
+        assert asyncio.run(main._count_sessions(sess, None)) == 8       # counted at t=30, still fresh
+
+        counts = [s for s in sess.statements if "count(*)" in s]
+        assert len(counts) == 3
+        assert "WHERE session.campaign_id = 1" in counts[0] and "WHERE" not in counts[1]
+
+        # Saving a session drops its campaign's entry and the all-campaigns one
+        main._session_counts[2] = (0.0, 5)
+        main._invalidate_session_counts(1)
+        assert list(main._session_counts) == [2]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
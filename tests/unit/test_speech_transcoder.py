@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for size-targeted speech transcoding
+"""
+
+import sys
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.speech_transcoder import SpeechTranscoder, format_bytes_saved
+
+
+def test_segment_duration_follows_bitrate():
+    transcoder = SpeechTranscoder("opus", bitrate_kbps=24, container_overhead=0.0)
+    # 23MB at 24kbps is a little over two hours
+    assert int(transcoder.max_segment_duration(23)) == 8039
+    assert transcoder.max_segment_duration(23) > 2 * 3600
+
+
+def test_overhead_shrinks_budget():
+    tight = SpeechTranscoder("aac", container_overhead=0.1)
+    loose = SpeechTranscoder("aac", container_overhead=0.0)
+    assert tight.max_segment_duration(23) < loose.max_segment_duration(23)
+
+
+def test_ffmpeg_args_encode_mono_16k():
+    args = SpeechTranscoder("opus").ffmpeg_args()
+    assert args[args.index('-ac') + 1] == '1'
+    assert args[args.index('-ar') + 1] == '16000'
+    assert args[args.index('-c:a') + 1] == 'libopus'
+    assert SpeechTranscoder("aac").suffix == ".m4a"
+
+
+def test_format_bytes_saved():
+    assert format_bytes_saved(100 * 1024 * 1024, 10 * 1024 * 1024) == "100.0MB -> 10.0MB (90% smaller)"
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
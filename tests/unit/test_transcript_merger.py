@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for transcript merging across overlapping segments
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.agents.audio_splitter import SegmentInfo, SegmentManifest
+from core.agents.transcript_merger import MinHasher, TranscriptMerger, iter_transcript_entries
+
+
+def write_segment(directory: Path, index: int, duration: float, entries) -> Path:
+    lines = [
+        "# Session Transcript", "",
+        f"**Source Audio:** session_segment_{index:03d}.m4a",
+        f"**Duration:** {duration:.1f} seconds ({duration / 60:.1f} minutes)", "",
+        "## Transcript", "",
+    ]
+    for start, end, speaker, text in entries:
+        lines.append(f"### {start // 60:02d}:{start % 60:02d} - {end // 60:02d}:{end % 60:02d}")
+        lines.append(f"**{speaker}:** {text}")
+        lines.append("")
+    lines += ["---", ""]
+    path = directory / f"session_segment_{index:03d}_transcript.md"
+    path.write_text("\n".join(lines), encoding="utf-8")
+    return path
+
+
+def merged_entries(path: Path):
+    merger = TranscriptMerger()
+    return merger._extract_transcript_entries(path.read_text(encoding="utf-8"))
+
+
+def test_minhash_estimates_similarity():
+    minhash = MinHasher()
+    a = minhash.shingles("the goblin king raises his rusty crown and laughs")
+    b = minhash.shingles("the goblin king raises his rusty crown and laughs")
+    c = minhash.shingles("we should roll initiative before the bridge collapses")
+    assert minhash.jaccard(minhash.signature(a), minhash.signature(b)) == 1.0
+    assert minhash.jaccard(minhash.signature(a), minhash.signature(c)) < 0.2
+
+
+def test_streaming_parser_multiline_and_section_end():
+    lines = [
+        "**Source Audio:** a.m4a\n", "### 00:01 - 00:02\n", "**Nope:** header entries are ignored\n",
+        "## Transcript\n", "\n",
+        "### 00:05 - 00:09\n", "**GM:** You see a door.\n", "It is locked.\n", "\n",
+        "### 125:00 - 125:04\n", "**Alice:** I pick it.\n", "\n",
+        "---\n", "## Raw Transcript\n", "### 01:00 - 01:01\n", "**GM:** not an entry\n",
+    ]
+    entries = list(iter_transcript_entries(lines))
+    assert [e['speaker'] for e in entries] == ["GM", "Alice"]
+    assert entries[0]['content'] == "You see a door.\nIt is locked."
+    assert entries[1]['start_seconds'] == 7500.0
+
+
+def test_overlap_duplicates_removed_with_manifest():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        shared = "the goblin king raises his rusty crown and laughs at the party"
+        files = [
+            write_segment(tmp, 1, 100.0, [
+                (0, 40, "Alice", "we enter the throne room and look around carefully"),
+                (80, 99, "Bob", shared),
+            ]),
+            # Starts at 70s: its first 30 seconds repeat the end of segment 1
+            write_segment(tmp, 2, 100.0, [
+                (10, 29, "Speaker_1", shared),
+                (40, 60, "Carol", "I draw my sword and charge straight at the king"),
+            ]),
+            write_segment(tmp, 3, 60.0, [
+                (5, 20, "Alice", "the crown shatters into pieces on the stone floor"),
+            ]),
+        ]
+        manifest = SegmentManifest(
+            source="session.m4a", source_sha256="x", source_duration=200.0,
+            engine="parallel", overlap_seconds=30.0,
+            segments=[SegmentInfo(1, "session_segment_001.m4a", 0.0, 100.0, 100.0, 0.0, 1, "a"),
+                      SegmentInfo(2, "session_segment_002.m4a", 70.0, 170.0, 100.0, 30.0, 1, "b"),
+                      SegmentInfo(3, "session_segment_003.m4a", 140.0, 200.0, 60.0, 30.0, 1, "c")],
+        )
+        manifest.save(tmp / "session_manifest.json")
+
+        output = tmp / "merged.md"
+        TranscriptMerger().merge_transcripts([str(f) for f in files], str(output))
+        entries = merged_entries(output)
+
+        assert [e['content'] for e in entries].count(shared) == 1
+        assert [e['start_seconds'] for e in entries] == [0, 80, 110, 145]
+        assert "**Total Duration:** 200.0 seconds" in output.read_text(encoding="utf-8")
+
+
+def test_offsets_without_manifest_chain_durations():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        files = [
+            write_segment(tmp, 1, 100.0, [(0, 10, "Alice", "first segment opening line")]),
+            write_segment(tmp, 2, 100.0, [(50, 60, "Bob", "second segment middle line")]),
+            write_segment(tmp, 3, 100.0, [(50, 60, "Carol", "third segment middle line")]),
+        ]
+        output = tmp / "merged.md"
+        TranscriptMerger(overlap_seconds=30.0).merge_transcripts([str(f) for f in files], str(output))
+        assert [e['start_seconds'] for e in merged_entries(output)] == [0, 120, 190]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for the columnar transcript store and its markdown round trip
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from core.data.transcript_store import (
+    TranscriptTable, load_table, load_transcript, pyarrow_available, save_table, store_path_for
+)
+
+
+def sample_table() -> TranscriptTable:
+    table = TranscriptTable(metadata={
+        'source_audio': 'session_segment_002.m4a',
+        'duration': 7260.5,
+        'speakers': {'SPEAKER_00': 'GM', 'SPEAKER_01': 'Alice'}
+    })
+    table.append(65.3204, 69.87, "GM", "You see a door.\nIt is locked.", confidence=0.9104, segment=2)
+    table.append(70.0, 71.5, "Alice", "", segment=2)
+    table.append(7201.25, 7259.999, "Alice", "I pick the lock.", confidence=0.5, segment=2)
+    return table
+
+
+def test_table_survives_markdown_round_trip():
+    table = sample_table()
+    assert TranscriptTable.from_markdown(table.to_markdown()) == table
+
+
+def test_markdown_survives_table_round_trip():
+    markdown = sample_table().to_markdown()
+    assert TranscriptTable.from_markdown(markdown).to_markdown() == markdown
+
+
+def test_legacy_markdown_without_exact_times():
+    markdown = "## Transcript\n\n### 01:05 - 01:09\n**GM:** You see a door.\n\n---\n"
+    table = TranscriptTable.from_markdown(markdown)
+    assert (table.start, table.end, table.confidence, table.segment) == ([65.0], [69.0], [None], [0])
+
+
+def test_filter_by_speaker_and_time():
+    table = sample_table()
+    assert table.filter(speakers=["Alice"]).text == ["", "I pick the lock."]
+    assert table.filter(start=100.0).start == [7201.25]
+    assert table.to_dialogue() == "GM: You see a door.\nIt is locked.\nAlice: I pick the lock."
+
+
+def test_load_transcript_prefers_fresh_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        transcript = Path(tmp) / "session_transcript.md"
+        transcript.write_text(sample_table().to_markdown(), encoding="utf-8")
+        assert load_transcript(transcript) == sample_table()
+        if not pyarrow_available():
+            return
+
+        save_table(sample_table(), store_path_for(transcript))
+        assert load_transcript(transcript) == sample_table()
+        assert load_table(store_path_for(transcript), speakers=["GM"]).speaker == ["GM"]
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")
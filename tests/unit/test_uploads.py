@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+
+"""
+Unit tests for upload spooling and resumable uploads
+"""
+
+import sys
+import asyncio
+import hashlib
+import tempfile
+from pathlib import Path
+
+# Add project root to Python path
+project_root = Path(__file__).parent.parent.parent
+sys.path.insert(0, str(project_root))
+
+from apps.api.uploads import (
+    UploadOffsetError, UploadStore, UploadTooLargeError, parse_upload_metadata, spool_upload
+)
+
+DATA = bytes(range(256)) * 40
+
+
+class FakeUpload:
+    """Async reader like FastAPI's UploadFile."""
+
+    def __init__(self, data: bytes):
+        self.data = data
+        self.position = 0
+
+    async def read(self, size: int) -> bytes:
+        chunk = self.data[self.position:self.position + size]
+        self.position += len(chunk)
+        return chunk
+
+
+async def stream(*chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+def test_spool_hashes_and_enforces_limit():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "upload.wav"
+        spooled = asyncio.run(spool_upload(FakeUpload(DATA), path, max_bytes=len(DATA), chunk_bytes=1000))
+        assert spooled.size == len(DATA)
+        assert spooled.sha256 == hashlib.sha256(DATA).hexdigest()
+        assert path.read_bytes() == DATA
+
+        try:
+            asyncio.run(spool_upload(FakeUpload(DATA), path, max_bytes=len(DATA) - 1, chunk_bytes=1000))
+        except UploadTooLargeError:
+            assert not path.exists()
+        else:
+            raise AssertionError("expected UploadTooLargeError")
+
+
+def test_resumable_upload_offsets_and_hash():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UploadStore(Path(tmp) / "uploads", max_bytes=10 * len(DATA)).start()
+        upload = store.create(len(DATA), "session.m4a")
+
+        upload = asyncio.run(store.append(upload.id, 0, stream(DATA[:3000])))
+        assert upload.offset == 3000 and not upload.complete
+        try:
+            asyncio.run(store.append(upload.id, 0, stream(DATA[:10])))
+        except UploadOffsetError as e:
+            assert e.expected == 3000
+        else:
+            raise AssertionError("expected UploadOffsetError")
+
+        # A restarted server has lost the running hash; it is recomputed on completion
+        restarted = UploadStore(store.directory, max_bytes=store.max_bytes).start()
+        upload = asyncio.run(restarted.append(upload.id, 3000, stream(DATA[3000:6000], DATA[6000:])))
+        assert upload.complete
+        assert upload.sha256 == hashlib.sha256(DATA).hexdigest()
+
+        path, claimed = restarted.claim(upload.id, Path(tmp) / "job_input.m4a")
+        assert path.read_bytes() == DATA and claimed.filename == "session.m4a"
+        assert restarted.get(upload.id) is None
+
+
+def test_parts_received_by_another_process_are_rehashed():
+    with tempfile.TemporaryDirectory() as tmp:
+        worker_a = UploadStore(tmp).start()
+        worker_b = UploadStore(tmp).start()   # a second API worker on the same directory
+        upload = worker_a.create(len(DATA), "session.m4a")
+
+        asyncio.run(worker_a.append(upload.id, 0, stream(DATA[:1000])))
+        upload = asyncio.run(worker_b.append(upload.id, 1000, stream(DATA[1000:2000])))
+        assert upload.hashed == 0
+        # Worker A's running hash stops at 1000 bytes, so it must not be used
+        upload = asyncio.run(worker_a.append(upload.id, 2000, stream(DATA[2000:])))
+        assert upload.sha256 == hashlib.sha256(DATA).hexdigest()
+
+
+def test_concurrent_writers_are_refused():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UploadStore(tmp).start()
+        other = UploadStore(tmp).start()
+        upload = store.create(len(DATA), "session.m4a")
+
+        async def run():
+            gate = asyncio.Event()
+
+            async def slow():
+                yield DATA[:100]
+                await gate.wait()
+                yield DATA[100:200]
+
+            first = asyncio.ensure_future(store.append(upload.id, 0, slow()))
+            await asyncio.sleep(0.01)
+            try:
+                await other.append(upload.id, 0, stream(DATA[:100]))
+                raise AssertionError("expected UploadOffsetError")
+            except UploadOffsetError:
+                pass
+            try:
+                other.claim(upload.id, Path(tmp) / "job_input.m4a")
+                raise AssertionError("expected ValueError")
+            except ValueError:
+                pass
+            gate.set()
+            return await first
+
+        assert asyncio.run(run()).offset == 200
+
+
+def test_upload_metadata_and_length_checks():
+    assert parse_upload_metadata("filename c2Vzc2lvbi5tNGE=,is_confidential") == {
+        "filename": "session.m4a", "is_confidential": ""
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UploadStore(tmp, max_bytes=100).start()
+        try:
+            store.create(101, "big.wav")
+        except UploadTooLargeError:
+            pass
+        else:
+            raise AssertionError("expected UploadTooLargeError")
+        upload = store.create(10, "short.wav")
+        try:
+            asyncio.run(store.append(upload.id, 0, stream(b"x" * 11)))
+        except UploadTooLargeError:
+            pass
+        else:
+            raise AssertionError("expected UploadTooLargeError")
+        assert store.get("../etc") is None
+
+
+if __name__ == "__main__":
+    for name, func in list(globals().items()):
+        if name.startswith("test_") and callable(func):
+            func()
+            print(f"✅ {name}")